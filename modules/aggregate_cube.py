@@ -0,0 +1,230 @@
+# modules/aggregate_cube.py
+"""
+Cube d'agrégation hiérarchique du portefeuille (onglet Répartition)
+- Type ➔ Secteur ➔ Catégorie ➔ Entreprise agrégés une seule fois par version des données
+- Un nœud par niveau (ids / parents), directement exploitable par un sunburst
+- Simulations appliquées comme deltas sur les nœuds concernés : le coût d'un ajout ou d'une
+  suppression dépend du nombre de simulations, pas de la taille du portefeuille
+"""
+
+import hashlib
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from modules.tab0_constants import SECTOR_COLORS
+
+LEVELS = ['Type', 'Secteur', 'Category', 'Entreprise']
+# Séparateur des identifiants de nœuds (chemin dans la hiérarchie)
+NODE_SEPARATOR = '|'
+# Couleur d'un nœud regroupant plusieurs secteurs
+MIXED_COLOR = '#D5D8DC'
+
+
+class AggregateCube:
+    """
+    Agrégats du portefeuille à tous les niveaux de la hiérarchie
+
+    Les nœuds sont stockés dans des tableaux alignés (id, parent, libellé, secteur, valeur) ;
+    un dictionnaire id → position permet de reporter un delta sur un chemin en O(profondeur).
+    Les simulations restent des deltas creux jusqu'au rendu (materialize).
+    """
+
+    def __init__(self, df: pd.DataFrame, value_col: str = 'Current_value_EUR'):
+        leaves = df.groupby(LEVELS, as_index=False)[value_col].sum()
+        leaves = leaves.rename(columns={value_col: 'Current value'})
+        self.total = float(leaves['Current value'].sum())
+
+        frames = []
+        for depth in range(1, len(LEVELS) + 1):
+            keys = LEVELS[:depth]
+            level = leaves.groupby(keys, as_index=False, sort=False).agg(
+                value=('Current value', 'sum'), sectors=('Secteur', 'nunique'), sector=('Secteur', 'first')
+            )
+            labels = level[keys].astype(str)
+            ids = labels[keys[0]].str.cat([labels[key] for key in keys[1:]], sep=NODE_SEPARATOR)
+            parents = ids.str.rpartition(NODE_SEPARATOR)[0] if depth > 1 else pd.Series('', index=level.index)
+            frames.append(pd.DataFrame({
+                'id': ids,
+                'parent': parents,
+                'label': labels[keys[-1]],
+                # Secteur commun à tout le sous-arbre (vide si plusieurs secteurs)
+                'Secteur': level['sector'].where(level['sectors'] == 1, ''),
+                'Current value': level['value']
+            }))
+        nodes = pd.concat(frames, ignore_index=True)
+
+        self.ids: List[str] = nodes['id'].tolist()
+        self.parents: List[str] = nodes['parent'].tolist()
+        self.labels: List[str] = nodes['label'].tolist()
+        self.sectors: List[str] = nodes['Secteur'].astype(str).tolist()
+        self.values = nodes['Current value'].to_numpy(dtype=float)
+        self.index: Dict[str, int] = {node_id: i for i, node_id in enumerate(self.ids)}
+        self.sector_totals = leaves.groupby('Secteur')['Current value'].sum()
+        self.figures: Dict = {}
+
+    def apply(self, simulations: Optional[List[Dict]] = None) -> Dict:
+        """
+        Appliquer des simulations (deltas) sur le cube, sans toucher aux agrégats de base
+
+        Seuls les nœuds touchés sont enregistrés (position → delta, nœuds ajoutés) : le coût
+        dépend du nombre de simulations ; les tableaux complets ne sont reconstruits qu'au rendu.
+
+        Args:
+            simulations: dicts {Type, Secteur, Category, Entreprise, Current value}
+
+        Returns:
+            dict: cube, deltas, nœuds racine multi-secteurs, nœuds ajoutés, sources, total et totaux par secteur
+        """
+        simulations = simulations or []
+        deltas: Dict[int, float] = {}
+        mixed = set()
+        added: Dict[str, List] = {'ids': [], 'parents': [], 'labels': [], 'sectors': [], 'values': []}
+        added_index: Dict[str, int] = {}
+        sources = []
+        sector_delta: Dict[str, float] = {}
+
+        for simulation in simulations:
+            amount = float(simulation['Current value'])
+            path = [str(simulation[level]) for level in LEVELS]
+            sector_delta[path[1]] = sector_delta.get(path[1], 0.0) + amount
+            node_id = ''
+            for depth, label in enumerate(path):
+                parent_id, node_id = node_id, (node_id + NODE_SEPARATOR + label if depth else label)
+                position = self.index.get(node_id)
+                if position is not None:
+                    deltas[position] = deltas.get(position, 0.0) + amount
+                    if depth == 0 and self.sectors[position] != path[1]:
+                        mixed.add(position)
+                    continue
+
+                # Nouveau nœud (catégorie ou entreprise absente du portefeuille)
+                slot = added_index.get(node_id)
+                if slot is None:
+                    slot = added_index[node_id] = len(added['ids'])
+                    added['ids'].append(node_id)
+                    added['parents'].append(parent_id)
+                    added['labels'].append(label)
+                    added['sectors'].append(path[1])
+                    added['values'].append(0.0)
+                elif depth == 0 and added['sectors'][slot] != path[1]:
+                    added['sectors'][slot] = ''
+                added['values'][slot] += amount
+            sources.append(node_id)
+
+        total = self.total + sum(sector_delta.values())
+        sector_totals = self.sector_totals.add(pd.Series(sector_delta, dtype=float), fill_value=0.0)
+        return {
+            'cube': self, 'deltas': deltas, 'mixed': mixed, 'added': added,
+            'sources': set(sources), 'total': total, 'sector_totals': sector_totals
+        }
+
+    def materialize(self, snapshot: Dict) -> Dict:
+        """
+        Nœuds complets (ids, parents, labels, sectors, values) d'un résultat de apply()
+
+        Returns:
+            dict: tableaux alignés des nœuds de base (deltas reportés) suivis des nœuds ajoutés
+        """
+        added = snapshot['added']
+        values = self.values.copy()
+        if snapshot['deltas']:
+            positions = np.fromiter(snapshot['deltas'].keys(), dtype=int)
+            values[positions] += np.fromiter(snapshot['deltas'].values(), dtype=float)
+        sectors = list(self.sectors)
+        for position in snapshot['mixed']:
+            sectors[position] = ''
+        return {
+            'ids': self.ids + added['ids'],
+            'parents': self.parents + added['parents'],
+            'labels': self.labels + added['labels'],
+            'sectors': sectors + added['sectors'],
+            'values': np.concatenate([values, np.asarray(added['values'], dtype=float)])
+        }
+
+
+# === CACHE ===
+
+def cube_signature(df: pd.DataFrame, value_col: str = 'Current_value_EUR') -> str:
+    """Empreinte des colonnes utilisées par le cube"""
+    columns = [col for col in LEVELS + [value_col] if col in df.columns]
+    return hashlib.sha1(
+        pd.util.hash_pandas_object(df[columns], index=False).to_numpy().tobytes() + repr(columns).encode()
+    ).hexdigest()
+
+
+def get_aggregate_cube(df: pd.DataFrame, value_col: str = 'Current_value_EUR') -> AggregateCube:
+    """Cube mis en cache en session, reconstruit uniquement quand les données changent"""
+    signature = cube_signature(df, value_col)
+    cached = st.session_state.get('aggregate_cube')
+    if cached and cached['signature'] == signature:
+        return cached['cube']
+
+    cube = AggregateCube(df, value_col)
+    st.session_state.aggregate_cube = {'signature': signature, 'cube': cube}
+    return cube
+
+
+# === RENDUS ===
+
+def sunburst_figure(snapshot: Dict, height: int, title: str = "", show_source: bool = False) -> go.Figure:
+    """
+    Sunburst construit directement depuis les nœuds du cube (branchvalues='total')
+
+    Les deltas du résultat de apply() sont matérialisés ici, une fois par figure.
+    """
+    nodes = snapshot['cube'].materialize(snapshot)
+    values = nodes['values']
+    total = snapshot['total'] or 1.0
+    colors = [SECTOR_COLORS.get(sector, MIXED_COLOR) if sector else MIXED_COLOR for sector in nodes['sectors']]
+    customdata = np.column_stack([values, np.round(values / total * 100, 2)])
+    hovertemplate = "<b>%{label}</b><br>%{customdata[0]:,.0f} €<br>%{customdata[1]}%"
+
+    if show_source:
+        sources = np.where(np.isin(nodes['ids'], list(snapshot['sources'])), "Simulation", "Portefeuille")
+        customdata = np.column_stack([customdata.astype(object), sources])
+        hovertemplate += "<br><i>%{customdata[2]}</i>"
+
+    fig = go.Figure(go.Sunburst(
+        ids=nodes['ids'],
+        labels=nodes['labels'],
+        parents=nodes['parents'],
+        values=values,
+        branchvalues='total',
+        marker=dict(colors=colors),
+        customdata=customdata,
+        insidetextorientation='radial',
+        textinfo="label+percent entry",
+        hovertemplate=hovertemplate + "<extra></extra>"
+    ))
+    fig.update_layout(title=title, height=height, margin=dict(t=50 if title else 10, l=0, r=0, b=0))
+    return fig
+
+
+def cached_sunburst(cube: AggregateCube, height: int, title: str = "") -> go.Figure:
+    """Sunburst du portefeuille réel, construit une fois par version du cube"""
+    key = (height, title)
+    if key not in cube.figures:
+        cube.figures[key] = sunburst_figure(cube.apply(), height, title)
+    return cube.figures[key]
+
+
+def sector_comparison(before: pd.Series, before_total: float, after: pd.Series, after_total: float) -> pd.DataFrame:
+    """Tableau AVANT / APRÈS par secteur à partir des totaux du cube"""
+    sectors = before.index.union(after.index)
+    before = before.reindex(sectors, fill_value=0.0)
+    after = after.reindex(sectors, fill_value=0.0)
+    before_pct = (before / before_total * 100).round(2) if before_total else before * 0
+    after_pct = (after / after_total * 100).round(2) if after_total else after * 0
+    return pd.DataFrame({
+        "Secteur": sectors,
+        "Avant - Montant (€)": before.round(2).to_numpy(),
+        "Avant - % ": before_pct.to_numpy(),
+        "Après - Montant (€)": after.round(2).to_numpy(),
+        "Après - %": after_pct.to_numpy(),
+        "Différence (€)": (after - before).round(2).to_numpy(),
+        "Différence (%)": (after_pct - before_pct).to_numpy()
+    })
@@ -0,0 +1,208 @@
+# modules/allocation_planner.py
+"""
+Planificateur d'apport (onglet Répartition)
+- Agrégation EUR vectorisée du portefeuille (une seule passe sur df_data)
+- Répartition d'un apport, achats uniquement, qui minimise l'écart aux objectifs de Feuil2
+- Par catégorie (Type ➔ Secteur ➔ Catégorie, y compris non détenues) ou par ligne détenue
+- Résultat transmis directement au simulateur d'investissement
+"""
+
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linprog
+
+from modules.rebalancing_engine import COMPANY_CAP, parse_limit_rules, rule_matrices
+from modules.tab0_constants import CATEGORY_LIST, SECTEUR_PAR_TYPE
+
+BUCKET_COLUMNS = {
+    'category': ['Type', 'Secteur', 'Category'],
+    'ticker': ['Type', 'Secteur', 'Category', 'Entreprise', 'Ticker']
+}
+# Montant (€) en dessous duquel une ligne d'allocation est ignorée
+MIN_ALLOCATION_EUR = 1.0
+
+
+# === AGRÉGATION EUR ===
+
+def eur_values(df: pd.DataFrame, eurusd_rate: float, value_col: str = 'Current value') -> pd.Series:
+    """
+    Valeurs converties en EUR (même convention que les onglets Répartition / Déséquilibres)
+
+    Args:
+        df: lignes du portefeuille
+        eurusd_rate: taux du gestionnaire de cache
+        value_col: colonne à convertir
+
+    Returns:
+        Series: valeurs EUR alignées sur df
+    """
+    values = pd.to_numeric(df[value_col], errors='coerce')
+    units = df['Units'].fillna('EUR').astype(str).str.strip().str.upper() if 'Units' in df.columns \
+        else pd.Series('EUR', index=df.index)
+    return values.where(units != 'USD', values * eurusd_rate)
+
+
+def aggregate_positions(df: pd.DataFrame, eurusd_rate: float) -> pd.DataFrame:
+    """
+    Positions EUR par Type / Secteur / Catégorie / Entreprise / Ticker (un seul groupby)
+
+    Returns:
+        DataFrame: colonnes de regroupement + 'Valeur'
+    """
+    keys = BUCKET_COLUMNS['ticker']
+    positions = df.reindex(columns=keys).fillna('').astype(str)
+    positions['Valeur'] = eur_values(df, eurusd_rate).fillna(0).clip(lower=0)
+    return positions.groupby(keys, as_index=False, sort=False)['Valeur'].sum()
+
+
+def category_buckets(positions: pd.DataFrame) -> pd.DataFrame:
+    """Toutes les catégories possibles (détenues ou non) avec leur valeur actuelle"""
+    leaves = pd.DataFrame(
+        [(type_, secteur, category)
+         for type_, secteurs in SECTEUR_PAR_TYPE.items()
+         for secteur in secteurs
+         for category in CATEGORY_LIST.get(secteur, [])],
+        columns=BUCKET_COLUMNS['category']
+    )
+    held = positions.groupby(BUCKET_COLUMNS['category'], as_index=False)['Valeur'].sum()
+    buckets = leaves.merge(held, on=BUCKET_COLUMNS['category'], how='outer')
+    buckets['Valeur'] = buckets['Valeur'].fillna(0.0)
+    return buckets
+
+
+def ticker_buckets(positions: pd.DataFrame) -> pd.DataFrame:
+    """Lignes détenues (une par ticker)"""
+    held = positions[positions['Ticker'] != '']
+    return held.groupby('Ticker', as_index=False, sort=False).agg(
+        Type=('Type', 'first'), Secteur=('Secteur', 'first'), Category=('Category', 'first'),
+        Entreprise=('Entreprise', 'first'), Valeur=('Valeur', 'sum')
+    )[BUCKET_COLUMNS['ticker'] + ['Valeur']]
+
+
+# === OPTIMISATION ===
+
+def plan_allocation(positions: pd.DataFrame, limits: pd.DataFrame, cash_eur: float,
+                    by: str = 'category', company_cap: float = COMPANY_CAP) -> Dict:
+    """
+    Répartir un apport (achats uniquement) pour se rapprocher au mieux des objectifs
+
+    Pour chaque règle de Feuil2 : écart € = (membre - objectif × base) × (valeur + achat).
+    Objectif : min Σ |écart| (plafonds ETF : dépassement seulement), sous Σ achat = apport.
+    En mode ticker, une entreprise Actions n'est pas renforcée au-delà du plafond de 10 %.
+
+    Args:
+        positions: résultat de aggregate_positions
+        limits: Feuil2
+        cash_eur: apport en EUR
+        by: 'category' ou 'ticker'
+        company_cap: part maximale d'une entreprise Actions (fraction)
+
+    Returns:
+        dict: 'allocation' (DataFrame), 'rules' (écarts avant / après), 'status', 'elapsed_ms'
+    """
+    start = time.perf_counter()
+    buckets = category_buckets(positions) if by == 'category' else ticker_buckets(positions)
+    rules = parse_limit_rules(limits, tolerance=0.0)
+    values = buckets['Valeur'].to_numpy(dtype=float)
+    k, r = len(buckets), len(rules)
+
+    if k == 0 or cash_eur <= 0:
+        return {'allocation': pd.DataFrame(), 'rules': pd.DataFrame(), 'status': 'empty',
+                'elapsed_ms': (time.perf_counter() - start) * 1000}
+
+    if r == 0:
+        # Aucune limite : apport réparti au prorata des lignes existantes
+        weights = values / values.sum() if values.sum() > 0 else np.full(k, 1.0 / k)
+        buys = weights * cash_eur
+        members = bases = np.zeros((0, k))
+        targets, is_cap = np.zeros((0, 1)), np.zeros(0, dtype=bool)
+    else:
+        members, bases = (m.toarray() for m in rule_matrices(buckets, rules))
+        targets = np.array([rule['target'] / 100 for rule in rules]).reshape(r, 1)
+        gaps = members - targets * bases                      # r × k
+
+        # Variables : achats (k), dépassements p (r), manques q (r) ; gaps·(v + b) = p - q
+        is_cap = np.array([rule['kind'] == 'cap' for rule in rules], dtype=bool)
+        cost = np.concatenate([np.zeros(k), np.ones(r), np.where(is_cap, 0.0, 1.0)])
+        a_eq = np.vstack([
+            np.hstack([gaps, -np.eye(r), np.eye(r)]),
+            np.concatenate([np.ones(k), np.zeros(2 * r)])
+        ])
+        b_eq = np.concatenate([-gaps @ values, [cash_eur]])
+
+        buy_max = np.full(k, np.inf)
+        if by == 'ticker':
+            is_capped = buckets['Type'].to_numpy() == 'Actions'
+            headroom = np.where(is_capped, np.maximum(company_cap * (values.sum() + cash_eur) - values, 0.0), np.inf)
+            if headroom.sum() >= cash_eur:
+                buy_max = headroom
+
+        bounds = list(zip(np.zeros(k + 2 * r), np.concatenate([buy_max, np.full(2 * r, np.inf)])))
+        result = linprog(cost, A_eq=a_eq, b_eq=b_eq, bounds=bounds, method='highs')
+        if result.status != 0:
+            return {'allocation': pd.DataFrame(), 'rules': pd.DataFrame(), 'status': result.message,
+                    'elapsed_ms': (time.perf_counter() - start) * 1000}
+        buys = result.x[:k]
+
+    buys = np.where(buys >= MIN_ALLOCATION_EUR, buys, 0.0)
+    # Reliquat des arrondis : ajouté à la plus grosse ligne d'achat
+    if buys.any():
+        buys[buys.argmax()] += cash_eur - buys.sum()
+    after = values + buys
+
+    allocation = buckets.copy()
+    allocation['Montant (€)'] = buys
+    allocation['Valeur après'] = after
+    allocation['% avant'] = values / max(values.sum(), 1e-9) * 100
+    allocation['% après'] = after / after.sum() * 100
+    allocation = allocation[buys > 0].sort_values('Montant (€)', ascending=False).reset_index(drop=True)
+
+    # Écarts par règle (part du groupe dans sa base, avant / après)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        share_before = (members @ values) / (bases @ values) * 100
+        share_after = (members @ after) / (bases @ after) * 100
+    rule_table = pd.DataFrame({
+        'Limite': [rule['scope'] for rule in rules],
+        'Groupe': [rule['label'] for rule in rules],
+        'Objectif (%)': targets.ravel() * 100,
+        'Avant (%)': share_before,
+        'Après (%)': share_after
+    })
+    rule_table['Écart avant'] = rule_table['Avant (%)'] - rule_table['Objectif (%)']
+    rule_table['Écart après'] = rule_table['Après (%)'] - rule_table['Objectif (%)']
+    # Plafonds : seul le dépassement compte
+    rule_table.loc[is_cap, ['Écart avant', 'Écart après']] = rule_table.loc[is_cap, ['Écart avant', 'Écart après']].clip(lower=0)
+
+    return {
+        'allocation': allocation,
+        'rules': rule_table,
+        'status': 'optimal',
+        'elapsed_ms': (time.perf_counter() - start) * 1000
+    }
+
+
+def allocation_to_simulations(allocation: pd.DataFrame, currency: str, cash_original: float,
+                              cash_eur: float) -> Dict[str, Dict]:
+    """
+    Convertir une allocation en entrées du simulateur (st.session_state.sim_inputs)
+
+    Les montants en devise d'origine sont répartis au prorata des montants EUR.
+    """
+    ratio = cash_original / cash_eur if cash_eur else 1.0
+    simulations = {}
+    for row in allocation.to_dict('records'):
+        entreprise: Optional[str] = row.get('Entreprise')
+        key = "_".join([row['Type'], row['Secteur'], row['Category'], entreprise or '', currency, 'plan'])
+        simulations[key] = {
+            "Type": row['Type'],
+            "Secteur": row['Secteur'],
+            "Category": row['Category'],
+            "Entreprise": entreprise,
+            "devise": currency,
+            "montant_original": row['Montant (€)'] * ratio,
+            "montant_eur": row['Montant (€)']
+        }
+    return simulations
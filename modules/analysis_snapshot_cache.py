@@ -0,0 +1,237 @@
+# modules/analysis_snapshot_cache.py
+"""
+Cache des instantanés d'analyse société (onglet Analyse)
+- Un instantané par ticker : info, historique max, comptes annuels, actualités
+- TTL adapté à chaque champ (actualités 30 min, comptes annuels 7 jours...)
+- Mémoire du processus + persistance SQLite partagée (.cache/)
+- Historique de prix complété de façon incrémentale (rechargement complet si ajusté)
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+import yfinance as yf
+
+from modules.yfinance_cache_manager import get_yahoo_rate_limiter
+
+ANALYSIS_CACHE_PATH = os.path.join(".cache", "analysis_snapshots.sqlite")
+
+# Durée de validité de chaque champ
+SNAPSHOT_TTL = {
+    'info': timedelta(hours=6),
+    'history': timedelta(hours=12),
+    'financials': timedelta(days=7),
+    'news': timedelta(minutes=30)
+}
+SNAPSHOT_FIELDS = tuple(SNAPSHOT_TTL)
+
+# Délai avant de retenter un champ dont la récupération a échoué ou est revenue vide
+FAILURE_RETRY_DELAY = timedelta(minutes=5)
+
+# Écart toléré sur le recouvrement avant de considérer l'historique ajusté (split, dividende)
+HISTORY_ADJUSTMENT_TOLERANCE = 0.005
+
+
+def _naive(df: pd.DataFrame) -> pd.DataFrame:
+    """Supprimer le fuseau horaire de l'index"""
+    if not df.empty and getattr(df.index, 'tz', None) is not None:
+        df.index = df.index.tz_localize(None)
+    return df
+
+
+def _is_empty(value) -> bool:
+    """Réponse vide (info {}, DataFrame vide, aucune actualité)"""
+    if value is None:
+        return True
+    if isinstance(value, pd.DataFrame):
+        return value.empty
+    return len(value) == 0 if isinstance(value, (dict, list)) else False
+
+
+def fetch_snapshot_field(ticker: str, field: str, previous=None):
+    """
+    Télécharger un champ de l'instantané (réseau uniquement, utilisable en thread)
+
+    Args:
+        ticker: symbole Yahoo
+        field: info, history, financials ou news
+        previous: valeur en cache (historique : base du complément incrémental)
+
+    Returns:
+        Valeur du champ (dict, DataFrame ou liste)
+    """
+    get_yahoo_rate_limiter().acquire()
+    stock = yf.Ticker(ticker)
+
+    if field == 'info':
+        return stock.info or {}
+    if field == 'financials':
+        return stock.financials
+    if field == 'news':
+        return stock.news or []
+
+    # Historique : complément depuis la dernière barre connue
+    if previous is None or previous.empty:
+        return _naive(stock.history(period="max"))
+
+    recent = _naive(stock.history(start=previous.index[-1].strftime('%Y-%m-%d')))
+    if recent.empty:
+        return previous
+
+    overlap = previous.index[-1]
+    if overlap in recent.index:
+        old_close, new_close = previous.loc[overlap, 'Close'], recent.loc[overlap, 'Close']
+        if old_close and abs(new_close - old_close) / old_close > HISTORY_ADJUSTMENT_TOLERANCE:
+            # Cours ajustés depuis le dernier passage : rechargement complet
+            get_yahoo_rate_limiter().acquire()
+            return _naive(stock.history(period="max"))
+
+    combined = pd.concat([previous[previous.index < recent.index[0]], recent])
+    return combined[~combined.index.duplicated(keep='last')]
+
+
+class AnalysisSnapshotCache:
+    """
+    Instantanés d'analyse par ticker et par champ
+
+    Lecture : mémoire du processus, puis SQLite, puis réseau si le TTL a expiré.
+    Une valeur expirée reste servie si le rafraîchissement échoue ; une réponse vide
+    n'est pas mémorisée et un échec n'est retenté qu'après FAILURE_RETRY_DELAY.
+    """
+
+    def __init__(self, path: str = ANALYSIS_CACHE_PATH, ttl: Optional[Dict[str, timedelta]] = None):
+        self.path = path
+        self.ttl = {**SNAPSHOT_TTL, **(ttl or {})}
+        self._lock = threading.Lock()
+        self._memory: Dict[Tuple[str, str], Tuple[object, datetime]] = {}
+        self._failures: Dict[Tuple[str, str], datetime] = {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    ticker TEXT NOT NULL,
+                    field TEXT NOT NULL,
+                    payload BLOB NOT NULL,
+                    fetched_at TEXT NOT NULL,
+                    PRIMARY KEY (ticker, field)
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # === LECTURE ===
+
+    def peek(self, ticker: str, field: str) -> Tuple[Optional[object], Optional[datetime]]:
+        """
+        Valeur en cache sans appel réseau
+
+        Returns:
+            tuple: (valeur ou None, date de récupération ou None)
+        """
+        key = (ticker.upper(), field)
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload, fetched_at FROM snapshots WHERE ticker = ? AND field = ?",
+                               key).fetchone()
+        if row is None:
+            return None, None
+
+        entry = (pickle.loads(row[0]), datetime.fromisoformat(row[1]))
+        with self._lock:
+            self._memory[key] = entry
+        return entry
+
+    def is_fresh(self, fetched_at: Optional[datetime], field: str) -> bool:
+        return fetched_at is not None and datetime.now() - fetched_at < self.ttl[field]
+
+    def get(self, ticker: str, field: str, force_refresh: bool = False):
+        """
+        Champ d'un instantané, rafraîchi si son TTL a expiré
+
+        Args:
+            ticker: symbole
+            field: info, history, financials ou news
+            force_refresh: ignorer le TTL
+
+        Returns:
+            Valeur du champ (None si jamais récupérée et réseau indisponible)
+        """
+        key = (ticker.upper(), field)
+        value, fetched_at = self.peek(ticker, field)
+        if not force_refresh and self.is_fresh(fetched_at, field):
+            return value
+
+        with self._lock:
+            failed_at = self._failures.get(key)
+        if not force_refresh and failed_at is not None and datetime.now() - failed_at < FAILURE_RETRY_DELAY:
+            return value
+
+        try:
+            new_value = fetch_snapshot_field(ticker.upper(), field, value if field == 'history' else None)
+        except Exception:
+            new_value = None
+
+        if _is_empty(new_value):
+            # Réseau indisponible, quota ou réponse vide : valeur périmée plutôt que rien, sans la figer pour tout le TTL
+            with self._lock:
+                self._failures[key] = datetime.now()
+            return value
+
+        with self._lock:
+            self._failures.pop(key, None)
+        self.store(ticker, field, new_value)
+        return new_value
+
+    def get_snapshot(self, ticker: str, fields: Iterable[str] = SNAPSHOT_FIELDS,
+                     force_refresh: bool = False) -> Dict:
+        """
+        Instantané complet d'un ticker
+
+        Returns:
+            dict: {champ: valeur}
+        """
+        return {field: self.get(ticker, field, force_refresh) for field in fields}
+
+    # === ÉCRITURE ===
+
+    def store(self, ticker: str, field: str, value, fetched_at: Optional[datetime] = None):
+        """Mémoriser un champ (mémoire + disque)"""
+        key = (ticker.upper(), field)
+        fetched_at = fetched_at or datetime.now()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._memory[key] = (value, fetched_at)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO snapshots (ticker, field, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                    (*key, payload, fetched_at.isoformat())
+                )
+
+    def invalidate(self, ticker: str):
+        """Forcer le rafraîchissement de tous les champs d'un ticker"""
+        ticker = ticker.upper()
+        with self._lock:
+            for field in SNAPSHOT_FIELDS:
+                self._memory.pop((ticker, field), None)
+                self._failures.pop((ticker, field), None)
+            with self._connect() as conn:
+                conn.execute("DELETE FROM snapshots WHERE ticker = ?", (ticker,))
+
+
+@st.cache_resource
+def get_analysis_cache():
+    """Singleton du cache d'instantanés d'analyse (partagé entre sessions)"""
+    return AnalysisSnapshotCache()
@@ -0,0 +1,233 @@
+# modules/calendar_feed.py
+"""
+Flux d'événements du calendrier financier (onglet Calendrier)
+- Table des événements construite par opérations vectorisées (pas d'iterrows)
+- Mise en cache en session par version des données sources
+- Requêtes par plage de dates (recherche binaire sur la colonne triée)
+- Composant calendrier statique : seuls les événements du mois affiché sont envoyés
+"""
+
+import hashlib
+import os
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import streamlit.components.v1 as components
+
+from modules.cost_basis_engine import BUY, FEE, SELL, SPLIT, normalize_ledger
+
+EVENT_COLUMNS = ['Date', 'title', 'category', 'color']
+
+CATEGORY_COLORS = {
+    'Personnel': '#8B5CF6',       # Violet
+    'Investissement': '#10B981',  # Vert
+    'Dividende': '#F59E0B',       # Orange
+    'Dividende estimé': '#FCD34D',
+    'FED': '#EF4444',
+    'BCE': '#3B82F6',
+    'Économique': '#6B7280',
+    'Résultats': '#0EA5E9',
+    'Ex-dividende': '#FB923C'
+}
+
+# Type d'événement de marché (event_sources) → catégorie et couleur du calendrier
+MARKET_CATEGORIES = {
+    'FED': 'Économique', 'BCE': 'Économique', 'Macro': 'Économique',
+    'Résultats': 'Résultats', 'Ex-dividende': 'Dividende'
+}
+MARKET_COLORS = {
+    'FED': CATEGORY_COLORS['FED'], 'BCE': CATEGORY_COLORS['BCE'], 'Macro': CATEGORY_COLORS['Économique'],
+    'Résultats': CATEGORY_COLORS['Résultats'], 'Ex-dividende': CATEGORY_COLORS['Ex-dividende']
+}
+
+# Libellé des opérations du journal (Feuil1)
+OPERATION_TITLES = {BUY: '💰 Achat', SELL: '📤 Vente', FEE: '🧾 Frais', SPLIT: '✂️ Split'}
+
+# Marge autour du mois affiché (la grille montre 6 semaines)
+VIEW_MARGIN = timedelta(days=14)
+
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "tlb_calendar")
+_calendar_component = components.declare_component("tlb_calendar", path=_FRONTEND_DIR)
+
+
+# === CONSTRUCTION VECTORISÉE ===
+
+def _format_number(values: pd.Series, fmt: str) -> np.ndarray:
+    """Formatage numérique vectorisé (printf numpy)"""
+    return np.char.mod(fmt, pd.to_numeric(values, errors='coerce').fillna(0).to_numpy(dtype=float))
+
+
+def _frame(dates, titles, category: str, color) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Date': pd.to_datetime(pd.Series(dates).reset_index(drop=True), errors='coerce').dt.normalize(),
+        'title': pd.Series(titles).reset_index(drop=True).astype(str),
+        'category': category,
+        'color': color
+    })
+
+
+def personal_events(df_events: pd.DataFrame) -> pd.DataFrame:
+    """Événements personnels (Feuil5)"""
+    if df_events is None or df_events.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    date_col = 'Date paiement' if 'Date paiement' in df_events.columns else 'Date'
+    text = df_events.get('Event', pd.Series('', index=df_events.index)).fillna('').astype(str).str.strip()
+    keep = (text != '') & pd.to_datetime(df_events[date_col], errors='coerce').notna()
+    return _frame(df_events.loc[keep, date_col], "📝 " + text[keep], 'Personnel', CATEGORY_COLORS['Personnel'])
+
+
+def purchase_events(df_data: pd.DataFrame) -> pd.DataFrame:
+    """Opérations sur titres (Feuil1) : achats, ventes, frais et splits, libellés selon l'Opération"""
+    ledger = normalize_ledger(df_data)
+    if ledger.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    operation = ledger['Opération']
+    details = np.select(
+        [operation == SPLIT, operation == FEE],
+        ["×" + _format_number(ledger['Quantité'], '%g'),
+         _format_number(ledger['Frais'], '%.2f') + " " + ledger['Units'].to_numpy(dtype=str)],
+        default=_format_number(ledger['Quantité'], '%g') + " parts"
+    )
+    titles = operation.map(OPERATION_TITLES) + " " + ledger['Ticker'] + " (" + details + ")"
+    return _frame(ledger['Date'], titles, 'Investissement', CATEGORY_COLORS['Investissement'])
+
+
+def dividend_events(df_div: pd.DataFrame) -> pd.DataFrame:
+    """Dividendes reçus (Feuil4)"""
+    if df_div is None or df_div.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    df = df_div[pd.to_datetime(df_div['Date paiement'], errors='coerce').notna()]
+    amount_col = 'Montant net (€)' if 'Montant net (€)' in df.columns else 'Montant brut (€)'
+    amounts = df[amount_col] if amount_col in df.columns else pd.Series(0, index=df.index)
+    titles = "💸 Dividende " + df['Entreprise'].astype(str) + " (" + _format_number(amounts, '%.2f') + "€)"
+    return _frame(df['Date paiement'], titles, 'Dividende', CATEGORY_COLORS['Dividende'])
+
+
+def estimated_dividend_events(payments: pd.DataFrame) -> pd.DataFrame:
+    """Dividendes estimés (prévision de dividend_forecast), regroupés par ticker et date"""
+    if payments is None or payments.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    estimated = payments.groupby(['Date estimée', 'Ticker', 'Devise'], as_index=False).agg(
+        Entreprise=('Entreprise', 'first'), Montant=('Montant net', 'sum')
+    )
+    titles = ("🔮 Dividende estimé " + estimated['Entreprise'].astype(str) + " (~"
+              + _format_number(estimated['Montant'], '%.2f') + " " + estimated['Devise'].astype(str) + ")")
+    return _frame(estimated['Date estimée'], titles, 'Dividende', CATEGORY_COLORS['Dividende estimé'])
+
+
+def market_events(market: pd.DataFrame) -> pd.DataFrame:
+    """Événements de marché (event_sources) : banques centrales, macro, résultats, ex-dividendes"""
+    if market is None or market.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    kinds = market['Type'].astype(str)
+    categories = kinds.map(MARKET_CATEGORIES).fillna('Économique')
+    colors = kinds.map(MARKET_COLORS).fillna(CATEGORY_COLORS['Économique'])
+    return _frame(market['Date'], market['Titre'], categories.to_numpy(), colors.to_numpy())
+
+
+def build_events_frame(df_events=None, df_data=None, df_div=None, payments=None,
+                       market: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Table complète des événements, triée par date
+
+    Returns:
+        DataFrame: Date (datetime normalisée), title, category, color
+    """
+    parts = [
+        personal_events(df_events),
+        purchase_events(df_data),
+        dividend_events(df_div),
+        estimated_dividend_events(payments),
+        market_events(market)
+    ]
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame(columns=EVENT_COLUMNS).astype({'Date': 'datetime64[ns]'})
+
+    events = pd.concat(parts, ignore_index=True).dropna(subset=['Date'])
+    return events.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+
+# === CACHE ET REQUÊTES ===
+
+def data_version(*frames) -> str:
+    """Empreinte du contenu des tables sources (change à chaque modification)"""
+    digest = hashlib.sha1()
+    for frame in frames:
+        if frame is None:
+            digest.update(b'none')
+        elif isinstance(frame, pd.DataFrame):
+            digest.update(str(frame.shape).encode())
+            if not frame.empty:
+                digest.update(pd.util.hash_pandas_object(frame.astype(str), index=False).to_numpy().tobytes())
+        else:
+            digest.update(repr(frame).encode())
+    return digest.hexdigest()
+
+
+def get_calendar_events(df_events, df_data, df_div, payments=None,
+                        market: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Table des événements mise en cache en session
+
+    Reconstruite uniquement quand une table source change (version par empreinte).
+    """
+    version = data_version(df_events, df_data, df_div, payments, market, date.today())
+    cached = st.session_state.get('calendar_events_cache')
+    if cached and cached['version'] == version:
+        return cached['events']
+
+    events = build_events_frame(df_events, df_data, df_div, payments, market)
+    st.session_state.calendar_events_cache = {'version': version, 'events': events}
+    return events
+
+
+def events_in_range(events: pd.DataFrame, start, end) -> pd.DataFrame:
+    """
+    Événements entre start et end inclus (recherche binaire sur la colonne triée)
+    """
+    dates = events['Date'].to_numpy(dtype='datetime64[ns]')
+    lo = np.searchsorted(dates, np.datetime64(pd.Timestamp(start).normalize()), side='left')
+    hi = np.searchsorted(dates, np.datetime64(pd.Timestamp(end).normalize()), side='right')
+    return events.iloc[lo:hi]
+
+
+# === COMPOSANT CALENDRIER ===
+
+def month_window(year: int, month: int) -> Tuple[pd.Timestamp, pd.Timestamp]:
+    """Plage couverte par la grille d'un mois (avec marge)"""
+    first = pd.Timestamp(year=year, month=month, day=1)
+    last = first + pd.offsets.MonthEnd(0)
+    return first - VIEW_MARGIN, last + VIEW_MARGIN
+
+
+def events_to_json(events: pd.DataFrame) -> List[Dict]:
+    """Sérialisation compacte pour le navigateur"""
+    return pd.DataFrame({
+        'date': events['Date'].dt.strftime('%Y-%m-%d'),
+        'title': events['title'],
+        'category': events['category'],
+        'color': events['color']
+    }).to_dict('records')
+
+
+def display_calendar(events: pd.DataFrame, key: str = "tlb_calendar_view", height: int = 520) -> Dict:
+    """
+    Afficher le calendrier mensuel
+
+    Le composant renvoie le mois affiché ; au rerun suivant, seuls les événements
+    de ce mois (et des jours voisins visibles) sont transmis.
+
+    Returns:
+        dict: mois affiché {'year', 'month'}
+    """
+    today = date.today()
+    view = st.session_state.get(key) or {'year': today.year, 'month': today.month}
+    start, end = month_window(view['year'], view['month'])
+    window = events_in_range(events, start, end)
+
+    _calendar_component(events=events_to_json(window), view=view, key=key, default=view, height=height)
+    return view
@@ -0,0 +1,158 @@
+# modules/chart_utils.py
+"""
+Outils de graphiques Plotly pour les longues séries temporelles
+- Sous-échantillonnage LTTB (Largest-Triangle-Three-Buckets) qui conserve la forme des courbes
+- Passage automatique en traces WebGL (Scattergl) au-delà d'un seuil de points
+- Cache des figures sérialisées par empreinte des données d'entrée
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+# Budget de points par trace envoyé au navigateur
+MAX_CHART_POINTS = 1500
+# Au-delà, rendu WebGL (Scattergl) plutôt que SVG
+WEBGL_THRESHOLD = 1000
+# Nombre de figures gardées en cache par session
+FIGURE_CACHE_SIZE = 32
+
+
+# === SOUS-ÉCHANTILLONNAGE ===
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices des points retenus par l'algorithme LTTB
+
+    Le premier et le dernier point sont toujours conservés ; dans chaque seau,
+    on garde le point qui forme le plus grand triangle avec le point retenu
+    précédent et la moyenne du seau suivant (pics et creux préservés).
+
+    Args:
+        x: abscisses numériques croissantes
+        y: ordonnées (sans NaN)
+        n_out: nombre de points souhaité
+
+    Returns:
+        ndarray: indices triés des points retenus
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+
+        area = np.abs((x[previous] - avg_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (avg_y - y[previous]))
+        previous = start + int(area.argmax())
+        selected[i + 1] = previous
+
+    return selected
+
+
+def downsample(df: pd.DataFrame, y_col: str, x_col: Optional[str] = None,
+               max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """
+    Réduire un DataFrame à max_points lignes en conservant la forme de y_col
+
+    Les autres colonnes (moyennes mobiles, customdata...) suivent les mêmes lignes.
+
+    Args:
+        df: données triées par x
+        y_col: colonne de référence pour le choix des points
+        x_col: colonne des abscisses (index si None)
+        max_points: budget de points
+
+    Returns:
+        DataFrame: sous-ensemble des lignes (df inchangé si déjà sous le budget)
+    """
+    if len(df) <= max_points:
+        return df
+
+    x = df.index if x_col is None else df[x_col]
+    x = pd.to_numeric(pd.Series(x), errors='coerce') if not pd.api.types.is_datetime64_any_dtype(x) \
+        else pd.Series(pd.DatetimeIndex(x).asi8)
+    y = pd.to_numeric(df[y_col], errors='coerce')
+
+    valid = (x.notna().to_numpy() & y.notna().to_numpy())
+    positions = np.flatnonzero(valid)
+    keep = positions[lttb_indices(x.to_numpy()[valid], y.to_numpy()[valid], max_points)]
+    return df.iloc[keep]
+
+
+def line_trace(x, y, threshold: int = WEBGL_THRESHOLD, **kwargs):
+    """
+    Trace de ligne SVG ou WebGL selon le nombre de points
+
+    Les remplissages (fill) restent en SVG : Scattergl les gère mal.
+    """
+    if len(y) > threshold and not kwargs.get('fill'):
+        return go.Scattergl(x=x, y=y, **kwargs)
+    return go.Scatter(x=x, y=y, **kwargs)
+
+
+# === CACHE DES FIGURES ===
+
+def figure_cache_key(*parts) -> str:
+    """
+    Empreinte des entrées d'une figure
+
+    Les DataFrame / Series sont hachés par contenu (index compris), le reste par repr.
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, (pd.DataFrame, pd.Series)):
+            digest.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+            digest.update(repr(list(getattr(part, 'columns', [part.name]))).encode())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+
+def get_cached_figure(key_parts: Sequence, builder: Callable[[], go.Figure]) -> Dict:
+    """
+    Figure sérialisée depuis le cache de session, construite si absente
+
+    Args:
+        key_parts: entrées dont dépend la figure (données, options d'affichage)
+        builder: fonction sans argument qui construit la figure
+
+    Returns:
+        dict: figure sérialisée (acceptée directement par st.plotly_chart)
+    """
+    if 'figure_cache' not in st.session_state:
+        st.session_state.figure_cache = OrderedDict()
+    cache = st.session_state.figure_cache
+
+    key = figure_cache_key(*key_parts)
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+
+    figure = builder().to_dict()
+    cache[key] = figure
+    while len(cache) > FIGURE_CACHE_SIZE:
+        cache.popitem(last=False)
+    return figure
+
+
+def plot_cached(key_parts: Sequence, builder: Callable[[], go.Figure], **plotly_kwargs):
+    """Afficher une figure mise en cache (voir get_cached_figure)"""
+    st.plotly_chart(get_cached_figure(key_parts, builder), **plotly_kwargs)
@@ -0,0 +1,389 @@
+# modules/cost_basis_engine.py
+"""
+Moteur vectorisé de prix de revient (FIFO par lot)
+- Journal de transactions : achats, ventes, frais et divisions d'actions (splits)
+- Feuil1 reste compatible : sans colonne Opération, une quantité négative est une vente
+- Appariement FIFO des ventes sur les lots par intervalles de quantités cumulées
+  (une interpolation unique pour tous les tickers et comptes, sans boucle)
+- Plus-values réalisées / latentes par ticker et par compte, en devise d'origine
+- Résultat mémorisé en session par version du journal
+
+Benchmark : python -m modules.cost_basis_engine
+"""
+
+import hashlib
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# === JOURNAL ===
+
+BUY, SELL, FEE, SPLIT = 'Achat', 'Vente', 'Frais', 'Split'
+
+# Libellés acceptés dans la colonne Opération de Feuil1
+OPERATION_ALIASES = {
+    'achat': BUY, 'buy': BUY,
+    'vente': SELL, 'sell': SELL,
+    'frais': FEE, 'fee': FEE, 'fees': FEE,
+    'split': SPLIT, 'division': SPLIT
+}
+# Ordre des opérations d'une même journée : le split s'applique à l'ouverture,
+# les achats précèdent les ventes (aller-retour dans la journée)
+OPERATION_ORDER = {SPLIT: 0, BUY: 1, FEE: 2, SELL: 3}
+
+LEDGER_COLUMNS = ['Date', 'Ticker', 'Compte', 'Opération', 'Quantité', 'Montant', 'Frais', 'Units', 'Ligne']
+POSITION_KEYS = ['Ticker', 'Compte']
+POSITION_COLUMNS = POSITION_KEYS + [
+    'Units', 'Quantité', 'Coût de revient', 'PRU', 'Prix actuel', 'Valeur actuelle',
+    'Plus-value latente', 'Plus-value réalisée', 'Frais'
+]
+
+
+def normalize_ledger(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Journal normalisé à partir des lignes de Feuil1
+
+    - Opération : colonne 'Opération' si présente, sinon signe de Quantity (négatif = vente)
+    - Montant : valeur absolue de Purchase value (à défaut Quantity × Purchase price)
+    - Frais : colonne 'Frais' (achats : ajoutés au coût ; ventes : déduits du produit) ;
+      une ligne Frais seule porte son montant dans Frais ou Purchase value
+    - Split : la quantité porte le ratio (2 = une action devient deux)
+    - Ligne : position de la ligne dans Feuil1
+
+    Returns:
+        DataFrame: LEDGER_COLUMNS trié par Ticker, Compte, Date et ordre des opérations
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=LEDGER_COLUMNS)
+
+    quantity = pd.to_numeric(df.get('Quantity'), errors='coerce').fillna(0.0)
+    sign_operation = pd.Series(np.where(quantity < 0, SELL, BUY), index=df.index)
+    if 'Opération' in df.columns:
+        operation = df['Opération'].astype(str).str.strip().str.lower().map(OPERATION_ALIASES).fillna(sign_operation)
+    else:
+        operation = sign_operation
+
+    value = pd.to_numeric(df['Purchase value'], errors='coerce') if 'Purchase value' in df.columns \
+        else pd.Series(np.nan, index=df.index)
+    if 'Purchase price' in df.columns:
+        value = value.fillna(quantity.abs() * pd.to_numeric(df['Purchase price'], errors='coerce'))
+    fees = pd.to_numeric(df['Frais'], errors='coerce').fillna(0.0) if 'Frais' in df.columns \
+        else pd.Series(0.0, index=df.index)
+
+    is_fee = operation == FEE
+    ledger = pd.DataFrame({
+        'Date': pd.to_datetime(df['Date'], errors='coerce'),
+        'Ticker': df['Ticker'].astype(str).str.strip(),
+        'Compte': df['Compte'].fillna('N/A').astype(str) if 'Compte' in df.columns else 'N/A',
+        'Opération': operation,
+        'Quantité': np.where(operation == SPLIT, quantity, quantity.abs()),
+        'Montant': np.where(is_fee, 0.0, value.abs().fillna(0.0)),
+        'Frais': np.where(is_fee, fees.where(fees > 0, value.abs()).fillna(0.0), fees.abs()),
+        'Units': df['Units'].fillna('EUR').astype(str).str.strip().str.upper() if 'Units' in df.columns else 'EUR',
+        'Ligne': np.arange(len(df))
+    })
+    ledger = ledger[ledger['Date'].notna() & ~ledger['Ticker'].isin(['', 'nan', 'None'])]
+    ledger = ledger[(ledger['Opération'] != SPLIT) | (ledger['Quantité'] > 0)]
+
+    order = ledger['Opération'].map(OPERATION_ORDER)
+    return ledger.assign(_order=order).sort_values(POSITION_KEYS + ['Date', '_order'], kind='mergesort') \
+        .drop(columns='_order').reset_index(drop=True)
+
+
+# === CALCUL FIFO ===
+
+def split_adjusted_quantities(ledger: pd.DataFrame, group: pd.Series) -> pd.Series:
+    """Quantités exprimées en actions d'aujourd'hui (produit des splits postérieurs)"""
+    ratio = ledger['Quantité'].where(ledger['Opération'] == SPLIT, 1.0)
+    # Produit inclusif depuis la fin, divisé par le ratio de la ligne : splits strictement postérieurs
+    later = ratio[::-1].groupby(group[::-1], sort=False).cumprod()[::-1] / ratio
+    return ledger['Quantité'] * later
+
+
+def signed_quantities(ledger: pd.DataFrame) -> pd.Series:
+    """Mouvement de quantité de chaque ligne du journal en actions d'aujourd'hui (achats +, ventes -, frais et splits 0)"""
+    group = ledger.groupby(POSITION_KEYS, sort=False).ngroup()
+    quantity = split_adjusted_quantities(ledger, group)
+    operation = ledger['Opération']
+    return pd.Series(np.select([operation == BUY, operation == SELL], [quantity, -quantity], default=0.0),
+                     index=ledger.index)
+
+
+def signed_movements(df_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Mouvements de quantité des lignes de Feuil1 selon leur Opération (ventes, frais, splits)
+
+    Returns:
+        DataFrame: Date, Ticker, Compte, Quantity (signée, ajustée des splits)
+    """
+    ledger = normalize_ledger(df_data)
+    return ledger[['Date', 'Ticker', 'Compte']].assign(Quantity=signed_quantities(ledger))
+
+
+def compute_cost_basis(ledger: pd.DataFrame, prices: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Prix de revient FIFO, plus-values réalisées et latentes (opérations vectorisées)
+
+    Par ticker et compte, les achats occupent des intervalles successifs de quantité cumulée
+    et les ventes consomment ces intervalles dans l'ordre. Le coût d'une vente est la
+    différence de coût cumulé aux bornes de son intervalle : une seule interpolation
+    sur un axe global (groupes mis bout à bout) traite tous les groupes à la fois.
+    Une vente supérieure à la quantité détenue n'est couverte qu'à hauteur du détenu.
+
+    Args:
+        ledger: résultat de normalize_ledger
+        prices: prix actuels par ticker (devise d'origine) pour les plus-values latentes
+
+    Returns:
+        dict: 'positions' (ticker × compte), 'lots' (lots ouverts), 'realized' (ventes),
+              'warnings' (ventes non couvertes)
+    """
+    empty = {
+        'positions': pd.DataFrame(columns=POSITION_COLUMNS), 'lots': pd.DataFrame(),
+        'realized': pd.DataFrame(), 'warnings': pd.DataFrame()
+    }
+    if ledger.empty:
+        return empty
+
+    group = ledger.groupby(POSITION_KEYS, sort=False).ngroup()
+    quantity = split_adjusted_quantities(ledger, group)
+    is_buy = ((ledger['Opération'] == BUY) & (quantity > 0)).to_numpy()
+    is_sell = ((ledger['Opération'] == SELL) & (quantity > 0)).to_numpy()
+
+    # Quantités cumulées achetées / vendues par groupe
+    bought = pd.Series(np.where(is_buy, quantity, 0.0), index=ledger.index)
+    sold = pd.Series(np.where(is_sell, quantity, 0.0), index=ledger.index)
+    cum_bought = bought.groupby(group, sort=False).cumsum()
+    cum_sold_raw = sold.groupby(group, sort=False).cumsum()
+    # Excédent de vente jamais couvert (cumulé) : max courant de (vendu - acheté)
+    uncovered = (cum_sold_raw - cum_bought).clip(lower=0).groupby(group, sort=False).cummax()
+    cum_sold = cum_sold_raw - uncovered
+    sold_before = cum_sold.groupby(group, sort=False).shift(1, fill_value=0.0)
+
+    # Axe global : quantité achetée cumulée de tous les groupes mis bout à bout
+    buy_cost = (ledger['Montant'] + ledger['Frais']).to_numpy()
+    group_total = bought.groupby(group, sort=False).sum()
+    offset = (group_total.cumsum() - group_total).reindex(group).to_numpy()
+    axis_qty = np.concatenate([[0.0], np.cumsum(bought.to_numpy()[is_buy])])
+    axis_cost = np.concatenate([[0.0], np.cumsum(buy_cost[is_buy])])
+
+    # Ventes : coût FIFO des actions consommées
+    sells = ledger[is_sell]
+    start = (offset + sold_before.to_numpy())[is_sell]
+    end = (offset + cum_sold.to_numpy())[is_sell]
+    matched = end - start
+    cost_sold = np.interp(end, axis_qty, axis_cost) - np.interp(start, axis_qty, axis_cost)
+    covered = np.divide(matched, quantity.to_numpy()[is_sell], out=np.zeros(len(sells)),
+                        where=quantity.to_numpy()[is_sell] > 0)
+    proceeds = (sells['Montant'].to_numpy() * covered) - sells['Frais'].to_numpy()
+    realized = pd.DataFrame({
+        'Date': sells['Date'].to_numpy(),
+        'Ticker': sells['Ticker'].to_numpy(),
+        'Compte': sells['Compte'].to_numpy(),
+        'Units': sells['Units'].to_numpy(),
+        'Quantité vendue': matched,
+        'Produit net': proceeds,
+        'Coût FIFO': cost_sold,
+        'Plus-value réalisée': proceeds - cost_sold
+    })
+
+    # Lots ouverts : part de chaque intervalle d'achat au-delà de la quantité vendue finale
+    final_sold = cum_sold.groupby(group, sort=False).transform('last').to_numpy()[is_buy]
+    lot_end = cum_bought.to_numpy()[is_buy]
+    lot_qty = quantity.to_numpy()[is_buy]
+    remaining = np.clip(lot_end - np.maximum(lot_end - lot_qty, final_sold), 0.0, None)
+    buys = ledger[is_buy]
+    lots = pd.DataFrame({
+        'Date': buys['Date'].to_numpy(),
+        'Ticker': buys['Ticker'].to_numpy(),
+        'Compte': buys['Compte'].to_numpy(),
+        'Units': buys['Units'].to_numpy(),
+        'Quantité achetée': lot_qty,
+        'Quantité restante': remaining,
+        'Prix de revient unitaire': buy_cost[is_buy] / lot_qty,
+        'Ligne': buys['Ligne'].to_numpy()
+    })
+    lots['Coût restant'] = lots['Quantité restante'] * lots['Prix de revient unitaire']
+    lots = lots[lots['Quantité restante'] > 1e-9].reset_index(drop=True)
+
+    # Synthèse par ticker et compte
+    units = ledger.groupby(POSITION_KEYS, sort=False)['Units'].first()
+    standalone_fees = ledger[ledger['Opération'] == FEE].groupby(POSITION_KEYS)['Frais'].sum()
+    trade_fees = ledger[ledger['Opération'].isin([BUY, SELL])].groupby(POSITION_KEYS)['Frais'].sum()
+    positions = pd.DataFrame({
+        'Units': units,
+        'Quantité': lots.groupby(POSITION_KEYS)['Quantité restante'].sum(),
+        'Coût de revient': lots.groupby(POSITION_KEYS)['Coût restant'].sum(),
+        'Plus-value réalisée': realized.groupby(POSITION_KEYS)['Plus-value réalisée'].sum()
+                               .sub(standalone_fees, fill_value=0.0),
+        'Frais': trade_fees.add(standalone_fees, fill_value=0.0)
+    }).reindex(units.index)
+    positions[['Quantité', 'Coût de revient', 'Plus-value réalisée', 'Frais']] = \
+        positions[['Quantité', 'Coût de revient', 'Plus-value réalisée', 'Frais']].fillna(0.0)
+    positions = positions.reset_index()
+
+    positions['PRU'] = (positions['Coût de revient'] / positions['Quantité'].replace(0, np.nan)).fillna(0.0)
+    positions['Prix actuel'] = positions['Ticker'].map(prices or {}).astype(float)
+    positions['Valeur actuelle'] = positions['Quantité'] * positions['Prix actuel']
+    positions['Plus-value latente'] = positions['Valeur actuelle'] - positions['Coût de revient']
+
+    uncovered_qty = quantity.to_numpy()[is_sell] - matched
+    warnings = pd.DataFrame({
+        'Date': sells['Date'].to_numpy(), 'Ticker': sells['Ticker'].to_numpy(), 'Compte': sells['Compte'].to_numpy(),
+        'Quantité non couverte': uncovered_qty
+    })[uncovered_qty > 1e-9].reset_index(drop=True)
+
+    return {
+        'positions': positions[POSITION_COLUMNS],
+        'lots': lots,
+        'realized': realized,
+        'warnings': warnings
+    }
+
+
+# === CACHE ===
+
+def ledger_version(df: pd.DataFrame) -> str:
+    """Empreinte des colonnes du journal utilisées par le calcul"""
+    columns = [col for col in ['Date', 'Ticker', 'Compte', 'Opération', 'Quantity', 'Purchase price',
+                               'Purchase value', 'Frais', 'Units'] if col in df.columns]
+    return hashlib.sha1(
+        pd.util.hash_pandas_object(df[columns].astype(str), index=False).to_numpy().tobytes()
+        + repr(columns).encode()
+    ).hexdigest()
+
+
+def get_cost_basis(df_data: pd.DataFrame, prices: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Prix de revient du portefeuille, mémorisé en session par version du journal
+
+    Seule la valorisation (prix actuels) est recalculée quand les cours changent.
+    """
+    version = ledger_version(df_data)
+    cached = st.session_state.get('cost_basis')
+    if cached and cached['version'] == version:
+        result = cached['result']
+    else:
+        result = compute_cost_basis(normalize_ledger(df_data))
+        st.session_state.cost_basis = {'version': version, 'result': result}
+
+    if prices:
+        positions = result['positions'].copy()
+        positions['Prix actuel'] = positions['Ticker'].map(prices).astype(float)
+        positions['Valeur actuelle'] = positions['Quantité'] * positions['Prix actuel']
+        positions['Plus-value latente'] = positions['Valeur actuelle'] - positions['Coût de revient']
+        result = {**result, 'positions': positions}
+    return result
+
+
+def held_quantities(df_data: pd.DataFrame) -> pd.Series:
+    """
+    Quantité encore détenue issue de chaque ligne de Feuil1 (lots FIFO ouverts, en actions d'aujourd'hui)
+
+    Les ventes, frais et splits valent 0 : la somme par ticker et compte est la Quantité
+    des positions. Les lignes hors journal (date illisible, ticker vide) gardent leur Quantity.
+    """
+    held = pd.to_numeric(df_data['Quantity'], errors='coerce').to_numpy(dtype=float, copy=True)
+    held[normalize_ledger(df_data)['Ligne'].to_numpy()] = 0.0
+    lots = get_cost_basis(df_data)['lots']
+    if not lots.empty:
+        held[lots['Ligne'].to_numpy()] = lots['Quantité restante'].to_numpy()
+    return pd.Series(held, index=df_data.index)
+
+
+# === BENCHMARK ===
+
+def _legacy_fifo(ledger: pd.DataFrame) -> pd.DataFrame:
+    """Appariement FIFO ligne à ligne avec une file de lots (référence de comparaison)"""
+    results = []
+    for key, rows in ledger.groupby(POSITION_KEYS, sort=False):
+        lots, realized, fees = deque(), 0.0, 0.0
+        for row in rows.itertuples(index=False):
+            if row.Opération == SPLIT:
+                lots = deque([[qty * row.Quantité, cost] for qty, cost in lots])
+            elif row.Opération == BUY and row.Quantité > 0:
+                lots.append([row.Quantité, row.Montant + row.Frais])
+            elif row.Opération == SELL and row.Quantité > 0:
+                to_sell, cost = row.Quantité, 0.0
+                while to_sell > 1e-12 and lots:
+                    qty, lot_cost = lots[0]
+                    take = min(qty, to_sell)
+                    cost += lot_cost * take / qty
+                    lots[0] = [qty - take, lot_cost - lot_cost * take / qty]
+                    if lots[0][0] <= 1e-12:
+                        lots.popleft()
+                    to_sell -= take
+                realized += row.Montant * (row.Quantité - to_sell) / row.Quantité - row.Frais - cost
+            elif row.Opération == FEE:
+                fees += row.Frais
+        results.append({'Ticker': key[0], 'Compte': key[1],
+                        'Quantité': sum(qty for qty, _ in lots),
+                        'Coût de revient': sum(cost for _, cost in lots),
+                        'Plus-value réalisée': realized - fees})
+    return pd.DataFrame(results)
+
+
+def synthetic_ledger(n_transactions: int = 50_000, n_tickers: int = 300, sell_ratio: float = 0.25,
+                     split_ratio: float = 0.002, seed: int = 42) -> pd.DataFrame:
+    """
+    Journal synthétique au format Feuil1 (achats, ventes, quelques splits et frais)
+    """
+    rng = np.random.default_rng(seed)
+    tickers = np.array([f"TCK{i:04d}" for i in range(n_tickers)])
+    draw = rng.random(n_transactions)
+    operation = np.select([draw < split_ratio, draw < split_ratio + 0.01, draw < split_ratio + 0.01 + sell_ratio],
+                          [SPLIT, FEE, SELL], default=BUY)
+    quantity = rng.integers(1, 100, n_transactions).astype(float)
+    quantity = np.where(operation == SPLIT, rng.choice([2.0, 3.0, 10.0], n_transactions), quantity)
+    price = rng.uniform(10, 500, n_transactions).round(2)
+    return pd.DataFrame({
+        'Date': pd.Timestamp("2010-01-01") + pd.to_timedelta(rng.integers(0, 5000, n_transactions), unit='D'),
+        'Compte': rng.choice(['PEA', 'CTO'], n_transactions),
+        'Ticker': rng.choice(tickers, n_transactions),
+        'Opération': operation,
+        'Quantity': quantity,
+        'Purchase price': price,
+        'Purchase value': np.where(operation == SPLIT, 0.0, quantity * price),
+        'Frais': np.where(operation == SPLIT, 0.0, rng.uniform(0, 5, n_transactions).round(2)),
+        'Units': 'EUR'
+    })
+
+
+def run_benchmark(n_transactions: int = 50_000) -> Dict:
+    """
+    Mesurer le moteur vectorisé et la file FIFO ligne à ligne
+
+    Returns:
+        dict: temps (ms) et vérification de cohérence
+    """
+    ledger = normalize_ledger(synthetic_ledger(n_transactions))
+
+    start = time.perf_counter()
+    result = compute_cost_basis(ledger)
+    engine_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    legacy = _legacy_fifo(ledger)
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    merged = result['positions'].merge(legacy, on=POSITION_KEYS, suffixes=('', '_legacy'))
+    consistent = all(
+        np.allclose(merged[col], merged[f'{col}_legacy'], rtol=1e-6, atol=1e-4)
+        for col in ['Quantité', 'Coût de revient', 'Plus-value réalisée']
+    )
+    return {
+        'transactions': n_transactions,
+        'positions': len(result['positions']),
+        'engine_ms': round(engine_ms, 1),
+        'legacy_ms': round(legacy_ms, 1),
+        'speedup': round(legacy_ms / engine_ms, 1) if engine_ms else None,
+        'consistent': bool(consistent and len(merged) == len(legacy))
+    }
+
+
+if __name__ == "__main__":
+    print(run_benchmark())
@@ -0,0 +1,321 @@
+# modules/dividend_engine.py
+"""
+Moteur vectorisé de calcul des dividendes perçus
+- Quantité détenue cumulée par ticker (et compte) construite une seule fois
+- Droits de tous les dividendes calculés par une jointure as-of triée (merge_asof)
+- Ventes, frais et splits selon l'Opération de Feuil1 (cost_basis_engine) et positions partielles
+- Fiscalité par type de compte (PEA / CTO) et pays de l'émetteur
+- Conversion en EUR au taux de change du jour de paiement
+
+Benchmark : python -m modules.dividend_engine
+"""
+
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from modules.cost_basis_engine import signed_movements
+from modules.fx_history_cache import convert_to_eur
+
+DEFAULT_TAX_RATE = 0.30
+
+# === FISCALITÉ ===
+
+# Pays de l'émetteur selon le suffixe Yahoo (sans suffixe : États-Unis)
+COUNTRY_BY_SUFFIX = {
+    'PA': 'FR', 'DE': 'DE', 'F': 'DE', 'AS': 'NL', 'L': 'GB', 'SW': 'CH', 'MI': 'IT', 'MC': 'ES',
+    'BR': 'BE', 'LS': 'PT', 'IR': 'IE', 'HE': 'FI', 'CO': 'DK', 'ST': 'SE', 'OL': 'NO', 'VI': 'AT',
+    'TO': 'CA', 'V': 'CA', 'AX': 'AU', 'T': 'JP', 'HK': 'HK'
+}
+
+# Retenue à la source appliquée à un résident français (taux conventionnels)
+WITHHOLDING_TAX_BY_COUNTRY = {
+    'FR': 0.0, 'US': 0.15, 'DE': 0.26375, 'NL': 0.15, 'GB': 0.0, 'CH': 0.35, 'IT': 0.26, 'ES': 0.19,
+    'BE': 0.30, 'PT': 0.25, 'IE': 0.25, 'FI': 0.35, 'DK': 0.27, 'SE': 0.30, 'NO': 0.25, 'AT': 0.275,
+    'CA': 0.15, 'AU': 0.15, 'JP': 0.15, 'HK': 0.0
+}
+DEFAULT_WITHHOLDING_TAX = 0.15
+
+# Prélèvement forfaitaire unique (CTO) : impôt sur le revenu + prélèvements sociaux
+FRENCH_INCOME_TAX = 0.128
+SOCIAL_CHARGES = 0.172
+
+
+def account_type(compte) -> str:
+    """Type d'enveloppe fiscale d'après la colonne Compte (PEA, sinon CTO)"""
+    return 'PEA' if isinstance(compte, str) and 'PEA' in compte.upper() else 'CTO'
+
+
+def ticker_country(ticker: str) -> str:
+    """Pays de l'émetteur d'après le suffixe du ticker"""
+    if not isinstance(ticker, str) or '.' not in ticker:
+        return 'US'
+    return COUNTRY_BY_SUFFIX.get(ticker.rsplit('.', 1)[1].upper(), 'US')
+
+
+def build_tax_table(withholding: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Taux d'imposition total par (type de compte, pays)
+
+    - PEA : dividendes français exonérés ; retenue étrangère non récupérable
+    - CTO : PFU (12,8 % + 17,2 %), la retenue étrangère s'impute sur l'impôt
+      dans la limite de 12,8 % (l'excédent est perdu)
+
+    Args:
+        withholding: taux de retenue par pays (remplace la table par défaut)
+
+    Returns:
+        dict: {(type de compte, pays): taux}, clé (type, '*') pour les pays inconnus
+    """
+    withholding = {**WITHHOLDING_TAX_BY_COUNTRY, **(withholding or {})}
+    table = {}
+    for country, rate in list(withholding.items()) + [('*', DEFAULT_WITHHOLDING_TAX)]:
+        table[('PEA', country)] = 0.0 if country == 'FR' else rate
+        table[('CTO', country)] = max(rate, FRENCH_INCOME_TAX) + SOCIAL_CHARGES
+    return table
+
+
+def dividend_tax_rates(df: pd.DataFrame, tax_table: Optional[Dict] = None) -> pd.Series:
+    """
+    Taux d'imposition de chaque ligne (recherche vectorisée dans la table)
+
+    Args:
+        df: lignes avec Ticker et éventuellement Compte
+        tax_table: résultat de build_tax_table
+
+    Returns:
+        Series: taux alignés sur l'index de df
+    """
+    tax_table = tax_table or build_tax_table()
+    table = pd.Series(tax_table)
+
+    tickers = df['Ticker'].astype(str)
+    countries = tickers.map({t: ticker_country(t) for t in tickers.unique()})
+    comptes = df['Compte'] if 'Compte' in df.columns else pd.Series(None, index=df.index)
+    accounts = comptes.map({c: account_type(c) for c in comptes.unique()})
+
+    rates = table.reindex(pd.MultiIndex.from_arrays([accounts, countries])).to_numpy()
+    fallback = table.reindex(pd.MultiIndex.from_arrays([accounts, ['*'] * len(df)])).to_numpy()
+    return pd.Series(np.where(np.isnan(rates), fallback, rates), index=df.index)
+
+
+RESULT_COLUMNS = [
+    'Date paiement', 'Ticker', 'Entreprise', 'Dividende par action', 'Quantité détenue',
+    'Montant brut (€)', 'Montant net (€)', 'Devise', 'Type'
+]
+
+
+def build_position_timeline(holdings_df: pd.DataFrame, by: Sequence[str] = ('Ticker',)) -> pd.DataFrame:
+    """
+    Quantité détenue après chaque mouvement, par groupe (ticker, compte...)
+
+    Args:
+        holdings_df: lignes de transactions (Date, Ticker, Quantity ; ventes en négatif)
+        by: colonnes de regroupement
+
+    Returns:
+        DataFrame: colonnes `by` + Date + Quantité détenue, triée par Date
+    """
+    by = list(by)
+    timeline = holdings_df[by + ['Date', 'Quantity']].copy()
+    timeline['Date'] = pd.to_datetime(timeline['Date'], errors='coerce')
+    timeline['Quantity'] = pd.to_numeric(timeline['Quantity'], errors='coerce').fillna(0)
+    timeline = timeline.dropna(subset=['Date'] + by)
+
+    # Plusieurs mouvements le même jour : une seule ligne (quantité nette)
+    timeline = timeline.groupby(by + ['Date'], as_index=False, sort=True)['Quantity'].sum()
+    timeline['Quantité détenue'] = timeline.groupby(by, sort=False)['Quantity'].cumsum()
+
+    return timeline.drop(columns='Quantity').sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+
+def compute_entitlements(dividends_df: pd.DataFrame, holdings_df: pd.DataFrame,
+                         by: Sequence[str] = ('Ticker',), date_col: str = 'Date paiement') -> pd.DataFrame:
+    """
+    Quantité détenue à la date de chaque dividende (jointure as-of unique)
+
+    Un mouvement daté du jour même du dividende est pris en compte
+    (même convention que l'ancien calcul : achats <= date).
+
+    Args:
+        dividends_df: dividendes (Ticker, date_col, Dividende par action...)
+        holdings_df: transactions (Date, Ticker, Quantity, [Compte])
+        by: granularité du calcul ; ('Ticker', 'Compte') ventile par compte
+        date_col: colonne date des dividendes
+
+    Returns:
+        DataFrame: dividendes (dupliqués par compte si besoin) + Quantité détenue (> 0 uniquement)
+    """
+    by = list(by)
+    timeline = build_position_timeline(holdings_df, by)
+
+    dividends = dividends_df.copy()
+    dividends[date_col] = pd.to_datetime(dividends[date_col], errors='coerce')
+    dividends = dividends.dropna(subset=[date_col])
+
+    # Ventiler chaque dividende sur les groupes (comptes) ayant détenu le ticker
+    extra_keys = [col for col in by if col not in dividends.columns]
+    if extra_keys:
+        groups = timeline[by].drop_duplicates()
+        dividends = dividends.merge(groups, on=[col for col in by if col not in extra_keys], how='inner')
+
+    if dividends.empty or timeline.empty:
+        return dividends.assign(**{'Quantité détenue': pd.Series(dtype=float)}).iloc[0:0]
+
+    merged = pd.merge_asof(
+        dividends.sort_values(date_col, kind='mergesort'),
+        timeline,
+        left_on=date_col,
+        right_on='Date',
+        by=by,
+        direction='backward',
+        allow_exact_matches=True
+    ).drop(columns='Date')
+
+    merged = merged[merged['Quantité détenue'] > 0]
+    return merged.reset_index(drop=True)
+
+
+def calculate_dividend_amounts(dividends_df: pd.DataFrame, holdings_df: pd.DataFrame,
+                               tax_table: Optional[Dict] = None, fx_rates: Optional[pd.DataFrame] = None,
+                               tax_rate: Optional[float] = None) -> pd.DataFrame:
+    """
+    Montants brut / net de tous les dividendes en opérations vectorisées
+
+    Les droits sont calculés par compte (PEA / CTO) pour appliquer la bonne
+    fiscalité, puis regroupés par dividende (une ligne par ticker et date).
+
+    Args:
+        dividends_df: dividendes (Date paiement, Ticker, Dividende par action, Devise)
+        holdings_df: transactions du portefeuille (Date, Ticker, Quantity, Entreprise, Compte, [Opération])
+        tax_table: taux par (type de compte, pays) ; voir build_tax_table
+        fx_rates: historique des taux EUR (fx_history_cache) ; None = montants laissés en devise
+        tax_rate: taux forfaitaire unique (remplace la table si renseigné)
+
+    Returns:
+        DataFrame: format Feuil4 (Date paiement, Ticker, Entreprise, ... , Type)
+    """
+    if dividends_df.empty or holdings_df.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    # Quantités signées et ajustées des splits (Opération de Feuil1), pas la colonne Quantity brute
+    holdings = signed_movements(holdings_df)
+    by = ['Ticker', 'Compte'] if 'Compte' in holdings_df.columns else ['Ticker']
+
+    dividends = dividends_df.drop(columns=['Entreprise', 'Compte'], errors='ignore')
+    if 'Devise' not in dividends.columns:
+        dividends = dividends.assign(Devise='USD')
+    dividends = dividends.assign(_dividend_id=np.arange(len(dividends)))
+
+    entitled = compute_entitlements(dividends, holdings, by=by)
+    if entitled.empty:
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+
+    rates = dividend_tax_rates(entitled, tax_table) if tax_rate is None else tax_rate
+    entitled['Montant brut (€)'] = entitled['Quantité détenue'] * entitled['Dividende par action']
+    entitled['Montant net (€)'] = entitled['Montant brut (€)'] * (1 - rates)
+
+    if fx_rates is not None:
+        entitled = convert_to_eur(entitled, ['Montant brut (€)', 'Montant net (€)'], fx_rates)
+
+    # Une ligne par dividende (somme des comptes)
+    result = entitled.groupby('_dividend_id', sort=False).agg({
+        'Date paiement': 'first', 'Ticker': 'first', 'Dividende par action': 'first',
+        'Quantité détenue': 'sum', 'Montant brut (€)': 'sum', 'Montant net (€)': 'sum', 'Devise': 'first'
+    })
+
+    # Nom de l'entreprise : première ligne de transaction du ticker
+    companies = holdings_df.drop_duplicates('Ticker').set_index('Ticker')['Entreprise']
+    result['Entreprise'] = result['Ticker'].map(companies)
+    result['Type'] = 'Calculé automatiquement'
+
+    return result[RESULT_COLUMNS].sort_values(['Ticker', 'Date paiement'], kind='mergesort').reset_index(drop=True)
+
+
+# === BENCHMARK ===
+
+def _legacy_calculate_dividend_amounts(dividends_df: pd.DataFrame, holdings_df: pd.DataFrame) -> pd.DataFrame:
+    """Ancienne implémentation ligne à ligne (référence de comparaison)"""
+    results = []
+    for _, div_row in dividends_df.iterrows():
+        div_date = pd.to_datetime(div_row['Date paiement'])
+        relevant = holdings_df[(holdings_df['Ticker'] == div_row['Ticker']) &
+                               (pd.to_datetime(holdings_df['Date']) <= div_date)]
+        if not relevant.empty:
+            total_quantity = relevant['Quantity'].sum()
+            results.append({'Date paiement': div_date, 'Ticker': div_row['Ticker'],
+                            'Quantité détenue': total_quantity,
+                            'Montant brut (€)': total_quantity * div_row['Dividende par action']})
+    return pd.DataFrame(results)
+
+
+def synthetic_dividend_dataset(n_dividends: int = 10_000, n_lots: int = 5_000, n_tickers: int = 250,
+                               sell_ratio: float = 0.1, seed: int = 42):
+    """
+    Jeu de données synthétique (lots d'achat/vente + dividendes)
+
+    Returns:
+        tuple: (dividends_df, holdings_df)
+    """
+    rng = np.random.default_rng(seed)
+    tickers = np.array([f"TCK{i:04d}" for i in range(n_tickers)])
+    start = pd.Timestamp("2010-01-01")
+
+    lot_tickers = rng.choice(tickers, n_lots)
+    quantities = rng.integers(1, 200, n_lots).astype(float)
+    # Une partie des lots sont des ventes partielles
+    quantities[rng.random(n_lots) < sell_ratio] *= -0.5
+
+    holdings = pd.DataFrame({
+        'Date': start + pd.to_timedelta(rng.integers(0, 5000, n_lots), unit='D'),
+        'Ticker': lot_tickers,
+        'Compte': rng.choice(['PEA', 'CTO'], n_lots),
+        'Entreprise': lot_tickers,
+        'Quantity': quantities
+    })
+    dividends = pd.DataFrame({
+        'Date paiement': start + pd.to_timedelta(rng.integers(0, 5500, n_dividends), unit='D'),
+        'Ticker': rng.choice(tickers, n_dividends),
+        'Dividende par action': rng.uniform(0.05, 3.0, n_dividends).round(4),
+        'Devise': 'USD'
+    })
+    return dividends, holdings
+
+
+def run_benchmark(n_dividends: int = 10_000, n_lots: int = 5_000, legacy_sample: int = 500) -> Dict:
+    """
+    Mesurer le moteur vectorisé et l'ancienne boucle (extrapolée depuis un échantillon)
+
+    Returns:
+        dict: temps (ms) et vérification de cohérence
+    """
+    dividends, holdings = synthetic_dividend_dataset(n_dividends, n_lots)
+
+    start = time.perf_counter()
+    result = calculate_dividend_amounts(dividends, holdings)
+    engine_ms = (time.perf_counter() - start) * 1000
+
+    sample = dividends.head(legacy_sample)
+    start = time.perf_counter()
+    legacy = _legacy_calculate_dividend_amounts(sample, holdings)
+    legacy_ms = (time.perf_counter() - start) * 1000 * n_dividends / max(len(sample), 1)
+
+    # Cohérence sur l'échantillon (lignes à quantité positive ; l'ancien calcul ignore les comptes)
+    expected = legacy[legacy['Quantité détenue'] > 0]['Montant brut (€)'].sum()
+    actual = calculate_dividend_amounts(sample, holdings.drop(columns='Compte'))['Montant brut (€)'].sum()
+
+    return {
+        'dividends': n_dividends,
+        'lots': n_lots,
+        'rows': len(result),
+        'engine_ms': round(engine_ms, 1),
+        'legacy_ms_estimated': round(legacy_ms, 1),
+        'speedup': round(legacy_ms / engine_ms, 1) if engine_ms else None,
+        'consistent': bool(np.isclose(expected, actual))
+    }
+
+
+if __name__ == "__main__":
+    print(run_benchmark())
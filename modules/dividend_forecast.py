@@ -0,0 +1,228 @@
+# modules/dividend_forecast.py
+"""
+Prévision vectorisée des dividendes futurs
+- Fréquence, prochaines dates et montants estimés pour tous les tickers en une passe
+- Échéancier des revenus projetés sur 12 mois par compte et par devise
+- Lecture seule du cache d'historique persistant (aucun appel réseau)
+- Résultat mémorisé en session tant que l'historique et les positions sont inchangés
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.cost_basis_engine import signed_movements
+from modules.dividend_history_cache import get_dividend_cache
+from modules.dividend_engine import dividend_tax_rates
+
+# Fréquences usuelles (jours) : l'intervalle observé est ramené à la plus proche
+STANDARD_FREQUENCIES = np.array([30.4, 91.3, 182.6, 365.25])
+FREQUENCY_LABELS = np.array(['Mensuel', 'Trimestriel', 'Semestriel', 'Annuel'])
+# Nombre d'intervalles récents pris en compte pour la fréquence
+FREQUENCY_WINDOW = 6
+# Nombre de versements récents moyennés pour le montant
+AMOUNT_WINDOW = 3
+FORECAST_MONTHS = 12
+
+
+def estimate_dividend_patterns(history: pd.DataFrame, max_gap_days: int = 550,
+                               today: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Fréquence et montant de référence de chaque ticker (une seule passe groupby)
+
+    Args:
+        history: historique (Ticker, Date paiement, Dividende par action)
+        max_gap_days: au-delà de ce délai depuis le dernier versement, le dividende est considéré suspendu
+        today: date de référence
+
+    Returns:
+        DataFrame indexé par Ticker : Dernier versement, Fréquence (jours), Fréquence,
+        Montant estimé, Nb versements, Confiance
+    """
+    columns = ['Dernier versement', 'Fréquence (jours)', 'Fréquence', 'Montant estimé', 'Nb versements', 'Confiance']
+    if history is None or history.empty:
+        return pd.DataFrame(columns=columns)
+
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    df = history[['Ticker', 'Date paiement', 'Dividende par action']].copy()
+    df['Date paiement'] = pd.to_datetime(df['Date paiement'], errors='coerce')
+    df = df.dropna().sort_values(['Ticker', 'Date paiement'], kind='mergesort')
+
+    grouped = df.groupby('Ticker', sort=False)
+    df['interval'] = grouped['Date paiement'].diff().dt.days
+    df['rank_from_end'] = grouped.cumcount(ascending=False)
+
+    recent_intervals = df[df['rank_from_end'] < FREQUENCY_WINDOW].groupby('Ticker')['interval'].median()
+    recent_amounts = df[df['rank_from_end'] < AMOUNT_WINDOW].groupby('Ticker')['Dividende par action'].mean()
+
+    patterns = pd.DataFrame({
+        'Dernier versement': grouped['Date paiement'].max(),
+        'interval': recent_intervals,
+        'Montant estimé': recent_amounts,
+        'Nb versements': grouped.size()
+    })
+    # Un seul versement connu : hypothèse annuelle
+    patterns['interval'] = patterns['interval'].fillna(365.25)
+
+    # Ramener à la fréquence standard la plus proche (écart relatif)
+    distance = np.abs(np.log(patterns['interval'].to_numpy()[:, None] / STANDARD_FREQUENCIES[None, :]))
+    nearest = distance.argmin(axis=1)
+    patterns['Fréquence (jours)'] = STANDARD_FREQUENCIES[nearest]
+    patterns['Fréquence'] = FREQUENCY_LABELS[nearest]
+
+    patterns['Confiance'] = np.select(
+        [patterns['Nb versements'] >= 4, patterns['Nb versements'] >= 2],
+        ['Élevée', 'Moyenne'],
+        default='Faible'
+    )
+
+    # Dividendes suspendus : exclus de la prévision
+    active = (today - patterns['Dernier versement']).dt.days <= max_gap_days
+    return patterns.loc[active, columns]
+
+
+def forecast_next_payments(patterns: pd.DataFrame, n_payments: int = 4,
+                           today: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Prochaines N dates de versement par ticker (diffusion numpy, sans boucle)
+
+    Les échéances théoriques déjà passées sont ignorées : la projection démarre
+    au premier multiple de la fréquence postérieur à aujourd'hui.
+
+    Args:
+        patterns: résultat de estimate_dividend_patterns
+        n_payments: nombre de versements à projeter par ticker
+        today: date de référence
+
+    Returns:
+        DataFrame: Ticker, Date estimée, Montant estimé, Fréquence, Confiance
+    """
+    columns = ['Ticker', 'Date estimée', 'Montant estimé', 'Fréquence', 'Fréquence (jours)', 'Confiance']
+    if patterns.empty:
+        return pd.DataFrame(columns=columns).astype({'Date estimée': 'datetime64[ns]', 'Montant estimé': float})
+
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    last = patterns['Dernier versement'].to_numpy(dtype='datetime64[D]')
+    step = patterns['Fréquence (jours)'].to_numpy()
+
+    elapsed = (np.datetime64(today.date()) - last).astype(float)
+    first_k = np.maximum(np.floor(elapsed / step) + 1, 1)
+    k = first_k[:, None] + np.arange(n_payments)[None, :]
+    offsets = np.rint(k * step[:, None]).astype('timedelta64[D]')
+    dates = last[:, None] + offsets
+
+    forecast = pd.DataFrame({
+        'Ticker': np.repeat(patterns.index.to_numpy(), n_payments),
+        'Date estimée': pd.to_datetime(dates.ravel()),
+    })
+    for column in columns[2:]:
+        forecast[column] = np.repeat(patterns[column].to_numpy(), n_payments)
+    return forecast[columns]
+
+
+def current_positions(df_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quantité actuellement détenue par ticker et par compte
+
+    Returns:
+        DataFrame: Ticker, Compte, Entreprise, Quantité détenue (> 0)
+    """
+    # Quantités signées et ajustées des splits (ventes, frais et splits selon l'Opération)
+    movements = signed_movements(df_data)
+    positions = movements.groupby(['Ticker', 'Compte'], as_index=False)['Quantity'].sum() \
+        .rename(columns={'Quantity': 'Quantité détenue'})
+    companies = df_data.assign(Ticker=df_data['Ticker'].astype(str).str.strip()).drop_duplicates('Ticker') \
+        .set_index('Ticker')['Entreprise']
+    positions['Entreprise'] = positions['Ticker'].map(companies)
+    positions = positions[['Ticker', 'Compte', 'Entreprise', 'Quantité détenue']]
+    return positions[positions['Quantité détenue'] > 0].reset_index(drop=True)
+
+
+def project_income_schedule(df_data: pd.DataFrame, history: pd.DataFrame,
+                            currencies: Optional[Dict[str, str]] = None, months: int = FORECAST_MONTHS,
+                            tax_rate: Optional[float] = None,
+                            today: Optional[pd.Timestamp] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Revenus de dividendes projetés sur les prochains mois
+
+    Args:
+        df_data: transactions du portefeuille (Ticker, Compte, Quantity, Entreprise)
+        history: historique des dividendes (Ticker, Date paiement, Dividende par action)
+        currencies: devise de chaque ticker (USD par défaut)
+        months: horizon de projection
+        tax_rate: taux forfaitaire (par défaut : table PEA / CTO par pays)
+        today: date de référence
+
+    Returns:
+        dict: 'patterns' (par ticker), 'payments' (versements détaillés par compte),
+              'schedule' (Mois x Compte x Devise)
+    """
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    horizon = today + pd.DateOffset(months=months)
+
+    patterns = estimate_dividend_patterns(history, today=today)
+    # Fréquence mensuelle : jusqu'à 12 versements dans l'horizon
+    n_payments = int(np.ceil(months * 30.44 / STANDARD_FREQUENCIES.min())) + 1
+    next_payments = forecast_next_payments(patterns, n_payments, today=today)
+    next_payments = next_payments[next_payments['Date estimée'] < horizon]
+
+    payments = next_payments.merge(current_positions(df_data), on='Ticker', how='inner')
+    payments['Devise'] = payments['Ticker'].map(currencies or {}).fillna('USD')
+    payments['Montant brut'] = payments['Quantité détenue'] * payments['Montant estimé']
+    payments['Montant net'] = payments['Montant brut'] * (1 - (dividend_tax_rates(payments) if tax_rate is None else tax_rate))
+    payments['Mois'] = payments['Date estimée'].dt.to_period('M').astype(str)
+    payments = payments.sort_values(['Date estimée', 'Ticker'], kind='mergesort').reset_index(drop=True)
+
+    schedule = payments.groupby(['Mois', 'Compte', 'Devise'], as_index=False)[['Montant brut', 'Montant net']].sum()
+
+    return {'patterns': patterns, 'payments': payments, 'schedule': schedule}
+
+
+def get_dividend_forecast(df_data: pd.DataFrame, months: int = FORECAST_MONTHS) -> Dict[str, pd.DataFrame]:
+    """
+    Prévision des dividendes du portefeuille, mémorisée en session
+
+    Recalculée uniquement si le cache d'historique (nouveaux événements) ou les
+    positions ont changé. Partagée par l'onglet Dividendes et le calendrier.
+
+    Args:
+        df_data: DataFrame des positions
+        months: horizon de projection
+
+    Returns:
+        dict: voir project_income_schedule
+    """
+    div_cache = get_dividend_cache()
+    tickers = list(df_data['Ticker'].dropna().unique())
+    holdings_hash = int(pd.util.hash_pandas_object(
+        df_data[[col for col in ['Ticker', 'Compte', 'Quantity'] if col in df_data.columns]].astype(str), index=False
+    ).sum())
+    signature = (div_cache.signature(tickers), holdings_hash, months, datetime.now().date())
+
+    cached = st.session_state.get('dividend_forecast')
+    if cached and cached['signature'] == signature:
+        return cached['forecast']
+
+    states = div_cache.get_states(tickers)
+    currencies = {ticker: state['currency'] for ticker, state in states.items() if state.get('currency')}
+    history = div_cache.get_history(tickers)
+
+    # Tickers absents du cache (dividendes chargés depuis Feuil4) : historique de la session
+    df_div = st.session_state.get('df_dividendes')
+    if df_div is not None and not df_div.empty and 'Dividende par action' in df_div.columns:
+        missing = df_div[df_div['Ticker'].isin(set(tickers) - set(history['Ticker']))]
+        if not missing.empty:
+            missing = missing[['Ticker', 'Date paiement', 'Dividende par action']].drop_duplicates(['Ticker', 'Date paiement'])
+            missing = missing.assign(**{'Date paiement': pd.to_datetime(missing['Date paiement'], errors='coerce'),
+                                        'Dividende par action': pd.to_numeric(missing['Dividende par action'], errors='coerce')})
+            history = pd.concat([history, missing], ignore_index=True)
+            if 'Devise' in df_div.columns:
+                currencies = {**df_div.drop_duplicates('Ticker').set_index('Ticker')['Devise'].dropna().to_dict(), **currencies}
+
+    forecast = project_income_schedule(df_data, history, currencies, months)
+
+    st.session_state.dividend_forecast = {'signature': signature, 'forecast': forecast}
+    return forecast
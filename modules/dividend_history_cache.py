@@ -0,0 +1,225 @@
+# modules/dividend_history_cache.py
+"""
+Cache persistant et incrémental de l'historique des dividendes
+- Stockage SQLite partagé entre tous les utilisateurs (.cache/)
+- Seuls les dividendes postérieurs au dernier ex-date connu sont téléchargés
+- TTL par ticker : aucun appel réseau si le ticker a été vérifié récemment
+- Détection des ajustements (split) : rechargement complet si l'historique a changé
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+import yfinance as yf
+
+DIVIDEND_CACHE_PATH = os.path.join(".cache", "dividend_history.sqlite")
+# Délai minimal entre deux vérifications réseau d'un même ticker
+DIVIDEND_REFRESH_TTL = timedelta(hours=12)
+
+
+def _to_naive_index(series: pd.Series) -> pd.Series:
+    """Supprimer le fuseau horaire d'une série indexée par date"""
+    if not series.empty and series.index.tz is not None:
+        series.index = series.index.tz_convert('UTC').tz_localize(None)
+    return series
+
+
+def fetch_dividend_updates(ticker: str, last_ex_date: Optional[pd.Timestamp] = None) -> Tuple[pd.Series, bool]:
+    """
+    Télécharger les dividendes d'un ticker (réseau uniquement, utilisable en thread)
+
+    Args:
+        ticker: symbole Yahoo
+        last_ex_date: dernier ex-date stocké (None = historique complet)
+
+    Returns:
+        tuple: (série des dividendes, True si historique complet)
+    """
+    stock = yf.Ticker(ticker)
+
+    if last_ex_date is None:
+        return _to_naive_index(stock.dividends), True
+
+    # Depuis le dernier ex-date inclus : permet de vérifier qu'il n'a pas été ajusté
+    history = stock.history(start=(last_ex_date - timedelta(days=1)).strftime('%Y-%m-%d'),
+                            auto_adjust=False, actions=True)
+    if history.empty or 'Dividends' not in history.columns:
+        return pd.Series(dtype=float), False
+
+    dividends = history['Dividends']
+    return _to_naive_index(dividends[dividends != 0]), False
+
+
+class DividendHistoryCache:
+    """
+    Historique des dividendes par ticker, persistant sur disque
+
+    Une connexion SQLite par opération : utilisable depuis plusieurs threads/sessions.
+    """
+
+    def __init__(self, path: str = DIVIDEND_CACHE_PATH, ttl: timedelta = DIVIDEND_REFRESH_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dividend_events (
+                    ticker TEXT NOT NULL,
+                    ex_date TEXT NOT NULL,
+                    amount REAL NOT NULL,
+                    PRIMARY KEY (ticker, ex_date)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ticker_state (
+                    ticker TEXT PRIMARY KEY,
+                    last_checked TEXT,
+                    last_ex_date TEXT,
+                    updated_at TEXT,
+                    name TEXT,
+                    currency TEXT
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # === LECTURE ===
+
+    def get_states(self, tickers: List[str]) -> Dict[str, Dict]:
+        """État de cache de chaque ticker connu"""
+        if not tickers:
+            return {}
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, last_checked, last_ex_date, updated_at, name, currency "
+                f"FROM ticker_state WHERE ticker IN ({placeholders})", list(tickers)
+            ).fetchall()
+        return {
+            row[0]: {'last_checked': row[1], 'last_ex_date': row[2], 'updated_at': row[3],
+                     'name': row[4], 'currency': row[5]}
+            for row in rows
+        }
+
+    def stale_tickers(self, tickers: List[str]) -> Dict[str, Optional[pd.Timestamp]]:
+        """
+        Tickers à vérifier sur le réseau (jamais vus ou TTL expiré)
+
+        Returns:
+            dict: {ticker: dernier ex-date connu ou None}
+        """
+        states = self.get_states(tickers)
+        now = datetime.now()
+        stale = {}
+        for ticker in tickers:
+            state = states.get(ticker)
+            if state is None or state['last_checked'] is None:
+                stale[ticker] = None
+            elif now - datetime.fromisoformat(state['last_checked']) >= self.ttl:
+                stale[ticker] = pd.Timestamp(state['last_ex_date']) if state['last_ex_date'] else None
+        return stale
+
+    def get_history(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Historique stocké pour une liste de tickers
+
+        Returns:
+            DataFrame: colonnes Ticker, Date paiement, Dividende par action
+        """
+        if not tickers:
+            return pd.DataFrame(columns=['Ticker', 'Date paiement', 'Dividende par action'])
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT ticker AS Ticker, ex_date AS 'Date paiement', amount AS 'Dividende par action' "
+                f"FROM dividend_events WHERE ticker IN ({placeholders}) ORDER BY ticker, ex_date",
+                conn, params=list(tickers)
+            )
+        df['Date paiement'] = pd.to_datetime(df['Date paiement'])
+        return df
+
+    def signature(self, tickers: List[str]) -> str:
+        """Empreinte du contenu stocké (change dès qu'un ticker reçoit de nouveaux événements)"""
+        states = self.get_states(tickers)
+        return "|".join(f"{t}:{states.get(t, {}).get('updated_at')}" for t in sorted(tickers))
+
+    # === ÉCRITURE ===
+
+    def store(self, ticker: str, dividends: pd.Series, full_history: bool,
+              name: Optional[str] = None, currency: Optional[str] = None) -> int:
+        """
+        Fusionner des dividendes téléchargés dans le cache
+
+        Si l'ex-date de recouvrement a un montant différent (ajustement de split),
+        l'historique est considéré invalide et sera rechargé en entier au prochain passage.
+
+        Returns:
+            int: nombre de nouveaux événements (-1 si rechargement complet nécessaire)
+        """
+        now = datetime.now().isoformat()
+        events = [(ticker, idx.strftime('%Y-%m-%d'), float(amount)) for idx, amount in dividends.items()]
+
+        with self._lock, self._connect() as conn:
+            existing = dict(conn.execute(
+                "SELECT ex_date, amount FROM dividend_events WHERE ticker = ?", (ticker,)
+            ).fetchall())
+
+            if not full_history:
+                adjusted = any(ex_date in existing and abs(existing[ex_date] - amount) > 1e-6
+                               for _, ex_date, amount in events)
+                if adjusted:
+                    # Historique ajusté : forcer un rechargement complet
+                    conn.execute("DELETE FROM dividend_events WHERE ticker = ?", (ticker,))
+                    conn.execute("UPDATE ticker_state SET last_checked = NULL, last_ex_date = NULL WHERE ticker = ?",
+                                 (ticker,))
+                    return -1
+                new_events = [event for event in events if event[1] not in existing]
+                changed = bool(new_events)
+            else:
+                new_events = [event for event in events if event[1] not in existing]
+                changed = {(d, round(a, 8)) for _, d, a in events} != {(d, round(a, 8)) for d, a in existing.items()}
+                if changed:
+                    conn.execute("DELETE FROM dividend_events WHERE ticker = ?", (ticker,))
+                existing = {} if changed else existing
+
+            conn.executemany("INSERT OR REPLACE INTO dividend_events (ticker, ex_date, amount) VALUES (?, ?, ?)",
+                             events if (full_history and changed) else new_events)
+
+            last_ex_date = max([e[1] for e in events] + list(existing.keys()), default=None)
+            conn.execute("""
+                INSERT INTO ticker_state (ticker, last_checked, last_ex_date, updated_at, name, currency)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET
+                    last_checked = excluded.last_checked,
+                    last_ex_date = excluded.last_ex_date,
+                    updated_at = CASE WHEN ? THEN excluded.updated_at ELSE ticker_state.updated_at END,
+                    name = COALESCE(excluded.name, ticker_state.name),
+                    currency = COALESCE(excluded.currency, ticker_state.currency)
+            """, (ticker, now, last_ex_date, now, name, currency, changed))
+
+        return len(new_events)
+
+    def store_company(self, ticker: str, name: Optional[str], currency: Optional[str]):
+        """Mémoriser le nom et la devise d'un ticker (évite les appels .info)"""
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT INTO ticker_state (ticker, name, currency) VALUES (?, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET
+                    name = COALESCE(excluded.name, ticker_state.name),
+                    currency = COALESCE(excluded.currency, ticker_state.currency)
+            """, (ticker, name, currency))
+
+
+@st.cache_resource
+def get_dividend_cache():
+    """Singleton du cache d'historique des dividendes (partagé entre sessions)"""
+    return DividendHistoryCache()
@@ -0,0 +1,381 @@
+# modules/event_sources.py
+"""
+Sources d'événements de marché du calendrier financier
+- Calendriers banques centrales / macro importés depuis des fichiers locaux ICS ou CSV
+- Dates de résultats et d'ex-dividende des tickers détenus (téléchargement parallèle)
+- Table SQLite indexée par date (.cache/) : lecture par plage, sans parcours complet
+- Fichiers relus uniquement s'ils ont changé, tickers rafraîchis selon un TTL
+"""
+
+import glob
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+import streamlit as st
+import yfinance as yf
+
+from modules.rate_limiter import run_rate_limited
+from modules.yfinance_cache_manager import get_yahoo_rate_limiter
+
+EVENT_SOURCES_PATH = os.path.join(".cache", "event_sources.sqlite")
+
+# Calendriers livrés avec l'application, puis calendriers de l'utilisateur (dossier local)
+CALENDAR_DIRS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "calendars"),
+    "calendars"
+]
+CALENDAR_PATTERNS = ("*.ics", "*.csv")
+
+# Délai minimal entre deux vérifications réseau d'un même ticker
+TICKER_EVENTS_TTL = timedelta(hours=24)
+EVENT_FETCH_WORKERS = 6
+
+# Types d'événements stockés
+KIND_FED = 'FED'
+KIND_BCE = 'BCE'
+KIND_MACRO = 'Macro'
+KIND_EARNINGS = 'Résultats'
+KIND_EX_DIVIDEND = 'Ex-dividende'
+
+TITLE_COLUMNS = ['Titre', 'Title', 'Event', 'Événement', 'Summary', 'SUMMARY']
+DATE_COLUMNS = ['Date', 'date', 'DTSTART', 'Start']
+KIND_COLUMNS = ['Type', 'Catégorie', 'Category', 'CATEGORIES']
+
+
+def classify_macro_event(title: str) -> str:
+    """Type d'un événement macro d'après son intitulé"""
+    upper = str(title).upper()
+    if 'FED' in upper or 'FOMC' in upper:
+        return KIND_FED
+    if 'BCE' in upper or 'ECB' in upper:
+        return KIND_BCE
+    return KIND_MACRO
+
+
+# === FICHIERS LOCAUX (ICS / CSV) ===
+
+def _unescape_ics(text: str) -> str:
+    return text.replace('\\n', ' ').replace('\\N', ' ').replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+
+
+def parse_ics(content: str) -> List[Tuple[str, str, str]]:
+    """
+    Lire les VEVENT d'un calendrier ICS (RFC 5545, sous-ensemble utile)
+
+    Returns:
+        list: (date ISO, titre, type)
+    """
+    # Dépliage des lignes longues (continuation par espace ou tabulation)
+    content = re.sub(r'\r?\n[ \t]', '', content)
+
+    events = []
+    current: Optional[Dict[str, str]] = None
+    for line in content.splitlines():
+        if line == 'BEGIN:VEVENT':
+            current = {}
+        elif line == 'END:VEVENT':
+            if current and current.get('DTSTART') and current.get('SUMMARY'):
+                day = re.match(r'(\d{4})(\d{2})(\d{2})', current['DTSTART'])
+                if day:
+                    title = _unescape_ics(current['SUMMARY']).strip()
+                    kind = current.get('CATEGORIES') or classify_macro_event(title)
+                    events.append(('-'.join(day.groups()), title, kind))
+            current = None
+        elif current is not None and ':' in line:
+            name, value = line.split(':', 1)
+            current[name.split(';', 1)[0].upper()] = value.strip()
+    return events
+
+
+def parse_calendar_csv(path: str) -> List[Tuple[str, str, str]]:
+    """
+    Lire un calendrier CSV (colonnes Date, Titre et Type optionnel)
+
+    Returns:
+        list: (date ISO, titre, type)
+    """
+    df = pd.read_csv(path, sep=None, engine='python')
+    date_col = next((col for col in DATE_COLUMNS if col in df.columns), df.columns[0])
+    title_col = next((col for col in TITLE_COLUMNS if col in df.columns), df.columns[1])
+    kind_col = next((col for col in KIND_COLUMNS if col in df.columns), None)
+
+    dates = pd.to_datetime(df[date_col], errors='coerce')
+    titles = df[title_col].fillna('').astype(str).str.strip()
+    keep = dates.notna() & (titles != '')
+    kinds = df.loc[keep, kind_col].fillna('').astype(str) if kind_col else pd.Series('', index=df.index[keep])
+    kinds = kinds.where(kinds != '', titles[keep].map(classify_macro_event))
+
+    return list(zip(dates[keep].dt.strftime('%Y-%m-%d'), titles[keep], kinds))
+
+
+def calendar_files(directories: Sequence[str] = CALENDAR_DIRS) -> List[str]:
+    """Fichiers de calendrier présents dans les dossiers configurés"""
+    files = []
+    for directory in directories:
+        for pattern in CALENDAR_PATTERNS:
+            files.extend(glob.glob(os.path.join(directory, pattern)))
+    return sorted(set(os.path.abspath(path) for path in files))
+
+
+def _file_signature(path: str) -> str:
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+# === TICKERS DÉTENUS (YAHOO) ===
+
+def _calendar_dates(value) -> List[date]:
+    """Normaliser une entrée du calendrier Yahoo (date, liste, Timestamp...)"""
+    values = value if isinstance(value, (list, tuple)) else [value]
+    dates = pd.to_datetime(pd.Series(values, dtype=object), errors='coerce').dropna()
+    return [d.date() for d in dates]
+
+
+def fetch_ticker_events(ticker: str) -> List[Tuple[str, str, str]]:
+    """
+    Dates de résultats et d'ex-dividende d'un ticker (réseau uniquement, utilisable en thread)
+
+    Returns:
+        list: (date ISO, titre, type)
+    """
+    calendar = yf.Ticker(ticker).calendar
+    if calendar is None:
+        return []
+    if isinstance(calendar, pd.DataFrame):
+        # Anciennes versions de yfinance : une ligne par champ
+        calendar = {key: list(row.dropna()) for key, row in calendar.iterrows()} if not calendar.empty else {}
+
+    events = []
+    earnings = _calendar_dates(calendar.get('Earnings Date', []))
+    if earnings:
+        # Yahoo donne parfois une fourchette : seule la première date est retenue
+        events.append((earnings[0].isoformat(), f"📣 Résultats {ticker}", KIND_EARNINGS))
+    for ex_date in _calendar_dates(calendar.get('Ex-Dividend Date', []))[:1]:
+        events.append((ex_date.isoformat(), f"✂️ Ex-dividende {ticker}", KIND_EX_DIVIDEND))
+    return events
+
+
+# === STOCKAGE INDEXÉ ===
+
+class EventSourceStore:
+    """
+    Événements de marché persistants, indexés par date
+
+    Une connexion SQLite par opération : utilisable depuis plusieurs threads/sessions.
+    """
+
+    def __init__(self, path: str = EVENT_SOURCES_PATH, ttl: timedelta = TICKER_EVENTS_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS market_events (
+                    source TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    ticker TEXT,
+                    PRIMARY KEY (source, date, title)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_market_events_date ON market_events (date)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS event_sources (
+                    source TEXT PRIMARY KEY,
+                    signature TEXT,
+                    last_checked TEXT
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _states(self, sources: List[str]) -> Dict[str, Tuple[Optional[str], Optional[str]]]:
+        if not sources:
+            return {}
+        placeholders = ",".join("?" * len(sources))
+        with self._connect() as conn:
+            return {row[0]: row[1:] for row in conn.execute(
+                f"SELECT source, signature, last_checked FROM event_sources WHERE source IN ({placeholders})",
+                sources
+            ).fetchall()}
+
+    def replace_source(self, source: str, events: List[Tuple[str, str, str]],
+                       ticker: Optional[str] = None, signature: Optional[str] = None):
+        """Remplacer tous les événements d'une source (fichier ou ticker)"""
+        rows = [(source, day, title, kind, ticker) for day, title, kind in events]
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM market_events WHERE source = ?", (source,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO market_events (source, date, title, kind, ticker) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("""
+                INSERT INTO event_sources (source, signature, last_checked) VALUES (?, ?, ?)
+                ON CONFLICT(source) DO UPDATE SET
+                    signature = excluded.signature, last_checked = excluded.last_checked
+            """, (source, signature, datetime.now().isoformat()))
+
+    def mark_checked(self, source: str):
+        """Noter une vérification sans modifier les événements de la source"""
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT INTO event_sources (source, signature, last_checked) VALUES (?, NULL, ?)
+                ON CONFLICT(source) DO UPDATE SET last_checked = excluded.last_checked
+            """, (source, datetime.now().isoformat()))
+
+    # === INGESTION ===
+
+    def ingest_files(self, paths: Iterable[str]) -> Dict[str, str]:
+        """
+        Importer les calendriers ICS / CSV nouveaux ou modifiés
+
+        Un fichier supprimé voit ses événements retirés de la table.
+
+        Returns:
+            dict: {fichier: message d'erreur} pour les fichiers illisibles
+        """
+        paths = list(paths)
+        sources = {f"file:{path}": path for path in paths}
+        states = self._states(list(sources))
+
+        errors = {}
+        for source, path in sources.items():
+            try:
+                signature = _file_signature(path)
+                if states.get(source, (None, None))[0] == signature:
+                    continue
+                if path.lower().endswith('.ics'):
+                    with open(path, encoding='utf-8') as handle:
+                        events = parse_ics(handle.read())
+                else:
+                    events = parse_calendar_csv(path)
+            except Exception as e:
+                errors[path] = str(e)
+                continue
+            self.replace_source(source, events, signature=signature)
+
+        with self._lock, self._connect() as conn:
+            known = [row[0] for row in conn.execute("SELECT source FROM event_sources WHERE source LIKE 'file:%'")]
+            for source in set(known) - set(sources):
+                conn.execute("DELETE FROM market_events WHERE source = ?", (source,))
+                conn.execute("DELETE FROM event_sources WHERE source = ?", (source,))
+        return errors
+
+    def stale_tickers(self, tickers: Iterable[str]) -> List[str]:
+        """Tickers jamais vérifiés ou dont le TTL a expiré"""
+        tickers = sorted({t.upper() for t in tickers if t})
+        states = self._states([f"ticker:{t}" for t in tickers])
+        now = datetime.now()
+        stale = []
+        for ticker in tickers:
+            last_checked = states.get(f"ticker:{ticker}", (None, None))[1]
+            if not last_checked or now - datetime.fromisoformat(last_checked) >= self.ttl:
+                stale.append(ticker)
+        return stale
+
+    def refresh_tickers(self, tickers: Iterable[str]) -> Dict[str, str]:
+        """
+        Rafraîchir en parallèle les dates de résultats / ex-dividende des tickers périmés
+
+        Les téléchargements partagent le bucket Yahoo ; l'écriture est faite dans le thread principal.
+
+        Returns:
+            dict: {ticker: message d'erreur}
+        """
+        errors = {}
+        results = run_rate_limited(
+            fetch_ticker_events,
+            self.stale_tickers(tickers),
+            buckets=[get_yahoo_rate_limiter()],
+            max_workers=EVENT_FETCH_WORKERS
+        )
+        for ticker, events, error in results:
+            if error is not None:
+                # Ticker inconnu ou indisponible : anciens événements conservés, nouvel essai après le TTL
+                errors[ticker] = str(error)
+                self.mark_checked(f"ticker:{ticker}")
+                continue
+            self.replace_source(f"ticker:{ticker}", events, ticker=ticker)
+        return errors
+
+    # === LECTURE ===
+
+    def query(self, start=None, end=None, kinds: Optional[Sequence[str]] = None,
+              tickers: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """
+        Événements entre start et end inclus (lecture par l'index de date)
+
+        Args:
+            start, end: bornes (None = non bornée)
+            kinds: types à retenir (None = tous)
+            tickers: restreindre les événements de tickers à cette liste
+                     (les événements macro sont toujours inclus)
+
+        Returns:
+            DataFrame: Date, Titre, Type, Ticker (trié par date)
+        """
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("date >= ?")
+            params.append(pd.Timestamp(start).strftime('%Y-%m-%d'))
+        if end is not None:
+            clauses.append("date <= ?")
+            params.append(pd.Timestamp(end).strftime('%Y-%m-%d'))
+        if kinds:
+            clauses.append(f"kind IN ({','.join('?' * len(kinds))})")
+            params.extend(kinds)
+        if tickers is not None:
+            tickers = [t.upper() for t in tickers]
+            clauses.append(f"(ticker IS NULL OR ticker IN ({','.join('?' * len(tickers)) or 'NULL'}))")
+            params.extend(tickers)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT DISTINCT date AS Date, title AS Titre, kind AS Type, ticker AS Ticker "
+                f"FROM market_events {where} ORDER BY date", conn, params=params
+            )
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    def signature(self) -> str:
+        """Empreinte de l'état de la table (change à chaque ingestion)"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT COUNT(*), MAX(last_checked) FROM event_sources").fetchone()
+        return f"{row[0]}:{row[1]}"
+
+
+@st.cache_resource
+def get_event_store():
+    """Singleton de la table des événements de marché (partagée entre sessions)"""
+    return EventSourceStore()
+
+
+def get_market_events(tickers: Iterable[str], start=None, end=None) -> Tuple[pd.DataFrame, Dict[str, str]]:
+    """
+    Événements de marché à afficher : calendriers locaux + tickers détenus
+
+    Les fichiers inchangés et les tickers vérifiés récemment ne sont pas relus.
+
+    Args:
+        tickers: tickers détenus
+        start, end: plage de dates (None = non bornée)
+
+    Returns:
+        tuple: (DataFrame Date/Titre/Type/Ticker, erreurs {source: message})
+    """
+    tickers = list(tickers)
+    store = get_event_store()
+    errors = store.ingest_files(calendar_files())
+    errors.update(store.refresh_tickers(tickers))
+    return store.query(start, end, tickers=tickers), errors
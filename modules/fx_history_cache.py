@@ -0,0 +1,206 @@
+# modules/fx_history_cache.py
+"""
+Historique quotidien des taux de change (EUR → devise) persistant
+- Une série journalière par devise, téléchargée une fois puis complétée de façon incrémentale
+- Stockage SQLite partagé entre tous les utilisateurs (.cache/)
+- Conversion vectorisée d'une table entière au taux du jour de chaque ligne (merge_asof)
+
+Convention Yahoo : EURUSD=X = nombre de USD pour 1 EUR, donc montant EUR = montant USD / taux.
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import streamlit as st
+import yfinance as yf
+
+from modules.yfinance_cache_manager import get_yahoo_rate_limiter
+
+FX_CACHE_PATH = os.path.join(".cache", "fx_history.sqlite")
+FX_REFRESH_TTL = timedelta(hours=12)
+FX_HISTORY_START = "2000-01-01"
+
+# Cotations en sous-unité : (devise réelle, diviseur)
+SUBUNIT_CURRENCIES = {'GBp': ('GBP', 100), 'GBX': ('GBP', 100), 'ZAc': ('ZAR', 100), 'ILA': ('ILS', 100)}
+
+
+def normalize_currency(currency: Optional[str]) -> str:
+    """Devise ISO réelle (GBp → GBP) ; USD par défaut"""
+    if not currency or pd.isna(currency):
+        return 'USD'
+    return SUBUNIT_CURRENCIES.get(currency, (str(currency).upper(), 1))[0]
+
+
+def currency_divisor(currency: Optional[str]) -> float:
+    """Diviseur des cotations en sous-unité (pence → livres)"""
+    if not currency or pd.isna(currency):
+        return 1.0
+    return float(SUBUNIT_CURRENCIES.get(currency, (None, 1))[1])
+
+
+def fetch_fx_history(currency: str, start: str) -> pd.Series:
+    """
+    Télécharger la série quotidienne EUR{devise} depuis Yahoo (réseau uniquement)
+
+    Returns:
+        Series: taux de clôture indexés par date (sans fuseau)
+    """
+    get_yahoo_rate_limiter().acquire()
+    history = yf.Ticker(f"EUR{currency}=X").history(start=start, auto_adjust=False)
+    if history.empty:
+        return pd.Series(dtype=float)
+    rates = history['Close'].dropna()
+    if rates.index.tz is not None:
+        rates.index = rates.index.tz_localize(None)
+    return rates[rates > 0]
+
+
+class FxHistoryCache:
+    """
+    Taux de change quotidiens par devise, persistants sur disque
+
+    Une connexion SQLite par opération : utilisable depuis plusieurs threads/sessions.
+    """
+
+    def __init__(self, path: str = FX_CACHE_PATH, ttl: timedelta = FX_REFRESH_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fx_rates (
+                    currency TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    rate REAL NOT NULL,
+                    PRIMARY KEY (currency, date)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fx_state (
+                    currency TEXT PRIMARY KEY,
+                    last_checked TEXT,
+                    last_date TEXT
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def refresh(self, currencies: Iterable[str]) -> Dict[str, str]:
+        """
+        Compléter l'historique des devises dont le TTL a expiré
+
+        Returns:
+            dict: {devise: message d'erreur} pour les devises non rafraîchies
+        """
+        currencies = sorted({normalize_currency(c) for c in currencies} - {'EUR'})
+        if not currencies:
+            return {}
+
+        placeholders = ",".join("?" * len(currencies))
+        with self._connect() as conn:
+            states = {row[0]: row[1:] for row in conn.execute(
+                f"SELECT currency, last_checked, last_date FROM fx_state WHERE currency IN ({placeholders})",
+                currencies
+            ).fetchall()}
+
+        errors = {}
+        now = datetime.now()
+        for currency in currencies:
+            last_checked, last_date = states.get(currency, (None, None))
+            if last_checked and now - datetime.fromisoformat(last_checked) < self.ttl:
+                continue
+            try:
+                rates = fetch_fx_history(currency, last_date or FX_HISTORY_START)
+            except Exception as e:
+                errors[currency] = str(e)
+                continue
+
+            rows = [(currency, idx.strftime('%Y-%m-%d'), float(rate)) for idx, rate in rates.items()]
+            new_last = max([row[1] for row in rows] + ([last_date] if last_date else []), default=None)
+            with self._lock, self._connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO fx_rates (currency, date, rate) VALUES (?, ?, ?)", rows)
+                conn.execute("""
+                    INSERT INTO fx_state (currency, last_checked, last_date) VALUES (?, ?, ?)
+                    ON CONFLICT(currency) DO UPDATE SET
+                        last_checked = excluded.last_checked, last_date = excluded.last_date
+                """, (currency, now.isoformat(), new_last))
+        return errors
+
+    def get_rates(self, currencies: Iterable[str]) -> pd.DataFrame:
+        """
+        Historique stocké (format long)
+
+        Returns:
+            DataFrame: Devise, Date, Taux (unités de devise pour 1 EUR)
+        """
+        currencies = sorted({normalize_currency(c) for c in currencies} - {'EUR'})
+        if not currencies:
+            return pd.DataFrame({'Devise': pd.Series(dtype=str), 'Date': pd.Series(dtype='datetime64[ns]'),
+                                 'Taux': pd.Series(dtype=float)})
+        placeholders = ",".join("?" * len(currencies))
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT currency AS Devise, date AS Date, rate AS Taux FROM fx_rates "
+                f"WHERE currency IN ({placeholders}) ORDER BY date", conn, params=currencies
+            )
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+
+def convert_to_eur(df: pd.DataFrame, amount_columns: List[str], rates: pd.DataFrame,
+                   date_col: str = 'Date paiement', currency_col: str = 'Devise') -> pd.DataFrame:
+    """
+    Convertir des montants en EUR au taux du jour de chaque ligne (une jointure as-of)
+
+    Le taux retenu est le dernier connu à la date (week-ends, jours fériés) ;
+    pour une date antérieure à l'historique, le premier taux disponible.
+    Les devises sans historique restent non converties : montant d'origine conservé, Taux FX = NaN.
+
+    Args:
+        df: table à convertir
+        amount_columns: colonnes de montants exprimées dans la devise de la ligne
+        rates: résultat de FxHistoryCache.get_rates
+        date_col: colonne date
+        currency_col: colonne devise (cotations en sous-unité acceptées)
+
+    Returns:
+        DataFrame: copie avec colonnes converties et colonne 'Taux FX'
+    """
+    result = df.copy()
+    result['_order'] = range(len(result))
+    result['_date'] = pd.to_datetime(result[date_col], errors='coerce')
+    raw_currency = result[currency_col] if currency_col in result.columns else pd.Series('USD', index=result.index)
+    result['_currency'] = raw_currency.map(normalize_currency)
+    result['_divisor'] = raw_currency.map(currency_divisor)
+
+    rates = rates.rename(columns={'Devise': '_currency', 'Date': '_date'}).sort_values('_date')
+    dated = result.dropna(subset=['_date']).sort_values('_date', kind='mergesort')
+    dated = pd.merge_asof(dated, rates, on='_date', by='_currency', direction='backward')
+
+    # Dates antérieures au premier taux connu : premier taux disponible
+    first_rates = rates.groupby('_currency')['Taux'].first()
+    dated['Taux'] = dated['Taux'].fillna(dated['_currency'].map(first_rates))
+    dated.loc[dated['_currency'] == 'EUR', 'Taux'] = 1.0
+
+    result = pd.concat([dated, result[result['_date'].isna()]]).sort_values('_order')
+    result['Taux FX'] = result['Taux']
+    for column in amount_columns:
+        original = pd.to_numeric(result[column], errors='coerce')
+        # Sans taux connu, le montant d'origine est conservé (et non NaN, compté 0 € dans les sommes)
+        result[column] = (original / result['_divisor'] / result['Taux FX']).fillna(original)
+
+    return result.drop(columns=['_order', '_date', '_currency', '_divisor', 'Taux']).set_index(df.index)
+
+
+@st.cache_resource
+def get_fx_cache():
+    """Singleton du cache d'historique des taux de change (partagé entre sessions)"""
+    return FxHistoryCache()
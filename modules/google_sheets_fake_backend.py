@@ -0,0 +1,871 @@
+# modules/google_sheets_fake_backend.py
+"""
+Faux service Google Sheets / Drive en mémoire pour TLB INVESTOR
+Permet d'exercer les gestionnaires Google Sheets sans accès réseau :
+- Transport requests (gspread, export CSV public) et transport httplib2 (googleapiclient)
+- Endpoints Sheets v4 / Drive v3 / OAuth2 utilisés par l'application
+- Export CSV public (docs.google.com) avec ETag / If-None-Match
+- Latence configurable et simulation des quotas (HTTP 429)
+- Statistiques de requêtes pour les benchmarks de synchronisation
+
+Lancement du benchmark : python -m modules.google_sheets_fake_backend
+"""
+
+import copy
+import csv
+import hashlib
+import html
+import io
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque, defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, unquote
+
+import requests
+from requests.adapters import BaseAdapter
+
+SHEETS_HOST = "sheets.googleapis.com"
+GOOGLEAPIS_HOST = "www.googleapis.com"
+DOCS_HOST = "docs.google.com"
+
+
+def _column_to_index(letters: str) -> int:
+    """Convertir une colonne A1 ('A', 'AB') en index 0-based"""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index - 1
+
+
+def _index_to_column(index: int) -> str:
+    """Convertir un index 0-based en colonne A1"""
+    letters = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return letters
+
+
+def parse_a1_range(range_name: str) -> Tuple[Optional[str], int, int, Optional[int], Optional[int]]:
+    """
+    Décomposer une plage A1 ("'Feuil1'!A1:M20", "Feuil1", "A:C")
+
+    Returns:
+        tuple: (titre_feuille ou None, ligne_debut, col_debut, ligne_fin ou None, col_fin ou None)
+               indices 0-based, bornes de fin incluses
+    """
+    sheet_title = None
+    cells = range_name
+
+    if '!' in range_name:
+        sheet_title, cells = range_name.rsplit('!', 1)
+    elif not re.fullmatch(r"[A-Za-z]*\d*(:[A-Za-z]*\d*)?", range_name):
+        sheet_title, cells = range_name, ""
+
+    if sheet_title is not None:
+        sheet_title = sheet_title.strip()
+        if sheet_title.startswith("'") and sheet_title.endswith("'"):
+            sheet_title = sheet_title[1:-1].replace("''", "'")
+
+    if not cells:
+        return sheet_title, 0, 0, None, None
+
+    def _parse_cell(cell: str):
+        match = re.fullmatch(r"([A-Za-z]*)(\d*)", cell)
+        letters, digits = match.groups()
+        col = _column_to_index(letters) if letters else None
+        row = int(digits) - 1 if digits else None
+        return row, col
+
+    start, _, end = cells.partition(':')
+    r0, c0 = _parse_cell(start)
+    if end:
+        r1, c1 = _parse_cell(end)
+    else:
+        r1, c1 = r0, c0
+
+    return sheet_title, r0 or 0, c0 or 0, r1, c1
+
+
+class FakeGoogleSheetsBackend:
+    """
+    Stockage en mémoire des spreadsheets + routage des appels API Google
+
+    Thread-safe : peut être partagé entre les threads de l'application
+    (ordonnanceur d'écriture, synchronisation en arrière-plan...).
+    """
+
+    def __init__(self, latency_ms: float = 0.0, latency_jitter_ms: float = 0.0,
+                 read_quota_per_minute: Optional[int] = None,
+                 write_quota_per_minute: Optional[int] = None,
+                 quota_window_seconds: float = 60.0,
+                 user_email: str = "test.user@example.com"):
+        """
+        Args:
+            latency_ms: latence simulée par requête (millisecondes)
+            latency_jitter_ms: variation aléatoire ajoutée à la latence
+            read_quota_per_minute: quota de lectures par fenêtre (None = illimité)
+            write_quota_per_minute: quota d'écritures par fenêtre (None = illimité)
+            quota_window_seconds: durée de la fenêtre glissante de quota
+            user_email: email renvoyé par l'endpoint userinfo
+        """
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.read_quota_per_minute = read_quota_per_minute
+        self.write_quota_per_minute = write_quota_per_minute
+        self.quota_window_seconds = quota_window_seconds
+        self.user_email = user_email
+
+        self._lock = threading.RLock()
+        self._spreadsheets: Dict[str, Dict] = {}
+        self._request_times = {'read': deque(), 'write': deque()}
+        self.reset_stats()
+
+    # === GESTION DES DONNÉES ===
+
+    def create_spreadsheet(self, title: str, sheets: Optional[Dict[str, List[List]]] = None,
+                           spreadsheet_id: Optional[str] = None) -> str:
+        """
+        Créer un spreadsheet en mémoire
+
+        Args:
+            title: nom du document
+            sheets: {titre_feuille: valeurs (liste de lignes)}
+            spreadsheet_id: ID imposé (généré sinon)
+
+        Returns:
+            str: ID du spreadsheet
+        """
+        spreadsheet_id = spreadsheet_id or uuid.uuid4().hex
+        with self._lock:
+            self._spreadsheets[spreadsheet_id] = {
+                'title': title,
+                'version': 1,
+                'modifiedTime': self._now(),
+                'sheets': [],
+                'next_sheet_id': 0
+            }
+            for sheet_title, values in (sheets or {"Feuil1": []}).items():
+                self._add_sheet(spreadsheet_id, sheet_title, values=values)
+        return spreadsheet_id
+
+    def load_portfolio(self, title: str, portfolio_data: Dict, spreadsheet_id: Optional[str] = None) -> str:
+        """
+        Créer un spreadsheet TLB depuis des DataFrames (Feuil1 à Feuil5)
+
+        Args:
+            title: nom du document
+            portfolio_data: {nom_feuille ou nom_df: DataFrame}
+
+        Returns:
+            str: ID du spreadsheet
+        """
+        from modules.google_sheets_oauth_manager import PORTFOLIO_SHEET_MAPPING
+
+        sheets = {}
+        for name, df in portfolio_data.items():
+            values = [list(map(str, df.columns))]
+            values += df.astype(object).where(df.notna(), "").astype(str).values.tolist()
+            sheets[PORTFOLIO_SHEET_MAPPING.get(name, name)] = values
+        return self.create_spreadsheet(title, sheets, spreadsheet_id)
+
+    def get_values(self, spreadsheet_id: str, sheet_title: str) -> List[List]:
+        """Lire directement les valeurs d'une feuille (hors quota/latence)"""
+        with self._lock:
+            return [list(row) for row in self._find_sheet(spreadsheet_id, sheet_title)['values']]
+
+    def reset_stats(self):
+        """Remettre à zéro les compteurs de requêtes"""
+        with getattr(self, '_lock', threading.RLock()):
+            self.stats = {
+                'requests': 0,
+                'reads': 0,
+                'writes': 0,
+                'throttled': 0,
+                'cells_read': 0,
+                'cells_written': 0,
+                'by_endpoint': defaultdict(int)
+            }
+
+    def get_stats(self) -> Dict:
+        """Retourner une copie des statistiques"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['by_endpoint'] = dict(self.stats['by_endpoint'])
+            return stats
+
+    # === ROUTAGE DES REQUÊTES ===
+
+    def dispatch(self, method: str, url: str, body: Optional[bytes] = None,
+                 headers: Optional[Dict] = None) -> Tuple[int, bytes, Dict]:
+        """
+        Point d'entrée des transports : API JSON ou pages docs.google.com
+
+        Returns:
+            tuple: (code HTTP, contenu brut, en-têtes de réponse)
+        """
+        headers = headers or {}
+        if urlparse(url).netloc == DOCS_HOST:
+            return self._handle_docs(method, url, headers)
+
+        if isinstance(body, bytes):
+            body = body.decode('utf-8')
+        status, data = self.handle(method, url, json.loads(body) if body else None)
+        return status, json.dumps(data).encode('utf-8'), {'Content-Type': 'application/json; charset=UTF-8'}
+
+    def handle(self, method: str, url: str, body: Optional[Dict] = None) -> Tuple[int, Dict]:
+        """
+        Traiter un appel API Google
+
+        Args:
+            method: verbe HTTP
+            url: URL complète (avec query string)
+            body: corps JSON décodé
+
+        Returns:
+            tuple: (code HTTP, corps JSON de la réponse)
+        """
+        parsed = urlparse(url)
+        params = {k: v if len(v) > 1 else v[0] for k, v in parse_qs(parsed.query).items()}
+        path = unquote(parsed.path)
+        method = method.upper()
+        body = body or {}
+
+        kind = 'read' if method == 'GET' else 'write'
+        endpoint = self._endpoint_name(parsed.netloc, path, method)
+
+        self._simulate_latency()
+
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['by_endpoint'][endpoint] += 1
+
+            if self._quota_exceeded(kind):
+                self.stats['throttled'] += 1
+                return 429, self._error(429, "Quota exceeded for quota metric 'Requests' (simulé)", "RESOURCE_EXHAUSTED")
+
+            self.stats['reads' if kind == 'read' else 'writes'] += 1
+
+            try:
+                if parsed.netloc == SHEETS_HOST:
+                    return self._route_sheets(method, path, params, body)
+                if parsed.netloc == GOOGLEAPIS_HOST:
+                    return self._route_googleapis(method, path, params)
+                return 404, self._error(404, f"Hôte inconnu: {parsed.netloc}", "NOT_FOUND")
+            except KeyError as e:
+                return 404, self._error(404, f"Introuvable: {e}", "NOT_FOUND")
+            except ValueError as e:
+                return 400, self._error(400, str(e), "INVALID_ARGUMENT")
+
+    def _route_sheets(self, method: str, path: str, params: Dict, body: Dict) -> Tuple[int, Dict]:
+        """Endpoints Sheets v4"""
+        match = re.fullmatch(r"/v4/spreadsheets/([^/:]+)(.*)", path)
+        if not match:
+            return 404, self._error(404, "Endpoint Sheets inconnu", "NOT_FOUND")
+        spreadsheet_id, rest = match.groups()
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+
+        if rest == "" and method == "GET":
+            return 200, self._metadata(spreadsheet_id)
+
+        if rest == ":batchUpdate" and method == "POST":
+            # Atomique comme l'API réelle : tout ou rien
+            snapshot = copy.deepcopy(spreadsheet)
+            try:
+                replies = [self._apply_structural_request(spreadsheet_id, req) for req in body.get('requests', [])]
+            except Exception:
+                self._spreadsheets[spreadsheet_id] = snapshot
+                raise
+            self._touch(spreadsheet)
+            return 200, {'spreadsheetId': spreadsheet_id, 'replies': replies}
+
+        if rest == "/values:batchGet" and method == "GET":
+            ranges = params.get('ranges', [])
+            ranges = [ranges] if isinstance(ranges, str) else ranges
+            return 200, {
+                'spreadsheetId': spreadsheet_id,
+                'valueRanges': [self._read_range(spreadsheet_id, r, params) for r in ranges]
+            }
+
+        if rest == "/values:batchUpdate" and method == "POST":
+            responses = [self._write_range(spreadsheet_id, item['range'], item.get('values', []))
+                         for item in body.get('data', [])]
+            self._touch(spreadsheet)
+            return 200, {
+                'spreadsheetId': spreadsheet_id,
+                'totalUpdatedCells': sum(r['updatedCells'] for r in responses),
+                'responses': responses
+            }
+
+        if rest == "/values:batchClear" and method == "POST":
+            for range_name in body.get('ranges', []):
+                self._clear_range(spreadsheet_id, range_name)
+            self._touch(spreadsheet)
+            return 200, {'spreadsheetId': spreadsheet_id, 'clearedRanges': body.get('ranges', [])}
+
+        values_match = re.fullmatch(r"/values/(.+?)(:clear|:append)?", rest)
+        if values_match:
+            range_name, action = values_match.groups()
+            if action == ":clear" and method == "POST":
+                self._clear_range(spreadsheet_id, range_name)
+                self._touch(spreadsheet)
+                return 200, {'spreadsheetId': spreadsheet_id, 'clearedRange': range_name}
+            if action == ":append" and method == "POST":
+                sheet = self._resolve_range(spreadsheet_id, range_name)[0]
+                start_row = len(sheet['values'])
+                target = f"'{sheet['title']}'!A{start_row + 1}"
+                result = self._write_range(spreadsheet_id, target, body.get('values', []))
+                self._touch(spreadsheet)
+                return 200, {'spreadsheetId': spreadsheet_id, 'updates': result}
+            if action is None and method == "GET":
+                return 200, self._read_range(spreadsheet_id, range_name, params)
+            if action is None and method == "PUT":
+                result = self._write_range(spreadsheet_id, range_name, body.get('values', []))
+                self._touch(spreadsheet)
+                return 200, result
+
+        return 404, self._error(404, f"Endpoint Sheets non simulé: {method} {rest}", "NOT_FOUND")
+
+    def _handle_docs(self, method: str, url: str, headers: Dict) -> Tuple[int, bytes, Dict]:
+        """Pages publiques : /htmlview (liste des onglets) et /export?format=csv"""
+        parsed = urlparse(url)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        match = re.fullmatch(r"/spreadsheets/d/([^/]+)/(htmlview|export)", parsed.path)
+
+        self._simulate_latency()
+
+        with self._lock:
+            self.stats['requests'] += 1
+            self.stats['by_endpoint'][f"docs.{match.group(2) if match else 'unknown'}"] += 1
+
+            if self._quota_exceeded('read'):
+                self.stats['throttled'] += 1
+                return 429, b"Too Many Requests", {'Content-Type': 'text/plain'}
+            self.stats['reads'] += 1
+
+            if not match or match.group(1) not in self._spreadsheets:
+                return 404, b"Not Found", {'Content-Type': 'text/plain'}
+            spreadsheet_id, page = match.groups()
+            sheets = self._spreadsheets[spreadsheet_id]['sheets']
+
+            if page == "htmlview":
+                buttons = "".join(
+                    f'<li id="sheet-button-{s["sheetId"]}"><a href="#">{html.escape(s["title"])}</a></li>'
+                    for s in sheets
+                )
+                content = f'<html><body><ul id="sheet-menu">{buttons}</ul></body></html>'
+                return 200, content.encode('utf-8'), {'Content-Type': 'text/html; charset=utf-8'}
+
+            gid = int(params.get('gid', 0))
+            sheet = next((s for s in sheets if s['sheetId'] == gid), None)
+            if sheet is None:
+                return 400, b"Bad Request", {'Content-Type': 'text/plain'}
+
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerows(sheet['values'])
+            content = buffer.getvalue().encode('utf-8')
+            etag = f'"{hashlib.md5(content).hexdigest()}"'
+            if headers.get('If-None-Match') == etag:
+                return 304, b"", {'ETag': etag}
+
+            self.stats['cells_read'] += sum(len(row) for row in sheet['values'])
+            return 200, content, {'Content-Type': 'text/csv; charset=utf-8', 'ETag': etag}
+
+    def _route_googleapis(self, method: str, path: str, params: Dict) -> Tuple[int, Dict]:
+        """Endpoints Drive v3 et OAuth2 userinfo"""
+        if path in ("/oauth2/v2/userinfo", "/userinfo/v2/me"):
+            return 200, {'email': self.user_email, 'verified_email': True, 'name': 'Utilisateur Test'}
+
+        if path == "/drive/v3/files" and method == "GET":
+            files = [self._drive_file(sid) for sid in self._spreadsheets]
+            files.sort(key=lambda f: f['modifiedTime'], reverse=True)
+            page_size = int(params.get('pageSize', 100))
+            return 200, {'kind': 'drive#fileList', 'files': files[:page_size]}
+
+        file_match = re.fullmatch(r"/drive/v3/files/([^/]+)", path)
+        if file_match and method == "GET":
+            return 200, self._drive_file(file_match.group(1))
+
+        return 404, self._error(404, f"Endpoint non simulé: {method} {path}", "NOT_FOUND")
+
+    # === OPÉRATIONS SUR LES FEUILLES ===
+
+    def _add_sheet(self, spreadsheet_id: str, title: str, values: Optional[List[List]] = None,
+                   rows: int = 1000, cols: int = 26, sheet_id: Optional[int] = None) -> Dict:
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+        if any(s['title'] == title for s in spreadsheet['sheets']):
+            raise ValueError(f"Une feuille nommée '{title}' existe déjà")
+        values = [list(row) for row in (values or [])]
+        sheet = {
+            'sheetId': spreadsheet['next_sheet_id'] if sheet_id is None else sheet_id,
+            'title': title,
+            'index': len(spreadsheet['sheets']),
+            'rowCount': max(rows, len(values)),
+            'columnCount': max(cols, max((len(r) for r in values), default=0)),
+            'values': values
+        }
+        spreadsheet['next_sheet_id'] = max(spreadsheet['next_sheet_id'], sheet['sheetId']) + 1
+        spreadsheet['sheets'].append(sheet)
+        return sheet
+
+    def _apply_structural_request(self, spreadsheet_id: str, request: Dict) -> Dict:
+        """Appliquer une requête spreadsheets.batchUpdate"""
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+
+        if 'addSheet' in request:
+            props = request['addSheet'].get('properties', {})
+            grid = props.get('gridProperties', {})
+            if any(s['sheetId'] == props.get('sheetId') for s in spreadsheet['sheets']):
+                raise ValueError(f"sheetId {props['sheetId']} déjà utilisé")
+            sheet = self._add_sheet(spreadsheet_id, props.get('title', f"Feuille {len(spreadsheet['sheets']) + 1}"),
+                                    rows=grid.get('rowCount', 1000), cols=grid.get('columnCount', 26),
+                                    sheet_id=props.get('sheetId'))
+            return {'addSheet': {'properties': self._sheet_properties(sheet)}}
+
+        if 'deleteSheet' in request:
+            sheet_id = request['deleteSheet']['sheetId']
+            spreadsheet['sheets'] = [s for s in spreadsheet['sheets'] if s['sheetId'] != sheet_id]
+            for index, sheet in enumerate(spreadsheet['sheets']):
+                sheet['index'] = index
+            return {}
+
+        if 'updateSheetProperties' in request:
+            props = request['updateSheetProperties']['properties']
+            sheet = self._sheet_by_id(spreadsheet_id, props['sheetId'])
+            grid = props.get('gridProperties', {})
+            if 'title' in props:
+                sheet['title'] = props['title']
+            if 'rowCount' in grid:
+                sheet['rowCount'] = grid['rowCount']
+                del sheet['values'][grid['rowCount']:]
+            if 'columnCount' in grid:
+                sheet['columnCount'] = grid['columnCount']
+                for row in sheet['values']:
+                    del row[grid['columnCount']:]
+            return {}
+
+        if 'deleteDimension' in request:
+            dim_range = request['deleteDimension']['range']
+            sheet = self._sheet_by_id(spreadsheet_id, dim_range['sheetId'])
+            start, end = dim_range['startIndex'], dim_range['endIndex']
+            if dim_range.get('dimension', 'ROWS') == 'ROWS':
+                del sheet['values'][start:end]
+                sheet['rowCount'] = max(sheet['rowCount'] - (end - start), 1)
+            else:
+                for row in sheet['values']:
+                    del row[start:end]
+                sheet['columnCount'] = max(sheet['columnCount'] - (end - start), 1)
+            return {}
+
+        if 'appendDimension' in request:
+            append = request['appendDimension']
+            sheet = self._sheet_by_id(spreadsheet_id, append['sheetId'])
+            key = 'rowCount' if append.get('dimension', 'ROWS') == 'ROWS' else 'columnCount'
+            sheet[key] += append['length']
+            return {}
+
+        if 'updateCells' in request:
+            update = request['updateCells']
+            if 'start' in update:
+                start = update['start']
+                sheet = self._sheet_by_id(spreadsheet_id, start['sheetId'])
+                r0, c0 = start.get('rowIndex', 0), start.get('columnIndex', 0)
+                values = [[self._from_cell_data(cell) for cell in row.get('values', [])]
+                          for row in update.get('rows', [])]
+                if values and (r0 + len(values) > sheet['rowCount'] or
+                               c0 + max(len(r) for r in values) > sheet['columnCount']):
+                    raise ValueError(f"Range exceeds grid limits for sheet {sheet['title']}")
+                self._write_values(sheet, r0, c0, values)
+            else:
+                grid_range = update['range']
+                sheet = self._sheet_by_id(spreadsheet_id, grid_range['sheetId'])
+                r1, c1 = grid_range.get('endRowIndex'), grid_range.get('endColumnIndex')
+                self._clear_cells(sheet, grid_range.get('startRowIndex', 0), grid_range.get('startColumnIndex', 0),
+                                  None if r1 is None else r1 - 1, None if c1 is None else c1 - 1)
+            return {}
+
+        if 'appendCells' in request:
+            append = request['appendCells']
+            sheet = self._sheet_by_id(spreadsheet_id, append['sheetId'])
+            values = [[self._from_cell_data(cell) for cell in row.get('values', [])]
+                      for row in append.get('rows', [])]
+            last_row = max((i for i, row in enumerate(sheet['values']) if self._rstrip_row(row)), default=-1)
+            self._write_values(sheet, last_row + 1, 0, values)
+            return {}
+
+        raise ValueError(f"Requête batchUpdate non simulée: {list(request.keys())}")
+
+    def _read_range(self, spreadsheet_id: str, range_name: str, params: Dict) -> Dict:
+        sheet, r0, c0, r1, c1 = self._resolve_range(spreadsheet_id, range_name)
+        rows = sheet['values'][r0:(r1 + 1 if r1 is not None else None)]
+        values = [row[c0:(c1 + 1 if c1 is not None else None)] for row in rows]
+
+        # Comme l'API réelle : lignes et colonnes vides de fin supprimées
+        values = [self._rstrip_row(row) for row in values]
+        while values and not values[-1]:
+            values.pop()
+
+        if params.get('valueRenderOption', 'FORMATTED_VALUE') == 'FORMATTED_VALUE':
+            values = [[self._format_value(v) for v in row] for row in values]
+
+        self.stats['cells_read'] += sum(len(row) for row in values)
+        result = {'range': f"'{sheet['title']}'!{range_name.split('!')[-1]}", 'majorDimension': 'ROWS'}
+        if values:
+            result['values'] = values
+        return result
+
+    def _write_range(self, spreadsheet_id: str, range_name: str, values: List[List]) -> Dict:
+        sheet, r0, c0, _, _ = self._resolve_range(spreadsheet_id, range_name)
+        updated_cells = self._write_values(sheet, r0, c0, values)
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'updatedRange': range_name,
+            'updatedRows': len(values),
+            'updatedColumns': max((len(r) for r in values), default=0),
+            'updatedCells': updated_cells
+        }
+
+    def _write_values(self, sheet: Dict, r0: int, c0: int, values: List[List]) -> int:
+        grid = sheet['values']
+
+        for i, row_values in enumerate(values):
+            row_index = r0 + i
+            while len(grid) <= row_index:
+                grid.append([])
+            row = grid[row_index]
+            needed = c0 + len(row_values)
+            if len(row) < needed:
+                row.extend([""] * (needed - len(row)))
+            row[c0:needed] = ["" if v is None else v for v in row_values]
+
+        sheet['rowCount'] = max(sheet['rowCount'], len(grid))
+        sheet['columnCount'] = max(sheet['columnCount'], max((len(r) for r in grid), default=0))
+
+        updated_cells = sum(len(r) for r in values)
+        self.stats['cells_written'] += updated_cells
+        return updated_cells
+
+    def _clear_range(self, spreadsheet_id: str, range_name: str):
+        sheet, r0, c0, r1, c1 = self._resolve_range(spreadsheet_id, range_name)
+        self._clear_cells(sheet, r0, c0, r1, c1)
+
+    @staticmethod
+    def _clear_cells(sheet: Dict, r0: int, c0: int, r1: Optional[int], c1: Optional[int]):
+        r_end = len(sheet['values']) if r1 is None else min(r1 + 1, len(sheet['values']))
+        for row in sheet['values'][r0:r_end]:
+            c_end = len(row) if c1 is None else min(c1 + 1, len(row))
+            for col in range(c0, c_end):
+                row[col] = ""
+
+    # === OUTILS INTERNES ===
+
+    def _resolve_range(self, spreadsheet_id: str, range_name: str) -> Tuple[Dict, int, int, Optional[int], Optional[int]]:
+        """Feuille + bornes d'une plage A1 (un nom de feuille seul prime sur une référence de cellule)"""
+        sheets = self._spreadsheets[spreadsheet_id]['sheets']
+        if '!' not in range_name:
+            title = range_name.strip()
+            if title.startswith("'") and title.endswith("'"):
+                title = title[1:-1].replace("''", "'")
+            for sheet in sheets:
+                if sheet['title'] == title:
+                    return sheet, 0, 0, None, None
+
+        title, r0, c0, r1, c1 = parse_a1_range(range_name)
+        sheet = sheets[0] if title is None else self._find_sheet(spreadsheet_id, title)
+        return sheet, r0, c0, r1, c1
+
+    def _find_sheet(self, spreadsheet_id: str, title: str) -> Dict:
+        for sheet in self._spreadsheets[spreadsheet_id]['sheets']:
+            if sheet['title'] == title:
+                return sheet
+        raise ValueError(f"Unable to parse range: {title}")
+
+    def _sheet_by_id(self, spreadsheet_id: str, sheet_id: int) -> Dict:
+        for sheet in self._spreadsheets[spreadsheet_id]['sheets']:
+            if sheet['sheetId'] == sheet_id:
+                return sheet
+        raise KeyError(f"sheetId {sheet_id}")
+
+    @staticmethod
+    def _sheet_properties(sheet: Dict) -> Dict:
+        return {
+            'sheetId': sheet['sheetId'],
+            'title': sheet['title'],
+            'index': sheet['index'],
+            'sheetType': 'GRID',
+            'gridProperties': {'rowCount': sheet['rowCount'], 'columnCount': sheet['columnCount']}
+        }
+
+    def _metadata(self, spreadsheet_id: str) -> Dict:
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+        return {
+            'spreadsheetId': spreadsheet_id,
+            'properties': {'title': spreadsheet['title'], 'locale': 'fr_FR', 'timeZone': 'Europe/Paris'},
+            'sheets': [{'properties': self._sheet_properties(s)} for s in spreadsheet['sheets']],
+            'spreadsheetUrl': f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/edit"
+        }
+
+    def _drive_file(self, spreadsheet_id: str) -> Dict:
+        spreadsheet = self._spreadsheets[spreadsheet_id]
+        return {
+            'id': spreadsheet_id,
+            'name': spreadsheet['title'],
+            'mimeType': 'application/vnd.google-apps.spreadsheet',
+            'modifiedTime': spreadsheet['modifiedTime'],
+            'version': str(spreadsheet['version']),
+            'webViewLink': f"https://docs.google.com/spreadsheets/d/{spreadsheet_id}/edit"
+        }
+
+    def _touch(self, spreadsheet: Dict):
+        spreadsheet['version'] += 1
+        spreadsheet['modifiedTime'] = self._now()
+
+    @staticmethod
+    def _from_cell_data(cell: Dict):
+        """Valeur brute depuis un CellData (updateCells)"""
+        value = cell.get('userEnteredValue', {})
+        for key in ('numberValue', 'boolValue', 'stringValue', 'formulaValue'):
+            if key in value:
+                return value[key]
+        return ""
+
+    @staticmethod
+    def _format_value(value) -> str:
+        """Rendu FORMATTED_VALUE simplifié"""
+        if value is None:
+            return ""
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+
+    @staticmethod
+    def _rstrip_row(row: List) -> List:
+        end = len(row)
+        while end > 0 and row[end - 1] in ("", None):
+            end -= 1
+        return row[:end]
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+    @staticmethod
+    def _error(code: int, message: str, status: str) -> Dict:
+        return {'error': {'code': code, 'message': message, 'status': status}}
+
+    @staticmethod
+    def _endpoint_name(host: str, path: str, method: str) -> str:
+        """Nom d'endpoint normalisé pour les statistiques"""
+        if host == SHEETS_HOST:
+            if '/values:' in path:
+                return f"sheets.values.{path.rsplit(':', 1)[1]}"
+            if '/values/' in path:
+                action = path.rsplit(':', 1)[1] if re.search(r":(clear|append)$", path) else method.lower()
+                return f"sheets.values.{action}"
+            if path.endswith(':batchUpdate'):
+                return "sheets.batchUpdate"
+            return "sheets.get"
+        if path.startswith('/drive/v3/files/'):
+            return "drive.files.get"
+        if path.startswith('/drive/v3/files'):
+            return "drive.files.list"
+        return "oauth2.userinfo"
+
+    def _simulate_latency(self):
+        if self.latency_ms or self.latency_jitter_ms:
+            delay = self.latency_ms + random.uniform(0, self.latency_jitter_ms)
+            time.sleep(max(delay, 0) / 1000.0)
+
+    def _quota_exceeded(self, kind: str) -> bool:
+        """Fenêtre glissante : True si la requête dépasse le quota simulé"""
+        quota = self.read_quota_per_minute if kind == 'read' else self.write_quota_per_minute
+        if quota is None:
+            return False
+
+        now = time.monotonic()
+        window = self._request_times[kind]
+        while window and now - window[0] > self.quota_window_seconds:
+            window.popleft()
+
+        if len(window) >= quota:
+            return True
+        window.append(now)
+        return False
+
+
+class FakeSheetsAdapter(BaseAdapter):
+    """
+    Adaptateur requests qui route les appels vers le faux backend
+    (utilisé par gspread via une requests.Session)
+    """
+
+    def __init__(self, backend: FakeGoogleSheetsBackend):
+        super().__init__()
+        self.backend = backend
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status, content, headers = self.backend.dispatch(request.method, request.url, request.body,
+                                                         dict(request.headers))
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = content
+        response.raw = io.BytesIO(content)
+        response.headers.update(headers)
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'Too Many Requests' if status == 429 else ('OK' if status < 400 else 'Error')
+        return response
+
+    def close(self):
+        pass
+
+
+class FakeGoogleHttp:
+    """
+    Objet http compatible httplib2 pour googleapiclient.discovery.build
+    """
+
+    def __init__(self, backend: FakeGoogleSheetsBackend):
+        self.backend = backend
+
+    def request(self, uri, method="GET", body=None, headers=None, redirections=5, connection_type=None):
+        import httplib2
+
+        status, content, response_headers = self.backend.dispatch(method, uri, body, headers)
+        response_headers = {k.lower(): v for k, v in response_headers.items()}
+        response_headers['status'] = status
+        return httplib2.Response(response_headers), content
+
+
+def fake_sheets_session(backend: FakeGoogleSheetsBackend) -> requests.Session:
+    """Créer une requests.Session dont les appels Google passent par le faux backend"""
+    session = requests.Session()
+    adapter = FakeSheetsAdapter(backend)
+    session.mount(f"https://{SHEETS_HOST}/", adapter)
+    session.mount(f"https://{GOOGLEAPIS_HOST}/", adapter)
+    session.mount(f"https://{DOCS_HOST}/", adapter)
+    return session
+
+
+def build_fake_services(backend: FakeGoogleSheetsBackend):
+    """
+    Construire les clients gspread / Drive branchés sur le faux backend
+
+    Returns:
+        tuple: (client gspread, service Drive v3)
+    """
+    import gspread
+    from googleapiclient.discovery import build
+
+    gc = gspread.Client(auth=None, session=fake_sheets_session(backend))
+    drive_service = build('drive', 'v3', http=FakeGoogleHttp(backend), static_discovery=True, cache_discovery=False)
+    return gc, drive_service
+
+
+def attach_fake_backend(manager, backend: FakeGoogleSheetsBackend):
+    """
+    Brancher un TLBGoogleSheetsOAuthManager sur le faux backend (sans OAuth)
+
+    Args:
+        manager: instance de TLBGoogleSheetsOAuthManager
+        backend: faux backend à utiliser
+    """
+    gc, drive_service = build_fake_services(backend)
+    manager.attach_services(gc, drive_service, user_profile={'email': backend.user_email})
+    return manager
+
+
+# === BENCHMARK DE SYNCHRONISATION ===
+
+def _synthetic_portfolio(n_rows: int, seed: int = 42) -> Dict:
+    """Portfolio TLB synthétique (5 feuilles) pour les benchmarks"""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    tickers = [f"TCK{i:03d}" for i in range(max(n_rows // 5, 1))]
+    df_data = pd.DataFrame({
+        "Date": pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1800, n_rows), unit="D"),
+        "Compte": rng.choice(["PEA", "CTO"], n_rows),
+        "Ticker": rng.choice(tickers, n_rows),
+        "Type": rng.choice(["Actions", "ETF"], n_rows),
+        "Secteur": rng.choice(["Cyclique", "Sensible", "Défensif"], n_rows),
+        "Category": rng.choice(["Technologie", "Santé", "Industrie"], n_rows),
+        "Entreprise": rng.choice(tickers, n_rows),
+        "Quantity": rng.integers(1, 100, n_rows),
+        "Purchase price": rng.uniform(10, 500, n_rows).round(2),
+        "Purchase value": rng.uniform(100, 5000, n_rows).round(2),
+        "Current price": rng.uniform(10, 500, n_rows).round(2),
+        "Current value": rng.uniform(100, 5000, n_rows).round(2),
+        "Units": rng.choice(["EUR", "USD"], n_rows)
+    })
+    df_data["Date"] = df_data["Date"].dt.strftime('%Y-%m-%d')
+
+    return {
+        'df_data': df_data,
+        'df_limits': pd.DataFrame([["Type", "Actions", 70], ["Type", "ETF", 30]],
+                                  columns=["Variable1", "Variable2", "Valeur seuils"]),
+        'df_comments': pd.DataFrame(columns=["Date", "Commentaire", "Date action", "Actions"]),
+        'df_dividendes': pd.DataFrame(columns=["Date paiement", "Ticker", "Entreprise", "Dividende par action",
+                                               "Quantité détenue", "Montant brut (€)", "Montant net (€)", "Devise", "Type"]),
+        'df_events': pd.DataFrame([["2025-01-01", "Revue annuelle"]], columns=["Date", "Event"])
+    }
+
+
+def run_sync_benchmark(n_rows: int = 1000, iterations: int = 5, latency_ms: float = 50.0,
+                       write_quota_per_minute: Optional[int] = None) -> Dict:
+    """
+    Mesurer le débit list / load / save du gestionnaire OAuth sur le faux backend
+
+    Args:
+        n_rows: nombre de lignes de Feuil1
+        iterations: nombre de répétitions par opération
+        latency_ms: latence simulée par requête
+        write_quota_per_minute: quota d'écriture simulé (None = illimité)
+
+    Returns:
+        dict: temps moyens (ms) par opération et statistiques du backend
+    """
+    from modules.google_sheets_oauth_manager import TLBGoogleSheetsOAuthManager
+
+    backend = FakeGoogleSheetsBackend(latency_ms=latency_ms, write_quota_per_minute=write_quota_per_minute)
+    portfolio = _synthetic_portfolio(n_rows)
+    sheet_id = backend.load_portfolio("TLB Benchmark", portfolio)
+
+    manager = attach_fake_backend(TLBGoogleSheetsOAuthManager(), backend)
+    timings = defaultdict(list)
+
+    for _ in range(iterations):
+        start = time.perf_counter()
+        manager.list_user_spreadsheets(force_refresh=True)
+        timings['list_ms'].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        success, _ = manager.load_portfolio_data(sheet_id, force_refresh=True)
+        timings['load_ms'].append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        manager.save_portfolio_data(portfolio, sheet_id)
+        timings['save_ms'].append((time.perf_counter() - start) * 1000)
+
+    results = {name: round(sum(values) / len(values), 1) for name, values in timings.items()}
+    results['rows'] = n_rows
+    results['latency_ms'] = latency_ms
+    results['backend'] = backend.get_stats()
+    return results
+
+
+if __name__ == "__main__":
+    for rows in (100, 1000, 5000):
+        print(json.dumps(run_sync_benchmark(n_rows=rows, iterations=3), indent=2, default=str))
@@ -4,23 +4,51 @@
 import streamlit as st
 import pandas as pd
 import requests
-import io
+from requests.adapters import HTTPAdapter
 import os
 import re
+import html
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, Tuple, Optional
 from urllib.parse import urlparse, parse_qs
 
+# Feuilles attendues dans un portfolio TLB
+TLB_SHEET_NAMES = ["Feuil1", "Feuil2", "Feuil3", "Feuil4", "Feuil5"]
+
+# Correspondance par défaut si les métadonnées ne sont pas lisibles
+DEFAULT_SHEET_GIDS = {
+    "Feuil1": "0",           # Données principales
+    "Feuil2": "1",           # Limites  
+    "Feuil3": "2",           # Commentaires
+    "Feuil4": "3",           # Dividendes
+    "Feuil5": "4"            # Événements
+}
+
 class TLBGoogleSheetsManager:
     """
     Gestionnaire Google Sheets pour TLB INVESTOR
     Permet de charger un portfolio depuis Google Sheets avec authentification
+    - Découverte des vrais gid depuis les métadonnées du document
+    - Téléchargement parallèle des feuilles (session HTTP poolée)
+    - Revalidation ETag / If-None-Match pour ignorer les feuilles inchangées
     """
     
-    def __init__(self):
+    def __init__(self, max_workers: int = 5):
+        self.max_workers = max_workers
         self.session = requests.Session()
+        
+        # Pool de connexions dimensionné pour les téléchargements parallèles
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        
         self.temp_folder = ".temp"
         os.makedirs(self.temp_folder, exist_ok=True)
+        
+        # Cache ETag des feuilles publiques (conservé entre les reruns)
+        if 'tlb_public_sheets_cache' not in st.session_state:
+            st.session_state.tlb_public_sheets_cache = {}
     
     def extract_sheet_id(self, url: str) -> Optional[str]:
         """
@@ -53,7 +81,10 @@ class TLBGoogleSheetsManager:
     
     def get_sheet_names(self, sheet_id: str) -> Dict[str, str]:
         """
-        Récupérer les noms des feuilles du Google Sheet
+        Récupérer les noms des feuilles du Google Sheet avec leurs vrais gid
+        
+        La page htmlview d'un document partagé liste chaque onglet avec son gid.
+        Si elle n'est pas exploitable, on retombe sur les gid standards TLB.
         
         Args:
             sheet_id: ID du Google Sheet
@@ -62,22 +93,81 @@ class TLBGoogleSheetsManager:
             dict: {nom_feuille: gid} ou None si erreur
         """
         try:
-            # URL pour récupérer les métadonnées du sheet
-            meta_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/edit#gid=0"
+            meta_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/htmlview"
+            response = self.session.get(meta_url, timeout=15)
+            response.raise_for_status()
             
-            # Pour simplifier, on utilise les noms standards TLB
-            # En production, on pourrait parser la page pour les vrais noms
-            return {
-                "Feuil1": "0",           # Données principales
-                "Feuil2": "1",           # Limites  
-                "Feuil3": "2",           # Commentaires
-                "Feuil4": "3",           # Dividendes
-                "Feuil5": "4"            # Événements
-            }
+            sheet_gids = self.parse_sheet_gids(response.text)
+            if sheet_gids:
+                return sheet_gids
+            
+            st.info("ℹ️ Onglets non détectés, utilisation des gid standards TLB")
+            return dict(DEFAULT_SHEET_GIDS)
             
         except Exception as e:
             st.warning(f"Erreur récupération feuilles: {e}")
-            return {}
+            return dict(DEFAULT_SHEET_GIDS)
+    
+    @staticmethod
+    def parse_sheet_gids(page_content: str) -> Dict[str, str]:
+        """
+        Extraire {nom_feuille: gid} du HTML de la page htmlview
+        
+        Args:
+            page_content: contenu HTML de la page
+            
+        Returns:
+            dict: {nom_feuille: gid} (vide si rien trouvé)
+        """
+        sheet_gids = {}
+        
+        # Format script : items.push({name: "Feuil1", ... gid: "0", ...})
+        for name, gid in re.findall(r'name:\s*"((?:[^"\\]|\\.)*)"[^}]*?gid:\s*"(\d+)"', page_content):
+            try:
+                name = json.loads(f'"{name}"')  # Décoder les échappements JS (\u00e9, \/ ...)
+            except ValueError:
+                pass
+            sheet_gids.setdefault(name.strip(), gid)
+        
+        # Format HTML : <li id="sheet-button-0"><a ...>Feuil1</a></li>
+        if not sheet_gids:
+            for gid, name in re.findall(r'id="sheet-button-(\d+)"[^>]*>\s*<a[^>]*>([^<]+)</a>', page_content):
+                sheet_gids.setdefault(html.unescape(name).strip(), gid)
+        
+        return sheet_gids
+    
+    def _download_sheet(self, sheet_id: str, gid: str, etag: Optional[str] = None) -> Tuple[int, Optional[pd.DataFrame], Optional[str]]:
+        """
+        Télécharger et parser une feuille en flux (sans passer par st.*)
+        
+        Appelée depuis les threads de téléchargement : aucune interaction
+        avec st.session_state ici.
+        
+        Args:
+            sheet_id: ID du Google Sheet
+            gid: ID de la feuille
+            etag: ETag connu pour revalidation (If-None-Match)
+            
+        Returns:
+            tuple: (status_code, DataFrame ou None si 304, nouvel ETag)
+        """
+        csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
+        headers = {"If-None-Match": etag} if etag else {}
+        
+        with self.session.get(csv_url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 304:
+                return 304, None, etag
+            
+            response.raise_for_status()
+            
+            # Parsing en flux du corps CSV (pas de copie intermédiaire en mémoire)
+            response.raw.decode_content = True
+            try:
+                df = pd.read_csv(response.raw, encoding="utf-8")
+            except pd.errors.EmptyDataError:
+                df = pd.DataFrame()
+            
+            return response.status_code, df, response.headers.get("ETag")
     
     def read_sheet_as_csv(self, sheet_id: str, gid: str = "0") -> Optional[pd.DataFrame]:
         """
@@ -91,34 +181,81 @@ class TLBGoogleSheetsManager:
             DataFrame ou None si erreur
         """
         try:
-            # URL pour export CSV d'une feuille spécifique
-            csv_url = f"https://docs.google.com/spreadsheets/d/{sheet_id}/export?format=csv&gid={gid}"
-            
-            # Télécharger le CSV
-            response = self.session.get(csv_url)
-            response.raise_for_status()
-            
-            # Convertir en DataFrame
-            csv_data = io.StringIO(response.text)
-            df = pd.read_csv(csv_data)
-            
+            _, df, _ = self._download_sheet(sheet_id, gid)
             return df
             
         except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 403:
-                st.error("❌ Accès refusé au Google Sheet. Vérifiez les permissions de partage.")
-                return None
-            elif e.response.status_code == 404:
-                st.error("❌ Google Sheet non trouvé. Vérifiez l'URL.")
-                return None
-            else:
-                st.error(f"❌ Erreur HTTP {e.response.status_code}")
-                return None
+            self._report_http_error(e)
+            return None
                 
         except Exception as e:
             st.error(f"❌ Erreur lecture Google Sheet: {e}")
             return None
     
+    def _report_http_error(self, error: requests.exceptions.HTTPError):
+        """Afficher un message explicite selon le code HTTP"""
+        if error.response.status_code == 403:
+            st.error("❌ Accès refusé au Google Sheet. Vérifiez les permissions de partage.")
+        elif error.response.status_code == 404:
+            st.error("❌ Google Sheet non trouvé. Vérifiez l'URL.")
+        else:
+            st.error(f"❌ Erreur HTTP {error.response.status_code}")
+    
+    def read_all_sheets(self, sheet_id: str, sheet_gids: Dict[str, str]) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Télécharger toutes les feuilles en parallèle avec revalidation ETag
+        
+        Les feuilles inchangées (304 Not Modified) sont servies depuis le cache
+        de session sans être re-téléchargées ni re-parsées.
+        
+        Args:
+            sheet_id: ID du Google Sheet
+            sheet_gids: {nom_feuille: gid}
+            
+        Returns:
+            dict: {nom_feuille: DataFrame ou None si erreur}
+        """
+        cache = st.session_state.tlb_public_sheets_cache
+        results = {}
+        unchanged = []
+        
+        if not sheet_gids:
+            return results
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(sheet_gids))) as executor:
+            futures = {}
+            for sheet_name, gid in sheet_gids.items():
+                cached = cache.get(f"{sheet_id}:{gid}", {})
+                future = executor.submit(self._download_sheet, sheet_id, gid, cached.get('etag'))
+                futures[future] = (sheet_name, gid)
+            
+            for future in as_completed(futures):
+                sheet_name, gid = futures[future]
+                cache_key = f"{sheet_id}:{gid}"
+                try:
+                    status, df, etag = future.result()
+                    
+                    if status == 304 and cache_key in cache:
+                        results[sheet_name] = cache[cache_key]['df'].copy()
+                        unchanged.append(sheet_name)
+                        continue
+                    
+                    results[sheet_name] = df
+                    if etag and df is not None:
+                        cache[cache_key] = {'etag': etag, 'df': df.copy()}
+                    
+                except requests.exceptions.HTTPError as e:
+                    self._report_http_error(e)
+                    results[sheet_name] = None
+                except Exception as e:
+                    st.error(f"❌ Erreur lecture {sheet_name}: {e}")
+                    results[sheet_name] = None
+        
+        if unchanged:
+            st.info(f"⚡ Feuilles inchangées (cache): {', '.join(sorted(unchanged))}")
+        
+        return results
+    
     def load_portfolio_from_sheets(self, sheet_url: str, username: str) -> Tuple[bool, str]:
         """
         Charger un portfolio complet depuis Google Sheets
@@ -141,23 +278,30 @@ class TLBGoogleSheetsManager:
             if not sheet_names:
                 return False, "Impossible de récupérer les feuilles du document"
             
-            # Charger chaque feuille
+            # Ne garder que les feuilles TLB présentes dans le document
+            tlb_gids = {name: gid for name, gid in sheet_names.items() if name in TLB_SHEET_NAMES}
+            if not tlb_gids:
+                # Onglets renommés : correspondance par position (ordre du document)
+                tlb_gids = dict(zip(TLB_SHEET_NAMES, sheet_names.values()))
+            
+            # Charger toutes les feuilles en un seul aller-retour parallèle
             sheets_data = {}
             
             with st.spinner("📊 Chargement des données depuis Google Sheets..."):
-                for sheet_name, gid in sheet_names.items():
-                    with st.spinner(f"📄 Chargement {sheet_name}..."):
-                        df = self.read_sheet_as_csv(sheet_id, gid)
-                        
-                        if df is not None and not df.empty:
-                            # CORRECTION : Nettoyer les données après chargement
-                            df = self.clean_dataframe(df, sheet_name)
-                            sheets_data[sheet_name] = df
-                            st.success(f"✅ {sheet_name}: {len(df)} lignes chargées")
-                        else:
-                            # Créer DataFrame vide si la feuille n'existe pas
-                            sheets_data[sheet_name] = self.create_empty_dataframe(sheet_name)
-                            st.info(f"⚪ {sheet_name}: Feuille vide, structure par défaut créée")
+                raw_sheets = self.read_all_sheets(sheet_id, tlb_gids)
+                
+                for sheet_name in TLB_SHEET_NAMES:
+                    df = raw_sheets.get(sheet_name)
+                    
+                    if df is not None and not df.empty:
+                        # CORRECTION : Nettoyer les données après chargement
+                        df = self.clean_dataframe(df, sheet_name)
+                        sheets_data[sheet_name] = df
+                        st.success(f"✅ {sheet_name}: {len(df)} lignes chargées")
+                    else:
+                        # Créer DataFrame vide si la feuille n'existe pas
+                        sheets_data[sheet_name] = self.create_empty_dataframe(sheet_name)
+                        st.info(f"⚪ {sheet_name}: Feuille vide, structure par défaut créée")
             
             # Vérifier qu'on a au moins les données principales
             if sheets_data.get("Feuil1") is None or sheets_data["Feuil1"].empty:
@@ -475,8 +619,9 @@ def test_google_sheets_access(sheet_url: str) -> Dict[str, any]:
         if not sheet_id:
             return {"success": False, "error": "URL invalide"}
         
-        # Tester l'accès à la première feuille
-        df = manager.read_sheet_as_csv(sheet_id, "0")
+        # Tester l'accès à la feuille principale (vrai gid si détecté)
+        gid = manager.get_sheet_names(sheet_id).get("Feuil1", "0")
+        df = manager.read_sheet_as_csv(sheet_id, gid)
         
         if df is not None:
             return {
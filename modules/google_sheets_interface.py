@@ -6,8 +6,10 @@ Interface Streamlit pour l'intégration Google Sheets OAuth2
 import streamlit as st
 import os
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from .google_sheets_oauth_manager import TLBGoogleSheetsOAuthManager
+from .google_sheets_write_scheduler import get_write_scheduler
+from .google_sheets_sync import get_sync_worker, merged_to_dataframes
 
 class TLBGoogleSheetsInterface:
     """
@@ -265,12 +267,151 @@ class TLBGoogleSheetsInterface:
         except Exception as e:
             st.warning(f"⚠️ Erreur actualisation automatique : {e}")
     
+    def _queue_portfolio_save(self, sheet_id: str) -> Tuple[bool, str]:
+        """
+        Déposer le portfolio courant dans la file de sauvegarde
+        
+        Returns:
+            tuple: (success, message)
+        """
+        if not sheet_id:
+            return False, "Aucun Google Sheet sélectionné"
+        
+        if not self.manager._ensure_services():
+            return False, "Services Google non initialisés"
+        
+        portfolio_data = {
+            'df_data': st.session_state.df_data,
+            'df_limits': st.session_state.df_limits,
+            'df_comments': st.session_state.df_comments,
+            'df_dividendes': st.session_state.df_dividendes,
+            'df_events': st.session_state.df_events
+        }
+        
+        user_profile = st.session_state.tlb_gs_cache.get('user_profile') or {}
+        user_key = user_profile.get('email') or st.session_state.get('username', 'default')
+        
+        job_id = get_write_scheduler().submit(self.manager.gc, sheet_id, portfolio_data, user_key=user_key)
+        st.session_state.gs_save_job_id = job_id
+        return True, "Sauvegarde en file d'attente"
+    
+    def _display_save_status(self, container=st, key: str = "main"):
+        """
+        Afficher l'état de la dernière sauvegarde en file
+        
+        Args:
+            container: st ou st.sidebar
+            key: suffixe des clés de widgets
+        """
+        job_id = st.session_state.get('gs_save_job_id')
+        if not job_id:
+            return
+        
+        scheduler = get_write_scheduler()
+        job = scheduler.get_job(job_id)
+        if job is None:
+            st.session_state.gs_save_job_id = None
+            return
+        
+        if job['status'] in ('pending', 'running', 'retrying'):
+            queue_depth = scheduler.get_status()['queue_depth']
+            retry_info = f" (tentative {job['attempts'] + 1})" if job['status'] == 'retrying' else ""
+            container.info(f"⏳ Sauvegarde en cours{retry_info} • File: {queue_depth}")
+            if container.button("🔄 Actualiser", key=f"refresh_gs_save_{key}"):
+                st.rerun()
+        
+        elif job['status'] == 'done':
+            container.success(f"✅ Sauvegardé en {job['latency_ms'] / 1000:.1f}s: {', '.join(job['sheets'])}")
+            self.manager.clear_cache(f"portfolio_data_{job['sheet_id']}")
+            st.session_state.data_modified = False
+            st.session_state.gs_save_job_id = None
+        
+        elif job['status'] == 'failed':
+            container.error(f"❌ Sauvegarde échouée après {job['attempts']} tentative(s): {job['error']}")
+            st.session_state.gs_save_job_id = None
+        
+        elif job['status'] == 'superseded':
+            # Remplacée par une sauvegarde plus récente
+            st.session_state.gs_save_job_id = None
+    
+    def _display_incremental_sync(self, sheet_id: str):
+        """
+        Synchronisation incrémentale en arrière-plan (sidebar)
+        Seules les lignes modifiées transitent ; les conflits sont signalés
+        
+        Args:
+            sheet_id: ID du Google Sheet sélectionné
+        """
+        worker = get_sync_worker()
+        
+        policy = st.sidebar.radio(
+            "En cas de conflit:",
+            options=["remote", "local"],
+            format_func=lambda x: "☁️ Garder Google Sheets" if x == "remote" else "💻 Garder cet appareil",
+            key="gs_sync_conflict_policy",
+            horizontal=True
+        )
+        
+        if worker.is_running(sheet_id):
+            st.sidebar.info("🔄 Synchronisation en cours...")
+            if st.sidebar.button("🔄 Actualiser", key="refresh_gs_sync"):
+                st.rerun()
+        
+        elif st.sidebar.button("🔄 Sync incrémental", key="sidebar_incremental_sync_gs"):
+            if not self.manager._ensure_services():
+                st.sidebar.error("❌ Services Google non initialisés")
+            else:
+                portfolio_data = {
+                    'df_data': st.session_state.df_data,
+                    'df_limits': st.session_state.df_limits,
+                    'df_comments': st.session_state.df_comments,
+                    'df_dividendes': st.session_state.df_dividendes,
+                    'df_events': st.session_state.df_events
+                }
+                worker.submit(self.manager.gc, self.manager.drive_service, sheet_id, portfolio_data, policy)
+                st.sidebar.info("🔄 Synchronisation lancée en arrière-plan")
+        
+        # Récupérer un résultat terminé (une seule fois) et l'appliquer
+        result = worker.collect(sheet_id)
+        if result is not None:
+            if result.get('merged'):
+                for df_name, df in merged_to_dataframes(result['merged']).items():
+                    st.session_state[df_name] = df
+                
+                from .tab0_constants import save_to_excel
+                save_to_excel()
+            
+            if result['status'] not in ('error', 'conflict'):
+                st.session_state.data_modified = False
+                self.manager.clear_cache(f"portfolio_data_{sheet_id}")
+            st.session_state.gs_sync_last_result = result
+        
+        last = st.session_state.get('gs_sync_last_result')
+        if last:
+            if last['status'] == 'error':
+                st.sidebar.error(f"❌ Sync échoué: {last['error']}")
+            elif last['status'] == 'up_to_date':
+                st.sidebar.success("✅ Déjà à jour")
+            elif last['status'] == 'conflict':
+                st.sidebar.warning("⚠️ Colonnes différentes et Google Sheets modifié : rien n'a été écrit. "
+                                   "Rechargez le Sheet ou alignez les colonnes avant de synchroniser.")
+            else:
+                st.sidebar.success(f"✅ ⬇️ {last['pulled']} • ⬆️ {last['pushed']} lignes ({last['duration_ms']:.0f} ms)")
+            
+            if last['conflicts']:
+                with st.sidebar.expander(f"⚠️ {len(last['conflicts'])} conflit(s)"):
+                    for conflict in last['conflicts']:
+                        kept = {"remote": "Google Sheets", "local": "cet appareil"}.get(conflict['kept'], "aucun (non écrit)")
+                        st.markdown(f"**{conflict['sheet']}** • {conflict['key']} → conservé: {kept}")
+                        st.caption(f"💻 {conflict['local']}")
+                        st.caption(f"☁️ {conflict['remote']}")
+    
     def display_save_interface(self) -> bool:
         """
         Afficher l'interface de sauvegarde vers Google Sheets
         
         Returns:
-            bool: True si sauvegarde réussie
+            bool: True si sauvegarde mise en file d'attente
         """
         cache = st.session_state.tlb_gs_cache
         
@@ -299,29 +440,17 @@ class TLBGoogleSheetsInterface:
                         key="save_to_gs", 
                         type="primary" if has_modifications else "secondary"):
                 
-                with st.spinner("💾 Sauvegarde vers Google Sheets..."):
-                    # Préparer les données
-                    portfolio_data = {
-                        'df_data': st.session_state.df_data,
-                        'df_limits': st.session_state.df_limits,
-                        'df_comments': st.session_state.df_comments, 
-                        'df_dividendes': st.session_state.df_dividendes,
-                        'df_events': st.session_state.df_events
-                    }
-                    
-                    # Sauvegarder
-                    success, message = self.manager.save_portfolio_data(
-                        portfolio_data, 
-                        cache['selected_sheet_id']
-                    )
-                    
-                    if success:
-                        st.success(f"✅ {message}")
-                        st.session_state.data_modified = False
-                        return True
-                    else:
-                        st.error(f"❌ {message}")
-                        return False
+                # Sauvegarde asynchrone (file d'attente avec quotas et retry)
+                success, message = self._queue_portfolio_save(cache['selected_sheet_id'])
+                
+                if success:
+                    st.info(f"⏳ {message}")
+                    return True
+                else:
+                    st.error(f"❌ {message}")
+                    return False
+            
+            self._display_save_status()
         
         with col2:
             # Lien vers le Google Sheet
@@ -432,25 +561,17 @@ class TLBGoogleSheetsInterface:
                                    key="sidebar_save_gs",
                                    type="primary" if has_modifications else "secondary"):
                     
-                    portfolio_data = {
-                        'df_data': st.session_state.df_data,
-                        'df_limits': st.session_state.df_limits,
-                        'df_comments': st.session_state.df_comments,
-                        'df_dividendes': st.session_state.df_dividendes,
-                        'df_events': st.session_state.df_events
-                    }
-                    
-                    success, message = self.manager.save_portfolio_data(
-                        portfolio_data,
+                    success, message = self._queue_portfolio_save(
                         st.session_state.tlb_gs_cache.get('selected_sheet_id')
                     )
                     
-                    if success:
-                        st.sidebar.success("✅ Sauvegardé")
-                        st.session_state.data_modified = False
-                        st.rerun()
-                    else:
-                        st.sidebar.error("❌ Erreur")
+                    if not success:
+                        st.sidebar.error(f"❌ {message}")
+                
+                self._display_save_status(st.sidebar, key="sidebar")
+                
+                # Synchronisation incrémentale bidirectionnelle
+                self._display_incremental_sync(st.session_state.tlb_gs_cache.get('selected_sheet_id'))
             
             # Bouton déconnexion
             st.sidebar.markdown("---")
@@ -501,6 +622,9 @@ class TLBGoogleSheetsInterface:
             st.sidebar.markdown("**📊 Statistiques:**")
             st.sidebar.json(cache_stats)
             
+            st.sidebar.markdown("**💾 File de sauvegarde:**")
+            st.sidebar.json(get_write_scheduler().get_status())
+            
             if st.sidebar.button("🗑️ Vider cache", key="clear_gs_cache"):
                 self.manager.clear_cache()
                 st.sidebar.success("Cache vidé")
@@ -6,6 +6,7 @@ Chaque utilisateur accède à SON propre Google Sheet privé
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import gspread
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -18,6 +19,15 @@ from typing import Dict, Tuple, Optional, List
 import hashlib
 import time
 
+# Mapping des DataFrames TLB vers les feuilles Google Sheets
+PORTFOLIO_SHEET_MAPPING = {
+    'df_data': 'Feuil1',
+    'df_limits': 'Feuil2',
+    'df_comments': 'Feuil3',
+    'df_dividendes': 'Feuil4',
+    'df_events': 'Feuil5'
+}
+
 class TLBGoogleSheetsOAuthManager:
     """
     Gestionnaire Google Sheets avec OAuth2 pour TLB INVESTOR
@@ -137,6 +147,47 @@ class TLBGoogleSheetsOAuthManager:
         except Exception as e:
             st.error(f"❌ Erreur initialisation services: {e}")
     
+    def _ensure_services(self) -> bool:
+        """
+        Reconstruire les services Google depuis les credentials en session
+        (le gestionnaire est recréé à chaque rerun Streamlit)
+
+        Returns:
+            bool: True si les services sont disponibles
+        """
+        if self.gc is not None and self.drive_service is not None:
+            return True
+
+        stored = st.session_state.tlb_gs_cache.get('credentials')
+        if not stored:
+            return False
+
+        try:
+            self.credentials = Credentials(**stored)
+            if not self.credentials.valid and self.credentials.refresh_token:
+                self.credentials.refresh(Request())
+                st.session_state.tlb_gs_cache['credentials']['token'] = self.credentials.token
+            self._init_services()
+            return self.gc is not None
+        except Exception as e:
+            st.warning(f"⚠️ Session Google expirée, reconnectez-vous: {e}")
+            return False
+
+    def attach_services(self, gc, drive_service, user_profile: Optional[Dict] = None):
+        """
+        Injecter des services déjà construits (sans passer par le flow OAuth2)
+        Utilisé par le faux backend local pour les benchmarks hors ligne
+
+        Args:
+            gc: client gspread
+            drive_service: service Google Drive v3
+            user_profile: profil utilisateur à exposer
+        """
+        self.gc = gc
+        self.drive_service = drive_service
+        st.session_state.tlb_gs_cache['user_profile'] = user_profile or {}
+        st.session_state.tlb_gs_cache['authenticated'] = True
+
     def _get_user_profile(self) -> Dict:
         """Récupérer le profil utilisateur Google"""
         try:
@@ -163,6 +214,9 @@ class TLBGoogleSheetsOAuthManager:
         if not force_refresh and self._is_cache_valid(cache_key):
             return st.session_state.tlb_gs_cache['data_cache'][cache_key]
         
+        if not self._ensure_services():
+            return []
+        
         try:
             # Rechercher les Google Sheets
             query = "mimeType='application/vnd.google-apps.spreadsheet'"
@@ -212,6 +266,9 @@ class TLBGoogleSheetsOAuthManager:
             cached_data = st.session_state.tlb_gs_cache['data_cache'][cache_key]
             return True, cached_data
         
+        if not self._ensure_services():
+            return False, "Services Google non initialisés"
+        
         try:
             # Ouvrir le spreadsheet
             spreadsheet = self.gc.open_by_key(sheet_id)
@@ -279,6 +336,10 @@ class TLBGoogleSheetsOAuthManager:
             # Supprimer les lignes complètement vides
             df = df.dropna(how='all').reset_index(drop=True)
             
+            # Supprimer les colonnes vides de la grille (sans en-tête : 'Unnamed: n')
+            unnamed = df.columns.astype(str).str.startswith('Unnamed:')
+            df = df.loc[:, ~(unnamed & df.isna().all().to_numpy())]
+            
             return df
             
         except ImportError:
@@ -389,55 +450,15 @@ class TLBGoogleSheetsOAuthManager:
             if not sheet_id:
                 return False, "Aucun Google Sheet sélectionné"
         
+        if not self._ensure_services():
+            return False, "Services Google non initialisés"
+        
         try:
-            # Ouvrir le spreadsheet
-            spreadsheet = self.gc.open_by_key(sheet_id)
-            
-            # Mapping des DataFrames vers les feuilles
-            sheet_mapping = {
-                'df_data': 'Feuil1',
-                'df_limits': 'Feuil2', 
-                'df_comments': 'Feuil3',
-                'df_dividendes': 'Feuil4',
-                'df_events': 'Feuil5'
-            }
-            
-            saved_sheets = []
-            
-            for df_name, sheet_name in sheet_mapping.items():
-                if df_name in portfolio_data:
-                    df = portfolio_data[df_name]
-                    
-                    try:
-                        # Essayer d'obtenir la feuille existante
-                        try:
-                            worksheet = spreadsheet.worksheet(sheet_name)
-                        except gspread.WorksheetNotFound:
-                            # Créer la feuille si elle n'existe pas
-                            worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=1000, cols=20)
-                        
-                        # Vider la feuille
-                        worksheet.clear()
-                        
-                        # Écrire les données
-                        if not df.empty:
-                            # Méthode optimisée avec gspread_dataframe
-                            try:
-                                from gspread_dataframe import set_with_dataframe
-                                set_with_dataframe(worksheet, df, include_index=False)
-                            except ImportError:
-                                # Fallback: méthode standard
-                                worksheet.update([df.columns.values.tolist()] + df.values.tolist())
-                        
-                        saved_sheets.append(sheet_name)
-                        
-                    except Exception as e:
-                        st.warning(f"⚠️ Erreur sauvegarde {sheet_name}: {e}")
+            # Écriture atomique des cinq feuilles en un seul batchUpdate
+            saved_sheets = self.commit_portfolio_batch(self.gc, sheet_id, portfolio_data)
             
             # Invalider le cache pour ce sheet
-            cache_key = f"portfolio_data_{sheet_id}"
-            if cache_key in st.session_state.tlb_gs_cache['data_cache']:
-                del st.session_state.tlb_gs_cache['data_cache'][cache_key]
+            self.clear_cache(f"portfolio_data_{sheet_id}")
             
             if saved_sheets:
                 return True, f"Sauvegarde réussie: {', '.join(saved_sheets)}"
@@ -447,6 +468,120 @@ class TLBGoogleSheetsOAuthManager:
         except Exception as e:
             return False, f"Erreur sauvegarde: {str(e)}"
     
+    # === ÉCRITURE GROUPÉE (batchUpdate) ===
+    
+    @staticmethod
+    def _cell_data(value) -> Dict:
+        """Convertir une valeur Python/pandas en CellData Sheets API"""
+        # pd.NaT / pd.NA ne sont pas des scalaires numpy : is_scalar pandas les couvre (avant la branche datetime)
+        if value is None or (pd.api.types.is_scalar(value) and pd.isna(value)):
+            return {}
+        if isinstance(value, (bool, np.bool_)):
+            return {'userEnteredValue': {'boolValue': bool(value)}}
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            return {'userEnteredValue': {'numberValue': float(value)}}
+        if isinstance(value, (pd.Timestamp, datetime)):
+            fmt = '%Y-%m-%d' if (value.hour, value.minute, value.second) == (0, 0, 0) else '%Y-%m-%d %H:%M:%S'
+            return {'userEnteredValue': {'stringValue': value.strftime(fmt)}}
+        return {'userEnteredValue': {'stringValue': str(value)}}
+    
+    @classmethod
+    def build_portfolio_batch_requests(cls, sheets_properties: List[Dict],
+                                       portfolio_data: Dict[str, pd.DataFrame]) -> Tuple[List[Dict], List[str]]:
+        """
+        Construire les requêtes spreadsheets.batchUpdate pour réécrire le portfolio
+        
+        Chaque feuille est créée si besoin, agrandie si nécessaire, vidée puis réécrite.
+        L'API applique un batchUpdate de façon atomique : soit toutes les feuilles
+        sont écrites, soit aucune.
+        
+        Args:
+            sheets_properties: propriétés des feuilles existantes (métadonnées du spreadsheet)
+            portfolio_data: Dictionnaire des DataFrames à sauvegarder
+            
+        Returns:
+            tuple: (liste des requêtes, noms des feuilles écrites)
+        """
+        existing = {props['title']: props for props in sheets_properties}
+        next_sheet_id = max((props['sheetId'] for props in sheets_properties), default=0) + 1
+        batch_requests = []
+        sheet_names = []
+        
+        for df_name, sheet_name in PORTFOLIO_SHEET_MAPPING.items():
+            if df_name not in portfolio_data:
+                continue
+            
+            df = portfolio_data[df_name]
+            n_rows, n_cols = len(df) + 1, max(len(df.columns), 1)
+            props = existing.get(sheet_name)
+            
+            if props is None:
+                # Créer la feuille (ID choisi ici pour la référencer dans le même batch)
+                sheet_id = next_sheet_id
+                next_sheet_id += 1
+                batch_requests.append({'addSheet': {'properties': {
+                    'sheetId': sheet_id,
+                    'title': sheet_name,
+                    'gridProperties': {'rowCount': max(1000, n_rows), 'columnCount': max(20, n_cols)}
+                }}})
+            else:
+                sheet_id = props['sheetId']
+                grid = props.get('gridProperties', {})
+                row_count, col_count = grid.get('rowCount', 0), grid.get('columnCount', 0)
+                
+                # Agrandir la grille si les nouvelles données dépassent
+                if n_rows > row_count or n_cols > col_count:
+                    batch_requests.append({'updateSheetProperties': {
+                        'properties': {
+                            'sheetId': sheet_id,
+                            'gridProperties': {'rowCount': max(row_count, n_rows),
+                                               'columnCount': max(col_count, n_cols)}
+                        },
+                        'fields': 'gridProperties(rowCount,columnCount)'
+                    }})
+                
+                # Vider les anciennes valeurs
+                batch_requests.append({'updateCells': {'range': {'sheetId': sheet_id}, 'fields': 'userEnteredValue'}})
+            
+            # Écrire en-tête + données
+            rows = [{'values': [cls._cell_data(col) for col in df.columns]}]
+            rows += [{'values': [cls._cell_data(value) for value in row]}
+                     for row in df.itertuples(index=False, name=None)]
+            batch_requests.append({'updateCells': {
+                'start': {'sheetId': sheet_id, 'rowIndex': 0, 'columnIndex': 0},
+                'rows': rows,
+                'fields': 'userEnteredValue'
+            }})
+            sheet_names.append(sheet_name)
+        
+        return batch_requests, sheet_names
+    
+    @classmethod
+    def commit_portfolio_batch(cls, gc, sheet_id: str, portfolio_data: Dict[str, pd.DataFrame]) -> List[str]:
+        """
+        Écrire le portfolio en une seule transaction (2 lectures + 1 écriture API)
+        
+        N'utilise pas st.session_state : peut être appelé depuis un thread de fond.
+        Les erreurs API (429, 5xx...) sont propagées à l'appelant.
+        
+        Args:
+            gc: client gspread
+            sheet_id: ID du Google Sheet
+            portfolio_data: Dictionnaire des DataFrames à sauvegarder
+            
+        Returns:
+            List[str]: noms des feuilles écrites
+        """
+        spreadsheet = gc.open_by_key(sheet_id)
+        metadata = spreadsheet.fetch_sheet_metadata({'fields': 'sheets.properties'})
+        sheets_properties = [sheet['properties'] for sheet in metadata.get('sheets', [])]
+        
+        batch_requests, sheet_names = cls.build_portfolio_batch_requests(sheets_properties, portfolio_data)
+        if batch_requests:
+            spreadsheet.batch_update({'requests': batch_requests})
+        
+        return sheet_names
+    
     def _is_cache_valid(self, cache_key: str) -> bool:
         """Vérifier si le cache est valide"""
         cache = st.session_state.tlb_gs_cache
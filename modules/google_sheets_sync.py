@@ -0,0 +1,607 @@
+# modules/google_sheets_sync.py
+"""
+Synchronisation incrémentale local <-> Google Sheets pour TLB INVESTOR
+- Réplique locale SQLite (.temp) avec empreinte et version par ligne
+- Vérification de version Drive : aucun téléchargement si le Sheet n'a pas bougé
+- Fusion à trois voies (base / local / distant) et détection des conflits
+- Envoi des seuls deltas (updateCells / deleteDimension / appendCells) en un batchUpdate
+- Exécution en arrière-plan (le thread UI récupère le résultat au rerun suivant)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from .google_sheets_oauth_manager import TLBGoogleSheetsOAuthManager, PORTFOLIO_SHEET_MAPPING
+
+SYNC_DIR = ".temp"
+
+# Colonnes identifiant une ligne (les doublons sont distingués par leur rang d'apparition)
+SYNC_KEY_COLUMNS = {
+    'Feuil1': ["Date", "Compte", "Ticker", "Purchase price"],
+    'Feuil2': ["Variable1", "Variable2"],
+    'Feuil3': ["Date", "Commentaire"],
+    'Feuil4': ["Date paiement", "Ticker"],
+    'Feuil5': ["Date", "Event"]
+}
+
+NUMBER_PATTERN = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][-+]?\d+)?")
+ISO_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Origine des dates Sheets (dateTimeRenderOption=SERIAL_NUMBER : jours depuis le 30/12/1899)
+SHEETS_EPOCH = pd.Timestamp("1899-12-30")
+
+SYNC_DATE_COLUMNS = {
+    'Feuil1': ["Date"],
+    'Feuil3': ["Date", "Date action"],
+    'Feuil4': ["Date paiement"],
+    'Feuil5': ["Date"]
+}
+
+
+# === NORMALISATION DES VALEURS ===
+
+def canonical_value(value, is_date: bool = False) -> str:
+    """
+    Représentation texte stable d'une cellule (identique côté local et Sheets)
+
+    Args:
+        value: valeur pandas / Python / API Sheets
+        is_date: colonne de type date
+
+    Returns:
+        str: valeur normalisée ('' si vide)
+    """
+    if value is None or (np.isscalar(value) and not isinstance(value, str) and pd.isna(value)):
+        return ""
+
+    if is_date and value != "":
+        try:
+            if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, (bool, np.bool_)):
+                ts = (SHEETS_EPOCH + pd.to_timedelta(float(value), unit='D')).round('s')
+            elif isinstance(value, str):
+                # Saisie texte au format français (05/03/2025 = 5 mars), ISO sinon
+                text = value.strip()
+                ts = pd.to_datetime(text, dayfirst=not ISO_DATE_PATTERN.match(text))
+            else:
+                ts = pd.Timestamp(value)
+            if pd.isna(ts):
+                return ""
+            return ts.strftime('%Y-%m-%d' if (ts.hour, ts.minute, ts.second) == (0, 0, 0) else '%Y-%m-%d %H:%M:%S')
+        except (ValueError, TypeError):
+            return str(value).strip()
+
+    if isinstance(value, (bool, np.bool_)):
+        return "TRUE" if value else "FALSE"
+
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return format(float(value), '.10g')
+
+    text = str(value).strip()
+    if text in ("nan", "NaN", "None", "NaT"):
+        return ""
+    if NUMBER_PATTERN.fullmatch(text):
+        return format(float(text), '.10g')
+    return text
+
+
+def canonical_rows(sheet_name: str, columns: List[str], rows) -> List[List[str]]:
+    """Normaliser des lignes (itérable de tuples) selon les colonnes de la feuille"""
+    date_flags = [col in SYNC_DATE_COLUMNS.get(sheet_name, []) for col in columns]
+    return [[canonical_value(v, date_flags[i] if i < len(date_flags) else False) for i, v in enumerate(row)]
+            for row in rows]
+
+
+def row_keys(sheet_name: str, columns: List[str], rows: List[List[str]]) -> List[str]:
+    """
+    Clé d'identité de chaque ligne (colonnes clés + rang d'apparition)
+
+    Sans colonne clé connue, la ligne entière sert d'identité.
+    """
+    key_indexes = [columns.index(col) for col in SYNC_KEY_COLUMNS.get(sheet_name, []) if col in columns]
+    seen = {}
+    keys = []
+    for row in rows:
+        parts = [row[i] for i in key_indexes] if key_indexes else row
+        base_key = "\x1f".join(parts)
+        seen[base_key] = seen.get(base_key, 0) + 1
+        keys.append(f"{base_key}#{seen[base_key]}")
+    return keys
+
+
+def row_hash(row: List[str]) -> str:
+    """Empreinte d'une ligne normalisée"""
+    return hashlib.sha1("\x1f".join(row).encode('utf-8')).hexdigest()
+
+
+# === RÉPLIQUE LOCALE ===
+
+class SheetsReplica:
+    """
+    Réplique SQLite du dernier état synchronisé d'un Google Sheet (la « base »)
+
+    Une connexion est ouverte par opération : utilisable depuis n'importe quel thread.
+    """
+
+    def __init__(self, sheet_id: str, directory: str = SYNC_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"tlb_sync_{sheet_id}.sqlite")
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS base_rows (
+                    sheet TEXT NOT NULL,
+                    row_key TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    row_hash TEXT NOT NULL,
+                    row_json TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    PRIMARY KEY (sheet, row_key)
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_state(self, key: str, default=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_state(self, **values):
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                             [(k, json.dumps(v)) for k, v in values.items()])
+
+    def load_base(self) -> Dict[str, Dict]:
+        """
+        Returns:
+            dict: {feuille: {'columns': [...], 'rows': {clé: (position, hash, ligne, version)}}}
+        """
+        base = {}
+        columns = self.get_state('columns', {})
+        with self._connect() as conn:
+            for sheet, key, position, hash_, row_json, version in conn.execute(
+                    "SELECT sheet, row_key, position, row_hash, row_json, version FROM base_rows"):
+                base.setdefault(sheet, {'columns': columns.get(sheet, []), 'rows': {}})
+                base[sheet]['rows'][key] = (position, hash_, json.loads(row_json), version)
+        for sheet, cols in columns.items():
+            base.setdefault(sheet, {'columns': cols, 'rows': {}})
+        return base
+
+    def save_base(self, sheets: Dict[str, Dict], generation: int):
+        """
+        Remplacer la base par l'état fusionné
+
+        Args:
+            sheets: {feuille: {'columns': [...], 'rows': [(clé, ligne)], 'versions': {clé: version},
+                     'positions': {clé: ligne du Sheet} (optionnel, rang sinon)}}
+            generation: numéro de synchronisation (version des lignes modifiées)
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM base_rows")
+            conn.executemany(
+                "INSERT INTO base_rows (sheet, row_key, position, row_hash, row_json, version) VALUES (?, ?, ?, ?, ?, ?)",
+                [(sheet, key, data.get('positions', {}).get(key, position), row_hash(row), json.dumps(row),
+                  data['versions'].get(key, generation))
+                 for sheet, data in sheets.items()
+                 for position, (key, row) in enumerate(data['rows'])]
+            )
+        self.set_state(columns={sheet: data['columns'] for sheet, data in sheets.items()}, generation=generation)
+
+
+# === MOTEUR DE SYNCHRONISATION ===
+
+class TLBSheetsSyncEngine:
+    """
+    Synchronisation bidirectionnelle incrémentale d'un portfolio TLB
+
+    N'utilise pas st.session_state : `sync()` peut tourner dans un thread de fond.
+    """
+
+    def __init__(self, gc, drive_service, sheet_id: str, conflict_policy: str = "remote",
+                 directory: str = SYNC_DIR):
+        """
+        Args:
+            gc: client gspread
+            drive_service: service Google Drive v3 (vérification de version)
+            sheet_id: ID du Google Sheet
+            conflict_policy: 'remote' (le Sheet gagne) ou 'local' (l'appareil gagne)
+            directory: dossier de la réplique locale
+        """
+        self.gc = gc
+        self.drive_service = drive_service
+        self.sheet_id = sheet_id
+        self.conflict_policy = conflict_policy
+        self.replica = SheetsReplica(sheet_id, directory)
+
+    def _remote_version(self) -> str:
+        metadata = self.drive_service.files().get(fileId=self.sheet_id, fields="version,modifiedTime").execute()
+        return str(metadata.get('version', metadata.get('modifiedTime', '')))
+
+    @staticmethod
+    def _local_sheets(portfolio_data: Dict[str, pd.DataFrame]) -> Dict[str, Dict]:
+        """DataFrames locaux -> lignes normalisées par feuille"""
+        sheets = {}
+        for df_name, sheet_name in PORTFOLIO_SHEET_MAPPING.items():
+            df = portfolio_data.get(df_name)
+            if df is None:
+                continue
+            columns = [str(col) for col in df.columns]
+            raw_rows = list(df.itertuples(index=False, name=None))
+            rows = canonical_rows(sheet_name, columns, raw_rows)
+            kept = [i for i, row in enumerate(rows) if any(row)]
+            keys = row_keys(sheet_name, columns, [rows[i] for i in kept])
+            sheets[sheet_name] = {
+                'columns': columns,
+                'rows': [(key, rows[i]) for key, i in zip(keys, kept)],
+                'raw': {key: raw_rows[i] for key, i in zip(keys, kept)}
+            }
+        return sheets
+
+    @staticmethod
+    def _ordered_rows(sheet_base: Dict) -> List[Tuple[str, List[str]]]:
+        """Lignes de la base dans l'ordre du Sheet"""
+        items = sorted(sheet_base.get('rows', {}).items(), key=lambda item: item[1][0])
+        return [(key, value[2]) for key, value in items]
+
+    def _fetch_remote(self, spreadsheet, sheet_titles: List[str]) -> Dict[str, Dict]:
+        """Télécharger les feuilles TLB existantes en un seul values:batchGet"""
+        wanted = [name for name in PORTFOLIO_SHEET_MAPPING.values() if name in sheet_titles]
+        if not wanted:
+            return {}
+
+        response = spreadsheet.values_batch_get(
+            [f"'{name}'" for name in wanted],
+            params={'valueRenderOption': 'UNFORMATTED_VALUE', 'dateTimeRenderOption': 'SERIAL_NUMBER'}
+        )
+
+        remote = {}
+        for sheet_name, value_range in zip(wanted, response.get('valueRanges', [])):
+            values = value_range.get('values', [])
+            columns = [str(col) for col in values[0]] if values else []
+            data_rows = [row + [""] * (len(columns) - len(row)) for row in values[1:]]
+            rows = canonical_rows(sheet_name, columns, [row[:len(columns)] for row in data_rows])
+
+            # Conserver la position réelle (les lignes vides occupent une ligne du Sheet)
+            positions = [i for i, row in enumerate(rows) if any(row)]
+            non_empty = [rows[i] for i in positions]
+            keys = row_keys(sheet_name, columns, non_empty)
+            remote[sheet_name] = {
+                'columns': columns,
+                'rows': {key: (pos, row_hash(row), row) for key, pos, row in zip(keys, positions, non_empty)},
+                'order': keys
+            }
+        return remote
+
+    def _merge_sheet(self, sheet_name: str, base: Dict, local: Dict, remote: Dict) -> Tuple[List, List[Dict], Dict]:
+        """
+        Fusion à trois voies d'une feuille
+
+        Returns:
+            tuple: (lignes finales [(clé, ligne)] dans l'ordre distant, conflits, compteurs)
+        """
+        base_rows = {key: value[2] for key, value in base.get('rows', {}).items()}
+        remote_rows = {key: value[2] for key, value in remote['rows'].items()}
+        local_rows = dict(local['rows'])
+
+        final = {}
+        conflicts = []
+        counts = {'pulled': 0, 'pushed': 0}
+
+        for key in list(dict.fromkeys(list(remote['order']) + [k for k, _ in local['rows']] + list(base_rows))):
+            b, l, r = base_rows.get(key), local_rows.get(key), remote_rows.get(key)
+            local_changed = l != b
+            remote_changed = r != b
+
+            if not local_changed and not remote_changed:
+                result = l
+            elif local_changed and not remote_changed:
+                result = l
+                counts['pushed'] += 1
+            elif remote_changed and not local_changed:
+                result = r
+                counts['pulled'] += 1
+            elif l == r:
+                result = l
+            else:
+                # Les deux côtés ont modifié la même ligne différemment
+                result = r if self.conflict_policy == "remote" else l
+                conflicts.append({
+                    'sheet': sheet_name,
+                    'key': key.rsplit('#', 1)[0].replace("\x1f", " | "),
+                    'base': b, 'local': l, 'remote': r,
+                    'kept': self.conflict_policy
+                })
+                counts['pulled' if self.conflict_policy == "remote" else 'pushed'] += 1
+
+            if result is not None:
+                final[key] = result
+
+        # Ordre final = ordre distant (après suppressions) + ajouts en fin
+        ordered = [key for key in remote['order'] if key in final]
+        ordered += [key for key, _ in local['rows'] if key in final and key not in remote['rows']]
+        ordered += [key for key in final if key not in set(ordered)]
+        return [(key, final[key]) for key in ordered], conflicts, counts
+
+    def _structure_conflicts(self, base: Dict, local: Dict, remote: Dict) -> List[Dict]:
+        """
+        Feuilles modifiées dans le Sheet depuis la base (et différentes du local)
+
+        Une réécriture complète les écraserait : elles sont signalées comme conflits.
+        """
+        conflicts = []
+        for sheet, remote_sheet in remote.items():
+            if sheet not in local:
+                continue
+            remote_state = (remote_sheet['columns'], {key: value[2] for key, value in remote_sheet['rows'].items()})
+            base_state = (base.get(sheet, {}).get('columns', []),
+                          {key: value[2] for key, value in base.get(sheet, {}).get('rows', {}).items()})
+            local_state = (local[sheet]['columns'], dict(local[sheet]['rows']))
+            if remote_state != base_state and remote_state != local_state:
+                conflicts.append({
+                    'sheet': sheet,
+                    'key': "Structure de la feuille (colonnes)",
+                    'base': base_state[0], 'local': local_state[0], 'remote': remote_state[0],
+                    'kept': None
+                })
+        return conflicts
+
+    @staticmethod
+    def _push_requests(sheet_id_num: int, remote: Dict, final_rows: List, raw_rows: Dict) -> List[Dict]:
+        """
+        Deltas à envoyer : mises à jour, suppressions (ordre décroissant), ajouts
+
+        Une ligne finale différente du Sheet vient forcément du local :
+        ses valeurs d'origine (typées) sont envoyées.
+        """
+        final = dict(final_rows)
+        to_cells = TLBGoogleSheetsOAuthManager._cell_data
+        requests_ = []
+
+        for key, (position, _, row) in remote['rows'].items():
+            if key in final and final[key] != row:
+                requests_.append({'updateCells': {
+                    'start': {'sheetId': sheet_id_num, 'rowIndex': position + 1, 'columnIndex': 0},
+                    'rows': [{'values': [to_cells(v) for v in raw_rows[key]]}],
+                    'fields': 'userEnteredValue'
+                }})
+
+        deleted = sorted((pos for key, (pos, _, _) in remote['rows'].items() if key not in final), reverse=True)
+        for position in deleted:
+            requests_.append({'deleteDimension': {'range': {
+                'sheetId': sheet_id_num, 'dimension': 'ROWS',
+                'startIndex': position + 1, 'endIndex': position + 2
+            }}})
+
+        appended = [raw_rows[key] for key, _ in final_rows if key not in remote['rows']]
+        if appended:
+            requests_.append({'appendCells': {
+                'sheetId': sheet_id_num,
+                'rows': [{'values': [to_cells(v) for v in row]} for row in appended],
+                'fields': 'userEnteredValue'
+            }})
+        return requests_
+
+    @staticmethod
+    def _final_positions(remote: Dict, final_rows: List) -> Dict[str, int]:
+        """Position de chaque ligne dans le Sheet après application des deltas"""
+        final_keys = {key for key, _ in final_rows}
+        deleted = sorted(pos for key, (pos, _, _) in remote['rows'].items() if key not in final_keys)
+
+        positions = {}
+        for key, (pos, _, _) in remote['rows'].items():
+            if key in final_keys:
+                positions[key] = pos - sum(1 for d in deleted if d < pos)
+
+        next_position = max(positions.values(), default=-1) + 1
+        for key, _ in final_rows:
+            if key not in positions:
+                positions[key] = next_position
+                next_position += 1
+        return positions
+
+    def sync(self, portfolio_data: Dict[str, pd.DataFrame]) -> Dict:
+        """
+        Synchroniser le portfolio local avec le Google Sheet
+
+        Args:
+            portfolio_data: Dictionnaire des DataFrames locaux
+
+        Returns:
+            dict: statut, lignes tirées/poussées, conflits, feuilles fusionnées, appels API
+        """
+        started = time.perf_counter()
+        stats = {'api_calls': 0, 'cells_pulled': 0, 'cells_pushed': 0}
+        local = self._local_sheets(portfolio_data)
+        base = self.replica.load_base()
+        generation = self.replica.get_state('generation', 0) + 1
+
+        remote_version = self._remote_version()
+        stats['api_calls'] += 1
+        remote_unchanged = bool(base) and remote_version == self.replica.get_state('remote_version')
+
+        local_unchanged = bool(base) and all(
+            sheet in base and data['columns'] == base[sheet]['columns']
+            and data['rows'] == self._ordered_rows(base[sheet])
+            for sheet, data in local.items()
+        )
+
+        if remote_unchanged and local_unchanged:
+            return self._result('up_to_date', started, stats, remote_version=remote_version)
+
+        spreadsheet = self.gc.open_by_key(self.sheet_id)
+        metadata = spreadsheet.fetch_sheet_metadata({'fields': 'sheets.properties'})
+        stats['api_calls'] += 2
+        sheet_ids = {s['properties']['title']: s['properties']['sheetId'] for s in metadata.get('sheets', [])}
+
+        if remote_unchanged:
+            # Le Sheet n'a pas bougé : l'état distant est la base, rien à télécharger
+            remote = {
+                sheet: {
+                    'columns': data['columns'],
+                    'rows': {key: (pos, hash_, row) for key, (pos, hash_, row, _) in data['rows'].items()},
+                    'order': [key for key, _ in self._ordered_rows(data)]
+                }
+                for sheet, data in base.items()
+            }
+        else:
+            remote = self._fetch_remote(spreadsheet, list(sheet_ids))
+            stats['api_calls'] += 1
+            stats['cells_pulled'] = sum(len(r[2]) for data in remote.values() for r in data['rows'].values())
+
+        # Structure différente (colonnes, feuille absente) : réécriture complète,
+        # sauf si le Sheet a été modifié depuis la base (la réécriture écraserait ces modifications)
+        if any(sheet not in remote or remote[sheet]['columns'] != data['columns'] or sheet not in sheet_ids
+               for sheet, data in local.items()):
+            conflicts = self._structure_conflicts(base, local, remote)
+            if conflicts:
+                return self._result('conflict', started, stats, remote_version=remote_version, conflicts=conflicts)
+
+            TLBGoogleSheetsOAuthManager.commit_portfolio_batch(self.gc, self.sheet_id, portfolio_data)
+            stats['api_calls'] += 3
+            stats['cells_pushed'] = sum(len(row) for data in local.values() for _, row in data['rows'])
+            new_version = self._remote_version()
+            stats['api_calls'] += 1
+            self.replica.save_base({sheet: {'columns': data['columns'], 'rows': data['rows'], 'versions': {}}
+                                    for sheet, data in local.items()}, generation)
+            self.replica.set_state(remote_version=new_version, last_sync=datetime.now().isoformat())
+            return self._result('full_push', started, stats, remote_version=new_version,
+                                pushed=sum(len(d['rows']) for d in local.values()))
+
+        merged, conflicts, batch_requests = {}, [], []
+        pulled = pushed = 0
+        for sheet, local_sheet in local.items():
+            final_rows, sheet_conflicts, counts = self._merge_sheet(sheet, base.get(sheet, {}), local_sheet, remote[sheet])
+            conflicts += sheet_conflicts
+            pulled += counts['pulled']
+            pushed += counts['pushed']
+
+            base_versions = {key: value[3] for key, value in base.get(sheet, {}).get('rows', {}).items()}
+            versions = {key: base_versions[key] for key, row in final_rows
+                        if key in base_versions and base.get(sheet)['rows'][key][2] == row}
+            merged[sheet] = {'columns': local_sheet['columns'], 'rows': final_rows, 'versions': versions,
+                             'positions': self._final_positions(remote[sheet], final_rows)}
+
+            sheet_requests = self._push_requests(sheet_ids[sheet], remote[sheet], final_rows, local_sheet['raw'])
+            stats['cells_pushed'] += sum(
+                len(row['values']) for req in sheet_requests
+                for row in (req.get('updateCells') or req.get('appendCells') or {}).get('rows', [])
+            )
+            batch_requests += sheet_requests
+
+        new_version = remote_version
+        if batch_requests:
+            spreadsheet.batch_update({'requests': batch_requests})
+            new_version = self._remote_version()
+            stats['api_calls'] += 2
+
+        self.replica.save_base(merged, generation)
+        self.replica.set_state(remote_version=new_version, last_sync=datetime.now().isoformat())
+
+        local_changed = any([k for k, _ in merged[s]['rows']] != [k for k, _ in local[s]['rows']] or
+                            dict(merged[s]['rows']) != dict(local[s]['rows']) for s in local)
+
+        return self._result(
+            'synced', started, stats, remote_version=new_version, pulled=pulled, pushed=pushed,
+            conflicts=conflicts,
+            merged={sheet: {'columns': data['columns'], 'rows': [row for _, row in data['rows']]}
+                    for sheet, data in merged.items()} if local_changed else None
+        )
+
+    @staticmethod
+    def _result(status: str, started: float, stats: Dict, **extra) -> Dict:
+        result = {'status': status, 'pulled': 0, 'pushed': 0, 'conflicts': [], 'merged': None,
+                  'duration_ms': round((time.perf_counter() - started) * 1000, 1), **stats}
+        result.update(extra)
+        return result
+
+
+def merged_to_dataframes(merged: Dict[str, Dict]) -> Dict[str, pd.DataFrame]:
+    """
+    Reconstruire les DataFrames typés depuis le résultat d'une synchronisation
+
+    Args:
+        merged: {feuille: {'columns': [...], 'rows': [...]}}
+
+    Returns:
+        dict: {nom_df: DataFrame nettoyé}
+    """
+    sheet_to_df = {sheet: df_name for df_name, sheet in PORTFOLIO_SHEET_MAPPING.items()}
+    cleaner = TLBGoogleSheetsOAuthManager.__new__(TLBGoogleSheetsOAuthManager)
+    frames = {}
+    for sheet, data in merged.items():
+        df = pd.DataFrame(data['rows'], columns=data['columns']).replace("", np.nan)
+        frames[sheet_to_df[sheet]] = cleaner._clean_dataframe_by_type(df, sheet_to_df[sheet])
+    return frames
+
+
+# === EXÉCUTION EN ARRIÈRE-PLAN ===
+
+class TLBSheetsSyncWorker:
+    """
+    Lance les synchronisations dans un thread de fond (une à la fois par Sheet)
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tlb-sheets-sync")
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, gc, drive_service, sheet_id: str, portfolio_data: Dict[str, pd.DataFrame],
+               conflict_policy: str = "remote") -> bool:
+        """
+        Démarrer une synchronisation
+
+        Returns:
+            bool: False si une synchronisation de ce Sheet est déjà en cours
+        """
+        with self._lock:
+            future = self._futures.get(sheet_id)
+            if future is not None and not future.done():
+                return False
+
+            snapshot = {name: df.copy() for name, df in portfolio_data.items()}
+            engine = TLBSheetsSyncEngine(gc, drive_service, sheet_id, conflict_policy)
+            self._futures[sheet_id] = self._executor.submit(engine.sync, snapshot)
+            return True
+
+    def is_running(self, sheet_id: str) -> bool:
+        with self._lock:
+            future = self._futures.get(sheet_id)
+            return future is not None and not future.done()
+
+    def collect(self, sheet_id: str) -> Optional[Dict]:
+        """
+        Récupérer le résultat d'une synchronisation terminée (une seule fois)
+
+        Returns:
+            dict ou None si rien de terminé
+        """
+        with self._lock:
+            future = self._futures.get(sheet_id)
+            if future is None or not future.done():
+                return None
+            del self._futures[sheet_id]
+
+        try:
+            return future.result()
+        except Exception as e:
+            return {'status': 'error', 'error': str(e), 'pulled': 0, 'pushed': 0, 'conflicts': [], 'merged': None}
+
+
+@st.cache_resource
+def get_sync_worker():
+    """Singleton du worker de synchronisation"""
+    return TLBSheetsSyncWorker()
@@ -0,0 +1,308 @@
+# modules/google_sheets_write_scheduler.py
+"""
+File d'attente des sauvegardes Google Sheets pour TLB INVESTOR
+- Regroupement des écritures par spreadsheet (la dernière version gagne)
+- Quotas par utilisateur et par projet (token buckets)
+- Retry avec backoff exponentiel + jitter, hors du thread UI
+- Commit atomique des cinq feuilles (un seul batchUpdate)
+- Suivi de la profondeur de file et des latences
+"""
+
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, Optional
+
+import requests
+import streamlit as st
+
+from .rate_limiter import TokenBucket
+from .google_sheets_oauth_manager import TLBGoogleSheetsOAuthManager
+
+# Quotas par défaut de l'API Google Sheets (requêtes par minute)
+USER_READ_QUOTA_PER_MINUTE = 60
+USER_WRITE_QUOTA_PER_MINUTE = 60
+PROJECT_READ_QUOTA_PER_MINUTE = 300
+PROJECT_WRITE_QUOTA_PER_MINUTE = 300
+
+# Coût d'une sauvegarde : open_by_key + métadonnées (lectures) / batchUpdate (écriture)
+READS_PER_COMMIT = 2
+WRITES_PER_COMMIT = 1
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TLBSheetsWriteScheduler:
+    """
+    Ordonnanceur des sauvegardes Google Sheets
+
+    Les pages Streamlit déposent un instantané du portfolio avec `submit()` puis
+    consultent `get_job()` / `get_status()`. Un thread de fond unique exécute les
+    commits ; il ne touche jamais à st.session_state.
+    """
+
+    def __init__(self, max_attempts: int = 6, base_delay: float = 1.0, max_delay: float = 60.0,
+                 user_read_quota: int = USER_READ_QUOTA_PER_MINUTE,
+                 user_write_quota: int = USER_WRITE_QUOTA_PER_MINUTE,
+                 project_read_quota: int = PROJECT_READ_QUOTA_PER_MINUTE,
+                 project_write_quota: int = PROJECT_WRITE_QUOTA_PER_MINUTE,
+                 commit_func: Optional[Callable] = None):
+        """
+        Args:
+            max_attempts: nombre maximal de tentatives par sauvegarde
+            base_delay: délai de base du backoff (secondes)
+            max_delay: délai maximal du backoff (secondes)
+            user_*_quota / project_*_quota: quotas par minute
+            commit_func: fonction (gc, sheet_id, portfolio_data) -> liste des feuilles écrites
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.user_read_quota = user_read_quota
+        self.user_write_quota = user_write_quota
+        self.commit_func = commit_func or TLBGoogleSheetsOAuthManager.commit_portfolio_batch
+
+        self.project_buckets = {
+            'read': TokenBucket(project_read_quota),
+            'write': TokenBucket(project_write_quota)
+        }
+        self.user_buckets: Dict[str, Dict[str, TokenBucket]] = {}
+
+        self._condition = threading.Condition()
+        self._pending: Dict[str, Dict] = {}     # sheet_id -> job en attente
+        self._queue = deque()                    # ordre des sheet_id en attente
+        self._jobs: Dict[str, Dict] = {}        # job_id -> job (historique récent)
+        self._in_flight: Optional[Dict] = None
+        self._latencies = deque(maxlen=200)
+        self.metrics = {'submitted': 0, 'coalesced': 0, 'completed': 0, 'failed': 0, 'retries': 0}
+
+        self._worker = threading.Thread(target=self._run, name="tlb-sheets-writer", daemon=True)
+        self._worker.start()
+
+    # === API PUBLIQUE ===
+
+    def submit(self, gc, sheet_id: str, portfolio_data: Dict, user_key: str = "default") -> str:
+        """
+        Déposer une sauvegarde dans la file
+
+        Si une sauvegarde du même spreadsheet attend encore, ses données sont
+        remplacées par celles-ci (un seul commit pour plusieurs clics).
+
+        Args:
+            gc: client gspread de l'utilisateur
+            sheet_id: ID du Google Sheet
+            portfolio_data: Dictionnaire des DataFrames à sauvegarder
+            user_key: identifiant de l'utilisateur (quota par utilisateur)
+
+        Returns:
+            str: ID du job (identique au job en attente en cas de regroupement)
+        """
+        snapshot = {name: df.copy() for name, df in portfolio_data.items()}
+
+        with self._condition:
+            self.metrics['submitted'] += 1
+            job = self._pending.get(sheet_id)
+
+            if job is not None:
+                job['portfolio_data'] = snapshot
+                job['gc'] = gc
+                job['coalesced'] += 1
+                self.metrics['coalesced'] += 1
+            else:
+                job = {
+                    'job_id': uuid.uuid4().hex[:12],
+                    'sheet_id': sheet_id,
+                    'user_key': user_key,
+                    'gc': gc,
+                    'portfolio_data': snapshot,
+                    'status': 'pending',
+                    'attempts': 0,
+                    'coalesced': 0,
+                    'submitted_at': time.time(),
+                    'not_before': 0.0,
+                    'finished_at': None,
+                    'latency_ms': None,
+                    'sheets': [],
+                    'error': None
+                }
+                self._pending[sheet_id] = job
+                self._jobs[job['job_id']] = job
+                self._queue.append(sheet_id)
+                self._prune_history()
+
+            self._condition.notify()
+            return job['job_id']
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Statut d'un job (sans les données ni le client)"""
+        with self._condition:
+            job = self._jobs.get(job_id)
+            return self._public_job(job) if job else None
+
+    def get_status(self) -> Dict:
+        """
+        Statistiques de la file
+
+        Returns:
+            dict: profondeur de file, job en cours, compteurs et latences (ms)
+        """
+        with self._condition:
+            latencies = sorted(self._latencies)
+            return {
+                'queue_depth': len(self._queue),
+                'in_flight': self._public_job(self._in_flight) if self._in_flight else None,
+                'avg_latency_ms': round(sum(latencies) / len(latencies), 1) if latencies else None,
+                'p95_latency_ms': round(latencies[round(0.95 * (len(latencies) - 1))], 1) if latencies else None,
+                'project_write_tokens': round(self.project_buckets['write'].available, 1),
+                **self.metrics
+            }
+
+    def wait_until_idle(self, timeout: Optional[float] = None) -> bool:
+        """Attendre que la file soit vide (benchmarks / scripts)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._queue or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining if remaining is not None else 0.5)
+            return True
+
+    # === THREAD DE FOND ===
+
+    def _run(self):
+        while True:
+            job = self._next_job()
+            self._execute(job)
+
+    def _next_job(self) -> Dict:
+        """Prendre le prochain job éligible (backoff respecté)"""
+        with self._condition:
+            while True:
+                now = time.time()
+                ready = [sid for sid in self._queue if self._pending[sid]['not_before'] <= now]
+                if ready:
+                    sheet_id = ready[0]
+                    self._queue.remove(sheet_id)
+                    job = self._pending.pop(sheet_id)
+                    job['status'] = 'running'
+                    self._in_flight = job
+                    return job
+
+                if self._queue:
+                    wait = min(self._pending[sid]['not_before'] for sid in self._queue) - now
+                    self._condition.wait(max(wait, 0.01))
+                else:
+                    self._condition.wait()
+
+    def _execute(self, job: Dict):
+        buckets = self._buckets_for(job['user_key'])
+        for kind, cost in (('read', READS_PER_COMMIT), ('write', WRITES_PER_COMMIT)):
+            buckets[kind].acquire(cost)
+            self.project_buckets[kind].acquire(cost)
+
+        job['attempts'] += 1
+        try:
+            sheets = self.commit_func(job['gc'], job['sheet_id'], job['portfolio_data'])
+            self._finish(job, 'done', sheets=sheets)
+        except Exception as e:
+            status_code = self._status_code(e)
+            retryable = status_code in RETRYABLE_STATUS_CODES or isinstance(
+                e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+            if retryable and job['attempts'] < self.max_attempts:
+                self._schedule_retry(job, e, status_code)
+            else:
+                self._finish(job, 'failed', error=str(e))
+
+    def _schedule_retry(self, job: Dict, error: Exception, status_code: Optional[int]):
+        """Remettre le job en file avec backoff exponentiel + jitter"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (job['attempts'] - 1)))
+        delay = random.uniform(delay / 2, delay)
+
+        retry_after = self._retry_after(error)
+        if retry_after:
+            delay = max(delay, retry_after)
+
+        if status_code == 429:
+            # Suspendre aussi les autres écritures de cet utilisateur
+            self._buckets_for(job['user_key'])['write'].penalize(delay)
+
+        with self._condition:
+            self.metrics['retries'] += 1
+            self._in_flight = None
+
+            if job['sheet_id'] in self._pending:
+                # Une version plus récente attend déjà : elle remplace celle-ci
+                newer = self._pending[job['sheet_id']]
+                newer['coalesced'] += 1
+                job['status'] = 'superseded'
+                job['finished_at'] = time.time()
+                job['error'] = str(error)
+            else:
+                job['status'] = 'retrying'
+                job['error'] = str(error)
+                job['not_before'] = time.time() + delay
+                self._pending[job['sheet_id']] = job
+                self._queue.append(job['sheet_id'])
+
+            self._condition.notify_all()
+
+    def _finish(self, job: Dict, status: str, sheets=None, error: Optional[str] = None):
+        with self._condition:
+            job['status'] = status
+            job['finished_at'] = time.time()
+            job['latency_ms'] = round((job['finished_at'] - job['submitted_at']) * 1000, 1)
+            job['sheets'] = sheets or []
+            job['error'] = error
+            job['portfolio_data'] = None
+            job['gc'] = None
+
+            self._latencies.append(job['latency_ms'])
+            self.metrics['completed' if status == 'done' else 'failed'] += 1
+            self._in_flight = None
+            self._condition.notify_all()
+
+    # === OUTILS ===
+
+    def _buckets_for(self, user_key: str) -> Dict[str, TokenBucket]:
+        with self._condition:
+            if user_key not in self.user_buckets:
+                self.user_buckets[user_key] = {
+                    'read': TokenBucket(self.user_read_quota),
+                    'write': TokenBucket(self.user_write_quota)
+                }
+            return self.user_buckets[user_key]
+
+    def _prune_history(self, keep: int = 100):
+        """Limiter l'historique des jobs terminés"""
+        finished = [jid for jid, job in self._jobs.items() if job['finished_at'] is not None]
+        for job_id in finished[:max(0, len(self._jobs) - keep)]:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _status_code(error: Exception) -> Optional[int]:
+        response = getattr(error, 'response', None)
+        return getattr(response, 'status_code', None)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            return float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _public_job(job: Dict) -> Dict:
+        return {key: value for key, value in job.items() if key not in ('gc', 'portfolio_data')}
+
+
+# Instance globale partagée entre les sessions (quota projet commun)
+@st.cache_resource
+def get_write_scheduler():
+    """Singleton de l'ordonnanceur d'écriture Google Sheets"""
+    return TLBSheetsWriteScheduler()
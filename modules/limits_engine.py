@@ -0,0 +1,246 @@
+# modules/limits_engine.py
+"""
+Moteur d'évaluation des limites du portefeuille (Feuil2)
+- Feuil2 compilée une seule fois en un jeu de règles typé (mis en cache par contenu)
+- Toutes les règles évaluées en une seule agrégation groupée sur les positions EUR
+- Résultat structuré (parts, écarts, dépassements, montants) commun aux alertes,
+  graphiques et conseils de l'onglet Déséquilibres, et au moteur de rééquilibrage
+- Forme matricielle (appartenance règles × positions) pour évaluer d'un coup de nombreux
+  jeux de valeurs (stress tests)
+"""
+
+import hashlib
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# Part maximale d'une entreprise (Actions) dans le portefeuille total (%)
+COMPANY_CAP_PCT = 10.0
+# Libellés acceptés pour les limites de catégorie dans Feuil2
+CATEGORY_LABELS = ('Category', 'Catégorie')
+# Catégories d'ETF : limites exprimées en part des ETF (plafonds)
+ETF_CATEGORIES = ('S&P500', 'Euro STOXX50', 'NASDAQ 100')
+
+# Seuils d'écart (points de %) des objectifs
+BALANCED_GAP = 5.0
+ALERT_GAP = 15.0
+CRITICAL_GAP = 25.0
+
+RULE_COLUMNS = ['Portée', 'Groupe', 'Base', 'Nature', 'Objectif']
+
+
+# === COMPILATION ===
+
+def compile_limits(limits: Optional[pd.DataFrame], company_cap: float = COMPANY_CAP_PCT) -> pd.DataFrame:
+    """
+    Traduire Feuil2 en règles typées
+
+    - Type : objectif sur le portefeuille total
+    - Secteur : objectif à l'intérieur des Actions
+    - Catégorie d'ETF : plafond sur la part des ETF
+    - Autre catégorie : objectif à l'intérieur des Actions
+    - Entreprise (implicite) : plafond de 10 % du total pour chaque société Actions
+
+    Returns:
+        DataFrame: Portée, Groupe, Base (Total / Actions / ETF), Nature (objectif / plafond), Objectif (%)
+    """
+    cap_rule = pd.DataFrame([['Entreprise', '*', 'Total', 'plafond', float(company_cap)]], columns=RULE_COLUMNS)
+    if limits is None or limits.empty or not {'Variable1', 'Variable2', 'Valeur seuils'} <= set(limits.columns.str.strip()):
+        return cap_rule
+
+    raw = limits.rename(columns=lambda c: str(c).strip())
+    variable = raw['Variable1'].astype(str).str.strip()
+    label = raw['Variable2'].astype(str).str.strip()
+    target = pd.to_numeric(raw['Valeur seuils'], errors='coerce')
+
+    is_category = variable.isin(CATEGORY_LABELS)
+    is_etf_category = is_category & label.isin(ETF_CATEGORIES)
+    scope = pd.Series(np.select([variable == 'Type', variable == 'Secteur', is_category],
+                                ['Type', 'Secteur', 'Category'], default=''), index=raw.index)
+    rules = pd.DataFrame({
+        'Portée': scope,
+        'Groupe': label,
+        'Base': np.select([scope == 'Type', is_etf_category], ['Total', 'ETF'], default='Actions'),
+        'Nature': np.where(is_etf_category, 'plafond', 'objectif'),
+        'Objectif': target.astype(float)
+    })
+    rules = rules[(rules['Portée'] != '') & rules['Objectif'].notna()]
+    rules = rules.drop_duplicates(['Portée', 'Groupe', 'Base'], keep='last')
+    return pd.concat([rules, cap_rule], ignore_index=True)
+
+
+def get_compiled_limits(limits: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Règles compilées, mises en cache en session tant que Feuil2 ne change pas"""
+    if limits is None or limits.empty:
+        signature = 'empty'
+    else:
+        signature = hashlib.sha1(
+            pd.util.hash_pandas_object(limits.astype(str), index=False).to_numpy().tobytes()
+            + repr(list(limits.columns)).encode()
+        ).hexdigest()
+
+    cached = st.session_state.get('compiled_limits')
+    if cached and cached['signature'] == signature:
+        return cached['rules']
+
+    rules = compile_limits(limits)
+    st.session_state.compiled_limits = {'signature': signature, 'rules': rules}
+    return rules
+
+
+# === ÉVALUATION ===
+
+def _long_positions(df: pd.DataFrame, value_col: str) -> pd.DataFrame:
+    """
+    Positions au format long : une ligne par (portée, groupe, base) à laquelle chaque position contribue
+
+    'Position' est le rang de la ligne dans df.
+    """
+    types = df['Type'].astype(str).to_numpy()
+    values = pd.to_numeric(df[value_col], errors='coerce').fillna(0).to_numpy()
+    position = np.arange(len(df))
+    is_actions = types == 'Actions'
+    is_etf = types == 'ETF'
+
+    parts = [
+        pd.DataFrame({'Portée': 'Type', 'Groupe': types, 'Base': 'Total', 'Valeur': values,
+                      'Position': position}),
+        pd.DataFrame({'Portée': 'Secteur', 'Groupe': df['Secteur'].astype(str).to_numpy(), 'Base': 'Actions',
+                      'Valeur': values, 'Position': position})[is_actions],
+        pd.DataFrame({'Portée': 'Category', 'Groupe': df['Category'].astype(str).to_numpy(),
+                      'Base': np.where(is_etf, 'ETF', 'Actions'), 'Valeur': values,
+                      'Position': position})[is_actions | is_etf],
+        pd.DataFrame({'Portée': 'Entreprise', 'Groupe': df['Entreprise'].astype(str).to_numpy(), 'Base': 'Total',
+                      'Valeur': values, 'Position': position})[is_actions]
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+def evaluate_limits(df: pd.DataFrame, rules: pd.DataFrame, value_col: str = 'Current value') -> Dict:
+    """
+    Évaluer toutes les règles en une agrégation
+
+    Args:
+        df: lignes du portefeuille (valeurs EUR)
+        rules: résultat de compile_limits
+        value_col: colonne de valeur EUR
+
+    Returns:
+        dict:
+            'evaluation': une ligne par règle (et par entreprise) — Valeur, Total base, Part (%),
+                          Écart (%), Montant (€) à ajuster (négatif = à réduire), Dépassement, Niveau
+            'groups': valeurs agrégées de tous les groupes (règle ou non)
+            'bases': totaux Total / Actions / ETF
+            'breaches': règles en dépassement (plafonds) ou en écart d'alerte (objectifs)
+    """
+    groups = _long_positions(df, value_col).groupby(['Portée', 'Groupe', 'Base'], as_index=False)['Valeur'].sum()
+    type_totals = groups[groups['Portée'] == 'Type'].set_index('Groupe')['Valeur']
+    bases = {
+        'Total': float(type_totals.sum()),
+        'Actions': float(type_totals.get('Actions', 0.0)),
+        'ETF': float(type_totals.get('ETF', 0.0))
+    }
+
+    # Règles explicites : groupes absents du portefeuille évalués à 0
+    explicit = rules[rules['Groupe'] != '*'].merge(groups, on=['Portée', 'Groupe', 'Base'], how='left')
+    # Règles génériques ('*') : appliquées à chaque groupe de la portée
+    generic = rules[rules['Groupe'] == '*'].drop(columns='Groupe').merge(groups, on=['Portée', 'Base'], how='inner')
+    evaluation = pd.concat([explicit, generic], ignore_index=True)
+    evaluation['Valeur'] = evaluation['Valeur'].fillna(0.0)
+
+    evaluation['Total base'] = evaluation['Base'].map(bases).fillna(0.0)
+    evaluation['Part (%)'] = (evaluation['Valeur'] / evaluation['Total base'].replace(0, np.nan) * 100).fillna(0.0)
+    evaluation['Écart (%)'] = evaluation['Part (%)'] - evaluation['Objectif']
+
+    is_cap = evaluation['Nature'] == 'plafond'
+    gap = evaluation['Écart (%)']
+    evaluation['Montant (€)'] = np.where(is_cap, -gap.clip(lower=0), -gap) / 100 * evaluation['Total base'] + 0.0
+    evaluation['Dépassement'] = np.where(is_cap, gap > 0, gap.abs() > ALERT_GAP)
+    evaluation['Niveau'] = np.select(
+        [is_cap & (gap > 0), is_cap, gap.abs() <= BALANCED_GAP, gap.abs() <= ALERT_GAP, gap.abs() < CRITICAL_GAP],
+        ['dépassement', 'ok', 'équilibré', 'écart', 'attention'],
+        default='critique'
+    )
+
+    return {
+        'evaluation': evaluation,
+        'groups': groups,
+        'bases': bases,
+        'breaches': evaluation[evaluation['Dépassement']].reset_index(drop=True)
+    }
+
+
+def scope_view(result: Dict, scope: str, base: Optional[str] = None, nature: Optional[str] = None) -> pd.DataFrame:
+    """Règles évaluées d'une portée (et éventuellement d'une base / nature)"""
+    evaluation = result['evaluation']
+    mask = evaluation['Portée'] == scope
+    if base is not None:
+        mask &= evaluation['Base'] == base
+    if nature is not None:
+        mask &= evaluation['Nature'] == nature
+    return evaluation[mask].reset_index(drop=True)
+
+
+def group_shares(result: Dict, scope: str, base: str) -> pd.DataFrame:
+    """Part de chaque groupe détenu d'une portée dans sa base (avec ou sans règle)"""
+    groups = result['groups']
+    view = groups[(groups['Portée'] == scope) & (groups['Base'] == base)].copy()
+    total = result['bases'].get(base, 0.0)
+    view['Part (%)'] = view['Valeur'] / total * 100 if total else 0.0
+    return view.reset_index(drop=True)
+
+
+# === ÉVALUATION MATRICIELLE ===
+
+def limits_matrix(df: pd.DataFrame, rules: pd.DataFrame) -> Dict:
+    """
+    Règles sous forme matricielle pour les positions de df
+
+    Les règles génériques ('*') sont développées sur les groupes présents dans df ; les
+    positions ajoutées plus tard à un jeu de valeurs ne sont donc pas couvertes.
+
+    Returns:
+        dict: 'rules' (une ligne par règle développée), 'members' et 'bases' (règles × positions, 0/1)
+    """
+    long = _long_positions(df.assign(_value=0.0), '_value')
+    keys = long[['Portée', 'Groupe', 'Base']].drop_duplicates()
+    explicit = rules[rules['Groupe'] != '*']
+    generic = rules[rules['Groupe'] == '*'].drop(columns='Groupe').merge(keys, on=['Portée', 'Base'], how='inner')
+    expanded = pd.concat([explicit, generic], ignore_index=True)[RULE_COLUMNS]
+
+    pairs = expanded.reset_index().merge(long[['Portée', 'Groupe', 'Base', 'Position']],
+                                         on=['Portée', 'Groupe', 'Base'], how='inner')
+    members = np.zeros((len(expanded), len(df)))
+    members[pairs['index'].to_numpy(), pairs['Position'].to_numpy()] = 1.0
+
+    types = df['Type'].astype(str).to_numpy()
+    base_members = {'Total': np.ones(len(df)), 'Actions': (types == 'Actions') * 1.0, 'ETF': (types == 'ETF') * 1.0}
+    bases = np.array([base_members[base] for base in expanded['Base']]).reshape(len(expanded), len(df))
+    return {'rules': expanded, 'members': members, 'bases': bases}
+
+
+def evaluate_limits_matrix(values: np.ndarray, matrix: Dict) -> Dict:
+    """
+    Évaluer toutes les règles pour plusieurs jeux de valeurs des positions
+
+    Mêmes définitions que evaluate_limits (part, écart, dépassement).
+
+    Args:
+        values: valeurs EUR, jeux × positions
+        matrix: résultat de limits_matrix
+
+    Returns:
+        dict: 'shares' (%), 'gaps' (points de %), 'breaches' (bool) — jeux × règles
+    """
+    values = np.atleast_2d(values)
+    rules = matrix['rules']
+    group_values = values @ matrix['members'].T
+    base_values = values @ matrix['bases'].T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shares = np.where(base_values != 0, group_values / base_values * 100, 0.0)
+    gaps = shares - rules['Objectif'].to_numpy(dtype=float)
+    is_cap = (rules['Nature'] == 'plafond').to_numpy()
+    breaches = np.where(is_cap, gaps > 0, np.abs(gaps) > ALERT_GAP)
+    return {'shares': shares, 'gaps': gaps, 'breaches': breaches}
@@ -0,0 +1,259 @@
+# modules/metric_scoring.py
+"""
+Moteur de notation des métriques TLB INVESTOR
+- Table de règles compilée une seule fois en bornes d'intervalles + niveaux par métrique
+- Notation d'un tableau complet (tickers x métriques) par recherche binaire vectorisée
+- Même résultat que l'ancien parcours des plages : première plage [min, max) qui contient la valeur
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Niveaux TLB (ordre = code numérique)
+LEVELS = ['TRÈS BON', 'BON', 'MAUVAIS', 'ÉLIMINATOIRE']
+LEVEL_EMOJIS = {'TRÈS BON': '🟢', 'BON': '🔵', 'MAUVAIS': '🟡', 'ÉLIMINATOIRE': '🔴', 'N/A': '⚪'}
+
+# Valeur hors de toutes les plages (ou métrique sans règle)
+DEFAULT_LEVEL = 'MAUVAIS'
+DEFAULT_EXPLANATION = "Critère à analyser"
+MISSING_EXPLANATION = "Donnée non disponible"
+
+# Codes numériques : 0-3 = LEVELS, 4 = hors plage, -1 = donnée absente
+FALLBACK_CODE = len(LEVELS)
+MISSING_CODE = -1
+
+# Règles de notation : plages [min, max) évaluées dans l'ordre
+SCORING_RULES = {
+    'PER': {
+        'ranges': [(0, 15, 'TRÈS BON', '🟢'), (15, 25, 'BON', '🔵'), (25, 50, 'MAUVAIS', '🟡'), (50, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Prix payé pour 1€ de bénéfice annuel. Plus bas = moins cher.'
+    },
+    'PEG': {
+        'ranges': [(0, 1, 'TRÈS BON', '🟢'), (1, 1, 'BON', '🔵'), (1, 2.5, 'MAUVAIS', '🟡'), (2.5, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'PER ajusté de la croissance. <1 = croissance pas chère.'
+    },
+    'P/B': {
+        'ranges': [(0, 1, 'TRÈS BON', '🟢'), (1, 2, 'BON', '🔵'), (2, 5, 'MAUVAIS', '🟡'), (5, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Prix vs valeur comptable. <2 généralement attractif.'
+    },
+    'P/S': {
+        'ranges': [(0, 2, 'TRÈS BON', '🟢'), (2, 4, 'BON', '🔵'), (4, 10, 'MAUVAIS', '🟡'), (10, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Prix vs chiffre d\'affaires. Varie selon le secteur.'
+    },
+    'EV/Revenue': {
+        'ranges': [(0, 3, 'TRÈS BON', '🟢'), (3, 5, 'BON', '🔵'), (5, 12, 'MAUVAIS', '🟡'), (12, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Valeur d\'entreprise vs revenus. Mesure la valorisation totale.'
+    },
+    'EV/EBITDA': {
+        'ranges': [(0, 8, 'TRÈS BON', '🟢'), (8, 12, 'BON', '🔵'), (12, 25, 'MAUVAIS', '🟡'), (25, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Valeur vs bénéfices avant amortissements. Standard du marché.'
+    },
+    'Marge Brute (%)': {
+        'ranges': [(40, float('inf'), 'TRÈS BON', '🟢'), (25, 40, 'BON', '🔵'), (5, 25, 'MAUVAIS', '🟡'), (0, 5, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Profit après coûts de production. Varie selon l\'industrie.'
+    },
+    'Marge Opérationnelle (%)': {
+        'ranges': [(15, float('inf'), 'TRÈS BON', '🟢'), (8, 15, 'BON', '🔵'), (0, 8, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Efficacité opérationnelle. >15% = très bon.'
+    },
+    'Marge Nette (%)': {
+        'ranges': [(15, float('inf'), 'TRÈS BON', '🟢'), (8, 15, 'BON', '🔵'), (0, 8, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Profit final. >10% = entreprise très rentable.'
+    },
+    'ROE (%)': {
+        'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (15, 20, 'BON', '🔵'), (5, 15, 'MAUVAIS', '🟡'), (0, 5, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Rendement des capitaux propres. >15% = excellente gestion.'
+    },
+    'ROA (%)': {
+        'ranges': [(8, float('inf'), 'TRÈS BON', '🟢'), (5, 8, 'BON', '🔵'), (0, 5, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Efficacité d\'utilisation des actifs. >7% = très bon.'
+    },
+    'Croissance CA (%)': {
+        'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (10, 20, 'BON', '🔵'), (0, 10, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Croissance du chiffre d\'affaires. >10% = forte croissance.'
+    },
+    'Croissance Bénéfices (%)': {
+        'ranges': [(25, float('inf'), 'TRÈS BON', '🟢'), (15, 25, 'BON', '🔵'), (0, 15, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Croissance des bénéfices. Plus importante que le CA.'
+    },
+    'Croissance CA Trim (%)': {
+        'ranges': [(15, float('inf'), 'TRÈS BON', '🟢'), (5, 15, 'BON', '🔵'), (-5, 5, 'MAUVAIS', '🟡'), (-float('inf'), -5, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Tendance récente du chiffre d\'affaires.'
+    },
+    'Croissance Bén Trim (%)': {
+        'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (10, 20, 'BON', '🔵'), (-10, 10, 'MAUVAIS', '🟡'), (-float('inf'), -10, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Dynamique récente des bénéfices.'
+    },
+    'Dette/Capitaux (%)': {
+        'ranges': [(0, 20, 'TRÈS BON', '🟢'), (20, 40, 'BON', '🔵'), (40, 100, 'MAUVAIS', '🟡'), (100, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Niveau d\'endettement. <30% = très sain.'
+    },
+    'Ratio Liquidité': {
+        'ranges': [(2, float('inf'), 'TRÈS BON', '🟢'), (1.5, 2, 'BON', '🔵'), (1, 1.5, 'MAUVAIS', '🟡'), (0, 1, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Capacité à payer les dettes court terme. >1.5 = bon.'
+    },
+    'Ratio Liquidité Imm': {
+        'ranges': [(1.5, float('inf'), 'TRÈS BON', '🟢'), (1.2, 1.5, 'BON', '🔵'), (0.8, 1.2, 'MAUVAIS', '🟡'), (0, 0.8, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Liquidité sans les stocks. >1 = sécurisant.'
+    },
+    'Trésorerie (Mds)': {
+        'ranges': [(5, float('inf'), 'TRÈS BON', '🟢'), (2, 5, 'BON', '🔵'), (0.1, 2, 'MAUVAIS', '🟡'), (0, 0.1, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Liquidités disponibles. Dépend de la taille de l\'entreprise.'
+    },
+    'Free Cash Flow (Mds)': {
+        'ranges': [(2, float('inf'), 'TRÈS BON', '🟢'), (0.5, 2, 'BON', '🔵'), (-0.5, 0.5, 'MAUVAIS', '🟡'), (-float('inf'), -0.5, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Argent généré après investissements. Crucial pour la santé.'
+    },
+    'Rendement Dividende (%)': {
+        'ranges': [(3, 5, 'TRÈS BON', '🟢'), (2, 3, 'BON', '🔵'), (0.1, 2, 'MAUVAIS', '🟡'), (0, 0.1, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Rendement annuel du dividende. 3-5% = idéal.'
+    },
+    'Taux Distribution (%)': {
+        'ranges': [(20, 60, 'TRÈS BON', '🟢'), (60, 80, 'BON', '🔵'), (80, 120, 'MAUVAIS', '🟡'), (120, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Part des bénéfices distribués. <80% = durable.'
+    },
+    'Dividende/Action ($)': {
+        'ranges': [(2, float('inf'), 'TRÈS BON', '🟢'), (1, 2, 'BON', '🔵'), (0.1, 1, 'MAUVAIS', '🟡'), (0, 0.1, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Montant annuel par action. Varie selon le prix de l\'action.'
+    },
+    'Performance 1 an (%)': {
+        'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (10, 20, 'BON', '🔵'), (-10, 10, 'MAUVAIS', '🟡'), (-float('inf'), -10, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Performance sur 12 mois vs marché.'
+    },
+    'Performance 3 ans (%)': {
+        'ranges': [(50, float('inf'), 'TRÈS BON', '🟢'), (20, 50, 'BON', '🔵'), (-20, 20, 'MAUVAIS', '🟡'), (-float('inf'), -20, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Performance cumulée sur 3 ans.'
+    },
+    'Performance 5 ans (%)': {
+        'ranges': [(100, float('inf'), 'TRÈS BON', '🟢'), (50, 100, 'BON', '🔵'), (-30, 50, 'MAUVAIS', '🟡'), (-float('inf'), -30, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Performance à long terme. Très révélatrice.'
+    },
+    'Volatilité (%)': {
+        'ranges': [(0, 15, 'TRÈS BON', '🟢'), (15, 25, 'BON', '🔵'), (25, 50, 'MAUVAIS', '🟡'), (50, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Variabilité des prix. <20% = stable.'
+    },
+    'Bêta': {
+        'ranges': [(0, 0.7, 'TRÈS BON', '🟢'), (0.7, 1, 'BON', '🔵'), (1, 1.8, 'MAUVAIS', '🟡'), (1.8, float('inf'), 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Volatilité vs marché. <1 = moins volatil que le marché.'
+    },
+    'Capitalisation (Mds)': {
+        'ranges': [(50, float('inf'), 'TRÈS BON', '🟢'), (10, 50, 'BON', '🔵'), (2, 10, 'MAUVAIS', '🟡'), (0, 2, 'ÉLIMINATOIRE', '🔴')],
+        'explanation': 'Taille de l\'entreprise. >10Mds = Large Cap.'
+    }
+}
+
+
+def _compile_rule(ranges) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Transformer une liste de plages en bornes triées + code de niveau par intervalle
+
+    Chaque intervalle élémentaire [e_i, e_i+1) est entièrement inclus ou exclu de
+    chaque plage : son niveau est celui de la première plage qui le contient.
+
+    Returns:
+        tuple: (bornes, codes) ; codes[i] couvre [bornes[i-1], bornes[i]), codes[0] = (-inf, bornes[0])
+    """
+    edges = np.unique([bound for min_val, max_val, _, _ in ranges for bound in (min_val, max_val)])
+    codes = np.full(len(edges) + 1, FALLBACK_CODE, dtype=np.int8)
+
+    for i in range(1, len(edges)):
+        low = edges[i - 1]
+        for min_val, max_val, label, _ in ranges:
+            if min_val <= low < max_val:
+                codes[i] = LEVELS.index(label)
+                break
+    return edges, codes
+
+
+# Compilé une seule fois à l'import
+COMPILED_RULES: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+    metric: _compile_rule(rule['ranges']) for metric, rule in SCORING_RULES.items()
+}
+
+
+def score_codes(metric_name: str, values) -> np.ndarray:
+    """
+    Codes de niveau d'une colonne de valeurs (une recherche binaire vectorisée)
+
+    Args:
+        metric_name: nom de la métrique
+        values: valeurs numériques (NaN = donnée absente)
+
+    Returns:
+        ndarray: codes (0-3 niveaux, 4 hors plage, -1 absent)
+    """
+    raw = pd.Series(values)
+    missing = raw.isna().to_numpy()
+    values = pd.to_numeric(raw, errors='coerce').to_numpy(dtype=float)
+    compiled = COMPILED_RULES.get(metric_name)
+
+    if compiled is None:
+        codes = np.full(len(values), FALLBACK_CODE, dtype=np.int8)
+    else:
+        edges, level_codes = compiled
+        codes = level_codes[np.searchsorted(edges, values, side='right')]
+
+    # Valeur non numérique (ex: texte) : hors plage, comme l'ancien calcul
+    codes[np.isnan(values)] = FALLBACK_CODE
+    codes[missing] = MISSING_CODE
+    return codes
+
+
+def score_metric(metric_name: str, value) -> Tuple[str, str, str]:
+    """
+    Niveau, emoji et explication d'une valeur
+
+    Returns:
+        tuple: (niveau, emoji, explication)
+    """
+    if value is None:
+        return "N/A", LEVEL_EMOJIS['N/A'], MISSING_EXPLANATION
+
+    rule = SCORING_RULES.get(metric_name)
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        rule = None
+
+    if rule is not None:
+        edges, level_codes = COMPILED_RULES[metric_name]
+        code = level_codes[np.searchsorted(edges, value, side='right')] if not np.isnan(value) else FALLBACK_CODE
+        if code != FALLBACK_CODE:
+            label = LEVELS[code]
+            return label, LEVEL_EMOJIS[label], rule['explanation']
+
+    return DEFAULT_LEVEL, LEVEL_EMOJIS[DEFAULT_LEVEL], DEFAULT_EXPLANATION
+
+
+def score_frame(metrics_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Niveaux de toutes les cellules d'un tableau de métriques
+
+    Args:
+        metrics_df: une ligne par ticker, une colonne par métrique
+
+    Returns:
+        DataFrame: codes de niveau de même forme (boucle sur les colonnes, pas sur les cellules)
+    """
+    return pd.DataFrame(
+        {metric: score_codes(metric, metrics_df[metric]) for metric in metrics_df.columns},
+        index=metrics_df.index
+    )
+
+
+def count_levels(metrics_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Nombre de métriques par niveau pour chaque ligne
+
+    Les valeurs hors plage (ou métriques sans règle) comptent comme MAUVAIS,
+    les données absentes ne sont pas comptées.
+
+    Returns:
+        DataFrame: colonnes TRÈS BON, BON, MAUVAIS, ÉLIMINATOIRE
+    """
+    codes = score_frame(metrics_df).to_numpy()
+    codes = np.where(codes == FALLBACK_CODE, LEVELS.index(DEFAULT_LEVEL), codes)
+    counts = np.stack([(codes == i).sum(axis=1) for i in range(len(LEVELS))], axis=1)
+    return pd.DataFrame(counts, index=metrics_df.index, columns=LEVELS)
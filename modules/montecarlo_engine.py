@@ -0,0 +1,347 @@
+# modules/montecarlo_engine.py
+"""
+Projections Monte-Carlo du portefeuille
+- Rendements mensuels tirés de l'historique quotidien des titres détenus (cache persistant des
+  cours, pondération actuelle) : bootstrap de blocs d'un mois ou loi log-normale calibrée
+- Versements mensuels et dividendes (rendement net prévu) réinvestis ou perçus
+- Simulation NumPy par lots : valeurs de toutes les trajectoires d'un lot en une formule
+  cumulative (aucune boucle par trajectoire ni par mois)
+- Lots indépendants (graines dérivées d'une graine fixe) : résultat identique en série ou
+  dans un pool de processus, utilisé à partir de 100 000 trajectoires
+- Éventail de percentiles, distribution finale et probabilité d'atteindre un objectif
+
+Benchmark : python -m modules.montecarlo_engine
+"""
+
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.cost_basis_engine import ledger_version, normalize_ledger
+
+MC_SEED = 42
+# Trajectoires par lot (mémoire d'un lot : trajectoires × mois)
+CHUNK_PATHS = 10_000
+# Pool de processus à partir de ce nombre de trajectoires
+PROCESS_POOL_THRESHOLD = 100_000
+MAX_WORKERS = max(1, min(4, (os.cpu_count() or 1)))
+# Séances par mois (blocs du bootstrap)
+MONTH_DAYS = 21
+# Historique utilisé pour les rendements
+PROJECTION_HISTORY = timedelta(days=10 * 365)
+# Nombre maximal de points de l'éventail (pas mensuel jusqu'à 10 ans)
+FAN_POINTS = 120
+PERCENTILES = (5, 25, 50, 75, 95)
+METHODS = {'bootstrap': "🔁 Bootstrap historique", 'lognormal': "📐 Loi log-normale"}
+
+
+# === RENDEMENTS ===
+
+def portfolio_daily_returns(prices: pd.DataFrame, weights: pd.Series) -> np.ndarray:
+    """
+    Rendements quotidiens du portefeuille à pondération constante (poids actuels)
+
+    Jours ouvrés uniquement ; les titres pas encore cotés sont exclus et les poids renormalisés.
+    """
+    prices = prices[prices.index.dayofweek < 5]
+    values = prices.to_numpy(dtype=float)
+    returns = values[1:] / values[:-1] - 1
+    weights = weights.reindex(prices.columns).fillna(0.0).to_numpy(dtype=float)
+    valid = ~np.isnan(returns)
+    covered = valid @ weights
+    with np.errstate(invalid='ignore', divide='ignore'):
+        portfolio = np.where(valid, returns, 0.0) @ weights / covered
+    return portfolio[covered > 0]
+
+
+def monthly_log_returns(daily: np.ndarray, window: int = MONTH_DAYS) -> np.ndarray:
+    """Log-rendements de tous les blocs glissants d'un mois (sommes cumulées)"""
+    logs = np.log1p(daily)
+    if len(logs) < window:
+        return np.array([])
+    cumulative = np.concatenate([[0.0], np.cumsum(logs)])
+    return cumulative[window:] - cumulative[:-window]
+
+
+def fan_grid(months: int, points: int = FAN_POINTS) -> np.ndarray:
+    """Mois conservés pour l'éventail (0 = aujourd'hui, chaque fin d'année, dernier = horizon)"""
+    grid = np.linspace(0, months, min(months, points) + 1).round().astype(int)
+    return np.union1d(grid, np.arange(0, months + 1, 12))
+
+
+# === SIMULATION ===
+
+def simulate_chunk(monthly_logs: np.ndarray, initial: float, months: int, n_paths: int, contribution: float,
+                   dividend_yield: float, reinvest: bool, method: str, seed, grid: np.ndarray) -> Dict:
+    """
+    Simuler un lot de trajectoires (fonction de module : exécutable dans un processus)
+
+    V_m = V_{m-1} × g_m + C, soit V = G × (V_0 + Σ C / G) avec G le produit cumulé des
+    croissances g_m (rendement du mois, plus le dividende s'il est réinvesti).
+
+    Returns:
+        dict: 'values' et 'dividends' (dividendes perçus cumulés), trajectoires × points de grid
+    """
+    rng = np.random.default_rng(seed)
+    if method == 'bootstrap':
+        logs = monthly_logs[rng.integers(0, len(monthly_logs), (n_paths, months))]
+    else:
+        logs = rng.normal(monthly_logs.mean(), monthly_logs.std(ddof=1), (n_paths, months))
+
+    monthly_yield = dividend_yield / 12
+    if reinvest:
+        logs = logs + np.log1p(monthly_yield)
+    growth = np.exp(np.cumsum(logs, axis=1))
+    values = growth * (initial + np.cumsum(contribution / growth, axis=1))
+
+    # Dividendes perçus (non réinvestis) : rendement mensuel × valeur avant versement
+    if reinvest:
+        dividends = np.zeros_like(values)
+    else:
+        dividends = np.cumsum((values - contribution) * monthly_yield, axis=1)
+
+    columns = grid[grid > 0] - 1
+    start = np.full((n_paths, 1), float(initial))
+    return {
+        'values': np.hstack([start, values[:, columns]]).astype(np.float32),
+        'dividends': np.hstack([np.zeros((n_paths, 1)), dividends[:, columns]]).astype(np.float32)
+    }
+
+
+def _simulate_task(task):
+    return simulate_chunk(*task)
+
+
+def run_projection(monthly_logs: np.ndarray, initial: float, months: int, n_paths: int,
+                   contribution: float = 0.0, dividend_yield: float = 0.0, reinvest: bool = True,
+                   method: str = 'bootstrap', seed: int = MC_SEED, target: Optional[float] = None,
+                   use_processes: Optional[bool] = None) -> Dict:
+    """
+    Projection Monte-Carlo complète
+
+    Args:
+        monthly_logs: log-rendements mensuels historiques (monthly_log_returns)
+        initial: valeur actuelle (EUR)
+        months: horizon
+        n_paths: nombre de trajectoires
+        contribution: versement mensuel (EUR)
+        dividend_yield: rendement net annuel des dividendes (0.02 = 2 %)
+        reinvest: dividendes réinvestis (sinon perçus)
+        method: 'bootstrap' ou 'lognormal'
+        seed: graine (résultat reproductible, indépendant du parallélisme)
+        target: capital visé (probabilité de l'atteindre à l'horizon)
+        use_processes: pool de processus (par défaut au-delà de PROCESS_POOL_THRESHOLD)
+
+    Returns:
+        dict: 'fan' (Mois, P5…P95, Versements cumulés, Dividendes perçus P50), 'final' (statistiques),
+              'final_values' (échantillon des valeurs finales), 'elapsed_ms', 'workers'
+    """
+    start_time = time.perf_counter()
+    grid = fan_grid(months)
+    sizes = [CHUNK_PATHS] * (n_paths // CHUNK_PATHS) + ([n_paths % CHUNK_PATHS] if n_paths % CHUNK_PATHS else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [(monthly_logs, initial, months, size, contribution, dividend_yield, reinvest, method, chunk_seed, grid)
+             for size, chunk_seed in zip(sizes, seeds)]
+
+    use_processes = n_paths >= PROCESS_POOL_THRESHOLD if use_processes is None else use_processes
+    workers = min(MAX_WORKERS, len(tasks)) if use_processes else 1
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunks = list(executor.map(_simulate_task, tasks))
+    else:
+        chunks = [_simulate_task(task) for task in tasks]
+
+    values = np.vstack([chunk['values'] for chunk in chunks])
+    dividends = np.vstack([chunk['dividends'] for chunk in chunks])
+    value_percentiles = np.percentile(values, PERCENTILES, axis=0)
+
+    fan = pd.DataFrame({'Mois': grid})
+    for percentile, row in zip(PERCENTILES, value_percentiles):
+        fan[f'P{percentile}'] = row
+    fan['Versements cumulés'] = initial + contribution * grid
+    fan['Dividendes perçus (médiane)'] = np.median(dividends, axis=0)
+
+    final = values[:, -1].astype(float)
+    invested = initial + contribution * months
+    summary = {
+        'Valeur médiane': float(np.median(final)),
+        'Valeur moyenne': float(final.mean()),
+        **{f'P{percentile}': float(value_percentiles[i, -1]) for i, percentile in enumerate(PERCENTILES)},
+        'Versements cumulés': float(invested),
+        'Probabilité de perte (%)': float((final < invested).mean() * 100),
+        'Probabilité objectif (%)': float((final >= target).mean() * 100) if target else None,
+        'Dividendes perçus (médiane)': float(np.median(dividends[:, -1]))
+    }
+    return {
+        'fan': fan,
+        'final': summary,
+        'final_values': final[:: max(1, len(final) // 20_000)],
+        'elapsed_ms': (time.perf_counter() - start_time) * 1000,
+        'workers': workers,
+        'paths': int(len(final))
+    }
+
+
+# === DONNÉES DU PORTEFEUILLE ===
+
+def get_projection_inputs(df_data: pd.DataFrame) -> Dict:
+    """
+    Rendements mensuels historiques, valeur actuelle et rendement des dividendes, mémorisés en
+    session (cours du cache persistant, rafraîchis seulement après expiration du TTL)
+
+    Returns:
+        dict: 'monthly_logs', 'initial' (EUR), 'dividend_yield', 'history_years', 'contribution'
+              (versement mensuel moyen des 12 derniers mois), 'missing', 'errors'
+    """
+    from modules.dividend_forecast import get_dividend_forecast
+    from modules.fx_history_cache import get_fx_cache
+    from modules.price_matrix import get_price_cache
+    from modules.returns_engine import fx_matrix, net_flows
+    from modules.risk_engine import current_holdings, prices_in_eur
+    from modules.yfinance_cache_manager import get_cache_manager
+
+    holdings = current_holdings(df_data)
+    empty = {'monthly_logs': np.array([]), 'initial': 0.0, 'dividend_yield': 0.0, 'history_years': 0.0,
+             'contribution': 0.0, 'missing': [], 'errors': {}}
+    if holdings.empty:
+        return empty
+
+    tickers = holdings['Ticker'].tolist()
+    currencies = dict(zip(holdings['Ticker'], holdings['Units'].fillna('EUR').astype(str).str.upper()))
+    ledger = normalize_ledger(df_data)
+    all_currencies = sorted(set(currencies.values()) | set(ledger['Units']) | {'USD'})
+    price_cache, fx_cache = get_price_cache(), get_fx_cache()
+    errors = {**price_cache.refresh(tickers), **fx_cache.refresh(all_currencies)}
+
+    signature = (ledger_version(df_data), price_cache.signature(tickers), datetime.now().date())
+    cached = st.session_state.get('projection_inputs')
+    if cached and cached['signature'] == signature:
+        return {**cached['inputs'], 'errors': errors}
+
+    eurusd_rate = get_cache_manager().get_eurusd_rate()
+    fx_fallback = {'USD': 1 / eurusd_rate} if eurusd_rate else None
+    fx_rates = fx_cache.get_rates(all_currencies)
+    prices = prices_in_eur(price_cache.get_matrix(tickers, start=datetime.now() - PROJECTION_HISTORY),
+                           currencies, fx_rates, fx_fallback)
+
+    last_prices = prices.ffill().iloc[-1] if not prices.empty else pd.Series(dtype=float)
+    values = holdings.set_index('Ticker')['Quantité'] * last_prices.reindex(tickers)
+    missing = sorted(values[values.isna()].index)
+    values = values.dropna()
+    initial = float(values.sum())
+    if initial <= 0:
+        return {**empty, 'missing': missing, 'errors': errors}
+
+    daily = portfolio_daily_returns(prices[values.index], values / initial)
+
+    # Rendement net des dividendes : revenus prévus sur 12 mois (EUR) / valeur actuelle
+    payments = get_dividend_forecast(df_data)['payments']
+    income = 0.0
+    if not payments.empty:
+        by_currency = payments.groupby('Devise')['Montant net'].sum()
+        rates = fx_matrix(fx_rates, list(by_currency.index), pd.DatetimeIndex([prices.index[-1]]), fx_fallback)
+        income = float(np.nansum(by_currency.to_numpy() / rates.iloc[0].to_numpy()))
+
+    # Versement mensuel moyen des 12 derniers mois : apports nets du moteur de rendements
+    # (achats + frais, ventes nettes), au taux historique du jour comme les cours
+    days = pd.date_range(pd.Timestamp(datetime.now()).normalize() - timedelta(days=364), periods=365, freq='D')
+    recent = ledger[ledger['Date'].dt.normalize() >= days[0]]
+    recent = recent.assign(Date=recent['Date'].dt.normalize().clip(upper=days[-1]))
+    flows = net_flows(recent, fx_matrix(fx_rates, sorted(set(recent['Units'])), days, fx_fallback), days)
+    contribution = float(np.nansum(flows.to_numpy()) / 12)
+
+    inputs = {
+        'monthly_logs': monthly_log_returns(daily),
+        'initial': initial,
+        'dividend_yield': income / initial,
+        'history_years': len(daily) / 252,
+        'contribution': max(contribution, 0.0),
+        'missing': missing
+    }
+    st.session_state.projection_inputs = {'signature': signature, 'inputs': inputs}
+    return {**inputs, 'errors': errors}
+
+
+def get_projection(inputs: Dict, **params) -> Dict:
+    """
+    Projection mémorisée en session : relancée seulement si les données ou les paramètres changent
+
+    Args:
+        inputs: get_projection_inputs
+        params: arguments de run_projection (months, n_paths, contribution, …)
+    """
+    signature = hashlib.sha1(
+        inputs['monthly_logs'].tobytes() + repr((inputs['initial'], sorted(params.items()))).encode()
+    ).hexdigest()
+    cached = st.session_state.get('projection_result')
+    if cached and cached['signature'] == signature:
+        return cached['result']
+
+    result = run_projection(inputs['monthly_logs'], inputs['initial'], **params)
+    st.session_state.projection_result = {'signature': signature, 'result': result}
+    return result
+
+
+# === BENCHMARK ===
+
+def synthetic_monthly_logs(n_days: int = 2_520, seed: int = 42) -> np.ndarray:
+    """Log-rendements mensuels d'un historique quotidien synthétique (10 ans)"""
+    rng = np.random.default_rng(seed)
+    return monthly_log_returns(rng.normal(0.0005, 0.011, n_days))
+
+
+def _legacy_paths(monthly_logs: np.ndarray, indices: np.ndarray, initial: float, contribution: float,
+                  dividend_yield: float) -> List[float]:
+    """Trajectoires simulées mois par mois en Python (référence, dividendes réinvestis)"""
+    finals = []
+    for path in indices:
+        value = initial
+        for index in path:
+            value = value * np.exp(monthly_logs[index]) * (1 + dividend_yield / 12) + contribution
+        finals.append(value)
+    return finals
+
+
+def run_benchmark(n_paths: int = 100_000, months: int = 240, legacy_paths: int = 500) -> Dict:
+    """
+    Mesurer la simulation par lots (série et pool de processus) et la boucle Python
+
+    Returns:
+        dict: temps (ms), reproductibilité et cohérence avec la boucle
+    """
+    monthly_logs = synthetic_monthly_logs()
+    params = dict(contribution=500.0, dividend_yield=0.02, reinvest=True, method='bootstrap', seed=MC_SEED)
+
+    serial = run_projection(monthly_logs, 50_000.0, months, n_paths, use_processes=False, **params)
+    pooled = run_projection(monthly_logs, 50_000.0, months, n_paths, use_processes=True, **params)
+
+    # Même tirage que le premier lot, rejoué trajectoire par trajectoire
+    rng = np.random.default_rng(np.random.SeedSequence(MC_SEED).spawn(1)[0])
+    indices = rng.integers(0, len(monthly_logs), (min(legacy_paths, CHUNK_PATHS), months))
+    start = time.perf_counter()
+    legacy = _legacy_paths(monthly_logs, indices, 50_000.0, 500.0, 0.02)
+    legacy_ms = (time.perf_counter() - start) * 1000 * n_paths / len(indices)
+    chunk = simulate_chunk(monthly_logs, 50_000.0, months, len(indices), 500.0, 0.02, True, 'bootstrap',
+                           np.random.SeedSequence(MC_SEED).spawn(1)[0], fan_grid(months))
+
+    return {
+        'paths': n_paths,
+        'months': months,
+        'serial_ms': round(serial['elapsed_ms'], 1),
+        'pool_ms': round(pooled['elapsed_ms'], 1),
+        'pool_workers': pooled['workers'],
+        'legacy_ms_estimated': round(legacy_ms, 1),
+        'reproducible': serial['final'] == pooled['final'],
+        'consistent': bool(np.allclose(chunk['values'][:, -1], legacy, rtol=1e-5))
+    }
+
+
+if __name__ == "__main__":
+    print(run_benchmark())
@@ -0,0 +1,237 @@
+# modules/price_matrix.py
+"""
+Historique quotidien des cours de clôture, persistant
+- Une série par ticker, téléchargée une fois puis complétée de façon incrémentale
+- Stockage SQLite partagé entre tous les utilisateurs (.cache/)
+- Détection des ajustements (split) : rechargement complet si le recouvrement a changé
+- Matrice dates × tickers (jours calendaires, dernier cours connu) pour les calculs vectorisés
+"""
+
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import streamlit as st
+import yfinance as yf
+
+from modules.rate_limiter import run_rate_limited
+from modules.yfinance_cache_manager import get_yahoo_rate_limiter
+
+PRICE_CACHE_PATH = os.path.join(".cache", "price_history.sqlite")
+PRICE_REFRESH_TTL = timedelta(hours=12)
+PRICE_HISTORY_START = "2000-01-01"
+PRICE_FETCH_WORKERS = 4
+# Écart relatif toléré sur le cours de recouvrement avant rechargement complet
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+def fetch_price_history(ticker: str, start: Optional[str] = None) -> pd.Series:
+    """
+    Télécharger les clôtures quotidiennes d'un ticker (réseau uniquement, utilisable en thread)
+
+    Clôtures ajustées des splits mais pas des dividendes (auto_adjust=False) :
+    les dividendes sont comptés à part comme revenus.
+
+    Returns:
+        Series: cours indexés par date (sans fuseau)
+    """
+    history = yf.Ticker(ticker).history(start=start or PRICE_HISTORY_START, auto_adjust=False)
+    if history.empty:
+        return pd.Series(dtype=float)
+    closes = history['Close'].dropna()
+    if closes.index.tz is not None:
+        closes.index = closes.index.tz_localize(None)
+    return closes[closes > 0]
+
+
+class PriceHistoryCache:
+    """
+    Cours de clôture quotidiens par ticker, persistants sur disque
+
+    Une connexion SQLite par opération : utilisable depuis plusieurs threads/sessions.
+    """
+
+    def __init__(self, path: str = PRICE_CACHE_PATH, ttl: timedelta = PRICE_REFRESH_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_history (
+                    ticker TEXT NOT NULL,
+                    date TEXT NOT NULL,
+                    close REAL NOT NULL,
+                    PRIMARY KEY (ticker, date)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS price_state (
+                    ticker TEXT PRIMARY KEY,
+                    last_checked TEXT,
+                    last_date TEXT,
+                    updated_at TEXT
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    # === LECTURE ===
+
+    def get_states(self, tickers: List[str]) -> Dict[str, Dict]:
+        """État de cache de chaque ticker connu"""
+        if not tickers:
+            return {}
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT ticker, last_checked, last_date, updated_at FROM price_state WHERE ticker IN ({placeholders})",
+                list(tickers)
+            ).fetchall()
+        return {row[0]: {'last_checked': row[1], 'last_date': row[2], 'updated_at': row[3]} for row in rows}
+
+    def stale_tickers(self, tickers: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Tickers à vérifier sur le réseau (jamais vus ou TTL expiré)
+
+        Returns:
+            dict: {ticker: dernière date stockée ou None}
+        """
+        states = self.get_states(tickers)
+        now = datetime.now()
+        stale = {}
+        for ticker in tickers:
+            state = states.get(ticker)
+            if state is None or state['last_checked'] is None:
+                stale[ticker] = None
+            elif now - datetime.fromisoformat(state['last_checked']) >= self.ttl:
+                stale[ticker] = state['last_date']
+        return stale
+
+    def get_history(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Historique stocké (format long)
+
+        Returns:
+            DataFrame: Ticker, Date, Close
+        """
+        if not tickers:
+            return pd.DataFrame({'Ticker': pd.Series(dtype=str), 'Date': pd.Series(dtype='datetime64[ns]'),
+                                 'Close': pd.Series(dtype=float)})
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            df = pd.read_sql_query(
+                f"SELECT ticker AS Ticker, date AS Date, close AS Close FROM price_history "
+                f"WHERE ticker IN ({placeholders}) ORDER BY date", conn, params=list(tickers)
+            )
+        df['Date'] = pd.to_datetime(df['Date'])
+        return df
+
+    def get_matrix(self, tickers: List[str], start=None, end=None) -> pd.DataFrame:
+        """
+        Matrice des cours : une ligne par jour calendaire, une colonne par ticker
+
+        Week-ends et jours fériés : dernier cours connu. Tickers sans historique : colonne vide (NaN).
+        """
+        tickers = sorted(set(tickers))
+        history = self.get_history(tickers)
+        matrix = history.pivot_table(index='Date', columns='Ticker', values='Close', aggfunc='last')
+        matrix = matrix.reindex(columns=tickers)
+
+        start = pd.Timestamp(start).normalize() if start is not None else \
+            (matrix.index.min() if not matrix.empty else pd.Timestamp(datetime.now()).normalize())
+        end = pd.Timestamp(end or datetime.now()).normalize()
+        days = pd.date_range(start, max(start, end), freq='D')
+        return matrix.reindex(matrix.index.union(days)).ffill().reindex(days)
+
+    def signature(self, tickers: List[str]) -> str:
+        """Empreinte du contenu stocké (change dès qu'un ticker reçoit de nouveaux cours)"""
+        states = self.get_states(tickers)
+        return "|".join(f"{t}:{states.get(t, {}).get('updated_at')}" for t in sorted(tickers))
+
+    # === ÉCRITURE ===
+
+    def store(self, ticker: str, closes: pd.Series, full_history: bool) -> bool:
+        """
+        Fusionner des cours téléchargés dans le cache
+
+        Returns:
+            bool: False si le cours de recouvrement a été ajusté (rechargement complet nécessaire)
+        """
+        now = datetime.now().isoformat()
+        rows = [(ticker, idx.strftime('%Y-%m-%d'), float(close)) for idx, close in closes.items()]
+
+        with self._lock, self._connect() as conn:
+            if not full_history and rows:
+                stored = conn.execute("SELECT close FROM price_history WHERE ticker = ? AND date = ?",
+                                      (ticker, rows[0][1])).fetchone()
+                if stored and abs(stored[0] - rows[0][2]) > ADJUSTMENT_TOLERANCE * stored[0]:
+                    return False
+            if full_history:
+                conn.execute("DELETE FROM price_history WHERE ticker = ?", (ticker,))
+            conn.executemany("INSERT OR REPLACE INTO price_history (ticker, date, close) VALUES (?, ?, ?)", rows)
+
+            last_date = conn.execute("SELECT MAX(date) FROM price_history WHERE ticker = ?", (ticker,)).fetchone()[0]
+            conn.execute("""
+                INSERT INTO price_state (ticker, last_checked, last_date, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET
+                    last_checked = excluded.last_checked,
+                    last_date = excluded.last_date,
+                    updated_at = CASE WHEN ? THEN excluded.updated_at ELSE price_state.updated_at END
+            """, (ticker, now, last_date, now, bool(rows)))
+        return True
+
+    def mark_checked(self, ticker: str):
+        """Ticker vérifié sans succès : pas de nouvelle tentative avant le TTL"""
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT INTO price_state (ticker, last_checked) VALUES (?, ?)
+                ON CONFLICT(ticker) DO UPDATE SET last_checked = excluded.last_checked
+            """, (ticker, datetime.now().isoformat()))
+
+    def refresh(self, tickers: Iterable[str]) -> Dict[str, str]:
+        """
+        Compléter l'historique des tickers dont le TTL a expiré (appels parallèles limités)
+
+        Returns:
+            dict: {ticker: message d'erreur} pour les tickers non rafraîchis
+        """
+        stale = self.stale_tickers(sorted({t for t in tickers if t}))
+        errors = {}
+
+        def _fetch(item: Tuple[str, Optional[str]]):
+            ticker, last_date = item
+            return fetch_price_history(ticker, last_date)
+
+        reload = []
+        for (ticker, last_date), closes, error in run_rate_limited(
+            _fetch, stale.items(), buckets=[get_yahoo_rate_limiter()], max_workers=PRICE_FETCH_WORKERS
+        ):
+            if error is not None:
+                errors[ticker] = str(error)
+                self.mark_checked(ticker)
+            elif not self.store(ticker, closes, full_history=last_date is None):
+                reload.append((ticker, None))
+
+        # Historique ajusté (split) : rechargement complet
+        for (ticker, _), closes, error in run_rate_limited(
+            _fetch, reload, buckets=[get_yahoo_rate_limiter()], max_workers=PRICE_FETCH_WORKERS
+        ):
+            if error is not None:
+                errors[ticker] = str(error)
+                self.mark_checked(ticker)
+            else:
+                self.store(ticker, closes, full_history=True)
+        return errors
+
+
+@st.cache_resource
+def get_price_cache():
+    """Singleton du cache d'historique des cours (partagé entre sessions)"""
+    return PriceHistoryCache()
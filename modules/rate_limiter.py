@@ -0,0 +1,129 @@
+# modules/rate_limiter.py
+"""
+Limitation de débit partagée pour les appels réseau de TLB INVESTOR
+- Token bucket thread-safe (quotas Google Sheets, Yahoo Finance...)
+- Exécution parallèle bornée par un ou plusieurs buckets
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe
+
+    Le bucket se remplit en continu de `rate_per_minute` jetons par minute,
+    jusqu'à `capacity` jetons (rafale maximale autorisée).
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute: débit moyen autorisé (jetons par minute)
+            capacity: taille de rafale (par défaut = débit par minute)
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate_per_second)
+        self._last_refill = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """
+        Consommer des jetons sans bloquer
+
+        Returns:
+            float: 0 si les jetons ont été consommés, sinon délai d'attente estimé (secondes)
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate_per_second
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Consommer des jetons en attendant si nécessaire
+
+        Args:
+            tokens: nombre de jetons à consommer
+            timeout: attente maximale en secondes (None = illimitée)
+
+        Returns:
+            bool: True si les jetons ont été obtenus
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """Vider le bucket pour suspendre les appels (ex: après un HTTP 429)"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, 0.0) - seconds * self.rate_per_second
+
+    @property
+    def available(self) -> float:
+        """Nombre de jetons actuellement disponibles"""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+def acquire_all(buckets: Sequence[TokenBucket], tokens: float = 1.0):
+    """Consommer des jetons dans tous les buckets (bloquant)"""
+    for bucket in buckets:
+        bucket.acquire(tokens)
+
+
+def run_rate_limited(func: Callable, items: Iterable, buckets: Sequence[TokenBucket] = (),
+                     max_workers: int = 5) -> Iterator[Tuple[object, object, Optional[Exception]]]:
+    """
+    Exécuter `func(item)` en parallèle en respectant les buckets
+
+    Les résultats sont produits au fil de l'eau (ordre de complétion),
+    ce qui permet d'afficher une progression depuis le thread principal.
+    Les fonctions exécutées ne doivent pas accéder à st.session_state.
+
+    Args:
+        func: fonction à appliquer à chaque élément
+        items: éléments à traiter
+        buckets: token buckets à respecter (1 jeton par appel)
+        max_workers: nombre maximal d'appels simultanés
+
+    Yields:
+        tuple: (item, résultat ou None, exception ou None)
+    """
+    def _call(item):
+        acquire_all(buckets)
+        return func(item)
+
+    items = list(items)
+    if not items:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items)))) as executor:
+        futures = {executor.submit(_call, item): item for item in items}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                yield item, future.result(), None
+            except Exception as e:
+                yield item, None, e
@@ -0,0 +1,316 @@
+# modules/rebalancing_engine.py
+"""
+Moteur de rééquilibrage du portefeuille (onglet Déséquilibres)
+- Positions EUR agrégées par entreprise, limites Type / Secteur / Catégorie de Feuil2
+- Plafond de 10 % du portefeuille total par entreprise (Actions, toutes lignes confondues)
+- Programme linéaire (HiGHS) : montants d'achat / de vente minimaux qui respectent toutes les limites
+  (une variable par catégorie, contraintes creuses)
+- Limites impossibles à tenir (catégorie non détenue...) : contraintes relâchées et signalées
+
+Benchmark : python -m modules.rebalancing_engine
+"""
+
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from modules.limits_engine import COMPANY_CAP_PCT, ETF_CATEGORIES, RULE_COLUMNS, compile_limits
+
+# Part maximale d'une entreprise (Actions) dans le portefeuille total
+COMPANY_CAP = COMPANY_CAP_PCT / 100
+# Tolérance autour des objectifs Type / Secteur / Catégorie (points de %)
+TARGET_TOLERANCE = 5.0
+# Coût d'un euro de dépassement de limite (très supérieur au coût d'un euro échangé)
+SLACK_PENALTY = 1_000.0
+# Écart (€) en dessous duquel un ordre est ignoré
+MIN_TRADE_EUR = 1.0
+
+POSITION_COLUMNS = ['Type', 'Secteur', 'Category', 'Entreprise']
+
+
+# === LIMITES ===
+
+def parse_limit_rules(limits: pd.DataFrame, tolerance: float = TARGET_TOLERANCE) -> List[Dict]:
+    """
+    Règles compilées de Feuil2 (limits_engine) traduites en bornes (fractions)
+
+    Les objectifs deviennent des bandes objectif ± tolérance, les plafonds des bornes hautes ;
+    le plafond par entreprise est traité à part (bornes de variables).
+
+    Returns:
+        list: dicts {'scope', 'label', 'base', 'kind' (target / cap), 'target', 'low', 'high'}
+    """
+    compiled = compile_limits(limits)
+    compiled = compiled[compiled['Groupe'] != '*']
+
+    rules = []
+    for scope, label, base, nature, target in compiled[RULE_COLUMNS].itertuples(index=False):
+        is_cap = nature == 'plafond'
+        low, high = (0.0, target) if is_cap else (target - tolerance, target + tolerance)
+        rules.append({
+            'scope': scope, 'label': label, 'base': None if base == 'Total' else base,
+            'kind': 'cap' if is_cap else 'target', 'target': float(target),
+            'low': max(low, 0.0) / 100, 'high': min(high, 100.0) / 100
+        })
+    return rules
+
+
+def build_positions(df: pd.DataFrame, value_col: str = 'Current value') -> pd.DataFrame:
+    """
+    Positions EUR agrégées par Type / Secteur / Catégorie / Entreprise
+
+    Args:
+        df: lignes du portefeuille (valeurs déjà converties en EUR)
+        value_col: colonne de valeur EUR
+
+    Returns:
+        DataFrame: colonnes de regroupement + 'Valeur'
+    """
+    positions = df[POSITION_COLUMNS].astype(str).copy()
+    positions['Valeur'] = pd.to_numeric(df[value_col], errors='coerce').fillna(0).clip(lower=0)
+    return positions.groupby(POSITION_COLUMNS, as_index=False, sort=False)['Valeur'].sum()
+
+
+# === OPTIMISATION ===
+
+def rule_matrices(positions: pd.DataFrame, rules: List[Dict]):
+    """
+    Appartenance de chaque ligne au groupe et à la base de chaque règle
+
+    Returns:
+        tuple: (membres, bases) — matrices creuses (CSR) n_règles × n_lignes de 0/1
+    """
+    n = len(positions)
+    types = positions['Type'].to_numpy()
+    base_masks = {None: np.ones(n, dtype=bool), 'Actions': types == 'Actions', 'ETF': types == 'ETF'}
+    scopes = {scope: positions[scope].to_numpy() for scope in {rule['scope'] for rule in rules}}
+
+    member_cols, base_cols = [], []
+    for rule in rules:
+        base = base_masks[rule['base']]
+        base_cols.append(np.flatnonzero(base))
+        member_cols.append(np.flatnonzero(base & (scopes[rule['scope']] == rule['label'])))
+
+    def to_matrix(cols):
+        rows = np.repeat(np.arange(len(cols)), [len(c) for c in cols])
+        indices = np.concatenate(cols) if cols else np.zeros(0, dtype=int)
+        return sparse.csr_matrix((np.ones(len(indices)), (rows, indices)), shape=(len(rules), n))
+
+    return to_matrix(member_cols), to_matrix(base_cols)
+
+
+def _rule_rows(positions: pd.DataFrame, rules: List[Dict]):
+    """
+    Lignes de contraintes (membre × valeur finale ≤ 0) pour chaque borne de chaque règle
+
+    Returns:
+        tuple: (matrice creuse n_bornes × n_positions, descriptions des bornes)
+    """
+    members, bases = rule_matrices(positions, rules)
+    upper = [i for i, rule in enumerate(rules) if rule['high'] < 1.0]
+    lower = [i for i, rule in enumerate(rules) if rule['low'] > 0.0]
+
+    # Plafond : membre - high × base ≤ 0 ; plancher : low × base - membre ≤ 0
+    high = sparse.diags([rules[i]['high'] for i in upper])
+    low = sparse.diags([rules[i]['low'] for i in lower])
+    matrix = sparse.vstack([
+        members[upper] - high @ bases[upper],
+        low @ bases[lower] - members[lower]
+    ]).tocsr()
+    descriptions = [{**rules[i], 'bound': 'max'} for i in upper] + [{**rules[i], 'bound': 'min'} for i in lower]
+    return matrix, descriptions
+
+
+def _spread(amounts: np.ndarray, unit_of: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Répartir le montant de chaque variable agrégée entre ses lignes au prorata des poids"""
+    totals = np.bincount(unit_of, weights=weights, minlength=len(amounts))[unit_of]
+    counts = np.bincount(unit_of, minlength=len(amounts))[unit_of]
+    share = np.divide(weights, totals, out=1.0 / counts, where=totals > 0)
+    return amounts[unit_of] * share
+
+
+def solve_rebalancing(positions: pd.DataFrame, rules: List[Dict], cash: float = 0.0,
+                      company_cap: float = COMPANY_CAP) -> Dict:
+    """
+    Ordres d'achat / de vente minimaux respectant les limites
+
+    Variables : achat b ≥ 0 et vente 0 ≤ s ≤ valeur, écart e ≥ 0 par contrainte.
+    Objectif : min Σb + Σs + pénalité × Σe, sous Σ(b - s) = cash.
+
+    Les lignes d'une même catégorie (Type / Secteur / Catégorie) ont les mêmes coefficients
+    dans toutes les règles : elles partagent une variable (bornes sommées), répartie ensuite
+    au prorata entre les lignes. Seules les entreprises dont le plafond est une contrainte
+    (plusieurs lignes) gardent une variable par ligne.
+
+    Args:
+        positions: résultat de build_positions
+        rules: résultat de parse_limit_rules
+        cash: apport (> 0) investi en même temps que le rééquilibrage
+        company_cap: part maximale d'une entreprise Actions (fraction)
+
+    Returns:
+        dict: 'trades' (DataFrame), 'violations' (bornes non tenues), 'status', 'elapsed_ms',
+              'total_buy', 'total_sell'
+    """
+    start = time.perf_counter()
+    n = len(positions)
+    values = positions['Valeur'].to_numpy(dtype=float)
+    total_after = values.sum() + cash
+
+    # Plafond entreprise (toutes ses lignes) : valeur finale ≤ cap × total final (total fixé par l'égalité).
+    # Entreprise sur une seule ligne : bornes de variables (achat ≤ marge restante, vente ≥ excédent)
+    # tant que le reste du portefeuille peut absorber les ventes ; sinon contraintes relâchables.
+    is_capped = positions['Type'].to_numpy() == 'Actions'
+    cap_value = company_cap * total_after
+    capped = np.flatnonzero(is_capped)
+    companies, company_of = np.unique(positions['Entreprise'].to_numpy()[capped].astype(str), return_inverse=True)
+    caps_as_bounds = (~is_capped).any() or len(companies) * cap_value >= total_after
+
+    as_bound = np.zeros(n, dtype=bool)
+    if caps_as_bounds:
+        as_bound[capped[np.bincount(company_of, minlength=len(companies))[company_of] == 1]] = True
+    in_cap_rows = is_capped & ~as_bound
+    cap_companies, cap_row_of = np.unique(company_of[in_cap_rows[capped]], return_inverse=True)
+
+    buy_max = np.where(as_bound, np.maximum(cap_value - values, 0.0), np.inf)
+    sell_min = np.where(as_bound, np.maximum(values - cap_value, 0.0), 0.0)
+
+    # Variables agrégées : une par catégorie, une par ligne soumise à une contrainte entreprise
+    category = positions.groupby(['Type', 'Secteur', 'Category'], sort=False).ngroup().to_numpy()
+    unit_key = np.where(in_cap_rows, category.max(initial=-1) + 1 + np.arange(n), category)
+    _, first_line, unit_of = np.unique(unit_key, return_index=True, return_inverse=True)
+    k = len(first_line)
+    unit_values = np.bincount(unit_of, weights=values, minlength=k)
+    unit_buy_max = np.bincount(unit_of, weights=buy_max, minlength=k)
+    unit_sell_min = np.bincount(unit_of, weights=sell_min, minlength=k)
+
+    cap_matrix = sparse.csr_matrix((np.ones(len(cap_row_of)), (cap_row_of, unit_of[in_cap_rows])),
+                                   shape=(len(cap_companies), k))
+    rule_matrix, descriptions = _rule_rows(positions.iloc[first_line], rules)
+
+    # A × (v + b - s) - e ≤ rhs  ⇔  A b - A s - e ≤ rhs - A v
+    constraints = sparse.vstack([cap_matrix, rule_matrix]).tocsr()
+    rhs = np.concatenate([np.full(len(cap_companies), cap_value), np.zeros(rule_matrix.shape[0])]) \
+        - constraints @ unit_values
+    m = constraints.shape[0]
+
+    a_ub = sparse.hstack([constraints, -constraints, -sparse.identity(m)]).tocsr()
+    a_eq = sparse.csr_matrix(np.concatenate([np.ones(k), -np.ones(k), np.zeros(m)]))
+    cost = np.concatenate([np.ones(2 * k), np.full(m, SLACK_PENALTY)])
+    bounds = np.column_stack([
+        np.concatenate([np.zeros(k), unit_sell_min, np.zeros(m)]),
+        np.concatenate([unit_buy_max, unit_values, np.full(m, np.inf)])
+    ])
+
+    result = linprog(cost, A_ub=a_ub if m else None, b_ub=rhs if m else None, A_eq=a_eq, b_eq=[cash],
+                     bounds=bounds, method='highs')
+
+    if result.status != 0:
+        return {'trades': pd.DataFrame(), 'violations': [], 'status': result.message,
+                'elapsed_ms': (time.perf_counter() - start) * 1000, 'total_buy': 0.0, 'total_sell': 0.0}
+
+    unit_buy, unit_sell, slack = result.x[:k], result.x[k:2 * k], result.x[2 * k:]
+    # Achats : au prorata de la marge sous le plafond (Actions) ou de la valeur (ETF) ;
+    # ventes : excédent obligatoire puis prorata de la valeur restante
+    buy = _spread(unit_buy, unit_of, np.where(np.isfinite(buy_max), buy_max, values))
+    sell = sell_min + _spread(np.maximum(unit_sell - unit_sell_min, 0.0), unit_of, values - sell_min)
+    net = np.where(np.abs(buy - sell) >= MIN_TRADE_EUR, buy - sell, 0.0)
+
+    trades = positions.copy()
+    trades['Achat (€)'] = net.clip(min=0)
+    trades['Vente (€)'] = (-net).clip(min=0)
+    trades['Valeur cible'] = values + net
+    trades['% actuel'] = values / max(values.sum(), 1e-9) * 100
+    trades['% cible'] = trades['Valeur cible'] / max(total_after, 1e-9) * 100
+    trades = trades[net != 0].sort_values('Vente (€)', ascending=False).reset_index(drop=True)
+
+    # Bornes non tenues (écart résiduel significatif)
+    violations = []
+    company_names = companies[cap_companies]
+    for row in np.flatnonzero(slack > MIN_TRADE_EUR):
+        if row < len(cap_companies):
+            violations.append({'scope': 'Entreprise', 'label': company_names[row], 'bound': 'max',
+                               'target': company_cap * 100, 'gap_eur': float(slack[row])})
+        else:
+            rule = descriptions[row - len(cap_companies)]
+            violations.append({'scope': rule['scope'], 'label': rule['label'], 'bound': rule['bound'],
+                               'target': rule['target'], 'gap_eur': float(slack[row])})
+
+    return {
+        'trades': trades,
+        'violations': violations,
+        'status': 'optimal',
+        'elapsed_ms': (time.perf_counter() - start) * 1000,
+        'total_buy': float(trades['Achat (€)'].sum()),
+        'total_sell': float(trades['Vente (€)'].sum())
+    }
+
+
+def rebalance_portfolio(df: pd.DataFrame, limits: pd.DataFrame, cash: float = 0.0,
+                        tolerance: float = TARGET_TOLERANCE, company_cap: float = COMPANY_CAP,
+                        value_col: str = 'Current value') -> Dict:
+    """Rééquilibrage complet depuis les lignes du portefeuille (EUR) et Feuil2"""
+    return solve_rebalancing(build_positions(df, value_col), parse_limit_rules(limits, tolerance),
+                             cash=cash, company_cap=company_cap)
+
+
+# === BENCHMARK ===
+
+
+def synthetic_portfolio(n_positions: int = 2_000, seed: int = 42):
+    """
+    Portefeuille synthétique (Actions / ETF) et limites du modèle par défaut
+
+    Returns:
+        tuple: (portfolio_df, limits_df)
+    """
+    from modules.tab0_constants import CATEGORY_LIST
+
+    rng = np.random.default_rng(seed)
+    n_etf = n_positions // 5
+    sectors = rng.choice(['Cyclique', 'Sensible', 'Défensif'], n_positions - n_etf)
+    categories = [rng.choice(CATEGORY_LIST[s]) for s in sectors]
+
+    portfolio = pd.DataFrame({
+        'Type': ['Actions'] * len(sectors) + ['ETF'] * n_etf,
+        'Secteur': list(sectors) + ['ETF'] * n_etf,
+        'Category': categories + list(rng.choice(list(ETF_CATEGORIES), n_etf)),
+        'Entreprise': [f"SOC{i:05d}" for i in range(n_positions)],
+        'Current value': rng.lognormal(7, 1.2, n_positions)
+    })
+    limits = pd.DataFrame([
+        ['Type', 'Actions', 70], ['Type', 'ETF', 30],
+        ['Secteur', 'Cyclique', 25], ['Secteur', 'Défensif', 35], ['Secteur', 'Sensible', 40],
+        ['Catégorie', 'Technologie', 15], ['Catégorie', 'Santé', 12], ['Catégorie', 'Energie', 8],
+        ['Catégorie', 'S&P500', 15], ['Catégorie', 'Euro STOXX50', 15]
+    ], columns=['Variable1', 'Variable2', 'Valeur seuils'])
+    return portfolio, limits
+
+
+def run_benchmark(sizes=(50, 500, 2_000, 10_000), repeat: int = 3) -> List[Dict]:
+    """
+    Temps de résolution (meilleur de `repeat`) par taille de portefeuille
+
+    Returns:
+        list: dicts {'positions', 'solve_ms', 'trades', 'violations'}
+    """
+    report = []
+    for size in sizes:
+        portfolio, limits = synthetic_portfolio(size)
+        timings, result = [], None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = rebalance_portfolio(portfolio, limits)
+            timings.append((time.perf_counter() - start) * 1000)
+        report.append({'positions': size, 'solve_ms': round(min(timings), 1),
+                       'trades': len(result['trades']), 'violations': len(result['violations'])})
+    return report
+
+
+if __name__ == "__main__":
+    for line in run_benchmark():
+        print(line)
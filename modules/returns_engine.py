@@ -0,0 +1,541 @@
+# modules/returns_engine.py
+"""
+Rendements pondérés par le temps (TWR) et par les capitaux (XIRR)
+- Valeur quotidienne du portefeuille par compte : quantités cumulées × matrice des cours / taux de change
+  (opérations matricielles, aucune boucle par jour ni par ligne)
+- Apports nets datés depuis le journal (achats, ventes, frais) et dividendes de Feuil4
+- TWR quotidien chaîné : insensible aux versements mensuels
+- XIRR de tous les comptes et de toutes les périodes résolus ensemble (Newton vectorisé)
+- Indices de référence (S&P 500, Euro STOXX 50, ETF au choix) simulés avec les mêmes apports
+  aux mêmes dates, valorisés dans la même passe matricielle
+- Résultat mémorisé en session : changer de période ne recalcule rien
+
+Benchmark : python -m modules.returns_engine
+"""
+
+import hashlib
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.cost_basis_engine import (
+    BUY, SELL, FEE, POSITION_KEYS, ledger_version, normalize_ledger, signed_quantities
+)
+from modules.dividend_engine import compute_entitlements
+
+# Fenêtres du sélecteur de période (jours ; None = depuis le début)
+PERIODS = {"Max": None, "1 an": 365, "6 mois": 180, "3 mois": 90, "1 mois": 30}
+TOTAL_ACCOUNT = "Total"
+
+# Indices de référence proposés (ticker Yahoo → libellé) et leur devise de cotation
+BENCHMARKS = {
+    '^GSPC': 'S&P 500', '^STOXX50E': 'Euro STOXX 50', '^NDX': 'NASDAQ 100', '^FCHI': 'CAC 40', 'URTH': 'MSCI World'
+}
+BENCHMARK_CURRENCIES = {'^GSPC': 'USD', '^STOXX50E': 'EUR', '^NDX': 'USD', '^FCHI': 'EUR', 'URTH': 'USD'}
+# Suffixes Yahoo des places cotant en EUR (devise des autres tickers : USD par défaut)
+EUR_SUFFIXES = ('PA', 'DE', 'F', 'AS', 'MI', 'MC', 'BR', 'LS', 'IR', 'HE', 'VI')
+
+XIRR_GUESS = 0.05
+XIRR_TOLERANCE = 1e-9
+XIRR_MAX_ITER = 100
+# Taux plancher (-99,99 %) : évite (1 + r) <= 0 pendant les itérations
+XIRR_FLOOR = -0.9999
+
+
+# === SÉRIES QUOTIDIENNES ===
+
+def fx_matrix(rates: pd.DataFrame, currencies: List[str], days: pd.DatetimeIndex,
+              fallback: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """
+    Taux de change quotidiens (unités de devise pour 1 EUR), une colonne par devise
+
+    Args:
+        rates: historique long (Devise, Date, Taux) de fx_history_cache
+        currencies: devises nécessaires
+        days: jours calendaires
+        fallback: taux fixe des devises sans historique
+
+    Returns:
+        DataFrame: jours × devises (EUR = 1)
+    """
+    wide = rates.pivot_table(index='Date', columns='Devise', values='Taux', aggfunc='last') if not rates.empty \
+        else pd.DataFrame(index=pd.DatetimeIndex([]))
+    wide = wide.reindex(wide.index.union(days)).ffill().bfill().reindex(days)
+    matrix = pd.DataFrame(index=days)
+    for currency in currencies:
+        if currency == 'EUR':
+            matrix[currency] = 1.0
+        elif currency in wide.columns:
+            matrix[currency] = wide[currency]
+        else:
+            matrix[currency] = (fallback or {}).get(currency, np.nan)
+    return matrix
+
+
+def benchmark_currency(ticker: str, info: Optional[Dict] = None) -> str:
+    """Devise de cotation d'un indice ou d'un ETF de référence (table, infos Yahoo, puis suffixe)"""
+    if ticker in BENCHMARK_CURRENCIES:
+        return BENCHMARK_CURRENCIES[ticker]
+    if info and info.get('currency'):
+        return str(info['currency']).upper()
+    suffix = ticker.rsplit('.', 1)[1].upper() if '.' in ticker else ''
+    return 'EUR' if suffix in EUR_SUFFIXES else 'USD'
+
+
+def allocate_dividends(df_div: Optional[pd.DataFrame], ledger: pd.DataFrame, signed: pd.Series) -> pd.DataFrame:
+    """
+    Dividendes nets (€) de Feuil4 ventilés par compte au prorata des quantités détenues
+
+    Returns:
+        DataFrame: Date, Compte, Dividendes
+    """
+    columns = ['Date', 'Compte', 'Dividendes']
+    if df_div is None or df_div.empty or not {'Date paiement', 'Ticker', 'Montant net (€)'} <= set(df_div.columns):
+        return pd.DataFrame(columns=columns)
+
+    dividends = df_div[['Date paiement', 'Ticker', 'Montant net (€)']].copy()
+    dividends['Montant net (€)'] = pd.to_numeric(dividends['Montant net (€)'], errors='coerce').fillna(0)
+    dividends['_dividend_id'] = np.arange(len(dividends))
+    holdings = ledger[POSITION_KEYS + ['Date']].assign(Quantity=signed.to_numpy())
+
+    entitled = compute_entitlements(dividends, holdings, by=POSITION_KEYS)
+    if entitled.empty:
+        return pd.DataFrame(columns=columns)
+    share = entitled['Quantité détenue'] / entitled.groupby('_dividend_id')['Quantité détenue'].transform('sum')
+    return pd.DataFrame({
+        'Date': entitled['Date paiement'].dt.normalize(),
+        'Compte': entitled['Compte'],
+        'Dividendes': entitled['Montant net (€)'] * share
+    })
+
+
+def net_flows(ledger: pd.DataFrame, fx: pd.DataFrame, days: pd.DatetimeIndex) -> pd.DataFrame:
+    """
+    Apports nets quotidiens en EUR par compte, au taux du jour du mouvement
+    (achats + frais, ventes nettes de frais, frais seuls)
+
+    Args:
+        ledger: journal normalisé, dates normalisées comprises dans `days`
+        fx: fx_matrix des devises du journal sur `days`
+        days: jours calendaires consécutifs
+
+    Returns:
+        DataFrame: jours × comptes
+    """
+    operation = ledger['Opération']
+    amount = np.select(
+        [operation == BUY, operation == SELL, operation == FEE],
+        [ledger['Montant'] + ledger['Frais'], -(ledger['Montant'] - ledger['Frais']), ledger['Frais']],
+        default=0.0
+    )
+    day_index = (ledger['Date'] - days[0]).dt.days.to_numpy()
+    currency_index = fx.columns.get_indexer(ledger['Units'])
+    flows = pd.DataFrame({'Date': ledger['Date'], 'Compte': ledger['Compte'],
+                          'Flux': amount / fx.to_numpy()[day_index, currency_index]})
+    return flows.pivot_table(index='Date', columns='Compte', values='Flux', aggfunc='sum') \
+        .reindex(index=days).fillna(0.0)
+
+
+def build_daily_series(ledger: pd.DataFrame, prices: pd.DataFrame, fx_rates: pd.DataFrame,
+                       df_div: Optional[pd.DataFrame] = None, end=None,
+                       fx_fallback: Optional[Dict[str, float]] = None,
+                       benchmarks: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Valeur, apports nets et dividendes quotidiens (EUR) par compte
+
+    Les quantités (ajustées des splits) sont cumulées sur une matrice jours × (compte, ticker),
+    multipliée par la matrice des cours et divisée par le taux de change du jour.
+    Une ligne à zéro précède le premier mouvement (point de départ de la période « Max »).
+
+    Chaque indice de référence est une colonne de plus de la même matrice des cours : les apports
+    nets du portefeuille y sont investis (ou retirés) aux mêmes dates. Les indices sont des
+    indices de prix : les dividendes du portefeuille restent distribués, pas réinvestis.
+
+    Args:
+        ledger: journal normalisé (cost_basis_engine.normalize_ledger)
+        prices: matrice des cours (price_matrix), jours × tickers
+        fx_rates: historique des taux (fx_history_cache.get_rates)
+        df_div: dividendes de Feuil4
+        end: dernier jour (aujourd'hui par défaut)
+        fx_fallback: taux fixe des devises sans historique
+        benchmarks: indices de référence {ticker: devise}, colonnes de `prices`
+
+    Returns:
+        dict: 'values', 'flows', 'dividends' (jours × comptes + Total), 'benchmarks' (jours × indices),
+              'missing' (tickers sans cours)
+    """
+    benchmarks = {ticker: currency for ticker, currency in (benchmarks or {}).items()
+                  if ticker in prices.columns and prices[ticker].notna().any()}
+    priced = prices.columns[prices.notna().any()]
+    missing = sorted(set(ledger['Ticker']) - set(priced))
+    ledger = ledger[ledger['Ticker'].isin(priced)].reset_index(drop=True)
+    if ledger.empty:
+        empty = pd.DataFrame(columns=[TOTAL_ACCOUNT], dtype=float)
+        return {'values': empty, 'flows': empty, 'dividends': empty, 'benchmarks': pd.DataFrame(),
+                'missing': missing}
+
+    end = pd.Timestamp(end or datetime.now()).normalize()
+    first = ledger['Date'].min().normalize()
+    days = pd.date_range(first - pd.Timedelta(days=1), max(end, first), freq='D')
+    ledger = ledger.assign(Date=ledger['Date'].dt.normalize())
+
+    signed = signed_quantities(ledger)
+
+    # Quantités détenues chaque jour : cumul des mouvements
+    holdings = pd.DataFrame({'Date': ledger['Date'], 'Compte': ledger['Compte'], 'Ticker': ledger['Ticker'],
+                             'Quantité': signed})
+    quantities = holdings.pivot_table(index='Date', columns=['Compte', 'Ticker'], values='Quantité', aggfunc='sum')
+    quantities = quantities.reindex(days, fill_value=0.0).fillna(0.0).cumsum().clip(lower=0)
+
+    # Devise de chaque position et taux du jour
+    units = ledger.groupby(POSITION_KEYS, sort=False)['Units'].first()
+    currencies = sorted(set(units.unique()) | set(benchmarks.values()))
+    fx = fx_matrix(fx_rates, currencies, days, fx_fallback)
+    column_units = units.reindex(pd.MultiIndex.from_arrays(
+        [quantities.columns.get_level_values('Ticker'), quantities.columns.get_level_values('Compte')]
+    )).to_numpy()
+
+    daily_prices = prices.reindex(prices.index.union(days)).ffill().bfill().reindex(days)
+    price_values = daily_prices[quantities.columns.get_level_values('Ticker')].to_numpy()
+    fx_values = fx[column_units].to_numpy()
+    position_values = quantities.to_numpy() * price_values / fx_values
+    values = pd.DataFrame(np.nan_to_num(position_values), index=days, columns=quantities.columns) \
+        .T.groupby(level='Compte').sum().T
+
+    flows = net_flows(ledger, fx, days).reindex(columns=values.columns, fill_value=0.0)
+
+    allocated = allocate_dividends(df_div, ledger, signed)
+    allocated = allocated[allocated['Date'].between(days[0], days[-1])]
+    dividends = allocated.pivot_table(index='Date', columns='Compte', values='Dividendes', aggfunc='sum') \
+        .reindex(index=days, columns=values.columns).fillna(0.0) if not allocated.empty \
+        else pd.DataFrame(0.0, index=days, columns=values.columns)
+
+    for frame in (values, flows, dividends):
+        frame[TOTAL_ACCOUNT] = frame.sum(axis=1)
+
+    # Indices de référence : parts achetées / vendues avec les apports nets du jour
+    benchmark_values = pd.DataFrame(index=days)
+    if benchmarks:
+        tickers = list(benchmarks)
+        benchmark_prices = daily_prices[tickers].to_numpy() / fx[list(benchmarks.values())].to_numpy()
+        shares = np.cumsum(flows[TOTAL_ACCOUNT].to_numpy()[:, None] / benchmark_prices, axis=0)
+        benchmark_values = pd.DataFrame(np.nan_to_num(shares * benchmark_prices), index=days, columns=tickers)
+
+    return {'values': values, 'flows': flows, 'dividends': dividends, 'benchmarks': benchmark_values,
+            'missing': missing}
+
+
+# === TWR ===
+
+def twr_index(values: pd.DataFrame, flows: pd.DataFrame, dividends: pd.DataFrame) -> pd.DataFrame:
+    """
+    Indice de performance TWR (base 1) par compte
+
+    Rendement du jour : (V_t + D_t - F_t) / V_t-1 - 1, les apports étant réputés
+    effectués en fin de journée ; jour sans valeur la veille : rendement nul.
+    """
+    previous = values.shift(1).fillna(0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = (values + dividends - flows) / previous - 1
+    daily = daily.where(previous > 0, 0.0).replace([np.inf, -np.inf], 0.0).fillna(0.0)
+    return (1 + daily).cumprod()
+
+
+# === XIRR ===
+
+def xirr_vectorized(amounts: np.ndarray, years: np.ndarray, guess: float = XIRR_GUESS,
+                    tol: float = XIRR_TOLERANCE, max_iter: int = XIRR_MAX_ITER) -> np.ndarray:
+    """
+    XIRR de plusieurs séries de flux à la fois (méthode de Newton vectorisée)
+
+    Résout Σ a_i (1 + r)^(-t_i) = 0 pour chaque ligne ; les lignes convergées sont figées.
+
+    Args:
+        amounts: flux (séries × dates), négatif = versement de l'investisseur
+        years: ancienneté de chaque flux en années depuis le début de la série
+        guess: taux initial
+
+    Returns:
+        ndarray: taux annuel par série (NaN sans changement de signe ou sans convergence)
+    """
+    amounts = np.asarray(amounts, dtype=float)
+    years = np.asarray(years, dtype=float)
+    rate = np.full(amounts.shape[0], guess)
+    converged = np.zeros(amounts.shape[0], dtype=bool)
+    valid = (amounts > 0).any(axis=1) & (amounts < 0).any(axis=1)
+
+    for _ in range(max_iter):
+        active = valid & ~converged
+        if not active.any():
+            break
+        base = 1 + rate[active, None]
+        discounted = amounts[active] * base ** -years[active]
+        value = discounted.sum(axis=1)
+        derivative = (-years[active] * discounted / base).sum(axis=1)
+        step = np.divide(value, derivative, out=np.zeros_like(value), where=derivative != 0)
+        updated = rate[active] - step
+        # Pas trop grand vers le bas : moitié du chemin jusqu'au plancher
+        updated = np.where(updated <= XIRR_FLOOR, (rate[active] + XIRR_FLOOR) / 2, updated)
+        rate[active] = updated
+        converged[active] = np.abs(step) < tol
+
+    return np.where(valid & converged, rate, np.nan)
+
+
+# === MÉTRIQUES PAR PÉRIODE ===
+
+def period_metrics(series: Dict, index: Optional[pd.DataFrame] = None,
+                   periods: Optional[Dict[str, Optional[int]]] = None) -> pd.DataFrame:
+    """
+    TWR et XIRR de chaque compte pour chaque période (une seule résolution XIRR)
+
+    Returns:
+        DataFrame: Période, Compte, Début, TWR (%), TWR annualisé (%), XIRR (%),
+                   Valeur début, Valeur fin, Apports nets, Dividendes
+    """
+    periods = periods or PERIODS
+    values, flows, dividends = series['values'], series['flows'], series['dividends']
+    if values.empty:
+        return pd.DataFrame()
+    index = index if index is not None else twr_index(values, flows, dividends)
+
+    days = values.index
+    accounts = list(values.columns)
+    n_days = len(days)
+    starts = [0 if window is None else max(0, n_days - 1 - window) for window in periods.values()]
+
+    # Flux vus de l'investisseur : apports négatifs, dividendes positifs
+    investor = (dividends - flows).to_numpy().T            # comptes × jours
+    values_np = values.to_numpy().T
+    flows_np = flows.to_numpy().T
+    dividends_np = dividends.to_numpy().T
+    elapsed = (days - days[0]).days.to_numpy() / 365.25
+
+    rows, amounts, years = [], [], []
+    for (label, window), start in zip(periods.items(), starts):
+        in_window = np.arange(n_days) > start
+        for i, account in enumerate(accounts):
+            series_flows = np.where(in_window, investor[i], 0.0)
+            series_flows[start] -= values_np[i, start]
+            series_flows[-1] += values_np[i, -1]
+            amounts.append(series_flows)
+            years.append(np.clip(elapsed - elapsed[start], 0, None))
+
+            twr = index[account].iloc[-1] / index[account].iloc[start] - 1
+            span_years = elapsed[-1] - elapsed[start]
+            rows.append({
+                'Période': label,
+                'Compte': account,
+                'Début': days[start] + pd.Timedelta(days=1),
+                'TWR (%)': twr * 100,
+                'TWR annualisé (%)': ((1 + twr) ** (1 / span_years) - 1) * 100 if span_years * 365.25 >= 365 else np.nan,
+                'Valeur début': values_np[i, start],
+                'Valeur fin': values_np[i, -1],
+                'Apports nets': flows_np[i, in_window].sum(),
+                'Dividendes': dividends_np[i, in_window].sum()
+            })
+
+    metrics = pd.DataFrame(rows)
+    metrics['XIRR (%)'] = xirr_vectorized(np.array(amounts), np.array(years)) * 100
+    return metrics
+
+
+# === CACHE ===
+
+def compute_portfolio_returns(df_data: pd.DataFrame, prices: pd.DataFrame, fx_rates: pd.DataFrame,
+                              df_div: Optional[pd.DataFrame] = None, end=None,
+                              fx_fallback: Optional[Dict[str, float]] = None,
+                              benchmarks: Optional[Dict[str, str]] = None) -> Dict:
+    """
+    Séries quotidiennes, indice TWR et métriques de toutes les périodes
+
+    Args:
+        benchmarks: indices de référence {ticker: devise} dont les cours sont dans `prices`
+
+    Returns:
+        dict: 'daily' (Date, Valeur, Apports nets cumulés, Dividendes cumulés, Indice TWR — total,
+              plus Valeur / Indice de chaque indice de référence), 'index' (TWR par compte),
+              'metrics', 'benchmark_metrics' (mêmes colonnes, un « compte » par indice), 'missing'
+    """
+    ledger = normalize_ledger(df_data)
+    series = build_daily_series(ledger, prices, fx_rates, df_div, end, fx_fallback, benchmarks)
+    if series['values'].empty:
+        return {'daily': pd.DataFrame(), 'index': pd.DataFrame(), 'metrics': pd.DataFrame(),
+                'benchmark_metrics': pd.DataFrame(), 'missing': series['missing']}
+
+    index = twr_index(series['values'], series['flows'], series['dividends'])
+    daily = pd.DataFrame({
+        'Date': series['values'].index,
+        'Valeur portefeuille': series['values'][TOTAL_ACCOUNT].to_numpy(),
+        'Montant investi': series['flows'][TOTAL_ACCOUNT].cumsum().to_numpy(),
+        'Dividendes cumulés': series['dividends'][TOTAL_ACCOUNT].cumsum().to_numpy(),
+        'Indice TWR': index[TOTAL_ACCOUNT].to_numpy()
+    })
+
+    # Indices de référence : mêmes apports, aucun dividende distribué
+    benchmark_values = series['benchmarks']
+    benchmark_metrics = pd.DataFrame()
+    if not benchmark_values.empty:
+        benchmark_series = {
+            'values': benchmark_values,
+            'flows': pd.DataFrame({ticker: series['flows'][TOTAL_ACCOUNT] for ticker in benchmark_values.columns}),
+            'dividends': pd.DataFrame(0.0, index=benchmark_values.index, columns=benchmark_values.columns)
+        }
+        benchmark_index = twr_index(**benchmark_series)
+        for ticker in benchmark_values.columns:
+            daily[f'Valeur {ticker}'] = benchmark_values[ticker].to_numpy()
+            daily[f'Indice {ticker}'] = benchmark_index[ticker].to_numpy()
+        benchmark_metrics = period_metrics(benchmark_series, benchmark_index)
+
+    return {
+        'daily': daily.iloc[1:].reset_index(drop=True),
+        'index': index.iloc[1:],
+        'metrics': period_metrics(series, index),
+        'benchmark_metrics': benchmark_metrics,
+        'missing': series['missing']
+    }
+
+
+def get_portfolio_returns(df_data: pd.DataFrame, df_div: Optional[pd.DataFrame] = None,
+                          benchmarks: Optional[List[str]] = None) -> Dict:
+    """
+    Rendements du portefeuille, mémorisés en session
+
+    Cours et taux sont complétés depuis les caches persistants (réseau uniquement si le TTL
+    est expiré) ; le calcul n'est refait que si le journal, les dividendes, les cours ou
+    les indices de référence choisis changent.
+
+    Args:
+        df_data: Feuil1
+        df_div: Feuil4
+        benchmarks: tickers Yahoo des indices / ETF de référence
+
+    Returns:
+        dict: voir compute_portfolio_returns, plus 'errors' {ticker/devise: message}
+    """
+    from modules.fx_history_cache import get_fx_cache
+    from modules.price_matrix import get_price_cache
+    from modules.yfinance_cache_manager import get_cache_manager
+
+    cache_manager = get_cache_manager()
+    tickers = sorted(df_data['Ticker'].dropna().astype(str).str.strip().unique())
+    benchmarks = [ticker for ticker in dict.fromkeys(benchmarks or []) if ticker]
+    benchmark_currencies = {
+        ticker: benchmark_currency(
+            ticker, None if ticker in BENCHMARK_CURRENCIES else cache_manager.get_ticker_info(ticker)
+        )
+        for ticker in benchmarks
+    }
+    currencies = sorted(
+        set(df_data['Units'].fillna('EUR').astype(str).str.strip().str.upper().unique()
+            if 'Units' in df_data.columns else ['EUR'])
+        | set(benchmark_currencies.values())
+    )
+    all_tickers = sorted(set(tickers) | set(benchmarks))
+
+    price_cache, fx_cache = get_price_cache(), get_fx_cache()
+    errors = {**price_cache.refresh(all_tickers), **fx_cache.refresh(currencies)}
+
+    div_hash = hashlib.sha1(
+        pd.util.hash_pandas_object(df_div.astype(str), index=False).to_numpy().tobytes()
+    ).hexdigest() if df_div is not None and not df_div.empty else 'none'
+    signature = (ledger_version(df_data), div_hash, price_cache.signature(all_tickers),
+                 tuple(sorted(benchmark_currencies.items())), datetime.now().date())
+
+    cached = st.session_state.get('portfolio_returns')
+    if cached and cached['signature'] == signature:
+        return {**cached['returns'], 'errors': errors}
+
+    # Devises sans historique : taux courant du gestionnaire de cache (USD pour 1 EUR)
+    eurusd_rate = cache_manager.get_eurusd_rate()
+    fx_fallback = {'USD': 1 / eurusd_rate} if eurusd_rate else None
+
+    first_date = pd.to_datetime(df_data['Date'], errors='coerce').min()
+    returns = compute_portfolio_returns(
+        df_data, price_cache.get_matrix(all_tickers, start=first_date), fx_cache.get_rates(currencies),
+        df_div, fx_fallback=fx_fallback, benchmarks=benchmark_currencies
+    )
+    st.session_state.portfolio_returns = {'signature': signature, 'returns': returns}
+    return {**returns, 'errors': errors}
+
+
+# === BENCHMARK ===
+
+def synthetic_returns_dataset(n_transactions: int = 2_000, n_tickers: int = 50, n_days: int = 3_650,
+                              seed: int = 42):
+    """
+    Achats mensuels synthétiques, cours en marche aléatoire et taux EURUSD
+
+    Returns:
+        tuple: (df_data, prices, fx_rates)
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(end=pd.Timestamp(datetime.now()).normalize(), periods=n_days, freq='D')
+    tickers = [f"TCK{i:03d}" for i in range(n_tickers)]
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (n_days, n_tickers)), axis=0)),
+                          index=days, columns=tickers)
+
+    dates = days[rng.integers(0, n_days - 1, n_transactions)]
+    ticker = rng.choice(tickers, n_transactions)
+    quantity = rng.integers(1, 20, n_transactions).astype(float)
+    price = prices.to_numpy()[days.get_indexer(dates), [tickers.index(t) for t in ticker]]
+    df_data = pd.DataFrame({
+        'Date': dates, 'Ticker': ticker, 'Compte': rng.choice(['PEA', 'CTO'], n_transactions),
+        'Quantity': quantity, 'Purchase price': price, 'Purchase value': quantity * price,
+        'Units': rng.choice(['EUR', 'USD'], n_transactions)
+    })
+    fx_rates = pd.DataFrame({'Devise': 'USD', 'Date': days, 'Taux': 1.1 + np.cumsum(rng.normal(0, 0.002, n_days))})
+    return df_data, prices, fx_rates
+
+
+def _legacy_daily_values(df_data: pd.DataFrame, prices: pd.DataFrame, days: pd.DatetimeIndex) -> List[float]:
+    """Ancienne valorisation jour par jour et ligne par ligne (référence de comparaison, EUR seulement)"""
+    values = []
+    for day in days:
+        total = 0.0
+        for _, row in df_data.iterrows():
+            if pd.Timestamp(row['Date']) > day:
+                continue
+            series = prices[row['Ticker']]
+            valid = series.index[series.index <= day]
+            if len(valid) > 0:
+                total += series.loc[valid.max()] * row['Quantity']
+        values.append(total)
+    return values
+
+
+def run_benchmark(n_transactions: int = 2_000, legacy_days: int = 5) -> Dict:
+    """
+    Mesurer le moteur (séries + TWR + XIRR de toutes les périodes) et l'ancienne boucle quotidienne
+
+    Returns:
+        dict: temps (ms), estimation de l'ancienne boucle et cohérence des valeurs
+    """
+    df_data, prices, fx_rates = synthetic_returns_dataset(n_transactions)
+    eur_only = df_data.assign(Units='EUR')
+
+    start = time.perf_counter()
+    returns = compute_portfolio_returns(eur_only, prices, fx_rates)
+    engine_ms = (time.perf_counter() - start) * 1000
+
+    sample_days = returns['daily']['Date'].iloc[-legacy_days:]
+    start = time.perf_counter()
+    legacy = _legacy_daily_values(eur_only, prices, pd.DatetimeIndex(sample_days))
+    legacy_ms = (time.perf_counter() - start) * 1000 * len(returns['daily']) / legacy_days
+
+    return {
+        'transactions': n_transactions,
+        'days': len(returns['daily']),
+        'engine_ms': round(engine_ms, 1),
+        'legacy_ms_estimated': round(legacy_ms, 1),
+        'speedup': round(legacy_ms / engine_ms, 1) if engine_ms else None,
+        'consistent': bool(np.allclose(returns['daily']['Valeur portefeuille'].iloc[-legacy_days:], legacy))
+    }
+
+
+if __name__ == "__main__":
+    print(run_benchmark())
@@ -0,0 +1,423 @@
+# modules/risk_engine.py
+"""
+Analyse de risque du portefeuille
+- Une matrice de rendements quotidiens alignée (jours ouvrés × titres, en EUR) construite depuis
+  l'historique persistant des cours (price_matrix)
+- Portefeuille = quantités détenues aujourd'hui, valorisées sur l'historique (achat-conservation)
+- Volatilité glissante, drawdown maximal, VaR / CVaR historiques et paramétriques, bêta,
+  matrice de corrélation des titres (NumPy, corrélations par paires sur les jours communs)
+- Mise à jour incrémentale : un nouveau jour de cours ne coûte qu'une mise à jour de rang 1
+  des sommes de la fenêtre, sans reconstruire la matrice
+- Modèle mémorisé en session par version du journal et indice de référence
+
+Benchmark : python -m modules.risk_engine
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import norm
+
+from modules.cost_basis_engine import get_cost_basis, ledger_version
+from modules.returns_engine import BENCHMARK_CURRENCIES, benchmark_currency, fx_matrix
+
+TRADING_DAYS = 252
+# Fenêtre des VaR, bêta et corrélations (jours ouvrés)
+RISK_WINDOW = 252
+# Fenêtre de la volatilité glissante (≈ 3 mois)
+ROLLING_VOL_WINDOW = 63
+# Historique chargé pour le drawdown et la volatilité glissante
+RISK_HISTORY = timedelta(days=5 * 365)
+CONFIDENCE_LEVELS = (0.95, 0.99)
+# Jours communs minimum pour publier une corrélation
+MIN_COMMON_DAYS = 20
+# Écart relatif toléré sur le dernier cours connu avant reconstruction complète
+PRICE_TOLERANCE = 1e-6
+
+
+# === MODÈLE ===
+
+class RiskModel:
+    """
+    Rendements et statistiques de risque d'un portefeuille à quantités fixes
+
+    Les rendements des titres ne sont conservés que sur la fenêtre de risque ; les corrélations
+    sont tirées de sommes par paires (jours communs, produits croisés) tenues à jour par
+    ajout de la nouvelle ligne et retrait de la plus ancienne. Les séries du portefeuille
+    (rendement, niveau, sommet) sont conservées en entier pour le drawdown.
+    """
+
+    def __init__(self, prices: pd.DataFrame, quantities: pd.Series, benchmark: Optional[pd.Series] = None,
+                 window: int = RISK_WINDOW, vol_window: int = ROLLING_VOL_WINDOW):
+        """
+        Args:
+            prices: cours en EUR, jours × tickers (jours calendaires acceptés, week-ends ignorés)
+            quantities: quantités détenues par ticker
+            benchmark: cours en EUR de l'indice de référence
+        """
+        prices = prices[prices.index.dayofweek < 5]
+        self.window = window
+        self.vol_window = vol_window
+        self.tickers: List[str] = list(prices.columns)
+        self.quantities = quantities.reindex(self.tickers).fillna(0.0).to_numpy(dtype=float)
+        self.dates = prices.index[1:]
+
+        values = prices.to_numpy(dtype=float)
+        self.last_prices = values[-1].copy() if len(values) else np.full(len(self.tickers), np.nan)
+        returns = values[1:] / values[:-1] - 1
+        self.portfolio_returns = self._portfolio_returns(values[:-1], values[1:])
+
+        benchmark_values = benchmark.reindex(prices.index).ffill().to_numpy(dtype=float) \
+            if benchmark is not None else np.full(len(prices), np.nan)
+        self.last_benchmark = benchmark_values[-1] if len(benchmark_values) else np.nan
+        self.benchmark_returns = benchmark_values[1:] / benchmark_values[:-1] - 1
+
+        self.levels = np.cumprod(1 + self.portfolio_returns)
+        self.peaks = np.maximum.accumulate(self.levels) if len(self.levels) else self.levels
+        self.rolling_vol = self._rolling_volatility(self.portfolio_returns)
+
+        # Sommes par paires sur la fenêtre : N (jours communs), Σx, Σx², Σxy
+        self.window_returns = returns[-window:]
+        count = len(self.tickers)
+        self._n = np.zeros((count, count))
+        self._sx = np.zeros((count, count))
+        self._sxx = np.zeros((count, count))
+        self._sxy = np.zeros((count, count))
+        self._accumulate(self.window_returns, 1.0)
+
+    def _portfolio_returns(self, previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+        """Rendement de la valeur des quantités détenues, sur les titres cotés les deux jours"""
+        valid = ~(np.isnan(previous) | np.isnan(current))
+        start = np.where(valid, previous, 0.0) @ self.quantities
+        end = np.where(valid, current, 0.0) @ self.quantities
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(start > 0, end / np.where(start > 0, start, 1.0) - 1, 0.0)
+
+    def _rolling_volatility(self, returns: np.ndarray) -> np.ndarray:
+        """Volatilité annualisée (%) sur fenêtre glissante, par sommes cumulées"""
+        size = self.vol_window
+        if len(returns) < size:
+            return np.full(len(returns), np.nan)
+        s1 = np.concatenate([[0.0], np.cumsum(returns)])
+        s2 = np.concatenate([[0.0], np.cumsum(returns ** 2)])
+        total, squares = s1[size:] - s1[:-size], s2[size:] - s2[:-size]
+        variance = np.clip((squares - total ** 2 / size) / (size - 1), 0, None)
+        return np.concatenate([np.full(size - 1, np.nan), np.sqrt(variance * TRADING_DAYS) * 100])
+
+    def _accumulate(self, rows: np.ndarray, sign: float):
+        """Ajouter (+1) ou retirer (-1) des lignes de rendements des sommes par paires"""
+        if not len(rows):
+            return
+        mask = (~np.isnan(rows)).astype(float)
+        x = np.nan_to_num(rows)
+        self._n += sign * (mask.T @ mask)
+        self._sx += sign * (x.T @ mask)
+        self._sxx += sign * ((x ** 2).T @ mask)
+        self._sxy += sign * (x.T @ x)
+
+    # === MISE À JOUR ===
+
+    def update(self, date, prices: pd.Series, benchmark_price: Optional[float] = None) -> bool:
+        """
+        Ajouter un jour de cours (EUR) sans reconstruire le modèle
+
+        Returns:
+            bool: False si le jour est ignoré (week-end ou déjà connu)
+        """
+        date = pd.Timestamp(date)
+        if date.dayofweek >= 5 or (len(self.dates) and date <= self.dates[-1]):
+            return False
+
+        current = prices.reindex(self.tickers).to_numpy(dtype=float)
+        current = np.where(np.isnan(current), self.last_prices, current)
+        row = current / self.last_prices - 1
+        portfolio_return = self._portfolio_returns(self.last_prices[None, :], current[None, :])
+
+        benchmark_price = self.last_benchmark if benchmark_price is None or np.isnan(benchmark_price) \
+            else benchmark_price
+        self.benchmark_returns = np.append(self.benchmark_returns, benchmark_price / self.last_benchmark - 1)
+        self.last_benchmark = benchmark_price
+        self.last_prices = current
+
+        self.dates = self.dates.append(pd.DatetimeIndex([date]))
+        self.portfolio_returns = np.append(self.portfolio_returns, portfolio_return)
+        level = (self.levels[-1] if len(self.levels) else 1.0) * (1 + portfolio_return[0])
+        self.levels = np.append(self.levels, level)
+        self.peaks = np.append(self.peaks, max(level, self.peaks[-1]) if len(self.peaks) else level)
+        tail = self.portfolio_returns[-self.vol_window:]
+        self.rolling_vol = np.append(
+            self.rolling_vol,
+            tail.std(ddof=1) * np.sqrt(TRADING_DAYS) * 100 if len(tail) == self.vol_window else np.nan
+        )
+
+        self._accumulate(row[None, :], 1.0)
+        self.window_returns = np.vstack([self.window_returns, row[None, :]])
+        if len(self.window_returns) > self.window:
+            self._accumulate(self.window_returns[:1], -1.0)
+            self.window_returns = self.window_returns[1:]
+        return True
+
+    # === MÉTRIQUES ===
+
+    def correlation(self) -> pd.DataFrame:
+        """Corrélations par paires sur les jours communs de la fenêtre (NaN si trop peu de jours)"""
+        n, sx, sxx = self._n, self._sx, self._sxx
+        covariance = n * self._sxy - sx * sx.T
+        variance = n * sxx - sx ** 2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = covariance / np.sqrt(variance * variance.T)
+        corr = np.where((n >= MIN_COMMON_DAYS) & (variance > 0) & (variance.T > 0), np.clip(corr, -1, 1), np.nan)
+        return pd.DataFrame(corr, index=self.tickers, columns=self.tickers)
+
+    def holding_volatility(self) -> pd.Series:
+        """Volatilité annualisée (%) de chaque titre sur la fenêtre"""
+        n, sx, sxx = np.diag(self._n), np.diag(self._sx), np.diag(self._sxx)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = np.where(n > 1, (sxx - sx ** 2 / n) / (n - 1), np.nan)
+        return pd.Series(np.sqrt(np.clip(variance, 0, None) * TRADING_DAYS) * 100, index=self.tickers)
+
+    def value(self) -> float:
+        """Valeur actuelle (EUR) des quantités détenues"""
+        return float(np.nansum(self.last_prices * self.quantities))
+
+    def metrics(self) -> Dict:
+        """
+        Indicateurs de risque du portefeuille
+
+        Returns:
+            dict: 'volatility' (%), 'max_drawdown' (%), 'current_drawdown' (%), 'beta',
+                  'var' (VaR / CVaR par niveau de confiance, en % et en €),
+                  'series' (Date, Volatilité glissante (%), Drawdown (%)),
+                  'correlation', 'holding_volatility', 'observations'
+        """
+        returns = self.portfolio_returns[-self.window:]
+        benchmark = self.benchmark_returns[-self.window:]
+        value = self.value()
+        mean, std = (returns.mean(), returns.std(ddof=1)) if len(returns) > 1 else (np.nan, np.nan)
+
+        drawdown = (self.levels / self.peaks - 1) * 100 if len(self.levels) else np.array([])
+
+        rows = []
+        for level in CONFIDENCE_LEVELS:
+            tail = 1 - level
+            if len(returns):
+                threshold = np.quantile(returns, tail)
+                historical_var = -threshold
+                historical_cvar = -returns[returns <= threshold].mean()
+            else:
+                historical_var = historical_cvar = np.nan
+            z = norm.ppf(tail)
+            parametric_var = -(mean + z * std)
+            parametric_cvar = -(mean - std * norm.pdf(z) / tail)
+            rows.append({
+                'Confiance': f"{level:.0%}",
+                'VaR historique (%)': historical_var * 100,
+                'CVaR historique (%)': historical_cvar * 100,
+                'VaR paramétrique (%)': parametric_var * 100,
+                'CVaR paramétrique (%)': parametric_cvar * 100,
+                'VaR historique (€)': historical_var * value,
+                'CVaR historique (€)': historical_cvar * value
+            })
+
+        valid = ~np.isnan(benchmark)
+        beta = np.nan
+        if valid.sum() > 1 and np.var(benchmark[valid], ddof=1) > 0:
+            beta = np.cov(returns[valid], benchmark[valid])[0, 1] / np.var(benchmark[valid], ddof=1)
+
+        return {
+            'volatility': std * np.sqrt(TRADING_DAYS) * 100,
+            'max_drawdown': float(drawdown.min()) if len(drawdown) else np.nan,
+            'current_drawdown': float(drawdown[-1]) if len(drawdown) else np.nan,
+            'beta': beta,
+            'var': pd.DataFrame(rows),
+            'series': pd.DataFrame({
+                'Date': self.dates,
+                'Volatilité glissante (%)': self.rolling_vol,
+                'Drawdown (%)': drawdown
+            }),
+            'correlation': self.correlation(),
+            'holding_volatility': self.holding_volatility(),
+            'observations': len(returns),
+            'value': value
+        }
+
+
+# === DONNÉES ===
+
+def prices_in_eur(prices: pd.DataFrame, currencies: Dict[str, str], fx_rates: pd.DataFrame,
+                  fx_fallback: Optional[Dict[str, float]] = None) -> pd.DataFrame:
+    """Matrice des cours convertie en EUR au taux du jour (unités de devise pour 1 EUR)"""
+    units = [currencies.get(ticker, 'EUR') for ticker in prices.columns]
+    fx = fx_matrix(fx_rates, sorted(set(units)), prices.index, fx_fallback)
+    return prices / fx[units].to_numpy()
+
+
+def current_holdings(df_data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quantités détenues par ticker (tous comptes), depuis le prix de revient FIFO
+
+    Returns:
+        DataFrame: Ticker, Quantité, Units
+    """
+    positions = get_cost_basis(df_data)['positions']
+    holdings = positions.groupby('Ticker', as_index=False).agg(Quantité=('Quantité', 'sum'), Units=('Units', 'first'))
+    return holdings[holdings['Quantité'] > 0].reset_index(drop=True)
+
+
+def get_risk_model(df_data: pd.DataFrame, benchmark: str = '^GSPC') -> Dict:
+    """
+    Modèle de risque mémorisé en session
+
+    Reconstruit quand le journal ou l'indice change ; sinon les nouveaux jours de cours du
+    cache persistant sont ajoutés un par un (RiskModel.update).
+
+    Returns:
+        dict: 'model' (RiskModel ou None), 'errors' {ticker/devise: message}
+    """
+    from modules.fx_history_cache import get_fx_cache
+    from modules.price_matrix import get_price_cache
+    from modules.yfinance_cache_manager import get_cache_manager
+
+    cache_manager = get_cache_manager()
+    holdings = current_holdings(df_data)
+    if holdings.empty:
+        return {'model': None, 'errors': {}}
+
+    tickers = holdings['Ticker'].tolist()
+    currencies = dict(zip(holdings['Ticker'], holdings['Units'].fillna('EUR').astype(str).str.upper()))
+    currencies[benchmark] = benchmark_currency(
+        benchmark, None if benchmark in BENCHMARK_CURRENCIES else cache_manager.get_ticker_info(benchmark)
+    )
+    all_tickers = sorted(set(tickers) | {benchmark})
+
+    price_cache, fx_cache = get_price_cache(), get_fx_cache()
+    errors = {**price_cache.refresh(all_tickers), **fx_cache.refresh(sorted(set(currencies.values())))}
+
+    eurusd_rate = cache_manager.get_eurusd_rate()
+    fx_fallback = {'USD': 1 / eurusd_rate} if eurusd_rate else None
+    version = (ledger_version(df_data), benchmark)
+    price_signature = price_cache.signature(all_tickers)
+
+    # Dernier jour réellement coté : pas de ligne « aujourd'hui » recopiée de la veille
+    last_dates = [state['last_date'] for state in price_cache.get_states(all_tickers).values() if state['last_date']]
+    end = max(last_dates) if last_dates else None
+
+    def _load(start) -> pd.DataFrame:
+        prices = price_cache.get_matrix(all_tickers, start=start, end=end)
+        return prices_in_eur(prices, currencies, fx_cache.get_rates(sorted(set(currencies.values()))), fx_fallback)
+
+    cached = st.session_state.get('risk_model')
+    if cached and cached['version'] == version:
+        model = cached['model']
+        if cached['prices'] == price_signature:
+            return {'model': model, 'errors': errors}
+
+        # Nouveaux cours : ajout incrémental si le dernier jour connu n'a pas été ajusté
+        recent = _load(model.dates[-1])
+        known = recent.iloc[0][model.tickers].to_numpy(dtype=float)
+        if np.allclose(known, model.last_prices, rtol=PRICE_TOLERANCE, equal_nan=True):
+            for date, row in recent.iloc[1:].iterrows():
+                model.update(date, row, row.get(benchmark))
+            st.session_state.risk_model = {**cached, 'prices': price_signature}
+            return {'model': model, 'errors': errors}
+
+    prices = _load(datetime.now() - RISK_HISTORY)
+    model = RiskModel(prices[tickers], holdings.set_index('Ticker')['Quantité'], prices[benchmark])
+    st.session_state.risk_model = {'version': version, 'prices': price_signature, 'model': model}
+    return {'model': model, 'errors': errors}
+
+
+# === BENCHMARK ===
+
+def synthetic_risk_dataset(n_tickers: int = 300, n_days: int = 1_300, seed: int = 42):
+    """
+    Cours corrélés synthétiques (facteur de marché), quantités et indice
+
+    Returns:
+        tuple: (prices, quantities, benchmark)
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(end=pd.Timestamp(datetime.now()).normalize(), periods=n_days)
+    market = rng.normal(0.0003, 0.01, n_days)
+    betas = rng.uniform(0.5, 1.5, n_tickers)
+    returns = market[:, None] * betas + rng.normal(0, 0.015, (n_days, n_tickers))
+    tickers = [f"TCK{i:03d}" for i in range(n_tickers)]
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(returns, axis=0)), index=days, columns=tickers)
+    # Titres introduits en cours d'historique
+    listed = rng.integers(0, n_days // 2, n_tickers) * (rng.random(n_tickers) < 0.2)
+    prices = prices.mask(np.arange(n_days)[:, None] < listed)
+    quantities = pd.Series(rng.integers(1, 100, n_tickers).astype(float), index=tickers)
+    benchmark = pd.Series(4000 * np.exp(np.cumsum(market)), index=days)
+    return prices, quantities, benchmark
+
+
+def _legacy_risk(prices: pd.DataFrame, quantities: pd.Series, benchmark: pd.Series) -> Dict:
+    """Calcul pandas titre par titre (référence de comparaison)"""
+    returns = prices.pct_change(fill_method=None).iloc[1:]
+    window = returns.iloc[-RISK_WINDOW:]
+    correlation = window.corr(min_periods=MIN_COMMON_DAYS)
+    holding_volatility = pd.Series({ticker: window[ticker].std() * np.sqrt(TRADING_DAYS) * 100
+                                    for ticker in window.columns})
+
+    values = []
+    for i in range(1, len(prices)):
+        previous, current = prices.iloc[i - 1], prices.iloc[i]
+        valid = previous.notna() & current.notna()
+        start = (previous[valid] * quantities[valid]).sum()
+        values.append((current[valid] * quantities[valid]).sum() / start - 1 if start > 0 else 0.0)
+    portfolio = pd.Series(values, index=returns.index)
+    level = (1 + portfolio).cumprod()
+    return {
+        'correlation': correlation,
+        'holding_volatility': holding_volatility,
+        'max_drawdown': ((level / level.cummax() - 1) * 100).min(),
+        'rolling_volatility': portfolio.rolling(ROLLING_VOL_WINDOW).std() * np.sqrt(TRADING_DAYS) * 100
+    }
+
+
+def run_benchmark(n_tickers: int = 300, n_days: int = 1_300) -> Dict:
+    """
+    Mesurer la construction du modèle, l'ajout d'un jour et le calcul pandas de référence
+
+    Returns:
+        dict: temps (ms) et cohérence des indicateurs
+    """
+    prices, quantities, benchmark = synthetic_risk_dataset(n_tickers, n_days)
+    history, last_day = prices.iloc[:-1], prices.index[-1]
+
+    start = time.perf_counter()
+    model = RiskModel(history, quantities, benchmark.iloc[:-1])
+    model.metrics()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    model.update(last_day, prices.iloc[-1], benchmark.iloc[-1])
+    metrics = model.metrics()
+    update_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    legacy = _legacy_risk(prices, quantities, benchmark)
+    legacy_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        'tickers': n_tickers,
+        'days': n_days,
+        'build_ms': round(build_ms, 1),
+        'update_ms': round(update_ms, 1),
+        'legacy_ms': round(legacy_ms, 1),
+        'consistent': bool(
+            np.allclose(metrics['correlation'], legacy['correlation'], equal_nan=True, atol=1e-8)
+            and np.allclose(metrics['holding_volatility'], legacy['holding_volatility'], equal_nan=True)
+            and np.isclose(metrics['max_drawdown'], legacy['max_drawdown'])
+            and np.allclose(metrics['series']['Volatilité glissante (%)'], legacy['rolling_volatility'],
+                            equal_nan=True)
+        )
+    }
+
+
+if __name__ == "__main__":
+    print(run_benchmark())
@@ -0,0 +1,310 @@
+# modules/stress_test_engine.py
+"""
+Stress tests et réévaluation « et si » du portefeuille
+- Positions EUR encodées une fois : vecteur de valeurs + codes Type / Secteur / Catégorie / Ticker / Devise
+- Un scénario = un ou plusieurs chocs (portée, groupe, variation %) ; les chocs se composent
+  par multiplication
+- Tous les scénarios appliqués ensemble : matrice de multiplicateurs scénarios × positions
+- Limites de Feuil2 évaluées pour tous les scénarios en deux produits matriciels
+  (limits_engine.evaluate_limits_matrix) : dépassements créés par chaque choc
+
+Benchmark : python -m modules.stress_test_engine
+"""
+
+import hashlib
+import time
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from modules.limits_engine import compile_limits, evaluate_limits, evaluate_limits_matrix, limits_matrix
+
+POSITION_LEVELS = ['Type', 'Secteur', 'Category', 'Entreprise', 'Ticker', 'Units']
+# Portées de choc → colonne des positions (Portefeuille : toutes les positions)
+SHOCK_SCOPES = {'Portefeuille': None, 'Type': 'Type', 'Secteur': 'Secteur', 'Category': 'Category',
+                'Ticker': 'Ticker', 'Devise': 'Units'}
+SHOCK_COLUMNS = ['Scénario', 'Portée', 'Groupe', 'Choc (%)']
+
+# Scénarios prédéfinis (Devise : variation de la devise contre l'euro)
+PRESET_SCENARIOS = {
+    "📉 Krach boursier": [('Portefeuille', '*', -35.0)],
+    "💻 Éclatement de la bulle tech": [('Category', 'Technologie', -40.0), ('Category', 'NASDAQ 100', -35.0),
+                                       ('Category', 'Services de communication', -25.0)],
+    "🏭 Récession": [('Secteur', 'Cyclique', -30.0), ('Secteur', 'Sensible', -20.0),
+                     ('Secteur', 'Défensif', -10.0), ('Type', 'ETF', -20.0)],
+    "💵 Dollar faible": [('Devise', 'USD', -15.0)],
+    "🛢️ Choc pétrolier": [('Category', 'Energie', 25.0), ('Category', 'Consommation cyclique', -20.0),
+                          ('Category', 'Industrie', -15.0)]
+}
+# Grille automatique
+GRID_MOVES = (-10.0, -20.0, -30.0)
+TICKER_CRASH = -50.0
+FX_MOVES = (-10.0, 10.0)
+
+
+# === ENCODAGE ===
+
+def encode_positions(df: pd.DataFrame, value_col: str = 'Current value') -> Dict:
+    """
+    Positions agrégées (une ligne par ticker et classification) et codes de chaque portée
+
+    Returns:
+        dict: 'positions' (DataFrame), 'values' (EUR), 'codes' {portée: (codes, libellés)}
+    """
+    data = df.copy()
+    for column in POSITION_LEVELS:
+        if column not in data.columns:
+            data[column] = 'EUR' if column == 'Units' else ''
+    data['Units'] = data['Units'].fillna('EUR').astype(str).str.strip().str.upper()
+    data[value_col] = pd.to_numeric(data[value_col], errors='coerce').fillna(0.0)
+    positions = data.groupby(POSITION_LEVELS, as_index=False, sort=False)[value_col].sum() \
+        .rename(columns={value_col: 'Current value'})
+
+    codes = {}
+    for scope, column in SHOCK_SCOPES.items():
+        if column is not None:
+            codes[scope] = pd.factorize(positions[column].astype(str))
+    return {'positions': positions, 'values': positions['Current value'].to_numpy(dtype=float), 'codes': codes}
+
+
+def shock_multipliers(encoded: Dict, shocks: pd.DataFrame):
+    """
+    Multiplicateurs de valeur scénarios × positions
+
+    Les chocs d'un scénario se composent : leurs log-multiplicateurs sont sommés par groupe,
+    puis projetés sur les positions par leurs codes. Un choc de -100 % annule la position.
+
+    Returns:
+        tuple: (noms des scénarios, matrice des multiplicateurs)
+    """
+    scenario_codes, names = pd.factorize(shocks['Scénario'])
+    n_positions = len(encoded['values'])
+    logs = np.zeros((len(names), n_positions))
+    if not len(names):
+        return list(names), np.exp(logs)
+
+    with np.errstate(divide='ignore'):
+        shock_logs = np.log1p(np.clip(shocks['Choc (%)'].to_numpy(dtype=float), -100.0, None) / 100)
+
+    scope = shocks['Portée'].to_numpy()
+    whole = scope == 'Portefeuille'
+    if whole.any():
+        per_scenario = np.zeros(len(names))
+        np.add.at(per_scenario, scenario_codes[whole], shock_logs[whole])
+        logs += per_scenario[:, None]
+
+    for name, (codes, labels) in encoded['codes'].items():
+        selected = scope == name
+        if not selected.any():
+            continue
+        groups = labels.get_indexer(shocks['Groupe'].astype(str).to_numpy()[selected])
+        known = groups >= 0
+        group_logs = np.zeros((len(names), len(labels)))
+        np.add.at(group_logs, (scenario_codes[selected][known], groups[known]), shock_logs[selected][known])
+        logs += group_logs[:, codes]
+
+    return list(names), np.exp(logs)
+
+
+# === SCÉNARIOS ===
+
+def preset_shocks(names: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """Chocs des scénarios prédéfinis (tous par défaut)"""
+    names = list(PRESET_SCENARIOS) if names is None else names
+    rows = [(name, scope, group, move) for name in names for scope, group, move in PRESET_SCENARIOS[name]]
+    return pd.DataFrame(rows, columns=SHOCK_COLUMNS)
+
+
+def generate_grid(encoded: Dict, moves: Sequence[float] = GRID_MOVES, crash: float = TICKER_CRASH,
+                  fx_moves: Sequence[float] = FX_MOVES) -> pd.DataFrame:
+    """
+    Grille de scénarios à un choc : marché, chaque type / secteur / catégorie, krach de chaque
+    titre et variation de chaque devise étrangère
+
+    Returns:
+        DataFrame: SHOCK_COLUMNS
+    """
+    frames = [pd.DataFrame({'Portée': 'Portefeuille', 'Groupe': '*', 'Choc (%)': list(moves)})]
+    for scope in ['Type', 'Secteur', 'Category']:
+        labels = [label for label in encoded['codes'][scope][1] if label]
+        frames.append(pd.DataFrame([(scope, label, move) for label in labels for move in moves],
+                                   columns=SHOCK_COLUMNS[1:]))
+    frames.append(pd.DataFrame({'Portée': 'Ticker', 'Groupe': list(encoded['codes']['Ticker'][1]),
+                                'Choc (%)': crash}))
+    currencies = [currency for currency in encoded['codes']['Devise'][1] if currency != 'EUR']
+    frames.append(pd.DataFrame([('Devise', currency, move) for currency in currencies for move in fx_moves],
+                               columns=SHOCK_COLUMNS[1:]))
+
+    grid = pd.concat(frames, ignore_index=True)
+    grid['Scénario'] = grid['Portée'].where(grid['Portée'] != 'Portefeuille', 'Marché') + ' ' + \
+        grid['Groupe'].where(grid['Groupe'] != '*', '') + ' ' + grid['Choc (%)'].map('{:+.0f}%'.format)
+    grid['Scénario'] = grid['Scénario'].str.replace('  ', ' ', regex=False)
+    return grid[SHOCK_COLUMNS]
+
+
+# === ÉVALUATION ===
+
+def run_stress_tests(encoded: Dict, matrix: Dict, shocks: pd.DataFrame) -> Dict:
+    """
+    Réévaluer le portefeuille et ses limites sous tous les scénarios en une passe
+
+    Args:
+        encoded: résultat de encode_positions
+        matrix: limits_engine.limits_matrix sur encoded['positions']
+        shocks: SHOCK_COLUMNS
+
+    Returns:
+        dict: 'summary' (une ligne par scénario), 'values' (scénarios × positions),
+              'limits' / 'baseline' (evaluate_limits_matrix), 'scenarios'
+    """
+    names, multipliers = shock_multipliers(encoded, shocks)
+    values = multipliers * encoded['values']
+    before = float(encoded['values'].sum())
+    after = values.sum(axis=1)
+
+    baseline = evaluate_limits_matrix(encoded['values'], matrix)
+    limits = evaluate_limits_matrix(values, matrix)
+    new_breaches = limits['breaches'] & ~baseline['breaches']
+    resolved = baseline['breaches'] & ~limits['breaches']
+
+    labels = (matrix['rules']['Portée'] + ' ' + matrix['rules']['Groupe']).to_numpy()
+    summary = pd.DataFrame({
+        'Scénario': names,
+        'Valeur avant': before,
+        'Valeur après': after,
+        'Impact (€)': after - before,
+        'Impact (%)': (after / before - 1) * 100 if before else 0.0,
+        'Dépassements': limits['breaches'].sum(axis=1),
+        'Nouveaux dépassements': new_breaches.sum(axis=1),
+        'Dépassements résolus': resolved.sum(axis=1),
+        'Limites touchées': [', '.join(labels[row]) for row in new_breaches]
+    })
+    return {'summary': summary, 'values': values, 'limits': limits, 'baseline': baseline, 'scenarios': names}
+
+
+def scenario_detail(result: Dict, matrix: Dict, scenario: str) -> pd.DataFrame:
+    """
+    Limites avant / après un scénario (règles en dépassement dans l'un des deux cas)
+
+    Returns:
+        DataFrame: règle, part et dépassement avant / après
+    """
+    row = result['scenarios'].index(scenario)
+    detail = matrix['rules'].copy()
+    detail['Part avant (%)'] = result['baseline']['shares'][0]
+    detail['Part après (%)'] = result['limits']['shares'][row]
+    detail['Dépassement avant'] = result['baseline']['breaches'][0]
+    detail['Dépassement après'] = result['limits']['breaches'][row]
+    detail = detail[detail['Dépassement avant'] | detail['Dépassement après']]
+    return detail.sort_values(['Dépassement après', 'Part après (%)'], ascending=False).reset_index(drop=True)
+
+
+def get_stress_model(df: pd.DataFrame, rules: pd.DataFrame, value_col: str = 'Current value') -> Dict:
+    """
+    Positions encodées et limites matricielles, mémorisées en session tant que les données
+    et les règles ne changent pas
+
+    Returns:
+        dict: 'encoded', 'matrix'
+    """
+    columns = [col for col in POSITION_LEVELS + [value_col] if col in df.columns]
+    signature = hashlib.sha1(
+        pd.util.hash_pandas_object(df[columns].astype(str), index=False).to_numpy().tobytes()
+        + pd.util.hash_pandas_object(rules.astype(str), index=False).to_numpy().tobytes()
+        + repr(columns).encode()
+    ).hexdigest()
+
+    cached = st.session_state.get('stress_model')
+    if cached and cached['signature'] == signature:
+        return cached['model']
+
+    encoded = encode_positions(df, value_col)
+    model = {'encoded': encoded, 'matrix': limits_matrix(encoded['positions'], rules)}
+    st.session_state.stress_model = {'signature': signature, 'model': model}
+    return model
+
+
+# === BENCHMARK ===
+
+def synthetic_portfolio(n_positions: int = 300, seed: int = 42):
+    """
+    Portefeuille et Feuil2 synthétiques
+
+    Returns:
+        tuple: (df, limits)
+    """
+    rng = np.random.default_rng(seed)
+    categories = ['Technologie', 'Santé', 'Energie', 'Industrie', 'Services financiers', 'Consommation cyclique']
+    etf_categories = ['S&P500', 'Euro STOXX50', 'NASDAQ 100']
+    is_etf = rng.random(n_positions) < 0.2
+    df = pd.DataFrame({
+        'Type': np.where(is_etf, 'ETF', 'Actions'),
+        'Secteur': np.where(is_etf, 'ETF', rng.choice(['Cyclique', 'Sensible', 'Défensif'], n_positions)),
+        'Category': np.where(is_etf, rng.choice(etf_categories, n_positions), rng.choice(categories, n_positions)),
+        'Entreprise': [f"Société {i % (n_positions // 2)}" for i in range(n_positions)],
+        'Ticker': [f"TCK{i:03d}" for i in range(n_positions)],
+        'Units': rng.choice(['EUR', 'USD'], n_positions),
+        'Current value': rng.lognormal(8, 1, n_positions)
+    })
+    limits = pd.DataFrame(
+        [('Type', 'Actions', 70.0), ('Type', 'ETF', 30.0), ('Secteur', 'Cyclique', 35.0),
+         ('Secteur', 'Sensible', 35.0), ('Secteur', 'Défensif', 30.0)]
+        + [('Category', category, 100 / len(categories)) for category in categories]
+        + [('Category', category, 50.0) for category in etf_categories],
+        columns=['Variable1', 'Variable2', 'Valeur seuils']
+    )
+    return df, limits
+
+
+def _legacy_stress(df: pd.DataFrame, rules: pd.DataFrame, shocks: pd.DataFrame) -> List[int]:
+    """Choc appliqué ligne par ligne puis evaluate_limits, scénario par scénario (référence)"""
+    columns = {scope: column for scope, column in SHOCK_SCOPES.items()}
+    counts = []
+    for _, scenario in shocks.groupby('Scénario', sort=False):
+        stressed = df.copy()
+        for _, shock in scenario.iterrows():
+            column = columns[shock['Portée']]
+            mask = np.ones(len(stressed), bool) if column is None \
+                else (stressed[column].astype(str) == shock['Groupe']).to_numpy()
+            stressed.loc[mask, 'Current value'] *= 1 + max(shock['Choc (%)'], -100.0) / 100
+        counts.append(int(evaluate_limits(stressed, rules)['evaluation']['Dépassement'].sum()))
+    return counts
+
+
+def run_benchmark(n_positions: int = 300, legacy_scenarios: int = 20) -> Dict:
+    """
+    Mesurer l'évaluation matricielle de toute la grille et la boucle scénario par scénario
+
+    Returns:
+        dict: temps (ms), scénarios par seconde et cohérence des dépassements
+    """
+    df, limits = synthetic_portfolio(n_positions)
+    rules = compile_limits(limits)
+    encoded = encode_positions(df)
+    matrix = limits_matrix(encoded['positions'], rules)
+    shocks = pd.concat([preset_shocks(), generate_grid(encoded)], ignore_index=True)
+
+    start = time.perf_counter()
+    result = run_stress_tests(encoded, matrix, shocks)
+    engine_ms = (time.perf_counter() - start) * 1000
+    n_scenarios = len(result['scenarios'])
+
+    sample = shocks[shocks['Scénario'].isin(result['scenarios'][:legacy_scenarios])]
+    start = time.perf_counter()
+    legacy = _legacy_stress(encoded['positions'], rules, sample)
+    legacy_ms = (time.perf_counter() - start) * 1000 * n_scenarios / legacy_scenarios
+
+    return {
+        'positions': n_positions,
+        'scenarios': n_scenarios,
+        'engine_ms': round(engine_ms, 1),
+        'scenarios_per_second': round(n_scenarios / engine_ms * 1000),
+        'legacy_ms_estimated': round(legacy_ms, 1),
+        'consistent': legacy == result['summary']['Dépassements'].iloc[:legacy_scenarios].tolist()
+    }
+
+
+if __name__ == "__main__":
+    print(run_benchmark())
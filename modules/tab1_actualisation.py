@@ -1,12 +1,15 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 from modules.tab0_constants import SECTEUR_PAR_TYPE, CATEGORY_LIST, SECTOR_COLORS, save_to_excel
 import calendar
 import numpy as np
+from modules.chart_utils import downsample, line_trace, plot_cached, WEBGL_THRESHOLD
+from modules.cost_basis_engine import get_cost_basis
+from modules.returns_engine import BENCHMARKS, PERIODS, get_portfolio_returns
+from modules.risk_engine import CONFIDENCE_LEVELS, RISK_WINDOW, get_risk_model
 
 # Importer le nouveau gestionnaire de cache
 from modules.yfinance_cache_manager import (
@@ -117,6 +120,18 @@ def display_tab1_actualisation():
                 "Units": "first"
             }).reset_index()
             
+            # Prix de revient FIFO (ventes, frais, splits) : remplace la somme brute des lignes d'achat
+            cost_basis = get_cost_basis(df)
+            fifo = cost_basis["positions"].groupby("Ticker").agg({
+                "Quantité": "sum", "Coût de revient": "sum", "Plus-value réalisée": "sum"
+            })
+            grouped["Quantity"] = grouped["Ticker"].map(fifo["Quantité"]).fillna(grouped["Quantity"])
+            grouped["Purchase value"] = grouped["Ticker"].map(fifo["Coût de revient"]).fillna(grouped["Purchase value"])
+            grouped["Plus-value réalisée"] = grouped["Ticker"].map(fifo["Plus-value réalisée"]).fillna(0.0)
+            usd_rate = np.where(grouped["Units"].str.upper() == "USD", cache_manager.get_eurusd_rate(), 1.0)
+            grouped["Purchase_value_EUR"] = grouped["Purchase value"] * usd_rate
+            grouped["Realized_EUR"] = grouped["Plus-value réalisée"] * usd_rate
+            
             # Ajout des données temps réel
             grouped["Prix actuel"] = grouped["Ticker"].map(lambda x: real_time_data.get(x, {}).get('current_price', 0))
             grouped["Variation jour"] = grouped["Ticker"].map(lambda x: real_time_data.get(x, {}).get('change', 0))
@@ -166,6 +181,15 @@ def display_tab1_actualisation():
             col4.metric("📈 Performance totale", f"+{(total_global - invested_general_eur):,.0f} €", 
                        delta=f"{total_rendement:.1f}%", delta_color="normal")
 
+            # Plus-values réalisées (ventes FIFO) et ventes non couvertes par les achats
+            realized_general_eur = grouped["Realized_EUR"].sum()
+            if not cost_basis["realized"].empty:
+                st.caption(f"💼 Plus-values réalisées (FIFO, frais déduits) : {realized_general_eur:+,.0f} € "
+                           f"sur {len(cost_basis['realized'])} ventes")
+            if not cost_basis["warnings"].empty:
+                st.warning(f"⚠️ {len(cost_basis['warnings'])} vente(s) supérieure(s) à la quantité détenue : "
+                           f"seule la quantité détenue est prise en compte")
+
             # === 2. DÉTAIL PAR DEVISE (EN PLUS PETIT) ===
             with st.expander("💰 Détail par devise", expanded=False):
                 col1, col2, col3, col4 = st.columns(4)
@@ -291,215 +315,224 @@ def display_tab1_actualisation():
             st.markdown("### 📈 Évolution du rendement cumulé du portefeuille")
             
             # Sélecteur de période
-            col_selector1, col_empty1 = st.columns([1, 3])
+            col_selector1, col_bench1, col_custom1 = st.columns([1, 2, 1])
             with col_selector1:
                 periode_perf = st.selectbox(
                     "Période d'affichage :",
-                    ["Max", "6 mois", "3 mois", "1 mois"],
+                    list(PERIODS.keys()),
                     index=0,
                     key="periode_perf"
                 )
+            with col_bench1:
+                # Indices simulés avec les mêmes apports aux mêmes dates
+                benchmarks_perf = st.multiselect(
+                    "Comparer à :",
+                    list(BENCHMARKS.keys()),
+                    default=["^GSPC"],
+                    format_func=lambda ticker: BENCHMARKS[ticker],
+                    key="perf_benchmarks"
+                )
+            with col_custom1:
+                benchmark_custom = st.text_input(
+                    "ETF de référence (ticker Yahoo) :",
+                    value="",
+                    placeholder="ex : CW8.PA",
+                    key="perf_benchmark_custom"
+                ).strip().upper()
+            benchmarks_perf = benchmarks_perf + ([benchmark_custom] if benchmark_custom else [])
+            benchmark_labels = {ticker: BENCHMARKS.get(ticker, ticker) for ticker in benchmarks_perf}
 
             if not df.empty and "Date" in df.columns:
-                df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
-                start_date = df["Date"].min().date()
-                end_date = datetime.today().date()
-                
-                # Ajustement de la période selon le sélecteur
-                if periode_perf == "6 mois":
-                    start_date_adjusted = max(start_date, (datetime.today() - timedelta(days=180)).date())
-                elif periode_perf == "3 mois":
-                    start_date_adjusted = max(start_date, (datetime.today() - timedelta(days=90)).date())
-                elif periode_perf == "1 mois":
-                    start_date_adjusted = max(start_date, (datetime.today() - timedelta(days=30)).date())
-                else:  # Max
-                    start_date_adjusted = start_date
-                
-                # Utilisation d'une fréquence plus fine pour un graphique plus lisse
-                date_range = pd.date_range(start=start_date_adjusted, end=end_date, freq="1D")
-
-                tickers = df["Ticker"].dropna().unique()
-                hist_prices = {}
-
-                try:
-                    # Récupération d'historiques plus détaillés
-                    hist_df = yf.download(
-                        tickers=list(tickers),
-                        start=start_date_adjusted,
-                        end=end_date + timedelta(days=1),
-                        interval="1d",
-                        group_by='ticker',
-                        auto_adjust=True,
-                        progress=False
-                    )
-
-                    for ticker in tickers:
-                        try:
-                            if isinstance(hist_df.columns, pd.MultiIndex):
-                                prices = hist_df[ticker]["Close"].dropna()
-                            else:
-                                prices = hist_df["Close"].dropna()
-                            hist_prices[ticker] = prices
-                        except Exception as e:
-                            st.warning(f"❌ Erreur pour {ticker} : {e}")
-                except Exception as e:
-                    st.error(f"Erreur lors du chargement des historiques : {e}")
-
-                # Calcul du portefeuille avec plus de détails
-                portefeuille = []
-                
-                for date in date_range:
-                    total_value_eur = 0
-                    total_cost_eur = 0
-                    
-                    for _, row in df.iterrows():
-                        achat_date = pd.to_datetime(row["Date"])
-                        if achat_date > date:
-                            continue
-                            
-                        ticker = row["Ticker"]
-                        quantity = row["Quantity"]
-                        devise = row["Units"]
-                        cost = row["Purchase value"]
-
-                        try:
-                            price_series = hist_prices.get(ticker)
-                            if price_series is not None and len(price_series) > 0:
-                                # Trouver le prix le plus proche de la date
-                                valid_dates = price_series.index[price_series.index <= pd.Timestamp(date)]
-                                if len(valid_dates) > 0:
-                                    closest_date = valid_dates.max()
-                                    price = price_series.loc[closest_date]
-                                    value = price * quantity
-                                    
-                                    # 🔥 CONVERSION AUTOMATIQUE EN EUR pour le graphique
-                                    if str(devise).upper() == "USD":
-                                        cache_manager = get_cache_manager()
-                                        eurusd_rate = cache_manager.get_eurusd_rate()
-                                        value *= eurusd_rate
-                                        cost *= eurusd_rate
-                                            
-                                    total_value_eur += value
-                                    total_cost_eur += cost
-                        except Exception:
-                            continue
-                    
-                    if total_cost_eur > 0:
-                        rendement = (total_value_eur - total_cost_eur) / total_cost_eur * 100
-                        portefeuille.append({
-                            "Date": date, 
-                            "Rendement (%)": rendement,
-                            "Valeur portefeuille": total_value_eur,
-                            "Montant investi": total_cost_eur,
-                            "Gain/Perte": total_value_eur - total_cost_eur
-                        })
-
-                perf_df = pd.DataFrame(portefeuille).dropna()
+                # Séries quotidiennes vectorisées (cours et taux en cache persistant), calculées une fois
+                # pour toutes les périodes : TWR (insensible aux versements) et XIRR par compte
+                with st.spinner("📊 Calcul des rendements..."):
+                    returns = get_portfolio_returns(st.session_state.df_data, st.session_state.get("df_dividendes"),
+                                                    benchmarks_perf)
+
+                if returns["errors"]:
+                    st.warning(f"❌ Historique indisponible pour : {', '.join(sorted(returns['errors']))}")
+                if returns["missing"]:
+                    st.caption(f"ℹ️ Titres sans historique de cours exclus du calcul : {', '.join(returns['missing'])}")
+
+                perf_df = pd.DataFrame()
+                if not returns["daily"].empty:
+                    window = PERIODS[periode_perf]
+                    daily = returns["daily"] if window is None else returns["daily"].iloc[-(window + 1):]
+                    # Indices de référence disponibles (cours trouvés), rebasés au début de la période
+                    benchmarks_shown = [ticker for ticker in benchmarks_perf if f"Indice {ticker}" in daily.columns]
+                    perf_df = daily.assign(**{
+                        "Rendement (%)": (daily["Indice TWR"] / daily["Indice TWR"].iloc[0] - 1) * 100,
+                        **{f"Rendement {ticker} (%)": (daily[f"Indice {ticker}"] / daily[f"Indice {ticker}"].iloc[0] - 1) * 100
+                           for ticker in benchmarks_shown}
+                    }).reset_index(drop=True)
+
+                    metrics = returns["metrics"]
+                    period_metrics = metrics[metrics["Période"] == periode_perf].set_index("Compte")
+                    total_metrics = period_metrics.loc["Total"]
+                    col_twr, col_xirr, col_flows = st.columns(3)
+                    col_twr.metric("⏱️ Rendement TWR", f"{total_metrics['TWR (%)']:+.1f}%",
+                                   delta=(f"{total_metrics['TWR annualisé (%)']:+.1f}% / an"
+                                          if pd.notna(total_metrics['TWR annualisé (%)']) else None))
+                    col_xirr.metric("💶 Rendement XIRR (annualisé)",
+                                    f"{total_metrics['XIRR (%)']:+.1f}%" if pd.notna(total_metrics['XIRR (%)']) else "N/A")
+                    col_flows.metric("📥 Apports nets sur la période", f"{total_metrics['Apports nets']:,.0f} €")
+
+                    with st.expander("🏦 Rendements par compte", expanded=False):
+                        st.dataframe(
+                            period_metrics.drop(columns=["Période"]).reset_index().style.format({
+                                "Début": "{:%d/%m/%Y}", "TWR (%)": "{:+.1f}%", "TWR annualisé (%)": "{:+.1f}%",
+                                "XIRR (%)": "{:+.1f}%", "Valeur début": "{:,.0f} €", "Valeur fin": "{:,.0f} €",
+                                "Apports nets": "{:,.0f} €", "Dividendes": "{:,.0f} €"
+                            }, na_rep="-"),
+                            use_container_width=True,
+                            hide_index=True
+                        )
+
+                    benchmark_metrics = returns["benchmark_metrics"]
+                    if benchmarks_shown and not benchmark_metrics.empty:
+                        with st.expander("🎯 Comparaison aux indices de référence", expanded=True):
+                            comparison = pd.concat([
+                                total_metrics.to_frame().T.assign(Compte="Mon portefeuille"),
+                                benchmark_metrics[(benchmark_metrics["Période"] == periode_perf)
+                                                  & benchmark_metrics["Compte"].isin(benchmarks_shown)]
+                                .assign(Compte=lambda frame: frame["Compte"].map(benchmark_labels))
+                            ], ignore_index=True)
+                            comparison["Écart TWR (pts)"] = comparison["TWR (%)"].astype(float) - float(total_metrics["TWR (%)"])
+                            st.dataframe(
+                                comparison[["Compte", "TWR (%)", "TWR annualisé (%)", "XIRR (%)", "Valeur fin",
+                                            "Écart TWR (pts)"]]
+                                .rename(columns={"Compte": "Placement", "Valeur fin": "Valeur finale"})
+                                .style.format({
+                                    "TWR (%)": "{:+.1f}%", "TWR annualisé (%)": "{:+.1f}%", "XIRR (%)": "{:+.1f}%",
+                                    "Valeur finale": "{:,.0f} €", "Écart TWR (pts)": "{:+.1f}"
+                                }, na_rep="-"),
+                                use_container_width=True,
+                                hide_index=True
+                            )
+                            st.caption("ℹ️ Chaque indice reçoit les mêmes apports nets aux mêmes dates que le portefeuille "
+                                       "(indices de prix : dividendes non réinvestis).")
 
                 if not perf_df.empty:
-                    # Création du graphique
-                    fig = go.Figure()
-
-                    # Ligne principale de performance
-                    fig.add_trace(go.Scatter(
-                        x=perf_df["Date"],
-                        y=perf_df["Rendement (%)"],
-                        mode='lines+markers',
-                        name='Rendement (%)',
-                        line=dict(width=3, color='#1f77b4'),
-                        marker=dict(size=4),
-                        hovertemplate='<b>Date:</b> %{x}<br>' +
-                                      '<b>Rendement:</b> %{y:.2f}%<br>' +
-                                      '<b>Valeur:</b> €%{customdata[0]:,.0f}<br>' +
-                                      '<b>Investi:</b> €%{customdata[1]:,.0f}<br>' +
-                                      '<extra></extra>',
-                        customdata=perf_df[["Valeur portefeuille", "Montant investi"]].values
-                    ))
+                    def build_performance_figure():
+                        # Nombre de points borné (LTTB), formes et extrêmes conservés
+                        perf_plot = downsample(perf_df.reset_index(drop=True), "Rendement (%)", x_col="Date")
+                        
+                        # Création du graphique
+                        fig = go.Figure()
+
+                        # Ligne principale de performance
+                        fig.add_trace(line_trace(
+                            perf_plot["Date"],
+                            perf_plot["Rendement (%)"],
+                            mode='lines+markers' if len(perf_plot) <= WEBGL_THRESHOLD else 'lines',
+                            name='Rendement TWR (%)',
+                            line=dict(width=3, color='#1f77b4'),
+                            marker=dict(size=4),
+                            hovertemplate='<b>Date:</b> %{x}<br>' +
+                                          '<b>Rendement:</b> %{y:.2f}%<br>' +
+                                          '<b>Valeur:</b> €%{customdata[0]:,.0f}<br>' +
+                                          '<b>Investi:</b> €%{customdata[1]:,.0f}<br>' +
+                                          '<extra></extra>',
+                            customdata=perf_plot[["Valeur portefeuille", "Montant investi"]].values
+                        ))
 
-                    # Zone de remplissage
-                    perf_positive = perf_df[perf_df["Rendement (%)"] >= 0].copy()
-                    perf_negative = perf_df[perf_df["Rendement (%)"] < 0].copy()
+                        # Indices de référence (mêmes apports, mêmes dates)
+                        for ticker in benchmarks_shown:
+                            fig.add_trace(line_trace(
+                                perf_plot["Date"],
+                                perf_plot[f"Rendement {ticker} (%)"],
+                                mode='lines',
+                                name=benchmark_labels[ticker],
+                                line=dict(width=2, dash='dash'),
+                                hovertemplate=f'<b>{benchmark_labels[ticker]}:</b> ' + '%{y:.2f}%<extra></extra>'
+                            ))
+
+                        # Zone de remplissage
+                        perf_positive = perf_plot[perf_plot["Rendement (%)"] >= 0].copy()
+                        perf_negative = perf_plot[perf_plot["Rendement (%)"] < 0].copy()
                     
-                    if not perf_positive.empty:
-                        fig.add_trace(go.Scatter(
-                            x=perf_positive["Date"],
-                            y=perf_positive["Rendement (%)"],
-                            fill='tozeroy',
-                            fillcolor='rgba(0, 255, 0, 0.1)',
-                            line=dict(width=0),
-                            showlegend=False,
-                            hoverinfo='skip'
-                        ))
+                        if not perf_positive.empty:
+                            fig.add_trace(go.Scatter(
+                                x=perf_positive["Date"],
+                                y=perf_positive["Rendement (%)"],
+                                fill='tozeroy',
+                                fillcolor='rgba(0, 255, 0, 0.1)',
+                                line=dict(width=0),
+                                showlegend=False,
+                                hoverinfo='skip'
+                            ))
                     
-                    if not perf_negative.empty:
-                        fig.add_trace(go.Scatter(
-                            x=perf_negative["Date"],
-                            y=perf_negative["Rendement (%)"],
-                            fill='tozeroy',
-                            fillcolor='rgba(255, 0, 0, 0.1)',
-                            line=dict(width=0),
-                            showlegend=False,
-                            hoverinfo='skip'
-                        ))
-
-                    # Ligne de référence à 0%
-                    fig.add_hline(y=0, line_dash="dash", line_color="rgba(128, 128, 128, 0.8)", line_width=2)
-
-                    # Statistiques pour le titre
-                    rendement_actuel = perf_df["Rendement (%)"].iloc[-1]
-                    rendement_max = perf_df["Rendement (%)"].max()
-                    rendement_min = perf_df["Rendement (%)"].min()
-                    volatilite = perf_df["Rendement (%)"].std()
-
-                    # Configuration du layout
-                    fig.update_layout(
-                        title=dict(
-                            text=f"📈 Performance du Portefeuille<br>" +
-                                 f"<sub>Actuel: {rendement_actuel:.1f}% • Max: {rendement_max:.1f}% • Min: {rendement_min:.1f}% • Volatilité: {volatilite:.1f}%</sub>",
-                            x=0.5,
-                            font=dict(size=16)
-                        ),
-                        xaxis_title="Date",
-                        yaxis_title="Rendement (%)",
-                        height=600,
-                        plot_bgcolor='rgba(0,0,0,0)',
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font=dict(size=12),
-                        showlegend=True,
-                        legend=dict(
-                            orientation="h",
-                            yanchor="bottom",
-                            y=1.02,
-                            xanchor="right",
-                            x=1
-                        ),
-                        hovermode='x unified'
-                    )
+                        if not perf_negative.empty:
+                            fig.add_trace(go.Scatter(
+                                x=perf_negative["Date"],
+                                y=perf_negative["Rendement (%)"],
+                                fill='tozeroy',
+                                fillcolor='rgba(255, 0, 0, 0.1)',
+                                line=dict(width=0),
+                                showlegend=False,
+                                hoverinfo='skip'
+                            ))
+
+                        # Ligne de référence à 0%
+                        fig.add_hline(y=0, line_dash="dash", line_color="rgba(128, 128, 128, 0.8)", line_width=2)
+
+                        # Statistiques pour le titre
+                        rendement_actuel = perf_df["Rendement (%)"].iloc[-1]
+                        rendement_max = perf_df["Rendement (%)"].max()
+                        rendement_min = perf_df["Rendement (%)"].min()
+                        volatilite = perf_df["Rendement (%)"].std()
+
+                        # Configuration du layout
+                        fig.update_layout(
+                            title=dict(
+                                text=f"📈 Performance du Portefeuille<br>" +
+                                     f"<sub>Actuel: {rendement_actuel:.1f}% • Max: {rendement_max:.1f}% • Min: {rendement_min:.1f}% • Volatilité: {volatilite:.1f}%</sub>",
+                                x=0.5,
+                                font=dict(size=16)
+                            ),
+                            xaxis_title="Date",
+                            yaxis_title="Rendement (%)",
+                            height=600,
+                            plot_bgcolor='rgba(0,0,0,0)',
+                            paper_bgcolor='rgba(0,0,0,0)',
+                            font=dict(size=12),
+                            showlegend=True,
+                            legend=dict(
+                                orientation="h",
+                                yanchor="bottom",
+                                y=1.02,
+                                xanchor="right",
+                                x=1
+                            ),
+                            hovermode='x unified'
+                        )
                     
-                    # Amélioration des axes
-                    fig.update_xaxes(
-                        showgrid=True, 
-                        gridwidth=1, 
-                        gridcolor='rgba(128,128,128,0.2)',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='rgba(128,128,128,0.3)',
-                        tickformat='%d/%m/%Y'
-                    )
-                    fig.update_yaxes(
-                        showgrid=True, 
-                        gridwidth=1, 
-                        gridcolor='rgba(128,128,128,0.2)',
-                        showline=True,
-                        linewidth=1,
-                        linecolor='rgba(128,128,128,0.3)',
-                        ticksuffix='%',
-                        zeroline=True,
-                        zerolinewidth=2,
-                        zerolinecolor='rgba(128,128,128,0.5)'
-                    )
+                        # Amélioration des axes
+                        fig.update_xaxes(
+                            showgrid=True, 
+                            gridwidth=1, 
+                            gridcolor='rgba(128,128,128,0.2)',
+                            showline=True,
+                            linewidth=1,
+                            linecolor='rgba(128,128,128,0.3)',
+                            tickformat='%d/%m/%Y'
+                        )
+                        fig.update_yaxes(
+                            showgrid=True, 
+                            gridwidth=1, 
+                            gridcolor='rgba(128,128,128,0.2)',
+                            showline=True,
+                            linewidth=1,
+                            linecolor='rgba(128,128,128,0.3)',
+                            ticksuffix='%',
+                            zeroline=True,
+                            zerolinewidth=2,
+                            zerolinecolor='rgba(128,128,128,0.5)'
+                        )
+                        return fig
                     
-                    st.plotly_chart(fig, use_container_width=True)
+                    # Figure sérialisée en cache : reconstruite seulement si les données changent
+                    plot_cached(("performance_chart", perf_df), build_performance_figure, use_container_width=True)
                 else:
                     st.warning("Aucune donnée suffisante pour afficher le rendement.")
 
@@ -627,7 +660,100 @@ def display_tab1_actualisation():
                 fig_gain_pct.update_layout(height=500)
                 fig_gain_pct.update_traces(textposition='outside')
                 st.plotly_chart(fig_gain_pct, use_container_width=True)
-            
+
+            # === 8. ANALYSE DU RISQUE ===
+            st.markdown("### 🛡️ Analyse du risque")
+
+            col_selector3, col_empty3 = st.columns([1, 3])
+            with col_selector3:
+                benchmark_risk = st.selectbox(
+                    "Indice de référence (bêta) :",
+                    list(BENCHMARKS.keys()),
+                    index=0,
+                    format_func=lambda ticker: BENCHMARKS[ticker],
+                    key="risk_benchmark"
+                )
+
+            # Modèle mémorisé : un nouveau jour de cours est ajouté sans tout recalculer
+            with st.spinner("🛡️ Calcul des indicateurs de risque..."):
+                risk = get_risk_model(st.session_state.df_data, benchmark_risk)
+
+            if risk["model"] is None or len(risk["model"].portfolio_returns) < 2:
+                st.info("ℹ️ Historique de cours insuffisant pour analyser le risque.")
+            else:
+                risk_metrics = risk["model"].metrics()
+                var_main = risk_metrics["var"].iloc[0]
+
+                col_vol, col_dd, col_var, col_beta = st.columns(4)
+                col_vol.metric("📉 Volatilité annualisée", f"{risk_metrics['volatility']:.1f}%")
+                col_dd.metric("🕳️ Drawdown maximal", f"{risk_metrics['max_drawdown']:.1f}%",
+                              delta=f"Actuel : {risk_metrics['current_drawdown']:.1f}%", delta_color="off")
+                col_var.metric(f"⚠️ VaR {var_main['Confiance']} (1 jour)", f"{var_main['VaR historique (€)']:,.0f} €",
+                               delta=f"{var_main['VaR historique (%)']:.2f}%", delta_color="off")
+                col_beta.metric(f"β vs {BENCHMARKS[benchmark_risk]}",
+                                f"{risk_metrics['beta']:.2f}" if pd.notna(risk_metrics['beta']) else "N/A")
+                st.caption(f"ℹ️ Quantités actuelles valorisées sur l'historique en EUR ; VaR, bêta et corrélations "
+                           f"sur les {risk_metrics['observations']} dernières séances (max {RISK_WINDOW}).")
+
+                risk_series = risk_metrics["series"]
+
+                def build_risk_figure():
+                    risk_plot = downsample(risk_series, "Drawdown (%)", x_col="Date")
+                    fig = go.Figure()
+                    fig.add_trace(line_trace(
+                        risk_plot["Date"], risk_plot["Drawdown (%)"],
+                        mode='lines', name='Drawdown (%)', fill='tozeroy',
+                        line=dict(width=1, color='#d62728'), fillcolor='rgba(214, 39, 40, 0.15)'
+                    ))
+                    fig.add_trace(line_trace(
+                        risk_plot["Date"], risk_plot["Volatilité glissante (%)"],
+                        mode='lines', name='Volatilité glissante (%)', yaxis='y2',
+                        line=dict(width=2, color='#1f77b4')
+                    ))
+                    fig.update_layout(
+                        title="🛡️ Drawdown et volatilité glissante",
+                        height=450,
+                        yaxis=dict(title="Drawdown (%)", ticksuffix='%'),
+                        yaxis2=dict(title="Volatilité (%)", ticksuffix='%', overlaying='y', side='right', showgrid=False),
+                        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+                        hovermode='x unified'
+                    )
+                    return fig
+
+                plot_cached(("risk_chart", risk_series), build_risk_figure, use_container_width=True)
+
+                with st.expander("⚠️ VaR et CVaR (1 jour)", expanded=False):
+                    st.dataframe(
+                        risk_metrics["var"].style.format({
+                            col: ("{:,.0f} €" if "€" in col else "{:.2f}%")
+                            for col in risk_metrics["var"].columns if col != "Confiance"
+                        }, na_rep="-"),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                    st.caption(f"Historique : quantile des rendements observés • Paramétrique : loi normale • "
+                               f"Niveaux : {', '.join(f'{level:.0%}' for level in CONFIDENCE_LEVELS)}")
+
+                with st.expander("🔗 Corrélations entre titres", expanded=False):
+                    correlation = risk_metrics["correlation"].dropna(how="all").dropna(axis=1, how="all")
+                    if correlation.empty:
+                        st.info("ℹ️ Pas assez de séances communes pour calculer les corrélations.")
+                    else:
+                        fig_corr = px.imshow(
+                            correlation.round(2), zmin=-1, zmax=1, color_continuous_scale="RdBu_r",
+                            text_auto=len(correlation) <= 20, aspect="auto"
+                        )
+                        fig_corr.update_layout(height=max(400, 22 * len(correlation)))
+                        st.plotly_chart(fig_corr, use_container_width=True)
+                        st.dataframe(
+                            risk_metrics["holding_volatility"].rename("Volatilité annualisée (%)").round(1)
+                            .sort_values(ascending=False).to_frame(),
+                            use_container_width=True
+                        )
+
+            if risk["errors"]:
+                st.warning(f"❌ Historique indisponible pour : {', '.join(sorted(risk['errors']))}")
+
         else:
             st.warning("⚠️ Aucune valeur actuelle trouvée. Cliquez sur 'Actualiser les cours' pour récupérer les prix.")
     else:
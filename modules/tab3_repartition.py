@@ -3,8 +3,9 @@ import pandas as pd
 import os
 import re
 from datetime import datetime
-import plotly.express as px
-from modules.tab0_constants import SECTEUR_PAR_TYPE, CATEGORY_LIST, SECTOR_COLORS
+from modules.tab0_constants import SECTEUR_PAR_TYPE, CATEGORY_LIST
+from modules.aggregate_cube import get_aggregate_cube, cached_sunburst, sunburst_figure, sector_comparison
+from modules.allocation_planner import eur_values, aggregate_positions, plan_allocation, allocation_to_simulations
 
 def add_eur_columns_tab3(df):
     """
@@ -22,14 +23,8 @@ def add_eur_columns_tab3(df):
         df["Units"] = "EUR"
     df["Units"] = df["Units"].fillna("EUR").astype(str)
     
-    # 🔥 CRÉER LES COLONNES EUR POUR TOUT
-    df["Current_value_EUR"] = df["Current value"].copy()
-    
-    # Convertir SEULEMENT les lignes USD
-    for idx, row in df.iterrows():
-        if str(row["Units"]).upper() == "USD":
-            if pd.notnull(row["Current value"]):
-                df.loc[idx, "Current_value_EUR"] = row["Current value"] * eurusd_rate
+    # 🔥 CRÉER LES COLONNES EUR POUR TOUT (seules les lignes USD sont converties)
+    df["Current_value_EUR"] = eur_values(df, eurusd_rate)
     
     return df
 
@@ -68,37 +63,15 @@ def display_tab3_repartition():
         df = add_eur_columns_tab3(df)
 
         # 🔥 UTILISER Current_value_EUR pour les calculs !
-        grouped = df.groupby(
-            ["Type", "Secteur", "Category", "Entreprise"],
-            as_index=False
-        )["Current_value_EUR"].sum()
-        
-        # Renommer pour compatibilité avec le reste du code
-        grouped.rename(columns={"Current_value_EUR": "Current value"}, inplace=True)
-        
-        total = grouped["Current value"].sum()
-        grouped["Pourcentage"] = (grouped["Current value"] / total * 100).round(2)
-        grouped["Source"] = "Portefeuille"
+        # Cube Type ➔ Secteur ➔ Catégorie ➔ Entreprise, agrégé une fois par version des données
+        cube = get_aggregate_cube(df, "Current_value_EUR")
+        total = cube.total
 
         # Affichage de la répartition actuelle
         st.subheader("📈 Répartition actuelle du portefeuille")
         
         # Sunburst principal
-        fig1 = px.sunburst(
-            grouped,
-            path=["Type", "Secteur", "Category", "Entreprise"],
-            values="Current value",
-            color="Secteur",
-            color_discrete_map=SECTOR_COLORS,
-            custom_data=["Current value", "Pourcentage"],
-            title="Répartition par Type ➔ Secteur ➔ Catégorie ➔ Entreprise (Tout en EUR)"
-        )
-        fig1.update_traces(
-            insidetextorientation='radial',
-            textinfo="label+percent entry",
-            hovertemplate="<b>%{label}</b><br>%{customdata[0]:,.0f} €<br>%{customdata[1]}%<extra></extra>"
-        )
-        fig1.update_layout(height=800)
+        fig1 = cached_sunburst(cube, 800, "Répartition par Type ➔ Secteur ➔ Catégorie ➔ Entreprise (Tout en EUR)")
         st.plotly_chart(fig1, use_container_width=True)
 
         # --- SECTION SIMULATION ---
@@ -109,6 +82,64 @@ def display_tab3_repartition():
         if "sim_inputs" not in st.session_state:
             st.session_state.sim_inputs = {}
 
+        # === PLANIFICATEUR D'APPORT ===
+        with st.expander("🧮 Planificateur d'apport : répartition optimale selon vos objectifs", expanded=False):
+            st.caption("Répartit un apport (achats uniquement) pour réduire au maximum les écarts "
+                       "aux objectifs Type / Secteur / Catégorie de vos limites")
+            col_plan1, col_plan2, col_plan3 = st.columns([2, 1, 2])
+            with col_plan1:
+                plan_cash = st.number_input("Montant de l'apport", min_value=0.0, step=100.0,
+                                            format="%.0f", key="plan_cash_input")
+            with col_plan2:
+                plan_devise = st.selectbox("Devise", ["EUR", "USD"], key="plan_devise_input")
+            with col_plan3:
+                plan_mode = st.radio("Répartir par", ["Catégorie", "Ligne détenue"],
+                                     horizontal=True, key="plan_mode_input")
+
+            if st.button("🧮 Calculer la répartition", key="compute_allocation_plan", disabled=plan_cash <= 0):
+                from modules.yfinance_cache_manager import get_cache_manager
+
+                eurusd_rate = get_cache_manager().get_eurusd_rate()
+                plan_cash_eur = plan_cash * eurusd_rate if plan_devise == "USD" else plan_cash
+                plan = plan_allocation(
+                    aggregate_positions(df, eurusd_rate),
+                    st.session_state.get("df_limits", pd.DataFrame()),
+                    plan_cash_eur,
+                    by="category" if plan_mode == "Catégorie" else "ticker"
+                )
+                plan.update({"devise": plan_devise, "cash": plan_cash, "cash_eur": plan_cash_eur})
+                st.session_state.allocation_plan = plan
+
+            plan = st.session_state.get("allocation_plan")
+            if plan and plan["status"] not in ("optimal", "empty"):
+                st.error(f"❌ Répartition impossible : {plan['status']}")
+            elif plan and not plan["allocation"].empty:
+                allocation = plan["allocation"]
+                st.dataframe(
+                    allocation.style.format({
+                        "Valeur": "{:,.0f} €", "Montant (€)": "{:,.0f} €", "Valeur après": "{:,.0f} €",
+                        "% avant": "{:.1f}%", "% après": "{:.1f}%"
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+                if not plan["rules"].empty:
+                    st.markdown("**🎯 Écarts aux objectifs (points de %)**")
+                    st.dataframe(
+                        plan["rules"].style.format({
+                            "Objectif (%)": "{:.1f}", "Avant (%)": "{:.1f}", "Après (%)": "{:.1f}",
+                            "Écart avant": "{:+.1f}", "Écart après": "{:+.1f}"
+                        }, na_rep="-"),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+
+                if st.button("➡️ Envoyer vers le simulateur", key="send_plan_to_simulator", type="primary"):
+                    st.session_state.sim_inputs = allocation_to_simulations(
+                        allocation, plan["devise"], plan["cash"], plan["cash_eur"]
+                    )
+                    st.rerun()
+
         # Interface de saisie des simulations en colonnes
         st.markdown("##### ➕ Ajout de nouvelles positions")
         
@@ -200,7 +231,8 @@ def display_tab3_repartition():
             for sim_key, sim_data in st.session_state.sim_inputs.items():
                 col_info, col_montant, col_eur, col_delete = st.columns([3, 1, 1, 0.5])
                 with col_info:
-                    st.write(f"**{sim_data['Type']}** → {sim_data['Secteur']} → {sim_data['Category']}")
+                    st.write(f"**{sim_data['Type']}** → {sim_data['Secteur']} → {sim_data['Category']}"
+                             + (f" → {sim_data['Entreprise']}" if sim_data.get("Entreprise") else ""))
                 with col_montant:
                     st.write(f"{sim_data['montant_original']:,.0f} {sim_data['devise']}")
                 with col_eur:
@@ -221,9 +253,8 @@ def display_tab3_repartition():
                     "Type": sim_data["Type"],
                     "Secteur": sim_data["Secteur"],
                     "Category": sim_data["Category"],
-                    "Entreprise": f"⭐ Simulation {i+1}",
-                    "Current value": sim_data["montant_eur"],  # 🔥 UTILISER montant_eur !
-                    "Source": "Simulation"
+                    "Entreprise": f"⭐ {sim_data['Entreprise']}" if sim_data.get("Entreprise") else f"⭐ Simulation {i+1}",
+                    "Current value": sim_data["montant_eur"]  # 🔥 UTILISER montant_eur !
                 })
                 total_simulation += sim_data["montant_eur"]  # 🔥 SOMMER en EUR !
             
@@ -234,14 +265,9 @@ def display_tab3_repartition():
             st.markdown("---")
             st.markdown("### 📊 Comparaison AVANT / APRÈS simulation")
             
-            # Préparer les données combinées
-            df_combined = pd.concat([
-                grouped,
-                pd.DataFrame(simulations_valides)
-            ], ignore_index=True)
-            
-            total_combined = df_combined["Current value"].sum()
-            df_combined["Pourcentage"] = (df_combined["Current value"] / total_combined * 100).round(2)
+            # Simulations appliquées comme deltas sur le cube
+            snapshot = cube.apply(simulations_valides)
+            total_combined = snapshot["total"]
 
             # Layout en deux colonnes pour AVANT/APRÈS
             col_avant, col_apres = st.columns(2)
@@ -250,79 +276,23 @@ def display_tab3_repartition():
                 st.markdown("#### 📈 AVANT Simulation")
                 st.markdown(f"**Total**: {total:,.0f} €")
                 
-                fig_avant = px.sunburst(
-                    grouped,
-                    path=["Type", "Secteur", "Category", "Entreprise"],
-                    values="Current value",
-                    color="Secteur",
-                    color_discrete_map=SECTOR_COLORS,
-                    custom_data=["Current value", "Pourcentage"],
-                    title=""
-                )
-                fig_avant.update_traces(
-                    insidetextorientation='radial',
-                    textinfo="label+percent entry",
-                    hovertemplate="<b>%{label}</b><br>%{customdata[0]:,.0f} €<br>%{customdata[1]}%<extra></extra>"
-                )
-                fig_avant.update_layout(height=600, showlegend=False)
+                fig_avant = cached_sunburst(cube, 600)
                 st.plotly_chart(fig_avant, use_container_width=True)
             
             with col_apres:
                 st.markdown("#### 🚀 APRÈS Simulation")
                 st.markdown(f"**Total**: {total_combined:,.0f} € (+{total_simulation:,.0f} €)")
                 
-                fig_apres = px.sunburst(
-                    df_combined,
-                    path=["Type", "Secteur", "Category", "Entreprise"],
-                    values="Current value",
-                    color="Secteur",
-                    color_discrete_map=SECTOR_COLORS,
-                    custom_data=["Current value", "Pourcentage", "Source"],
-                    title=""
-                )
-                fig_apres.update_traces(
-                    insidetextorientation='radial',
-                    textinfo="label+percent entry",
-                    hovertemplate="<b>%{label}</b><br>%{customdata[0]:,.0f} €<br>%{customdata[1]}%<br><i>%{customdata[2]}</i><extra></extra>"
-                )
-                fig_apres.update_layout(height=600, showlegend=False)
+                fig_apres = sunburst_figure(snapshot, 600, show_source=True)
                 st.plotly_chart(fig_apres, use_container_width=True)
 
             # TABLEAU RÉSUMÉ JUSTE EN DESSOUS
             st.markdown("#### 📋 Tableau de comparaison détaillé")
             
-            # Calculer les répartitions par secteur
-            repartition_avant = grouped.groupby("Secteur").agg({
-                "Current value": "sum",
-                "Pourcentage": "sum"
-            }).round(2)
-            
-            repartition_apres = df_combined.groupby("Secteur").agg({
-                "Current value": "sum", 
-                "Pourcentage": "sum"
-            }).round(2)
-            
-            # Créer le tableau de comparaison
-            all_secteurs = set(repartition_avant.index) | set(repartition_apres.index)
-            comparison_data = []
-            
-            for secteur in sorted(all_secteurs):
-                avant_val = repartition_avant.loc[secteur, "Current value"] if secteur in repartition_avant.index else 0
-                avant_pct = repartition_avant.loc[secteur, "Pourcentage"] if secteur in repartition_avant.index else 0
-                apres_val = repartition_apres.loc[secteur, "Current value"] if secteur in repartition_apres.index else 0
-                apres_pct = repartition_apres.loc[secteur, "Pourcentage"] if secteur in repartition_apres.index else 0
-                
-                comparison_data.append({
-                    "Secteur": secteur,
-                    "Avant - Montant (€)": avant_val,
-                    "Avant - % ": avant_pct,
-                    "Après - Montant (€)": apres_val,
-                    "Après - %": apres_pct,
-                    "Différence (€)": apres_val - avant_val,
-                    "Différence (%)": apres_pct - avant_pct
-                })
-            
-            df_comparison = pd.DataFrame(comparison_data)
+            # Répartitions par secteur lues dans le cube (avant) et ses deltas (après)
+            df_comparison = sector_comparison(
+                cube.sector_totals, total, snapshot["sector_totals"], total_combined
+            )
             
             # Styling du tableau avec formatage
             def highlight_changes(row):
@@ -1,9 +1,16 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 from modules.tab0_constants import SECTOR_COLORS, SECTEUR_PAR_TYPE, CATEGORY_LIST
+from modules.rebalancing_engine import rebalance_portfolio, TARGET_TOLERANCE
+from modules.limits_engine import COMPANY_CAP_PCT, evaluate_limits, get_compiled_limits, group_shares, scope_view
+from modules.stress_test_engine import (
+    PRESET_SCENARIOS, SHOCK_COLUMNS, SHOCK_SCOPES, generate_grid, get_stress_model, preset_shocks,
+    run_stress_tests, scenario_detail
+)
 
 def add_eur_columns_tab4(df):
     """
@@ -65,11 +72,22 @@ def display_tab4_imbalances():
     limits = st.session_state.df_limits.copy()
     limits.columns = limits.columns.str.strip()
 
-    # Préparation des données de base
-    actions_only = df[df["Type"] == "Actions"].copy()
-    etf_only = df[df["Type"] == "ETF"].copy()
-    actions_total = actions_only["Current value"].sum()
-    etf_total = etf_only["Current value"].sum()
+    # Règles de Feuil2 compilées une fois, toutes évaluées en une seule agrégation
+    limits_result = evaluate_limits(df, get_compiled_limits(limits))
+    actions_total = limits_result["bases"]["Actions"]
+    etf_total = limits_result["bases"]["ETF"]
+
+    company_view = scope_view(limits_result, "Entreprise")
+    etf_caps = scope_view(limits_result, "Category", base="ETF", nature="plafond")
+    type_view = scope_view(limits_result, "Type")
+    sect_view = scope_view(limits_result, "Secteur")
+
+    df_companies_actions = company_view[["Groupe", "Valeur", "Part (%)"]].rename(
+        columns={"Groupe": "Entreprise", "Valeur": "Current value", "Part (%)": "% portefeuille total"}
+    )
+    df_etf_categories = group_shares(limits_result, "Category", "ETF")[["Groupe", "Valeur", "Part (%)"]].rename(
+        columns={"Groupe": "Category", "Valeur": "Current value", "Part (%)": "% des ETF"}
+    )
 
     # === 1) 🚨 ALERTES CRITIQUES ===
     st.markdown("### 🚨 Alertes critiques")
@@ -79,71 +97,35 @@ def display_tab4_imbalances():
     urgent_actions = []
     
     # Concentration par entreprise Actions (>10% du PORTEFEUILLE TOTAL)
-    if actions_total > 0:
-        df_companies_actions = actions_only.groupby("Entreprise")["Current value"].sum().reset_index()
-        df_companies_actions["% portefeuille total"] = (df_companies_actions["Current value"] / total_value * 100).round(2)
-        overweight_companies = df_companies_actions[df_companies_actions["% portefeuille total"] > 10]
-        
-        if not overweight_companies.empty:
-            for _, company in overweight_companies.iterrows():
-                excess_pct = company['% portefeuille total'] - 10
-                excess_amount = (excess_pct / 100) * total_value
-                alerts.append({
-                    "type": "🔴 RISQUE ÉLEVÉ", 
-                    "message": f"**{company['Entreprise']}** représente {company['% portefeuille total']:.1f}% du portefeuille total (>10%)",
-                    "severity": "error"
-                })
-                urgent_actions.append(f"Réduire {company['Entreprise']} : {company['% portefeuille total']:.1f}% → ≤10% (Vendre ~{excess_amount:,.0f}€)")
+    for company in company_view[company_view["Dépassement"]].to_dict("records"):
+        alerts.append({
+            "type": "🔴 RISQUE ÉLEVÉ", 
+            "message": f"**{company['Groupe']}** représente {company['Part (%)']:.1f}% du portefeuille total (>{COMPANY_CAP_PCT:.0f}%)",
+            "severity": "error"
+        })
+        urgent_actions.append(f"Réduire {company['Groupe']} : {company['Part (%)']:.1f}% → ≤{COMPANY_CAP_PCT:.0f}% (Vendre ~{-company['Montant (€)']:,.0f}€)")
     
     # ETF avec limites depuis df_limits
-    if not etf_only.empty and not limits.empty:
-        df_etf_categories = etf_only.groupby("Category")["Current value"].sum().reset_index()
-        df_etf_categories["% des ETF"] = (df_etf_categories["Current value"] / etf_total * 100).round(2)
-        
-        etf_limits = limits.query("Variable1=='Category' and Variable2 in ['S&P500', 'Euro STOXX50', 'NASDAQ 100']")
-        
-        if not etf_limits.empty:
-            for _, limit_row in etf_limits.iterrows():
-                category = limit_row['Variable2']
-                seuil = limit_row['Valeur seuils']
-                
-                etf_cat_data = df_etf_categories[df_etf_categories['Category'] == category]
-                if not etf_cat_data.empty:
-                    current_pct = etf_cat_data['% des ETF'].iloc[0]
-                    if current_pct > seuil:
-                        excess_pct = current_pct - seuil
-                        excess_amount = (excess_pct / 100) * etf_total
-                        alerts.append({
-                            "type": "🟠 ETF SURPONDÉRÉ",
-                            "message": f"**{category}** représente {current_pct:.1f}% des ETF (limite: {seuil}%)",
-                            "severity": "warning"
-                        })
-                        urgent_actions.append(f"Réduire {category} ETF : {current_pct:.1f}% → ≤{seuil}% (Rééquilibrer ~{excess_amount:,.0f}€)")
+    for etf_cap in etf_caps[etf_caps["Dépassement"]].to_dict("records"):
+        alerts.append({
+            "type": "🟠 ETF SURPONDÉRÉ",
+            "message": f"**{etf_cap['Groupe']}** représente {etf_cap['Part (%)']:.1f}% des ETF (limite: {etf_cap['Objectif']:g}%)",
+            "severity": "warning"
+        })
+        urgent_actions.append(f"Réduire {etf_cap['Groupe']} ETF : {etf_cap['Part (%)']:.1f}% → ≤{etf_cap['Objectif']:g}% (Rééquilibrer ~{-etf_cap['Montant (€)']:,.0f}€)")
     
     # Déséquilibres majeurs Types d'actifs
-    if not limits.empty:
-        df_type = df.groupby("Type")["Current value"].sum().reset_index()
-        df_type["% portefeuille"] = df_type["Current value"] / total_value * 100
-        
-        exp_type = limits.query("Variable1=='Type'")[["Variable2", "Valeur seuils"]]
-        exp_type.columns = ["Type", "Valeur seuils"]
-        full_type = exp_type.merge(df_type, on="Type", how="left").fillna(0)
-        
-        for _, row in full_type.iterrows():
-            ecart = row["% portefeuille"] - row["Valeur seuils"]
-            if abs(ecart) > 15:
-                severity = "🟠 ATTENTION" if abs(ecart) < 25 else "🔴 CRITIQUE"
-                alerts.append({
-                    "type": severity,
-                    "message": f"**{row['Type']}** : {ecart:+.1f}% vs objectif ({row['% portefeuille']:.1f}% vs {row['Valeur seuils']:.1f}%)",
-                    "severity": "warning" if abs(ecart) < 25 else "error"
-                })
-                
-                amount_to_adjust = abs(ecart / 100) * total_value
-                if ecart > 15:
-                    urgent_actions.append(f"Réduire {row['Type']} : {row['% portefeuille']:.1f}% → {row['Valeur seuils']:.1f}% (Réduire ~{amount_to_adjust:,.0f}€)")
-                elif ecart < -15:
-                    urgent_actions.append(f"Renforcer {row['Type']} : {row['% portefeuille']:.1f}% → {row['Valeur seuils']:.1f}% (Ajouter ~{amount_to_adjust:,.0f}€)")
+    for row in type_view[type_view["Dépassement"]].to_dict("records"):
+        is_critical = row["Niveau"] == "critique"
+        alerts.append({
+            "type": "🔴 CRITIQUE" if is_critical else "🟠 ATTENTION",
+            "message": f"**{row['Groupe']}** : {row['Écart (%)']:+.1f}% vs objectif ({row['Part (%)']:.1f}% vs {row['Objectif']:.1f}%)",
+            "severity": "error" if is_critical else "warning"
+        })
+        if row["Écart (%)"] > 0:
+            urgent_actions.append(f"Réduire {row['Groupe']} : {row['Part (%)']:.1f}% → {row['Objectif']:.1f}% (Réduire ~{-row['Montant (€)']:,.0f}€)")
+        else:
+            urgent_actions.append(f"Renforcer {row['Groupe']} : {row['Part (%)']:.1f}% → {row['Objectif']:.1f}% (Ajouter ~{row['Montant (€)']:,.0f}€)")
     
     # Affichage des alertes
     if alerts:
@@ -159,56 +141,160 @@ def display_tab4_imbalances():
     st.markdown("---")
     st.markdown("### 🔴 Actions urgentes à réaliser")
     
-    # Créer des actions simplifiées sans prix
-    urgent_actions_simple = []
-    if actions_total > 0 and 'overweight_companies' in locals():
-        if not overweight_companies.empty:
-            for _, company in overweight_companies.iterrows():
-                urgent_actions_simple.append(f"Réduire {company['Entreprise']} : {company['% portefeuille total']:.1f}% → ≤10%")
-    
-    if not etf_only.empty and not limits.empty and 'df_etf_categories' in locals():
-        etf_limits = limits.query("Variable1=='Category' and Variable2 in ['S&P500', 'Euro STOXX50', 'NASDAQ 100']")
-        if not etf_limits.empty:
-            for _, limit_row in etf_limits.iterrows():
-                category = limit_row['Variable2']
-                seuil = limit_row['Valeur seuils']
-                etf_cat_data = df_etf_categories[df_etf_categories['Category'] == category]
-                if not etf_cat_data.empty:
-                    current_pct = etf_cat_data['% des ETF'].iloc[0]
-                    if current_pct > seuil:
-                        urgent_actions_simple.append(f"Réduire {category} ETF : {current_pct:.1f}% → ≤{seuil}%")
-    
-    if not limits.empty and 'full_type' in locals():
-        for _, row in full_type.iterrows():
-            ecart = row["% portefeuille"] - row["Valeur seuils"]
-            if abs(ecart) > 15:
-                if ecart > 15:
-                    urgent_actions_simple.append(f"Réduire {row['Type']} : {row['% portefeuille']:.1f}% → {row['Valeur seuils']:.1f}%")
-                elif ecart < -15:
-                    urgent_actions_simple.append(f"Renforcer {row['Type']} : {row['% portefeuille']:.1f}% → {row['Valeur seuils']:.1f}%")
-    
-    if urgent_actions_simple:
-        for i, action in enumerate(urgent_actions_simple, 1):
+    if urgent_actions:
+        for i, action in enumerate(urgent_actions, 1):
             st.error(f"**{i}.** {action}")
     else:
         st.success("🎉 Aucune action urgente nécessaire - Portefeuille équilibré")
 
+    # === 2b) ⚖️ PLAN DE RÉÉQUILIBRAGE CHIFFRÉ ===
+    st.markdown("---")
+    st.markdown("### ⚖️ Plan de rééquilibrage")
+    st.caption("Montants d'achat / de vente minimaux pour respecter les limites de Feuil2 "
+               "et le plafond de 10% par entreprise (valeurs EUR)")
+
+    col_cash, col_tol = st.columns(2)
+    with col_cash:
+        rebalance_cash = st.number_input("💶 Apport à investir en même temps (€)", min_value=0.0,
+                                         step=100.0, format="%.0f", key="rebalance_cash")
+    with col_tol:
+        rebalance_tolerance = st.slider("🎯 Tolérance autour des objectifs (points de %)", 0.0, 15.0,
+                                        float(TARGET_TOLERANCE), 0.5, key="rebalance_tolerance")
+
+    plan = rebalance_portfolio(df, limits, cash=rebalance_cash, tolerance=rebalance_tolerance)
+    if plan['status'] != 'optimal':
+        st.error(f"❌ Optimisation impossible : {plan['status']}")
+    elif plan['trades'].empty:
+        st.success("🎉 Toutes les limites sont déjà respectées - aucun ordre nécessaire")
+    else:
+        col_buy, col_sell, col_count = st.columns(3)
+        col_buy.metric("🟢 Total achats", f"{plan['total_buy']:,.0f} €")
+        col_sell.metric("🔴 Total ventes", f"{plan['total_sell']:,.0f} €")
+        col_count.metric("📋 Ordres", len(plan['trades']))
+
+        st.dataframe(
+            plan['trades'].drop(columns=['Secteur']).style.format({
+                "Valeur": "{:,.0f} €", "Achat (€)": "{:,.0f}", "Vente (€)": "{:,.0f}",
+                "Valeur cible": "{:,.0f} €", "% actuel": "{:.1f}%", "% cible": "{:.1f}%"
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+
+    for violation in plan['violations']:
+        st.warning(f"⚠️ Limite non atteignable avec les lignes actuelles : **{violation['label']}** "
+                   f"({violation['scope']}, {violation['bound']} {violation['target']:.0f}%) "
+                   f"- écart résiduel ~{violation['gap_eur']:,.0f}€")
+    st.caption(f"⏱️ Résolu en {plan['elapsed_ms']:.0f} ms")
+
+    # === 2c) 💥 STRESS TESTS ===
+    st.markdown("---")
+    st.markdown("### 💥 Stress tests")
+    st.caption("Chocs de marché, de secteur, de catégorie, de devise (contre l'euro) ou krach d'un titre, "
+               "appliqués à tout le portefeuille : impact sur la valeur et sur les limites de Feuil2")
+
+    # Positions encodées et règles matricielles mémorisées : chaque scénario ne coûte qu'une ligne de matrice
+    stress_model = get_stress_model(df, get_compiled_limits(limits))
+    encoded, stress_matrix = stress_model["encoded"], stress_model["matrix"]
+
+    col_presets, col_grid = st.columns([3, 1])
+    with col_presets:
+        stress_presets = st.multiselect("Scénarios prédéfinis :", list(PRESET_SCENARIOS),
+                                        default=list(PRESET_SCENARIOS), key="stress_presets")
+    with col_grid:
+        stress_grid = st.checkbox("🧮 Grille automatique", value=True, key="stress_grid",
+                                  help="Marché, chaque type / secteur / catégorie (-10/-20/-30%), "
+                                       "krach de chaque titre (-50%) et devises (±10%)")
+
+    with st.expander("➕ Scénario personnalisé", expanded=False):
+        col_name, col_scope, col_group, col_move = st.columns([2, 1, 2, 1])
+        with col_name:
+            stress_name = st.text_input("Nom du scénario", value="Mon scénario", key="stress_name")
+        with col_scope:
+            stress_scope = st.selectbox("Portée", list(SHOCK_SCOPES), key="stress_scope")
+        with col_group:
+            stress_groups = ["*"] if stress_scope == "Portefeuille" else list(encoded["codes"][stress_scope][1])
+            stress_group = st.selectbox("Groupe", stress_groups, key="stress_group")
+        with col_move:
+            stress_move = st.number_input("Choc (%)", min_value=-100.0, max_value=300.0, value=-20.0,
+                                          step=5.0, key="stress_move")
+
+        col_add, col_clear = st.columns(2)
+        if col_add.button("➕ Ajouter ce choc", key="stress_add"):
+            st.session_state.stress_custom = st.session_state.get("stress_custom", []) + [
+                (stress_name.strip() or "Mon scénario", stress_scope, stress_group, stress_move)
+            ]
+        if col_clear.button("🗑️ Effacer les chocs personnalisés", key="stress_clear"):
+            st.session_state.stress_custom = []
+        if st.session_state.get("stress_custom"):
+            st.dataframe(pd.DataFrame(st.session_state.stress_custom, columns=SHOCK_COLUMNS),
+                         use_container_width=True, hide_index=True)
+
+    shocks = pd.concat([
+        preset_shocks(stress_presets),
+        pd.DataFrame(st.session_state.get("stress_custom", []), columns=SHOCK_COLUMNS),
+        generate_grid(encoded) if stress_grid else pd.DataFrame(columns=SHOCK_COLUMNS)
+    ], ignore_index=True)
+
+    if shocks.empty:
+        st.info("💡 Sélectionnez au moins un scénario.")
+    else:
+        stress_start = datetime.now()
+        stress = run_stress_tests(encoded, stress_matrix, shocks)
+        stress_ms = (datetime.now() - stress_start).total_seconds() * 1000
+        summary = stress["summary"].sort_values("Impact (€)").reset_index(drop=True)
+
+        col_count, col_worst, col_new = st.columns(3)
+        col_count.metric("🧪 Scénarios évalués", len(summary))
+        col_worst.metric("📉 Pire scénario", f"{summary['Impact (€)'].iloc[0]:+,.0f} €",
+                         delta=f"{summary['Impact (%)'].iloc[0]:+.1f}% • {summary['Scénario'].iloc[0]}",
+                         delta_color="off")
+        col_new.metric("🚨 Scénarios créant des dépassements", int((summary["Nouveaux dépassements"] > 0).sum()))
+
+        worst = summary.head(15).iloc[::-1]
+        fig_stress = px.bar(
+            worst, x="Impact (€)", y="Scénario", orientation="h",
+            color="Nouveaux dépassements", color_continuous_scale="Reds",
+            hover_data={"Impact (%)": ":.1f", "Limites touchées": True},
+            title="📉 Scénarios les plus pénalisants"
+        )
+        fig_stress.update_layout(height=max(350, 30 * len(worst)), yaxis_title="")
+        st.plotly_chart(fig_stress, use_container_width=True)
+
+        with st.expander("📋 Tous les scénarios", expanded=False):
+            st.dataframe(
+                summary.style.format({
+                    "Valeur avant": "{:,.0f} €", "Valeur après": "{:,.0f} €",
+                    "Impact (€)": "{:+,.0f} €", "Impact (%)": "{:+.1f}%"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+
+        stress_scenario = st.selectbox("🔍 Limites après le scénario :", summary["Scénario"].tolist(),
+                                       key="stress_scenario")
+        detail = scenario_detail(stress, stress_matrix, stress_scenario)
+        if detail.empty:
+            st.success("🎉 Aucune limite dépassée avant ni après ce scénario")
+        else:
+            st.dataframe(
+                detail[["Portée", "Groupe", "Nature", "Objectif", "Part avant (%)", "Part après (%)",
+                        "Dépassement avant", "Dépassement après"]].style.format({
+                    "Objectif": "{:.1f}%", "Part avant (%)": "{:.1f}%", "Part après (%)": "{:.1f}%"
+                }),
+                use_container_width=True,
+                hide_index=True
+            )
+        st.caption(f"⏱️ {len(summary)} scénarios évalués en {stress_ms:.0f} ms")
+
     # === 3) 📊 ETF vs ACTIONS : GRAPHIQUE AMÉLIORÉ ===
     st.markdown("---")
     st.markdown("### 📊 ETF vs Actions : Répartition et objectifs")
     
     if actions_total > 0 and etf_total > 0:
         # Récupérer les objectifs depuis df_limits
-        target_pcts = [50, 50]  # Valeurs par défaut
-        if not limits.empty:
-            type_limits = limits.query("Variable1=='Type'")
-            for _, limit_row in type_limits.iterrows():
-                type_name = limit_row['Variable2']
-                target_pct = limit_row['Valeur seuils']
-                if type_name == 'Actions':
-                    target_pcts[0] = target_pct
-                elif type_name == 'ETF':
-                    target_pcts[1] = target_pct
+        type_targets = type_view.set_index("Groupe")["Objectif"]
+        target_pcts = [type_targets.get("Actions", 50), type_targets.get("ETF", 50)]  # 50/50 par défaut
         
         # Calculer les pourcentages actuels
         actions_pct = actions_total/total_value*100
@@ -357,7 +443,7 @@ def display_tab4_imbalances():
         
         # Ligne de seuil à 10% du portefeuille total
         fig_actions.add_vline(
-            x=10, 
+            x=COMPANY_CAP_PCT, 
             line_dash="dash", 
             line_color="red",
             annotation_text="Seuil de risque (10% du portefeuille)",
@@ -369,14 +455,9 @@ def display_tab4_imbalances():
         st.plotly_chart(fig_actions, use_container_width=True)
     
     # ETF avec limites depuis df_limits
-    if not etf_only.empty:
+    if etf_total > 0:
         st.markdown("#### 📊 ETF (avec limites par catégorie)")
         
-        # S'assurer que df_etf_categories existe
-        if 'df_etf_categories' not in locals():
-            df_etf_categories = etf_only.groupby("Category")["Current value"].sum().reset_index()
-            df_etf_categories["% des ETF"] = (df_etf_categories["Current value"] / etf_total * 100).round(2)
-        
         fig_etf = px.bar(
             df_etf_categories,
             x="% des ETF",
@@ -388,40 +469,29 @@ def display_tab4_imbalances():
             title="📈 Répartition des ETF par catégorie (% des ETF en EUR)"
         )
         
-        # Ajouter les lignes de seuil depuis df_limits
-        if not limits.empty:
-            etf_limits = limits.query("Variable1=='Category' and Variable2 in ['S&P500', 'Euro STOXX50', 'NASDAQ 100']")
-            if not etf_limits.empty:
-                for _, limit_row in etf_limits.iterrows():
-                    seuil = limit_row['Valeur seuils']
-                    category = limit_row['Variable2']
-                    
-                    # Vérifier si cette catégorie existe dans nos données
-                    if category in df_etf_categories['Category'].values:
-                        fig_etf.add_vline(
-                            x=seuil, 
-                            line_dash="dash", 
-                            line_color="red",
-                            line_width=2,
-                            annotation_text=f"Limite {category}: {seuil}%",
-                            annotation_position="top",
-                            annotation_bgcolor="white",
-                            annotation_bordercolor="red"
-                        )
+        # Ajouter les lignes de seuil depuis df_limits (catégories présentes uniquement)
+        for etf_cap in etf_caps[etf_caps["Groupe"].isin(df_etf_categories["Category"])].to_dict("records"):
+            fig_etf.add_vline(
+                x=etf_cap["Objectif"], 
+                line_dash="dash", 
+                line_color="red",
+                line_width=2,
+                annotation_text=f"Limite {etf_cap['Groupe']}: {etf_cap['Objectif']:g}%",
+                annotation_position="top",
+                annotation_bgcolor="white",
+                annotation_bordercolor="red"
+            )
         
         fig_etf.update_layout(height=300, showlegend=False)
         fig_etf.update_traces(textposition='outside')
         st.plotly_chart(fig_etf, use_container_width=True)
 
     # === FONCTIONS D'ANALYSE DES ÉCARTS ===
-    def analyse_ecarts_smart(df_full, label_col, value_col):
+    def analyse_ecarts_smart(view):
         conseils = []
         actions = []
         
-        for _, row in df_full.iterrows():
-            ecart = row[value_col] - row["Valeur seuils"]
-            label = row[label_col]
-            
+        for label, ecart in zip(view["Groupe"], view["Écart (%)"]):
             if ecart > 5:
                 if ecart > 15:
                     conseils.append(f"🔴 **{label}** : TRÈS surpondéré (+{ecart:.1f}%)")
@@ -442,29 +512,20 @@ def display_tab4_imbalances():
                 
         return conseils, actions
 
-    def plot_ecart_enhanced(df_in, label, val, target, title):
-        d = df_in.copy()
-        d["Écart"] = (d[val] - d[target]).round(2)
-        d = d.sort_values("Écart")
+    def plot_ecart_enhanced(view, title):
+        d = view.assign(**{"Écart": view["Écart (%)"].round(2)}).sort_values("Écart")
         
         # Couleurs selon la gravité
-        colors = []
-        for ecart in d["Écart"]:
-            if ecart > 15:
-                colors.append("#FF4444")  # Rouge foncé
-            elif ecart > 5:
-                colors.append("#FF8800")  # Orange
-            elif ecart < -15:
-                colors.append("#4444FF")  # Bleu foncé
-            elif ecart < -5:
-                colors.append("#FFAA00")  # Jaune
-            else:
-                colors.append("#00AA44")  # Vert
+        colors = np.select(
+            [d["Écart"] > 15, d["Écart"] > 5, d["Écart"] < -15, d["Écart"] < -5],
+            ["#FF4444", "#FF8800", "#4444FF", "#FFAA00"],  # Rouge foncé, orange, bleu foncé, jaune
+            default="#00AA44"  # Vert
+        )
         
         fig = go.Figure(data=[
             go.Bar(
                 x=d["Écart"],
-                y=d[label],
+                y=d["Groupe"],
                 orientation='h',
                 text=d["Écart"].round(1).astype(str) + "%",
                 textposition='outside',
@@ -490,14 +551,14 @@ def display_tab4_imbalances():
     st.markdown("---")
     st.markdown("### 🎯 Analyse par type d'actif")
     
-    if not limits.empty and 'full_type' in locals():
-        conseils_type, actions_type = analyse_ecarts_smart(full_type, "Type", "% portefeuille")
+    if not type_view.empty:
+        conseils_type, actions_type = analyse_ecarts_smart(type_view)
         
         col1, col2 = st.columns([2, 1])
         
         with col1:
             st.plotly_chart(
-                plot_ecart_enhanced(full_type, "Type", "% portefeuille", "Valeur seuils", "📊 Écarts vs objectifs - Types d'actifs (EUR)"),
+                plot_ecart_enhanced(type_view, "📊 Écarts vs objectifs - Types d'actifs (EUR)"),
                 use_container_width=True
             )
         
@@ -513,23 +574,14 @@ def display_tab4_imbalances():
     # === ANALYSE PAR SECTEUR ===
     st.markdown("### 🏭 Analyse par secteur")
     
-    actions_df = df[df["Type"] == "Actions"].copy()
-    if not actions_df.empty and not limits.empty:
-        actions_total_sect = actions_df["Current value"].sum()
-        df_sect = actions_df.groupby("Secteur")["Current value"].sum().reset_index()
-        df_sect["% dans Actions"] = df_sect["Current value"] / actions_total_sect * 100
-
-        exp_sect = limits.query("Variable1=='Secteur'")[["Variable2", "Valeur seuils"]]
-        exp_sect.columns = ["Secteur", "Valeur seuils"]
-        full_sect = exp_sect.merge(df_sect, on="Secteur", how="left").fillna(0)
-
-        conseils_sect, actions_sect = analyse_ecarts_smart(full_sect, "Secteur", "% dans Actions")
+    if actions_total > 0 and not sect_view.empty:
+        conseils_sect, actions_sect = analyse_ecarts_smart(sect_view)
         
         col1, col2 = st.columns([2, 1])
         
         with col1:
             st.plotly_chart(
-                plot_ecart_enhanced(full_sect, "Secteur", "% dans Actions", "Valeur seuils", "📊 Écarts vs objectifs - Secteurs (EUR)"),
+                plot_ecart_enhanced(sect_view, "📊 Écarts vs objectifs - Secteurs (EUR)"),
                 use_container_width=True
             )
         
@@ -545,7 +597,7 @@ def display_tab4_imbalances():
     # === DONNÉES DÉTAILLÉES ===
     st.markdown("---")
     with st.expander("📊 Données détaillées du portefeuille (EUR)", expanded=False):
-        if actions_total > 0 and 'df_companies_actions' in locals():
+        if actions_total > 0:
             st.markdown("**Répartition des Actions par entreprise (% portefeuille total en EUR):**")
             st.dataframe(
                 df_companies_actions.sort_values("% portefeuille total", ascending=False).style.format({
@@ -555,7 +607,7 @@ def display_tab4_imbalances():
                 use_container_width=True
             )
         
-        if not etf_only.empty and 'df_etf_categories' in locals():
+        if etf_total > 0:
             st.markdown("**Répartition des ETF par catégorie (EUR):**")
             st.dataframe(
                 df_etf_categories.sort_values("% des ETF", ascending=False).style.format({
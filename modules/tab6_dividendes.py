@@ -6,50 +6,61 @@ import plotly.express as px
 from datetime import datetime, timedelta
 import numpy as np
 import requests
-import time
 from modules.tab0_constants import save_to_excel
+from modules.rate_limiter import run_rate_limited
+from modules.yfinance_cache_manager import get_cache_manager, get_yahoo_rate_limiter
+from modules.dividend_history_cache import get_dividend_cache, fetch_dividend_updates
+from modules.dividend_engine import calculate_dividend_amounts as compute_dividend_amounts
+from modules.fx_history_cache import get_fx_cache
+from modules.dividend_forecast import estimate_dividend_patterns, forecast_next_payments, get_dividend_forecast
+
+# Parallélisme du scan des dividendes (le débit global est borné par le bucket Yahoo)
+DIVIDEND_SCAN_WORKERS = 8
+# Les infos société (nom, devise) changent rarement : cache réutilisé 24h
+DIVIDEND_INFO_MAX_AGE = timedelta(hours=24)
+
+def fetch_dividend_series(ticker):
+    """
+    Télécharger la série brute des dividendes (sans fuseau horaire)
+    Appel réseau uniquement : utilisable depuis un thread de fond
+    """
+    return fetch_dividend_updates(ticker, None)[0]
+
+def dividend_history_frame(ticker, dividends, start_date):
+    """
+    Filtrer une série de dividendes depuis la date d'achat et la mettre en forme
+    """
+    if dividends.empty:
+        return pd.DataFrame()
+    
+    # S'assurer que start_date est également sans fuseau horaire
+    if hasattr(start_date, 'tz_localize'):
+        start_date = start_date.tz_localize(None)
+    elif hasattr(start_date, 'tz'):
+        start_date = pd.Timestamp(start_date).tz_localize(None)
+    else:
+        start_date = pd.Timestamp(start_date)
+    
+    # Filtrer depuis la date d'achat
+    dividends = dividends[dividends.index >= start_date]
+    
+    if dividends.empty:
+        return pd.DataFrame()
+    
+    # Convertir en DataFrame avec les informations nécessaires
+    return pd.DataFrame({
+        'Date paiement': dividends.index,
+        'Ticker': ticker,
+        'Dividende par action': dividends.values,
+        'Devise': 'USD'  # Par défaut USD, sera ajusté plus tard
+    })
 
 def get_dividend_history_yfinance(ticker, start_date):
     """
     Récupérer l'historique des dividendes via Yahoo Finance
     """
     try:
-        stock = yf.Ticker(ticker)
-        
-        # Récupérer les dividendes depuis la date d'achat
-        dividends = stock.dividends
-        
-        if dividends.empty:
-            return pd.DataFrame()
-        
-        # Normaliser les fuseaux horaires pour la comparaison
-        if dividends.index.tz is not None:
-            # Si les dividendes ont un fuseau horaire, convertir en UTC puis supprimer le fuseau
-            dividends.index = dividends.index.tz_convert('UTC').tz_localize(None)
-        
-        # S'assurer que start_date est également sans fuseau horaire
-        if hasattr(start_date, 'tz_localize'):
-            start_date = start_date.tz_localize(None)
-        elif hasattr(start_date, 'tz'):
-            start_date = pd.Timestamp(start_date).tz_localize(None)
-        else:
-            start_date = pd.Timestamp(start_date)
-        
-        # Filtrer depuis la date d'achat
-        dividends = dividends[dividends.index >= start_date]
-        
-        if dividends.empty:
-            return pd.DataFrame()
-        
-        # Convertir en DataFrame avec les informations nécessaires
-        div_df = pd.DataFrame({
-            'Date paiement': dividends.index,
-            'Ticker': ticker,
-            'Dividende par action': dividends.values,
-            'Devise': 'USD'  # Par défaut USD, sera ajusté plus tard
-        })
-        
-        return div_df
+        return dividend_history_frame(ticker, fetch_dividend_series(ticker), start_date)
         
     except Exception as e:
         st.warning(f"Erreur lors de la récupération des dividendes pour {ticker}: {e}")
@@ -58,108 +69,186 @@ def get_dividend_history_yfinance(ticker, start_date):
 def get_next_dividend_estimate(ticker, historical_dividends):
     """
     Estimer le prochain dividende basé sur l'historique
+    (voir modules/dividend_forecast.py pour le calcul vectorisé multi-tickers)
     """
     try:
         if historical_dividends.empty or len(historical_dividends) < 2:
             return None
         
-        # Calculer la fréquence moyenne entre les dividendes
-        dates = pd.to_datetime(historical_dividends['Date paiement']).sort_values()
-        intervals = []
-        
-        for i in range(1, len(dates)):
-            interval = (dates.iloc[i] - dates.iloc[i-1]).days
-            intervals.append(interval)
-        
-        if not intervals:
+        history = historical_dividends.assign(Ticker=ticker)
+        next_payment = forecast_next_payments(estimate_dividend_patterns(history), n_payments=1)
+        if next_payment.empty:
             return None
         
-        # Fréquence moyenne
-        avg_interval = np.mean(intervals)
-        
-        # Dernière date de dividende
-        last_date = dates.max()
-        
-        # Estimation de la prochaine date
-        next_date = last_date + timedelta(days=avg_interval)
-        
-        # Estimation du montant (moyenne des 3 derniers)
-        last_amounts = historical_dividends['Dividende par action'].tail(3)
-        estimated_amount = last_amounts.mean()
-        
+        row = next_payment.iloc[0]
         return {
-            'Date estimée': next_date,
-            'Montant estimé': estimated_amount,
-            'Confiance': 'Élevée' if len(historical_dividends) >= 4 else 'Moyenne',
-            'Fréquence (jours)': avg_interval
+            'Date estimée': row['Date estimée'],
+            'Montant estimé': row['Montant estimé'],
+            'Confiance': row['Confiance'],
+            'Fréquence (jours)': row['Fréquence (jours)']
         }
         
     except Exception as e:
         st.warning(f"Erreur estimation dividende pour {ticker}: {e}")
         return None
 
+def company_info_from_yf_info(ticker, info):
+    """
+    Extraire les informations utiles d'un dictionnaire yfinance .info
+    """
+    info = info or {}
+    return {
+        'Nom': info.get('longName', ticker),
+        'Devise': info.get('currency', 'USD'),
+        'Secteur': info.get('sector', 'N/A'),
+        'Rendement dividende': info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0
+    }
+
 def get_company_info(ticker):
     """
     Récupérer les informations de l'entreprise
     """
     try:
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        return {
-            'Nom': info.get('longName', ticker),
-            'Devise': info.get('currency', 'USD'),
-            'Secteur': info.get('sector', 'N/A'),
-            'Rendement dividende': info.get('dividendYield', 0) * 100 if info.get('dividendYield') else 0
-        }
+        return company_info_from_yf_info(ticker, get_cache_manager().get_ticker_info(ticker))
     except:
-        return {
-            'Nom': ticker,
-            'Devise': 'USD',
-            'Secteur': 'N/A',
-            'Rendement dividende': 0
-        }
+        return company_info_from_yf_info(ticker, {})
+
+def _scan_ticker_dividends(ticker, refresh, last_ex_date, need_info):
+    """
+    Tâche de fond du scan : nouveaux dividendes + infos société si absentes du cache
+    (réseau uniquement, pas d'accès à st.session_state)
+    
+    Args:
+        ticker: symbole
+        refresh: interroger Yahoo pour les dividendes (TTL du cache expiré)
+        last_ex_date: dernier ex-date stocké (None = historique complet)
+        need_info: infos société (nom, devise) à récupérer
+    
+    Returns:
+        tuple: (série des nouveaux dividendes ou None, historique complet ?, dict .info ou None)
+    """
+    dividends, full_history = (None, False)
+    if refresh:
+        dividends, full_history = fetch_dividend_updates(ticker, last_ex_date)
+    
+    info = None
+    if need_info:
+        # Second appel Yahoo : consomme aussi un jeton du bucket partagé
+        get_yahoo_rate_limiter().acquire()
+        try:
+            info = yf.Ticker(ticker).info
+        except Exception:
+            info = None
+    
+    return dividends, full_history, info
+
+def scan_portfolio_dividends(df_data, progress_callback=None):
+    """
+    Rafraîchir de façon incrémentale les dividendes de tous les tickers
+    
+    Seuls les tickers dont le cache persistant a expiré sont interrogés, et
+    uniquement pour les dividendes postérieurs au dernier ex-date connu.
+    Les appels réseau sont répartis sur un pool borné (DIVIDEND_SCAN_WORKERS)
+    et limités en débit par le bucket Yahoo partagé. Les résultats sont
+    traités au fil de l'eau dans le thread principal.
+    
+    Args:
+        df_data: DataFrame des positions (Date déjà convertie)
+        progress_callback: fonction (terminés, total, ticker) appelée à chaque résultat
+        
+    Returns:
+        tuple: (liste des historiques, liste des estimations, liste des erreurs)
+    """
+    cache_manager = get_cache_manager()
+    div_cache = get_dividend_cache()
+    tickers = list(df_data['Ticker'].dropna().unique())
+    first_purchase_dates = df_data.groupby('Ticker')['Date'].min()
+    
+    stale = div_cache.stale_tickers(tickers)
+    states = div_cache.get_states(tickers)
+    
+    # Infos société : cache persistant, puis cache de session
+    cached_info = {}
+    for ticker in tickers:
+        state = states.get(ticker) or {}
+        if state.get('name'):
+            cached_info[ticker] = {'longName': state['name'], 'currency': state['currency']}
+        else:
+            cached_info[ticker] = cache_manager.get_cached_ticker_info(ticker, max_age=DIVIDEND_INFO_MAX_AGE)
+    
+    # Tickers à interroger : cache expiré ou nom/devise inconnus pour un payeur de dividendes
+    tasks = {
+        ticker: (ticker in stale, stale.get(ticker),
+                 cached_info[ticker] is None and (ticker in stale or bool((states.get(ticker) or {}).get('last_ex_date'))))
+        for ticker in tickers
+    }
+    tasks = {ticker: task for ticker, task in tasks.items() if task[0] or task[2]}
+    
+    errors = []
+    results = run_rate_limited(
+        lambda t: _scan_ticker_dividends(t, *tasks[t]),
+        list(tasks),
+        buckets=[get_yahoo_rate_limiter()],
+        max_workers=DIVIDEND_SCAN_WORKERS
+    )
+    
+    for done, (ticker, result, error) in enumerate(results, start=1):
+        if error is not None:
+            errors.append((ticker, error))
+        else:
+            dividends, full_history, info = result
+            if info:
+                cache_manager.store_ticker_info(ticker, info)
+                cached_info[ticker] = info
+                company = company_info_from_yf_info(ticker, info)
+                div_cache.store_company(ticker, company['Nom'], company['Devise'])
+            
+            if dividends is not None:
+                if div_cache.store(ticker, dividends, full_history) < 0:
+                    # Historique ajusté (split) : rechargement complet immédiat
+                    dividends, full_history = fetch_dividend_updates(ticker, None)
+                    div_cache.store(ticker, dividends, full_history)
+        
+        if progress_callback:
+            progress_callback(done, len(tasks), ticker)
+    
+    # Reconstituer les historiques depuis le cache persistant
+    all_dividends = []
+    history = div_cache.get_history(tickers)
+    
+    # Estimation du prochain dividende : une seule passe sur tous les historiques
+    next_payments = forecast_next_payments(estimate_dividend_patterns(history), n_payments=1)
+    next_dividends = next_payments.drop(columns='Fréquence').to_dict('records')
+    
+    for ticker, events in history.groupby('Ticker'):
+        dividends = pd.Series(events['Dividende par action'].values, index=pd.DatetimeIndex(events['Date paiement']))
+        div_history = dividend_history_frame(ticker, dividends, first_purchase_dates[ticker])
+        
+        if not div_history.empty:
+            company_info = company_info_from_yf_info(ticker, cached_info.get(ticker))
+            div_history['Entreprise'] = company_info['Nom']
+            div_history['Devise'] = company_info['Devise']
+            all_dividends.append(div_history)
+    
+    for next_div in next_dividends:
+        next_div['Entreprise'] = company_info_from_yf_info(next_div['Ticker'], cached_info.get(next_div['Ticker']))['Nom']
+    
+    return all_dividends, next_dividends, errors
 
 def calculate_dividend_amounts(dividends_df, holdings_df):
     """
     Calculer les montants réels de dividendes selon les quantités détenues
+    (jointure as-of vectorisée, fiscalité PEA / CTO par pays et conversion
+    en EUR au taux du jour de paiement : voir modules/dividend_engine.py)
     """
-    results = []
-    
-    for _, div_row in dividends_df.iterrows():
-        ticker = div_row['Ticker']
-        div_date = pd.to_datetime(div_row['Date paiement'])
-        div_per_share = div_row['Dividende par action']
-        
-        # Trouver les achats antérieurs à cette date de dividende
-        relevant_purchases = holdings_df[
-            (holdings_df['Ticker'] == ticker) & 
-            (pd.to_datetime(holdings_df['Date']) <= div_date)
-        ]
-        
-        if not relevant_purchases.empty:
-            # Quantité totale détenue à cette date
-            total_quantity = relevant_purchases['Quantity'].sum()
-            
-            # Montant brut du dividende
-            gross_amount = total_quantity * div_per_share
-            
-            # Estimation de l'impôt (30% fixe)
-            tax_rate = 0.30
-            net_amount = gross_amount * (1 - tax_rate)
-            
-            results.append({
-                'Date paiement': div_date,
-                'Ticker': ticker,
-                'Entreprise': relevant_purchases['Entreprise'].iloc[0],
-                'Dividende par action': div_per_share,
-                'Quantité détenue': total_quantity,
-                'Montant brut (€)': gross_amount,
-                'Montant net (€)': net_amount,
-                'Devise': div_row['Devise'],
-                'Type': 'Calculé automatiquement'
-            })
-    
-    return pd.DataFrame(results)
+    currencies = dividends_df['Devise'].dropna().unique() if 'Devise' in dividends_df.columns else ['USD']
+    fx_cache = get_fx_cache()
+    
+    # Historique FX téléchargé une fois puis complété (TTL), commun à toutes les sessions
+    for currency, error in fx_cache.refresh(currencies).items():
+        st.warning(f"Taux de change {currency} indisponible, montants non convertis : {error}")
+    
+    return compute_dividend_amounts(dividends_df, holdings_df, fx_rates=fx_cache.get_rates(currencies))
 
 def display_tab6_dividendes():
     st.markdown("## 💰 Suivi des Dividendes")
@@ -187,50 +276,28 @@ def display_tab6_dividendes():
         progress_bar = st.progress(0)
         status_text = st.empty()
         
-        all_dividends = []
-        next_dividends = []
+        def _update_progress(done, total, ticker):
+            status_text.text(f"✔️ {ticker} ({done}/{total})")
+            progress_bar.progress(done / total)
         
-        for i, ticker in enumerate(tickers):
-            try:
-                status_text.text(f"Traitement de {ticker}...")
-                
-                # Date du premier achat pour ce ticker (normaliser le fuseau horaire)
-                first_purchase_date = df_data[df_data['Ticker'] == ticker]['Date'].min()
-                # S'assurer que la date est sans fuseau horaire
-                if hasattr(first_purchase_date, 'tz_localize'):
-                    first_purchase_date = first_purchase_date.tz_localize(None)
-                elif hasattr(first_purchase_date, 'tz') and first_purchase_date.tz is not None:
-                    first_purchase_date = first_purchase_date.tz_convert(None)
-                
-                # Récupérer l'historique des dividendes
-                div_history = get_dividend_history_yfinance(ticker, first_purchase_date)
-                
-                if not div_history.empty:
-                    # Informations de l'entreprise
-                    company_info = get_company_info(ticker)
-                    div_history['Entreprise'] = company_info['Nom']
-                    div_history['Devise'] = company_info['Devise']
-                    
-                    all_dividends.append(div_history)
-                    
-                    # Estimation du prochain dividende
-                    next_div = get_next_dividend_estimate(ticker, div_history)
-                    if next_div:
-                        next_div['Ticker'] = ticker
-                        next_div['Entreprise'] = company_info['Nom']
-                        next_dividends.append(next_div)
-                
-                # Petite pause pour éviter de surcharger l'API
-                time.sleep(0.1)
-                
-            except Exception as e:
-                st.warning(f"Erreur pour {ticker}: {e}")
-            
-            # Mise à jour de la progression
-            progress_bar.progress((i + 1) / len(tickers))
+        # Rafraîchissement incrémental : cache persistant + scan parallèle borné
+        all_dividends, next_dividends, scan_errors = scan_portfolio_dividends(df_data, _update_progress)
+        
+        for ticker, error in scan_errors:
+            st.warning(f"Erreur pour {ticker}: {error}")
+        
+        # Rien de nouveau (cache et positions inchangés) : pas de recalcul
+        scan_signature = (
+            get_dividend_cache().signature(list(tickers)),
+            int(pd.util.hash_pandas_object(df_data[['Ticker', 'Date', 'Quantity']], index=False).sum())
+        )
+        unchanged = (scan_signature == st.session_state.get('dividend_scan_signature') and
+                     not st.session_state.df_dividendes.empty)
         
         # Consolidation des résultats
-        if all_dividends:
+        if unchanged:
+            st.success("✅ Aucun nouveau dividende depuis la dernière recherche")
+        elif all_dividends:
             consolidated_dividends = pd.concat(all_dividends, ignore_index=True)
             
             # Calculer les montants réels basés sur les quantités détenues
@@ -239,6 +306,7 @@ def display_tab6_dividendes():
             if not calculated_dividends.empty:
                 # Mettre à jour le session state
                 st.session_state.df_dividendes = calculated_dividends
+                st.session_state.dividend_scan_signature = scan_signature
                 st.session_state.data_modified = True
                 
                 # Sauvegarder automatiquement
@@ -413,56 +481,60 @@ def display_tab6_dividendes():
     # === PROCHAINS DIVIDENDES ESTIMÉS ===
     st.markdown("### 🔮 Prochains dividendes estimés")
     
-    # Analyse des patterns pour estimer les prochains dividendes
-    prochains_dividendes = []
+    # Prévision vectorisée depuis le cache d'historique (partagée avec le calendrier)
+    forecast = get_dividend_forecast(st.session_state.df_data)
+    payments = forecast['payments']
     date_actuelle = datetime.now()
+    prochains = payments[payments['Date estimée'] <= date_actuelle + timedelta(days=180)]
     
-    for entreprise in df_div['Entreprise'].unique():
-        # Derniers dividendes de cette entreprise
-        div_entreprise = df_div[df_div['Entreprise'] == entreprise].sort_values("Date paiement")
-        if len(div_entreprise) >= 2:
-            # Calculer la fréquence moyenne
-            dates = div_entreprise["Date paiement"].dt.date
-            intervals = [(dates.iloc[i] - dates.iloc[i-1]).days for i in range(1, len(dates))]
-            interval_moyen = np.mean(intervals) if intervals else 365
-            
-            # Prochaine date estimée
-            derniere_date = div_entreprise["Date paiement"].iloc[-1]
-            prochaine_date = derniere_date + timedelta(days=interval_moyen)
-            
-            if prochaine_date > date_actuelle and prochaine_date <= date_actuelle + timedelta(days=180):
-                montant_moyen = div_entreprise["Montant net (€)"].tail(3).mean()
-                prochains_dividendes.append({
-                    "Entreprise": entreprise,
-                    "Date estimée": prochaine_date.date(),
-                    "Montant estimé (€)": f"{montant_moyen:.0f}",
-                    "Fréquence (jours)": f"{interval_moyen:.0f}",
-                    "Confiance": "Élevée" if len(div_entreprise) >= 4 else "Moyenne",
-                    "Dernier versement": derniere_date.strftime('%d/%m/%Y')
-                })
-    
-    if prochains_dividendes:
-        df_prochains = pd.DataFrame(prochains_dividendes).sort_values("Date estimée")
+    if not prochains.empty:
+        df_prochains = prochains.groupby(['Date estimée', 'Ticker', 'Devise'], as_index=False).agg(
+            Entreprise=('Entreprise', 'first'),
+            Montant=('Montant net', 'sum'),
+            Fréquence=('Fréquence', 'first'),
+            Confiance=('Confiance', 'first')
+        )
+        df_prochains['Date estimée'] = df_prochains['Date estimée'].dt.date
+        df_prochains = df_prochains.rename(columns={'Montant': 'Montant net estimé'})
         
         col_next1, col_next2 = st.columns([2, 1])
         
         with col_next1:
-            st.dataframe(df_prochains, use_container_width=True, hide_index=True)
+            st.dataframe(
+                df_prochains[['Date estimée', 'Entreprise', 'Montant net estimé', 'Devise', 'Fréquence', 'Confiance']],
+                use_container_width=True,
+                hide_index=True,
+                column_config={'Montant net estimé': st.column_config.NumberColumn(format="%.2f")}
+            )
         
         with col_next2:
             # Résumé des prochains 3 mois
-            trois_mois = datetime.now() + timedelta(days=90)
-            prochains_3m = df_prochains[pd.to_datetime(df_prochains['Date estimée']) <= trois_mois]
+            trois_mois = date_actuelle + timedelta(days=90)
+            prochains_3m = prochains[prochains['Date estimée'] <= trois_mois]
             
             if not prochains_3m.empty:
-                total_estime_3m = prochains_3m['Montant estimé (€)'].str.replace('€', '').astype(float).sum()
-                nb_versements_3m = len(prochains_3m)
-                
                 st.markdown("**📅 Prochains 3 mois :**")
-                st.metric("Versements attendus", f"{nb_versements_3m}")
-                st.metric("Montant estimé", f"{total_estime_3m:.0f} €")
+                st.metric("Versements attendus", f"{prochains_3m.groupby(['Date estimée', 'Ticker']).ngroups}")
+                for devise, montant in prochains_3m.groupby('Devise')['Montant net'].sum().items():
+                    st.metric(f"Montant estimé ({devise})", f"{montant:.0f}")
             else:
                 st.info("Aucun dividende estimé dans les 3 prochains mois")
+        
+        # Échéancier 12 mois par compte et devise
+        schedule = forecast['schedule']
+        if not schedule.empty:
+            st.markdown("#### 📆 Revenus projetés sur 12 mois")
+            fig_schedule = px.bar(
+                schedule,
+                x='Mois',
+                y='Montant net',
+                color='Compte',
+                facet_row='Devise' if schedule['Devise'].nunique() > 1 else None,
+                barmode='stack',
+                labels={'Montant net': 'Montant net estimé'}
+            )
+            fig_schedule.update_layout(height=350)
+            st.plotly_chart(fig_schedule, use_container_width=True)
     else:
         st.info("Impossible d'estimer les prochains dividendes. Besoin de plus d'historique.")
 
@@ -4,15 +4,29 @@ import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime, timedelta
-import yfinance as yf
 import numpy as np
 import warnings
+from modules.analysis_snapshot_cache import get_analysis_cache
+from modules.metric_scoring import LEVELS, score_metric, count_levels
+from modules.chart_utils import downsample, line_trace, plot_cached
 warnings.filterwarnings('ignore')
 
 def display_tab8_analyse():
     st.title("🔍 Analyse complète d'une société")
     st.markdown("### 🚀 TLB INVESTOR - Validateur Automatisé")
 
+    mode = st.radio(
+        "Mode",
+        ["🔍 Analyse d'une société", "📋 Screening en lot"],
+        horizontal=True,
+        key="tab8_mode",
+        label_visibility="collapsed"
+    )
+    if mode == "📋 Screening en lot":
+        from modules.tlb_screener import display_batch_screening
+        display_batch_screening()
+        return
+
     # Interface de recherche dans le contenu principal
     col1, col2 = st.columns([3, 1])
     
@@ -26,6 +40,8 @@ def display_tab8_analyse():
     
     with col2:
         st.markdown("**[🔍 Rechercher un ticker](https://finance.yahoo.com/lookup/)**")
+        if ticker and st.button("🔄 Actualiser les données", key="refresh_analysis_snapshot"):
+            get_analysis_cache().invalidate(ticker.upper())
 
     # Analyser automatiquement si un ticker est saisi
     if ticker:
@@ -45,10 +61,10 @@ def analyze_company(ticker):
         status_text.text("🔄 Récupération des données...")
         progress_bar.progress(20)
         
-        # Récupération des données
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        hist = stock.history(period="max")
+        # Récupération des données (instantané en cache, TTL par champ)
+        snapshot = get_analysis_cache().get_snapshot(ticker, fields=('info', 'history', 'financials'))
+        info = snapshot['info'] or {}
+        hist = snapshot['history'] if snapshot['history'] is not None else pd.DataFrame()
         
         if not info or 'longName' not in info:
             st.error(f"❌ Impossible de trouver les données pour {ticker}")
@@ -60,7 +76,7 @@ def analyze_company(ticker):
         status_text.text("📊 Calcul des métriques...")
         
         # Calcul des métriques
-        metrics_data = calculate_all_metrics(info, hist)
+        metrics_data = calculate_all_metrics(info, hist, snapshot['financials'])
         
         progress_bar.progress(80)
         status_text.text("📋 Génération du rapport...")
@@ -92,9 +108,7 @@ def analyze_company(ticker):
         progress_bar.progress(100)
         status_text.text("✅ Analyse terminée !")
         
-        # Nettoyage après 1 seconde
-        import time
-        time.sleep(1)
+        # Nettoyage immédiat (les données viennent du cache : pas d'attente)
         progress_bar.empty()
         status_text.empty()
         
@@ -483,8 +497,7 @@ def get_recent_news(ticker):
     """Récupérer les titres d'actualités récentes"""
     
     try:
-        stock = yf.Ticker(ticker)
-        news = stock.news
+        news = get_analysis_cache().get(ticker, 'news')
         
         headlines = []
         if news:
@@ -500,8 +513,14 @@ def get_recent_news(ticker):
     except Exception:
         return None
 
-def calculate_all_metrics(info, hist):
-    """Calculer toutes les métriques financières"""
+def calculate_all_metrics(info, hist, financials=None):
+    """Calculer toutes les métriques financières
+    
+    Args:
+        info: dictionnaire yfinance .info
+        hist: historique de prix
+        financials: comptes annuels (lus depuis le cache d'instantanés si absents)
+    """
     
     def safe_get(key, default=None):
         value = info.get(key, default)
@@ -538,9 +557,9 @@ def calculate_all_metrics(info, hist):
     
     # Calcul des revenues des 5 dernières années
     try:
-        stock = yf.Ticker(info.get('symbol', ''))
-        financials = stock.financials
-        if not financials.empty and 'Total Revenue' in financials.index:
+        if financials is None:
+            financials = get_analysis_cache().get(info.get('symbol', ''), 'financials')
+        if financials is not None and not financials.empty and 'Total Revenue' in financials.index:
             revenues = financials.loc['Total Revenue'].dropna()
             if len(revenues) >= 2:
                 # Prendre les 5 dernières années disponibles
@@ -588,21 +607,21 @@ def calculate_all_metrics(info, hist):
     
     # === PERFORMANCE ===
     if not hist.empty and len(hist) > 0:
-        current_price = hist['Close'][-1]
+        current_price = hist['Close'].iloc[-1]
         
         # Performance 1 an
         if len(hist) >= 252:
-            price_1y_ago = hist['Close'][-252]
+            price_1y_ago = hist['Close'].iloc[-252]
             metrics['Performance 1 an (%)'] = ((current_price - price_1y_ago) / price_1y_ago) * 100
         
         # Performance 3 ans
         if len(hist) >= 756:
-            price_3y_ago = hist['Close'][-756]
+            price_3y_ago = hist['Close'].iloc[-756]
             metrics['Performance 3 ans (%)'] = ((current_price - price_3y_ago) / price_3y_ago) * 100
         
         # Performance 5 ans
         if len(hist) >= 1260:
-            price_5y_ago = hist['Close'][-1260]
+            price_5y_ago = hist['Close'].iloc[-1260]
             metrics['Performance 5 ans (%)'] = ((current_price - price_5y_ago) / price_5y_ago) * 100
         
         # Volatilité
@@ -662,76 +681,87 @@ def display_price_chart(hist, info):
                 f"${end_price:.2f} actuel"
             )
     
-    # Créer le graphique
-    fig = go.Figure()
-    
-    # Ligne de prix principal
-    fig.add_trace(go.Scatter(
-        x=hist_filtered.index,
-        y=hist_filtered['Close'],
-        mode='lines',
-        name='Prix de clôture',
-        line=dict(color='#2ecc71', width=2),
-        hovertemplate='<b>Date:</b> %{x}<br><b>Prix:</b> $%{y:.2f}<extra></extra>'
-    ))
-    
-    # Ajouter des moyennes mobiles
+    # Moyennes mobiles calculées sur toutes les séances, avant sous-échantillonnage
+    chart_data = pd.DataFrame({'Close': hist_filtered['Close']})
     if len(hist_filtered) > 50:
-        ma_50 = hist_filtered['Close'].rolling(window=50).mean()
-        fig.add_trace(go.Scatter(
-            x=hist_filtered.index,
-            y=ma_50,
-            mode='lines',
-            name='Moyenne mobile 50j',
-            line=dict(color='#f39c12', width=1, dash='dash'),
-            hovertemplate='<b>MM50:</b> $%{y:.2f}<extra></extra>'
-        ))
-    
+        chart_data['MA50'] = hist_filtered['Close'].rolling(window=50).mean()
     if len(hist_filtered) > 200:
-        ma_200 = hist_filtered['Close'].rolling(window=200).mean()
-        fig.add_trace(go.Scatter(
-            x=hist_filtered.index,
-            y=ma_200,
+        chart_data['MA200'] = hist_filtered['Close'].rolling(window=200).mean()
+    
+    def build_price_figure():
+        # Forme de la courbe conservée (LTTB) avec un nombre de points borné
+        data = downsample(chart_data, 'Close')
+        
+        fig = go.Figure()
+        
+        # Ligne de prix principal
+        fig.add_trace(line_trace(
+            data.index,
+            data['Close'],
             mode='lines',
-            name='Moyenne mobile 200j',
-            line=dict(color='#e74c3c', width=1, dash='dot'),
-            hovertemplate='<b>MM200:</b> $%{y:.2f}<extra></extra>'
+            name='Prix de clôture',
+            line=dict(color='#2ecc71', width=2),
+            hovertemplate='<b>Date:</b> %{x}<br><b>Prix:</b> $%{y:.2f}<extra></extra>'
         ))
+        
+        # Ajouter des moyennes mobiles
+        if 'MA50' in data.columns:
+            fig.add_trace(line_trace(
+                data.index,
+                data['MA50'],
+                mode='lines',
+                name='Moyenne mobile 50j',
+                line=dict(color='#f39c12', width=1, dash='dash'),
+                hovertemplate='<b>MM50:</b> $%{y:.2f}<extra></extra>'
+            ))
+        
+        if 'MA200' in data.columns:
+            fig.add_trace(line_trace(
+                data.index,
+                data['MA200'],
+                mode='lines',
+                name='Moyenne mobile 200j',
+                line=dict(color='#e74c3c', width=1, dash='dot'),
+                hovertemplate='<b>MM200:</b> $%{y:.2f}<extra></extra>'
+            ))
+        
+        # Configuration du graphique
+        fig.update_layout(
+            title=f"Évolution du cours - {selected_period}",
+            xaxis_title="Date",
+            yaxis_title="Prix ($)",
+            height=500,
+            showlegend=True,
+            legend=dict(
+                orientation="h",
+                yanchor="bottom",
+                y=1.02,
+                xanchor="right",
+                x=1
+            ),
+            hovermode='x unified',
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        
+        # Améliorer l'axe X
+        fig.update_xaxes(
+            gridcolor='lightgray',
+            gridwidth=0.5,
+            showgrid=True
+        )
+        
+        # Améliorer l'axe Y
+        fig.update_yaxes(
+            gridcolor='lightgray',
+            gridwidth=0.5,
+            showgrid=True
+        )
+        return fig
     
-    # Configuration du graphique
-    fig.update_layout(
-        title=f"Évolution du cours - {selected_period}",
-        xaxis_title="Date",
-        yaxis_title="Prix ($)",
-        height=500,
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        ),
-        hovermode='x unified',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)'
-    )
-    
-    # Améliorer l'axe X
-    fig.update_xaxes(
-        gridcolor='lightgray',
-        gridwidth=0.5,
-        showgrid=True
-    )
-    
-    # Améliorer l'axe Y
-    fig.update_yaxes(
-        gridcolor='lightgray',
-        gridwidth=0.5,
-        showgrid=True
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    # Figure sérialisée en cache : pas de reconstruction si les données n'ont pas changé
+    plot_cached(('price_chart', info.get('symbol'), selected_period, hist_filtered['Close']),
+                build_price_figure, use_container_width=True)
 
 def display_metrics_table(metrics_data, info):
     """Afficher le tableau principal des métriques selon le format TLB INVESTOR exact"""
@@ -1003,137 +1033,16 @@ def display_metrics_table(metrics_data, info):
     components.html(html_content, height=600, scrolling=True)
 
 def get_metric_score(metric_name, value):
-    """Calculer le score d'une métrique selon les seuils TLB INVESTOR"""
-    
-    if value is None:
-        return "N/A", "⚪", "Donnée non disponible"
-    
-    scoring_rules = {
-        'PER': {
-            'ranges': [(0, 15, 'TRÈS BON', '🟢'), (15, 25, 'BON', '🔵'), (25, 50, 'MAUVAIS', '🟡'), (50, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Prix payé pour 1€ de bénéfice annuel. Plus bas = moins cher.'
-        },
-        'PEG': {
-            'ranges': [(0, 1, 'TRÈS BON', '🟢'), (1, 1, 'BON', '🔵'), (1, 2.5, 'MAUVAIS', '🟡'), (2.5, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'PER ajusté de la croissance. <1 = croissance pas chère.'
-        },
-        'P/B': {
-            'ranges': [(0, 1, 'TRÈS BON', '🟢'), (1, 2, 'BON', '🔵'), (2, 5, 'MAUVAIS', '🟡'), (5, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Prix vs valeur comptable. <2 généralement attractif.'
-        },
-        'P/S': {
-            'ranges': [(0, 2, 'TRÈS BON', '🟢'), (2, 4, 'BON', '🔵'), (4, 10, 'MAUVAIS', '🟡'), (10, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Prix vs chiffre d\'affaires. Varie selon le secteur.'
-        },
-        'EV/Revenue': {
-            'ranges': [(0, 3, 'TRÈS BON', '🟢'), (3, 5, 'BON', '🔵'), (5, 12, 'MAUVAIS', '🟡'), (12, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Valeur d\'entreprise vs revenus. Mesure la valorisation totale.'
-        },
-        'EV/EBITDA': {
-            'ranges': [(0, 8, 'TRÈS BON', '🟢'), (8, 12, 'BON', '🔵'), (12, 25, 'MAUVAIS', '🟡'), (25, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Valeur vs bénéfices avant amortissements. Standard du marché.'
-        },
-        'Marge Brute (%)': {
-            'ranges': [(40, float('inf'), 'TRÈS BON', '🟢'), (25, 40, 'BON', '🔵'), (5, 25, 'MAUVAIS', '🟡'), (0, 5, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Profit après coûts de production. Varie selon l\'industrie.'
-        },
-        'Marge Opérationnelle (%)': {
-            'ranges': [(15, float('inf'), 'TRÈS BON', '🟢'), (8, 15, 'BON', '🔵'), (0, 8, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Efficacité opérationnelle. >15% = très bon.'
-        },
-        'Marge Nette (%)': {
-            'ranges': [(15, float('inf'), 'TRÈS BON', '🟢'), (8, 15, 'BON', '🔵'), (0, 8, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Profit final. >10% = entreprise très rentable.'
-        },
-        'ROE (%)': {
-            'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (15, 20, 'BON', '🔵'), (5, 15, 'MAUVAIS', '🟡'), (0, 5, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Rendement des capitaux propres. >15% = excellente gestion.'
-        },
-        'ROA (%)': {
-            'ranges': [(8, float('inf'), 'TRÈS BON', '🟢'), (5, 8, 'BON', '🔵'), (0, 5, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Efficacité d\'utilisation des actifs. >7% = très bon.'
-        },
-        'Croissance CA (%)': {
-            'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (10, 20, 'BON', '🔵'), (0, 10, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Croissance du chiffre d\'affaires. >10% = forte croissance.'
-        },
-        'Croissance Bénéfices (%)': {
-            'ranges': [(25, float('inf'), 'TRÈS BON', '🟢'), (15, 25, 'BON', '🔵'), (0, 15, 'MAUVAIS', '🟡'), (-float('inf'), 0, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Croissance des bénéfices. Plus importante que le CA.'
-        },
-        'Croissance CA Trim (%)': {
-            'ranges': [(15, float('inf'), 'TRÈS BON', '🟢'), (5, 15, 'BON', '🔵'), (-5, 5, 'MAUVAIS', '🟡'), (-float('inf'), -5, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Tendance récente du chiffre d\'affaires.'
-        },
-        'Croissance Bén Trim (%)': {
-            'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (10, 20, 'BON', '🔵'), (-10, 10, 'MAUVAIS', '🟡'), (-float('inf'), -10, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Dynamique récente des bénéfices.'
-        },
-        'Dette/Capitaux (%)': {
-            'ranges': [(0, 20, 'TRÈS BON', '🟢'), (20, 40, 'BON', '🔵'), (40, 100, 'MAUVAIS', '🟡'), (100, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Niveau d\'endettement. <30% = très sain.'
-        },
-        'Ratio Liquidité': {
-            'ranges': [(2, float('inf'), 'TRÈS BON', '🟢'), (1.5, 2, 'BON', '🔵'), (1, 1.5, 'MAUVAIS', '🟡'), (0, 1, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Capacité à payer les dettes court terme. >1.5 = bon.'
-        },
-        'Ratio Liquidité Imm': {
-            'ranges': [(1.5, float('inf'), 'TRÈS BON', '🟢'), (1.2, 1.5, 'BON', '🔵'), (0.8, 1.2, 'MAUVAIS', '🟡'), (0, 0.8, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Liquidité sans les stocks. >1 = sécurisant.'
-        },
-        'Trésorerie (Mds)': {
-            'ranges': [(5, float('inf'), 'TRÈS BON', '🟢'), (2, 5, 'BON', '🔵'), (0.1, 2, 'MAUVAIS', '🟡'), (0, 0.1, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Liquidités disponibles. Dépend de la taille de l\'entreprise.'
-        },
-        'Free Cash Flow (Mds)': {
-            'ranges': [(2, float('inf'), 'TRÈS BON', '🟢'), (0.5, 2, 'BON', '🔵'), (-0.5, 0.5, 'MAUVAIS', '🟡'), (-float('inf'), -0.5, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Argent généré après investissements. Crucial pour la santé.'
-        },
-        'Rendement Dividende (%)': {
-            'ranges': [(3, 5, 'TRÈS BON', '🟢'), (2, 3, 'BON', '🔵'), (0.1, 2, 'MAUVAIS', '🟡'), (0, 0.1, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Rendement annuel du dividende. 3-5% = idéal.'
-        },
-        'Taux Distribution (%)': {
-            'ranges': [(20, 60, 'TRÈS BON', '🟢'), (60, 80, 'BON', '🔵'), (80, 120, 'MAUVAIS', '🟡'), (120, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Part des bénéfices distribués. <80% = durable.'
-        },
-        'Dividende/Action ($)': {
-            'ranges': [(2, float('inf'), 'TRÈS BON', '🟢'), (1, 2, 'BON', '🔵'), (0.1, 1, 'MAUVAIS', '🟡'), (0, 0.1, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Montant annuel par action. Varie selon le prix de l\'action.'
-        },
-        'Performance 1 an (%)': {
-            'ranges': [(20, float('inf'), 'TRÈS BON', '🟢'), (10, 20, 'BON', '🔵'), (-10, 10, 'MAUVAIS', '🟡'), (-float('inf'), -10, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Performance sur 12 mois vs marché.'
-        },
-        'Performance 3 ans (%)': {
-            'ranges': [(50, float('inf'), 'TRÈS BON', '🟢'), (20, 50, 'BON', '🔵'), (-20, 20, 'MAUVAIS', '🟡'), (-float('inf'), -20, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Performance cumulée sur 3 ans.'
-        },
-        'Performance 5 ans (%)': {
-            'ranges': [(100, float('inf'), 'TRÈS BON', '🟢'), (50, 100, 'BON', '🔵'), (-30, 50, 'MAUVAIS', '🟡'), (-float('inf'), -30, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Performance à long terme. Très révélatrice.'
-        },
-        'Volatilité (%)': {
-            'ranges': [(0, 15, 'TRÈS BON', '🟢'), (15, 25, 'BON', '🔵'), (25, 50, 'MAUVAIS', '🟡'), (50, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Variabilité des prix. <20% = stable.'
-        },
-        'Bêta': {
-            'ranges': [(0, 0.7, 'TRÈS BON', '🟢'), (0.7, 1, 'BON', '🔵'), (1, 1.8, 'MAUVAIS', '🟡'), (1.8, float('inf'), 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Volatilité vs marché. <1 = moins volatil que le marché.'
-        },
-        'Capitalisation (Mds)': {
-            'ranges': [(50, float('inf'), 'TRÈS BON', '🟢'), (10, 50, 'BON', '🔵'), (2, 10, 'MAUVAIS', '🟡'), (0, 2, 'ÉLIMINATOIRE', '🔴')],
-            'explanation': 'Taille de l\'entreprise. >10Mds = Large Cap.'
-        }
-    }
+    """Calculer le score d'une métrique selon les seuils TLB INVESTOR
+    (règles compilées une seule fois : voir modules/metric_scoring.py)"""
     
-    if metric_name in scoring_rules:
-        rule = scoring_rules[metric_name]
-        for min_val, max_val, label, emoji in rule['ranges']:
-            if min_val <= value < max_val:
-                return label, emoji, rule['explanation']
+    return score_metric(metric_name, value)
+
+def count_metric_scores(metrics_data):
+    """Nombre de métriques par niveau TLB (TRÈS BON, BON, MAUVAIS, ÉLIMINATOIRE)"""
     
-    return "MAUVAIS", "🟡", "Critère à analyser"
+    counts = count_levels(pd.DataFrame([metrics_data]))
+    return {label: int(counts[label].iloc[0]) for label in LEVELS}
 
 def display_score_summary(metrics_data):
     """Afficher le résumé des scores SANS score global"""
@@ -1141,17 +1050,13 @@ def display_score_summary(metrics_data):
     st.header("🎯 Résumé des Évaluations")
     
     # Compter les scores
-    scores = []
-    for metric, value in metrics_data.items():
-        if value is not None:
-            score_label, score_emoji, _ = get_metric_score(metric, value)
-            scores.append(score_label)
+    counts = count_metric_scores(metrics_data)
     
-    tres_bon_count = scores.count('TRÈS BON')
-    bon_count = scores.count('BON')
-    mauvais_count = scores.count('MAUVAIS')
-    eliminatoire_count = scores.count('ÉLIMINATOIRE')
-    total_scores = len(scores)
+    tres_bon_count = counts['TRÈS BON']
+    bon_count = counts['BON']
+    mauvais_count = counts['MAUVAIS']
+    eliminatoire_count = counts['ÉLIMINATOIRE']
+    total_scores = sum(counts.values())
     
     # Affichage des compteurs uniquement
     col1, col2, col3, col4 = st.columns(4)
@@ -1184,24 +1089,26 @@ def display_score_summary(metrics_data):
             f"{eliminatoire_count/total_scores*100:.0f}%" if total_scores > 0 else "0%"
         )
 
-def display_radar_chart(metrics_data):
-    """Afficher un graphique radar des principales métriques"""
+def compute_radar_scores(metrics_data):
+    """Scores 1-5 des six dimensions du radar TLB
     
-    st.header("📊 Profil de Performance - Radar")
+    Returns:
+        dict: {dimension: score} (dimensions sans donnée absentes)
+    """
     
     # Sélectionner les métriques clés pour le radar
+    dette = metrics_data.get('Dette/Capitaux (%)', 50)
     key_metrics = {
         'Valorisation': metrics_data.get('PER'),
         'Rentabilité': metrics_data.get('ROE (%)'),
         'Croissance': metrics_data.get('Croissance CA (%)'),
-        'Solidité': 100 - metrics_data.get('Dette/Capitaux (%)', 50),
+        'Solidité': 100 - (50 if dette is None else dette),
         'Dividende': metrics_data.get('Rendement Dividende (%)', 0),
         'Performance': metrics_data.get('Performance 1 an (%)', 0)
     }
     
     # Normaliser les scores pour le radar (0-5)
-    radar_scores = []
-    radar_labels = []
+    radar = {}
     
     for label, value in key_metrics.items():
         if value is not None:
@@ -1275,8 +1182,19 @@ def display_radar_chart(metrics_data):
             else:
                 score = 3
             
-            radar_scores.append(score)
-            radar_labels.append(label)
+            radar[label] = score
+    
+    return radar
+
+def display_radar_chart(metrics_data, radar=None):
+    """Afficher un graphique radar des principales métriques"""
+    
+    st.header("📊 Profil de Performance - Radar")
+    
+    # Scores précalculés (screening en lot) ou calculés à la volée
+    radar = radar if radar is not None else compute_radar_scores(metrics_data)
+    radar_labels = list(radar.keys())
+    radar_scores = list(radar.values())
     
     if radar_scores and len(radar_scores) >= 3:
         # Fermer le polygone
@@ -0,0 +1,167 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+import plotly.graph_objects as go
+import plotly.express as px
+from datetime import datetime
+from modules.montecarlo_engine import (
+    MC_SEED, METHODS, PERCENTILES, PROCESS_POOL_THRESHOLD, get_projection, get_projection_inputs
+)
+
+# Nombre de trajectoires proposées
+PATH_OPTIONS = [1_000, 10_000, 50_000, 100_000, 250_000]
+
+def build_fan_chart(fan, start_date, title):
+    """
+    Éventail des percentiles (bandes P5-P95 et P25-P75, médiane, versements cumulés)
+    """
+    dates = [start_date + pd.DateOffset(months=int(month)) for month in fan["Mois"]]
+    fig = go.Figure()
+
+    for low, high, color, name in [("P5", "P95", "rgba(31, 119, 180, 0.15)", "P5 - P95"),
+                                   ("P25", "P75", "rgba(31, 119, 180, 0.30)", "P25 - P75")]:
+        fig.add_trace(go.Scatter(x=dates, y=fan[high], mode="lines", line=dict(width=0),
+                                 showlegend=False, hoverinfo="skip"))
+        fig.add_trace(go.Scatter(x=dates, y=fan[low], mode="lines", line=dict(width=0), fill="tonexty",
+                                 fillcolor=color, name=name, hoverinfo="skip"))
+
+    fig.add_trace(go.Scatter(
+        x=dates, y=fan["P50"], mode="lines", name="Médiane",
+        line=dict(width=3, color="#1f77b4"),
+        customdata=fan[["P5", "P25", "P75", "P95"]].values,
+        hovertemplate="<b>%{x|%m/%Y}</b><br>Médiane : %{y:,.0f} €<br>"
+                      "P25 - P75 : %{customdata[1]:,.0f} € - %{customdata[2]:,.0f} €<br>"
+                      "P5 - P95 : %{customdata[0]:,.0f} € - %{customdata[3]:,.0f} €<extra></extra>"
+    ))
+    fig.add_trace(go.Scatter(
+        x=dates, y=fan["Versements cumulés"], mode="lines", name="Versements cumulés",
+        line=dict(width=2, dash="dash", color="#7F8C8D"),
+        hovertemplate="Versé : %{y:,.0f} €<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title=dict(text=title, x=0.5, font=dict(size=16)),
+        xaxis_title="Date",
+        yaxis_title="Valeur du portefeuille (€)",
+        height=550,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        hovermode="x unified"
+    )
+    fig.update_yaxes(tickformat=",.0f", ticksuffix=" €", gridcolor='rgba(128,128,128,0.2)')
+    fig.update_xaxes(gridcolor='rgba(128,128,128,0.2)')
+    return fig
+
+def display_tab_projections():
+    st.header("📊 Projections Monte-Carlo du portefeuille")
+
+    # 🚨 Guard clause si pas de fichier Excel chargé
+    if "df_data" not in st.session_state or st.session_state.df_data.empty:
+        st.info("💡 Aucun fichier Excel chargé. Veuillez importer votre fichier dans la barre latérale.")
+        return
+
+    # Rendements historiques, valeur actuelle et dividendes : cache persistant des cours, une fois par session
+    with st.spinner("📥 Chargement de l'historique des cours..."):
+        inputs = get_projection_inputs(st.session_state.df_data)
+
+    if inputs["errors"]:
+        st.warning(f"❌ Historique indisponible pour : {', '.join(sorted(inputs['errors']))}")
+    if inputs["missing"]:
+        st.caption(f"ℹ️ Titres sans historique de cours exclus de la projection : {', '.join(inputs['missing'])}")
+    if inputs["initial"] <= 0 or len(inputs["monthly_logs"]) < 12:
+        st.warning("⚠️ Historique de cours insuffisant pour projeter le portefeuille.")
+        return
+
+    monthly_logs = inputs["monthly_logs"]
+    col_value, col_return, col_vol, col_yield = st.columns(4)
+    col_value.metric("💰 Valeur actuelle", f"{inputs['initial']:,.0f} €")
+    col_return.metric("📈 Rendement historique annualisé", f"{(np.exp(monthly_logs.mean() * 12) - 1) * 100:+.1f}%",
+                      delta=f"sur {inputs['history_years']:.1f} ans", delta_color="off")
+    col_vol.metric("📉 Volatilité annualisée", f"{monthly_logs.std(ddof=1) * np.sqrt(12) * 100:.1f}%")
+    col_yield.metric("💸 Rendement net des dividendes", f"{inputs['dividend_yield'] * 100:.2f}%")
+
+    # === PARAMÈTRES ===
+    st.markdown("### ⚙️ Paramètres de la simulation")
+    col_horizon, col_contribution, col_target = st.columns(3)
+    with col_horizon:
+        horizon_years = st.slider("⏳ Horizon (années)", 1, 40, 15, key="mc_horizon")
+    with col_contribution:
+        contribution = st.number_input("💶 Versement mensuel (€)", min_value=0.0, step=50.0, format="%.0f",
+                                       value=float(round(inputs["contribution"], -1)), key="mc_contribution",
+                                       help="Par défaut : moyenne des achats des 12 derniers mois")
+    with col_target:
+        target = st.number_input("🎯 Objectif de capital (€)", min_value=0.0, step=10_000.0, format="%.0f",
+                                 value=float(round(inputs["initial"] * 2, -3)), key="mc_target")
+
+    col_method, col_paths, col_options = st.columns(3)
+    with col_method:
+        method = st.radio("Modèle des rendements", list(METHODS), format_func=METHODS.get, key="mc_method",
+                          help="Bootstrap : mois tirés dans l'historique réel (queues épaisses conservées). "
+                               "Log-normale : moyenne et volatilité historiques.")
+    with col_paths:
+        n_paths = st.select_slider("🎲 Nombre de trajectoires", PATH_OPTIONS, value=10_000, key="mc_paths",
+                                   format_func=lambda n: f"{n:,}".replace(",", " "))
+        seed = st.number_input("🌱 Graine", min_value=0, value=MC_SEED, step=1, key="mc_seed",
+                               help="Même graine = mêmes résultats")
+    with col_options:
+        reinvest = st.checkbox("🔁 Réinvestir les dividendes", value=True, key="mc_reinvest")
+        use_processes = st.checkbox("⚡ Calcul multi-processus", value=n_paths >= PROCESS_POOL_THRESHOLD,
+                                    key="mc_processes",
+                                    help=f"Recommandé à partir de {PROCESS_POOL_THRESHOLD:,} trajectoires".replace(",", " "))
+
+    months = horizon_years * 12
+    with st.spinner(f"🎲 Simulation de {n_paths:,} trajectoires...".replace(",", " ")):
+        projection = get_projection(
+            inputs, months=months, n_paths=n_paths, contribution=contribution,
+            dividend_yield=inputs["dividend_yield"], reinvest=reinvest, method=method, seed=int(seed),
+            target=target or None, use_processes=use_processes
+        )
+    final = projection["final"]
+
+    # === RÉSULTATS ===
+    st.markdown(f"### 🔮 Dans {horizon_years} ans")
+    col_median, col_range, col_invested, col_proba = st.columns(4)
+    col_median.metric("🎯 Valeur médiane", f"{final['Valeur médiane']:,.0f} €",
+                      delta=f"{final['Valeur médiane'] - final['Versements cumulés']:+,.0f} € vs versé")
+    col_range.metric("📊 Fourchette P5 - P95", f"{final['P5']:,.0f} € - {final['P95']:,.0f} €")
+    col_invested.metric("📥 Total versé", f"{final['Versements cumulés']:,.0f} €",
+                        delta=f"Risque de perte : {final['Probabilité de perte (%)']:.1f}%", delta_color="off")
+    col_proba.metric("🏁 Probabilité d'atteindre l'objectif",
+                     f"{final['Probabilité objectif (%)']:.1f}%" if final['Probabilité objectif (%)'] is not None else "N/A")
+    if not reinvest:
+        st.info(f"💸 Dividendes perçus cumulés (médiane) : **{final['Dividendes perçus (médiane)']:,.0f} €**")
+
+    fan = projection["fan"]
+    start_date = pd.Timestamp(datetime.now()).normalize()
+    st.plotly_chart(build_fan_chart(fan, start_date, f"📊 Éventail des valeurs projetées ({METHODS[method]})"),
+                    use_container_width=True)
+
+    col_hist, col_table = st.columns([3, 2])
+    with col_hist:
+        fig_final = px.histogram(x=projection["final_values"], nbins=80,
+                                 title="Distribution de la valeur finale",
+                                 labels={"x": "Valeur finale (€)"})
+        fig_final.add_vline(x=final["Versements cumulés"], line_dash="dash", line_color="#7F8C8D",
+                            annotation_text="Versé")
+        if target:
+            fig_final.add_vline(x=target, line_dash="dot", line_color="#2ECC71", annotation_text="Objectif")
+        fig_final.update_layout(height=400, showlegend=False, yaxis_title="Trajectoires")
+        st.plotly_chart(fig_final, use_container_width=True)
+    with col_table:
+        # Percentiles en fin de chaque année
+        yearly = fan[(fan["Mois"] % 12 == 0) & (fan["Mois"] > 0)].copy()
+        yearly.insert(0, "Année", (start_date.year + yearly["Mois"] // 12).astype(int))
+        st.markdown("**📅 Percentiles par année**")
+        st.dataframe(
+            yearly[["Année"] + [f"P{percentile}" for percentile in PERCENTILES] + ["Versements cumulés"]]
+            .style.format({col: "{:,.0f} €" for col in yearly.columns if col not in ("Année", "Mois")}),
+            use_container_width=True,
+            hide_index=True,
+            height=380
+        )
+
+    paths_label = f"{projection['paths']:,}".replace(",", " ")
+    st.caption(f"⏱️ {paths_label} trajectoires simulées en {projection['elapsed_ms']:.0f} ms "
+               f"({projection['workers']} processus) • Rendements de prix historiques de la composition actuelle ; "
+               f"dividendes au rendement net prévu sur 12 mois • Projection indicative, non garantie")
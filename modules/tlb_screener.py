@@ -0,0 +1,303 @@
+# modules/tlb_screener.py
+"""
+Screening en lot du validateur TLB INVESTOR
+- Univers : portefeuille actuel, watchlist importée ou fichier de composition d'indice
+- Téléchargements en parallèle (pool borné + bucket Yahoo partagé)
+- Tableau noté et triable, scores radar précalculés pour chaque ticker
+"""
+
+from datetime import timedelta
+from typing import Dict, List, Tuple
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from modules.rate_limiter import run_rate_limited
+from modules.yfinance_cache_manager import get_cache_manager
+from modules.analysis_snapshot_cache import get_analysis_cache
+from modules.metric_scoring import LEVELS, LEVEL_EMOJIS, count_levels
+from modules.tab8_analyse import calculate_all_metrics, compute_radar_scores, display_radar_chart
+
+# Parallélisme du screening (le débit global est borné par le bucket Yahoo)
+SCREENING_WORKERS = 8
+# Infos société déjà en cache de session réutilisées pendant 6h
+SCREENING_INFO_MAX_AGE = timedelta(hours=6)
+MAX_SCREENING_TICKERS = 500
+
+# Points par niveau pour le score TLB global (%)
+SCORE_POINTS = {'TRÈS BON': 3, 'BON': 2, 'MAUVAIS': 1, 'ÉLIMINATOIRE': 0}
+
+# Métriques affichées dans le tableau de screening
+SCREENING_METRICS = [
+    'PER', 'PEG', 'ROE (%)', 'Marge Opérationnelle (%)', 'Croissance CA (%)', 'Dette/Capitaux (%)',
+    'Rendement Dividende (%)', 'Performance 1 an (%)', 'Volatilité (%)', 'Capitalisation (Mds)'
+]
+
+TICKER_COLUMN_CANDIDATES = ['Ticker', 'ticker', 'Symbol', 'symbol', 'Symbole', 'Code']
+
+
+# === UNIVERS DE SCREENING ===
+
+def parse_ticker_file(uploaded_file) -> List[str]:
+    """
+    Lire une liste de tickers depuis un CSV / Excel (watchlist ou composition d'indice)
+
+    La colonne Ticker / Symbol est utilisée si elle existe, sinon la première colonne.
+    """
+    name = getattr(uploaded_file, 'name', '').lower()
+    if name.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(uploaded_file)
+    else:
+        df = pd.read_csv(uploaded_file, sep=None, engine='python')
+
+    if df.empty:
+        return []
+    column = next((col for col in TICKER_COLUMN_CANDIDATES if col in df.columns), df.columns[0])
+    return normalize_tickers(df[column].dropna().astype(str).tolist())
+
+
+def normalize_tickers(tickers: List[str]) -> List[str]:
+    """Nettoyer, passer en majuscules et dédoublonner (ordre conservé)"""
+    cleaned = [t.strip().upper() for t in tickers if t and t.strip()]
+    return list(dict.fromkeys(cleaned))[:MAX_SCREENING_TICKERS]
+
+
+def portfolio_tickers() -> List[str]:
+    """Tickers du portefeuille chargé"""
+    df_data = st.session_state.get('df_data')
+    if df_data is None or df_data.empty or 'Ticker' not in df_data.columns:
+        return []
+    return normalize_tickers(df_data['Ticker'].dropna().astype(str).tolist())
+
+
+# === CALCUL ===
+
+def _fetch_screening_snapshot(ticker: str, need_info: bool) -> Dict:
+    """
+    Données d'un ticker (exécuté dans un thread : aucun accès à st.session_state)
+
+    Le cache d'instantanés est partagé et thread-safe ; chaque requête Yahoo
+    consomme un jeton du bucket global.
+    """
+    fields = ('info', 'history', 'financials') if need_info else ('history', 'financials')
+    return get_analysis_cache().get_snapshot(ticker, fields)
+
+
+def score_ticker(ticker: str, info: Dict, hist: pd.DataFrame, financials) -> Tuple[Dict, Dict, Dict]:
+    """
+    Métriques et scores radar d'un ticker (la notation des niveaux est faite
+    ensuite pour tous les tickers à la fois, voir score_table)
+
+    Returns:
+        tuple: (ligne du tableau, métriques complètes, scores radar)
+    """
+    metrics = calculate_all_metrics(info, hist, financials)
+    radar = compute_radar_scores(metrics)
+
+    row = {
+        'Ticker': ticker,
+        'Entreprise': info.get('longName', ticker),
+        'Secteur': info.get('sector', 'N/A'),
+        'Radar moyen': round(sum(radar.values()) / len(radar), 2) if radar else None,
+    }
+    row.update({metric: metrics.get(metric) for metric in SCREENING_METRICS})
+    return row, metrics, radar
+
+
+def score_table(rows: List[Dict], all_metrics: Dict[str, Dict]) -> pd.DataFrame:
+    """
+    Ajouter les niveaux TLB et le score global (notation vectorisée de tous les tickers)
+
+    Returns:
+        DataFrame: tableau trié par score décroissant
+    """
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+
+    metrics_frame = pd.DataFrame([all_metrics[ticker] for ticker in table['Ticker']], index=table.index)
+    counts = count_levels(metrics_frame)
+    total = counts.sum(axis=1)
+    points = sum(SCORE_POINTS[label] * counts[label] for label in LEVELS)
+
+    table.insert(3, 'Score TLB (%)', (points / (3 * total) * 100).where(total > 0).round(1))
+    for position, label in enumerate(LEVELS, start=4):
+        table.insert(position, LEVEL_EMOJIS[label], counts[label])
+
+    return table.sort_values('Score TLB (%)', ascending=False, na_position='last').reset_index(drop=True)
+
+
+def screen_tickers(tickers: List[str], progress_callback=None) -> Dict:
+    """
+    Screening complet d'une liste de tickers
+
+    Les infos société déjà présentes dans le cache de session (YFinanceCacheManager)
+    sont réutilisées ; les autres sont téléchargées et y sont ajoutées.
+    Les résultats sont traités au fil de l'eau dans le thread principal.
+
+    Args:
+        tickers: liste de symboles
+        progress_callback: fonction (terminés, total, ticker)
+
+    Returns:
+        dict: 'table' (DataFrame trié), 'metrics' et 'radar' par ticker, 'errors'
+    """
+    cache_manager = get_cache_manager()
+    cached_info = {t: cache_manager.get_cached_ticker_info(t, max_age=SCREENING_INFO_MAX_AGE) for t in tickers}
+
+    rows, all_metrics, all_radar, errors = [], {}, {}, []
+    results = run_rate_limited(
+        lambda t: _fetch_screening_snapshot(t, cached_info[t] is None),
+        tickers,
+        max_workers=SCREENING_WORKERS
+    )
+
+    for done, (ticker, snapshot, error) in enumerate(results, start=1):
+        if error is not None:
+            errors.append((ticker, str(error)))
+        else:
+            info = cached_info[ticker] or snapshot.get('info') or {}
+            if cached_info[ticker] is None and info:
+                cache_manager.store_ticker_info(ticker, info)
+
+            if not info or 'longName' not in info:
+                errors.append((ticker, "Données introuvables"))
+            else:
+                hist = snapshot.get('history')
+                hist = hist if hist is not None else pd.DataFrame()
+                try:
+                    row, metrics, radar = score_ticker(ticker, info, hist, snapshot.get('financials'))
+                    rows.append(row)
+                    all_metrics[ticker] = metrics
+                    all_radar[ticker] = radar
+                except Exception as e:
+                    errors.append((ticker, str(e)))
+
+        if progress_callback:
+            progress_callback(done, len(tickers), ticker)
+
+    table = score_table(rows, all_metrics)
+
+    return {'table': table, 'metrics': all_metrics, 'radar': all_radar, 'errors': errors}
+
+
+# === INTERFACE ===
+
+def display_radar_comparison(radar_by_ticker: Dict[str, Dict], tickers: List[str]):
+    """Superposer les radars précalculés de plusieurs tickers"""
+    fig = go.Figure()
+    for ticker in tickers:
+        radar = radar_by_ticker.get(ticker) or {}
+        if len(radar) < 3:
+            continue
+        labels = list(radar.keys())
+        scores = list(radar.values())
+        fig.add_trace(go.Scatterpolar(
+            r=scores + [scores[0]],
+            theta=labels + [labels[0]],
+            fill='toself',
+            name=ticker,
+            opacity=0.6,
+            hovertemplate=f'<b>{ticker}</b><br>%{{theta}}: %{{r}}/5<extra></extra>'
+        ))
+
+    fig.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 5], tickvals=[1, 2, 3, 4, 5])),
+        height=500,
+        paper_bgcolor='rgba(0,0,0,0)'
+    )
+    st.plotly_chart(fig, use_container_width=True)
+
+
+def display_batch_screening():
+    """Screening en lot : choix de l'univers, calcul parallèle, tableau noté"""
+
+    st.markdown("#### 📋 Screening en lot")
+
+    source = st.radio(
+        "Univers à analyser",
+        ["💼 Portefeuille actuel", "📄 Watchlist (CSV / Excel)", "📊 Composition d'indice (CSV / Excel)",
+         "⌨️ Saisie manuelle"],
+        horizontal=True,
+        key="screening_source"
+    )
+
+    tickers: List[str] = []
+    if source == "💼 Portefeuille actuel":
+        tickers = portfolio_tickers()
+        if not tickers:
+            st.info("💡 Aucun portefeuille chargé. Importez votre fichier ou choisissez une autre source.")
+    elif source == "⌨️ Saisie manuelle":
+        raw = st.text_area("Tickers (séparés par des virgules, espaces ou retours à la ligne)",
+                           key="screening_manual", placeholder="AAPL, MSFT, MC.PA, AI.PA")
+        tickers = normalize_tickers(raw.replace(',', ' ').split())
+    else:
+        uploaded = st.file_uploader(
+            "Fichier de tickers (colonne Ticker / Symbol, ou première colonne)",
+            type=['csv', 'txt', 'xlsx', 'xls'],
+            key=f"screening_file_{'index' if 'indice' in source else 'watchlist'}"
+        )
+        if uploaded is not None:
+            try:
+                tickers = parse_ticker_file(uploaded)
+            except Exception as e:
+                st.error(f"❌ Fichier illisible : {e}")
+
+    if tickers:
+        st.caption(f"{len(tickers)} ticker(s) : {', '.join(tickers[:20])}{' ...' if len(tickers) > 20 else ''}")
+
+    if st.button("🚀 Lancer le screening", type="primary", disabled=not tickers, key="run_screening"):
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        def _update_progress(done, total, ticker):
+            progress_bar.progress(done / max(total, 1))
+            status_text.text(f"📊 {ticker} ({done}/{total})")
+
+        st.session_state.screening_results = screen_tickers(tickers, _update_progress)
+        progress_bar.empty()
+        status_text.empty()
+
+    results = st.session_state.get('screening_results')
+    if not results:
+        return
+
+    for ticker, error in results['errors']:
+        st.warning(f"⚠️ {ticker} : {error}")
+
+    table = results['table']
+    if table.empty:
+        st.info("Aucun résultat exploitable.")
+        return
+
+    st.markdown(f"**{len(table)} société(s) notée(s)** — cliquez sur un en-tête de colonne pour trier")
+    st.dataframe(
+        table,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            'Score TLB (%)': st.column_config.ProgressColumn('Score TLB (%)', min_value=0, max_value=100, format="%.0f"),
+            **{metric: st.column_config.NumberColumn(metric, format="%.2f") for metric in SCREENING_METRICS}
+        }
+    )
+
+    st.download_button(
+        "📥 Exporter le screening (CSV)",
+        table.to_csv(index=False).encode('utf-8'),
+        file_name="screening_tlb.csv",
+        mime="text/csv"
+    )
+
+    # Radars précalculés : comparaison sans nouveau téléchargement
+    st.markdown("---")
+    selected = st.multiselect(
+        "Comparer les profils radar",
+        options=table['Ticker'].tolist(),
+        default=table['Ticker'].head(3).tolist(),
+        key="screening_radar_selection"
+    )
+    if len(selected) == 1:
+        display_radar_chart(results['metrics'][selected[0]], results['radar'][selected[0]])
+    elif selected:
+        display_radar_comparison(results['radar'], selected)
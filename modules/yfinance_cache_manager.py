@@ -9,6 +9,12 @@ import json
 from functools import wraps
 import requests
 from typing import Dict, List, Optional, Tuple
+from modules.rate_limiter import TokenBucket
+from modules.cost_basis_engine import held_quantities
+
+# Débit maximal vers Yahoo Finance partagé par toutes les sessions
+YAHOO_REQUESTS_PER_MINUTE = 300
+YAHOO_BURST = 20
 
 class YFinanceCacheManager:
     """
@@ -244,6 +250,36 @@ class YFinanceCacheManager:
             st.warning(f"⚠️ Erreur info pour {ticker}: {e}")
             return st.session_state.yf_cache['info'].get(ticker, {})
     
+    def get_cached_ticker_info(self, ticker: str, max_age: Optional[timedelta] = None) -> Optional[Dict]:
+        """
+        Lire les informations d'un ticker depuis le cache, sans appel réseau
+        
+        Args:
+            ticker: symbole
+            max_age: âge maximal accepté (durée du cache par défaut)
+            
+        Returns:
+            dict ou None si absent / expiré
+        """
+        cache = st.session_state.yf_cache
+        last_update = cache['last_update'].get(f"{ticker}_info")
+        if last_update is None or ticker not in cache['info']:
+            return None
+        
+        if datetime.now() - last_update >= (max_age or self.cache_duration):
+            return None
+        
+        return cache['info'][ticker]
+    
+    def store_ticker_info(self, ticker: str, info: Dict):
+        """
+        Enregistrer des informations récupérées ailleurs (ex: threads de scan)
+        À appeler depuis le thread principal Streamlit
+        """
+        if info:
+            st.session_state.yf_cache['info'][ticker] = info
+            st.session_state.yf_cache['last_update'][f"{ticker}_info"] = datetime.now()
+    
     def get_current_prices(self, tickers: List[str]) -> Dict[str, float]:
         """
         Récupérer les prix actuels pour une liste de tickers - VERSION ROBUSTE
@@ -321,6 +357,12 @@ def get_cache_manager():
     return YFinanceCacheManager(cache_duration_minutes=5)
 
 
+@st.cache_resource
+def get_yahoo_rate_limiter():
+    """Token bucket partagé pour les appels Yahoo Finance parallèles"""
+    return TokenBucket(YAHOO_REQUESTS_PER_MINUTE, capacity=YAHOO_BURST)
+
+
 def update_portfolio_prices_optimized(df: pd.DataFrame) -> pd.DataFrame:
     """
     Version optimisée de la mise à jour des prix du portefeuille
@@ -343,7 +385,8 @@ def update_portfolio_prices_optimized(df: pd.DataFrame) -> pd.DataFrame:
     
     # === MISE À JOUR DES PRIX SEULEMENT ===
     df_updated["Current price"] = df_updated["Ticker"].map(current_prices)
-    df_updated["Current value"] = df_updated["Current price"] * df_updated["Quantity"]
+    # Valeur des seules actions encore détenues (FIFO) : ventes, frais et splits valent 0
+    df_updated["Current value"] = df_updated["Current price"] * held_quantities(df_updated)
     
     # === IMPORTANT: On ne convertit RIEN ici ===
     # Les devises originales sont préservées
@@ -0,0 +1,68 @@
+# tests/test_allocation_planner.py
+"""
+Planificateur d'apport : achats seuls, objectifs de Feuil2 et plafond par entreprise
+"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from modules.allocation_planner import aggregate_positions, allocation_to_simulations, plan_allocation  # noqa: E402
+
+
+def _positions():
+    return aggregate_positions(pd.DataFrame({
+        'Type': ['Actions', 'Actions', 'ETF'],
+        'Secteur': ['Technologie', 'Technologie', 'Monde'],
+        'Category': ['Logiciel', 'Logiciel', 'S&P500'],
+        'Entreprise': ['Apple', 'Microsoft', 'Amundi'],
+        'Ticker': ['AAPL', 'MSFT', 'CW8.PA'],
+        'Units': ['USD', 'USD', 'EUR'],
+        'Current value': [5_000.0, 3_000.0, 2_000.0]
+    }), eurusd_rate=0.9)
+
+
+def _limits():
+    return pd.DataFrame({'Variable1': ['Type', 'Type'], 'Variable2': ['Actions', 'ETF'],
+                         'Valeur seuils': [60.0, 40.0]})
+
+
+def test_usd_lines_are_converted_before_aggregation():
+    positions = _positions().set_index('Ticker')
+    assert positions.loc['AAPL', 'Valeur'] == pytest.approx(4_500.0)
+    assert positions.loc['CW8.PA', 'Valeur'] == pytest.approx(2_000.0)
+
+
+@pytest.mark.parametrize("by", ['category', 'ticker'])
+def test_cash_goes_to_the_underweight_type(by):
+    result = plan_allocation(_positions(), _limits(), 1_000.0, by=by)
+    allocation = result['allocation']
+
+    assert result['status'] == 'optimal'
+    assert allocation['Montant (€)'].sum() == pytest.approx(1_000.0)
+    assert set(allocation['Type']) == {'ETF'}
+    rules = result['rules'].set_index('Groupe')
+    assert abs(rules.loc['ETF', 'Écart après']) < abs(rules.loc['ETF', 'Écart avant'])
+
+
+def test_ticker_mode_does_not_reinforce_companies_above_the_cap():
+    positions = _positions()
+    limits = pd.DataFrame({'Variable1': ['Type', 'Type'], 'Variable2': ['Actions', 'ETF'],
+                           'Valeur seuils': [90.0, 10.0]})
+    result = plan_allocation(positions, limits, 3_000.0, by='ticker', company_cap=0.30)
+    allocation = result['allocation'].set_index('Ticker')
+    total = positions['Valeur'].sum() + 3_000.0
+
+    # Objectif Actions : Apple (déjà > 30 %) n'est pas renforcée, Microsoft l'est jusqu'au plafond
+    assert allocation['Montant (€)'].sum() == pytest.approx(3_000.0)
+    assert 'AAPL' not in allocation.index
+    assert allocation.loc['MSFT', 'Valeur après'] == pytest.approx(0.30 * total, abs=1.0)
+
+
+def test_simulations_split_original_currency_pro_rata():
+    allocation = plan_allocation(_positions(), _limits(), 1_000.0, by='ticker')['allocation']
+    simulations = allocation_to_simulations(allocation, 'USD', 1_100.0, 1_000.0)
+
+    assert sum(sim['montant_eur'] for sim in simulations.values()) == pytest.approx(1_000.0)
+    assert sum(sim['montant_original'] for sim in simulations.values()) == pytest.approx(1_100.0)
@@ -0,0 +1,132 @@
+# tests/test_cost_basis_engine.py
+"""
+Prix de revient FIFO, quantités détenues et mouvements signés (journal Feuil1)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.cost_basis_engine import (
+    _legacy_fifo, compute_cost_basis, held_quantities, normalize_ledger, signed_movements, synthetic_ledger
+)
+
+
+def _feuil1(rows):
+    return pd.DataFrame(rows, columns=['Date', 'Ticker', 'Compte', 'Opération', 'Quantity', 'Purchase value', 'Frais'])
+
+
+def _position(result, ticker='AAPL', compte='CTO'):
+    positions = result['positions'].set_index(['Ticker', 'Compte'])
+    return positions.loc[(ticker, compte)]
+
+
+def test_partial_sell_consumes_oldest_lot_first():
+    ledger = normalize_ledger(_feuil1([
+        ['2024-01-02', 'AAPL', 'CTO', 'Achat', 10, 1000.0, 0.0],
+        ['2024-02-01', 'AAPL', 'CTO', 'Achat', 10, 2000.0, 0.0],
+        ['2024-03-01', 'AAPL', 'CTO', 'Vente', 15, 2400.0, 0.0],
+    ]))
+    result = compute_cost_basis(ledger)
+
+    # 10 × 100 + 5 × 200 vendues, il reste 5 actions à 200
+    assert result['realized']['Coût FIFO'].tolist() == pytest.approx([2000.0])
+    assert result['realized']['Plus-value réalisée'].tolist() == pytest.approx([400.0])
+    assert result['lots']['Quantité restante'].tolist() == pytest.approx([5.0])
+    assert _position(result)['PRU'] == pytest.approx(200.0)
+    assert result['warnings'].empty
+
+
+def test_sell_larger_than_position_is_only_covered_up_to_holding():
+    ledger = normalize_ledger(_feuil1([
+        ['2024-01-02', 'AAPL', 'CTO', 'Achat', 10, 1000.0, 0.0],
+        ['2024-03-01', 'AAPL', 'CTO', 'Vente', 15, 1800.0, 0.0],
+        ['2024-04-01', 'AAPL', 'CTO', 'Achat', 4, 480.0, 0.0],
+    ]))
+    result = compute_cost_basis(ledger)
+
+    realized = result['realized'].iloc[0]
+    assert realized['Quantité vendue'] == pytest.approx(10.0)
+    assert realized['Produit net'] == pytest.approx(1200.0)
+    assert result['warnings']['Quantité non couverte'].tolist() == pytest.approx([5.0])
+    # L'excédent n'est pas imputé sur l'achat suivant
+    assert _position(result)['Quantité'] == pytest.approx(4.0)
+
+
+def test_same_day_buy_is_matched_before_sell():
+    ledger = normalize_ledger(_feuil1([
+        ['2024-01-02', 'AAPL', 'CTO', 'Vente', 5, 600.0, 0.0],
+        ['2024-01-02', 'AAPL', 'CTO', 'Achat', 5, 500.0, 0.0],
+    ]))
+    result = compute_cost_basis(ledger)
+
+    assert ledger['Opération'].tolist() == ['Achat', 'Vente']
+    assert result['warnings'].empty
+    assert result['realized']['Plus-value réalisée'].tolist() == pytest.approx([100.0])
+    assert _position(result)['Quantité'] == pytest.approx(0.0)
+
+
+def test_split_adjusts_lots_bought_before_it_only():
+    ledger = normalize_ledger(_feuil1([
+        ['2024-01-02', 'AAPL', 'CTO', 'Achat', 10, 1000.0, 0.0],
+        ['2024-06-01', 'AAPL', 'CTO', 'Split', 2, 0.0, 0.0],
+        ['2024-07-01', 'AAPL', 'CTO', 'Achat', 5, 300.0, 0.0],
+        ['2024-08-01', 'AAPL', 'CTO', 'Vente', 25, 2000.0, 0.0],
+    ]))
+    result = compute_cost_basis(ledger)
+
+    # 20 actions post-split à 50 puis 5 à 60 : tout est vendu sans excédent
+    assert result['realized']['Quantité vendue'].tolist() == pytest.approx([25.0])
+    assert result['realized']['Coût FIFO'].tolist() == pytest.approx([1300.0])
+    assert result['warnings'].empty
+
+
+def test_split_on_buy_date_applies_before_the_buy():
+    ledger = normalize_ledger(_feuil1([
+        ['2024-06-01', 'AAPL', 'CTO', 'Achat', 5, 300.0, 0.0],
+        ['2024-06-01', 'AAPL', 'CTO', 'Split', 2, 0.0, 0.0],
+    ]))
+    result = compute_cost_basis(ledger)
+
+    assert _position(result)['Quantité'] == pytest.approx(5.0)
+    assert _position(result)['PRU'] == pytest.approx(60.0)
+
+
+def test_matches_lot_queue_reference():
+    ledger = normalize_ledger(synthetic_ledger(n_transactions=2_000, n_tickers=20))
+    positions = compute_cost_basis(ledger)['positions'].set_index(['Ticker', 'Compte'])
+    legacy = _legacy_fifo(ledger).set_index(['Ticker', 'Compte']).reindex(positions.index)
+
+    for column in legacy.columns:
+        np.testing.assert_allclose(positions[column], legacy[column], rtol=1e-9, atol=1e-6)
+
+
+def test_held_quantities_keep_rows_outside_the_ledger():
+    df = _feuil1([
+        ['2024-01-02', 'AAPL', 'CTO', 'Achat', 10, 1000.0, 0.0],
+        ['2024-02-01', 'AAPL', 'CTO', 'Achat', 10, 2000.0, 0.0],
+        ['2024-03-01', 'AAPL', 'CTO', 'Vente', 15, 2400.0, 0.0],
+        ['2024-03-02', 'AAPL', 'CTO', 'Frais', 0, 0.0, 5.0],
+        ['2024-04-01', 'AAPL', 'CTO', 'Split', 2, 0.0, 0.0],
+        ['date inconnue', 'MSFT', 'CTO', 'Achat', 7, 700.0, 0.0],
+        ['2024-05-01', '', 'CTO', 'Achat', 3, 300.0, 0.0],
+    ])
+    held = held_quantities(df)
+
+    assert held.index.equals(df.index)
+    assert held.tolist() == pytest.approx([0.0, 10.0, 0.0, 0.0, 0.0, 7.0, 3.0])
+    assert df['Quantity'].tolist() == [10, 10, 15, 0, 2, 7, 3]
+
+
+def test_signed_movements_follow_operation_and_splits():
+    df = _feuil1([
+        ['2024-01-02', 'AAPL', 'CTO', 'Achat', 10, 1000.0, 0.0],
+        ['2024-02-01', 'AAPL', 'CTO', 'Vente', 10, 1200.0, 0.0],
+        ['2024-03-01', 'AAPL', 'CTO', 'Split', 2, 0.0, 0.0],
+        ['2024-04-01', 'AAPL', 'CTO', 'Achat', 5, 300.0, 0.0],
+    ])
+    movements = signed_movements(df)
+
+    # Quantités en actions d'aujourd'hui : les mouvements antérieurs au split sont doublés
+    assert movements['Quantity'].tolist() == pytest.approx([20.0, -20.0, 0.0, 5.0])
+    assert movements['Quantity'].sum() == pytest.approx(5.0)
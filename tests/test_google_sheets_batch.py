@@ -0,0 +1,52 @@
+# tests/test_google_sheets_batch.py
+"""
+Écriture groupée du portfolio (batchUpdate) vers le faux backend Google Sheets
+"""
+
+import numpy as np
+import pandas as pd
+
+from modules.google_sheets_fake_backend import FakeGoogleSheetsBackend, build_fake_services
+from modules.google_sheets_oauth_manager import TLBGoogleSheetsOAuthManager
+
+
+def _portfolio_with_missing_dates():
+    df_data = pd.DataFrame({
+        "Date": pd.to_datetime(["2024-01-15", None]),
+        "Ticker": ["AAPL", "MC.PA"],
+        "Quantity": [10, np.nan]
+    })
+    df_dividendes = pd.DataFrame({
+        "Date paiement": [pd.NaT, pd.Timestamp("2024-06-01 10:30:00")],
+        "Ticker": ["AAPL", "MC.PA"],
+        "Montant net (€)": [12.5, 30.0]
+    })
+    return {'df_data': df_data, 'df_dividendes': df_dividendes}
+
+
+def test_cell_data_skips_missing_values():
+    for missing in (None, np.nan, pd.NaT, np.datetime64('NaT'), pd.NA):
+        assert TLBGoogleSheetsOAuthManager._cell_data(missing) == {}
+
+
+def test_cell_data_formats_dates():
+    assert TLBGoogleSheetsOAuthManager._cell_data(pd.Timestamp("2024-01-15")) == \
+        {'userEnteredValue': {'stringValue': '2024-01-15'}}
+    assert TLBGoogleSheetsOAuthManager._cell_data(pd.Timestamp("2024-06-01 10:30:00")) == \
+        {'userEnteredValue': {'stringValue': '2024-06-01 10:30:00'}}
+
+
+def test_commit_portfolio_batch_with_nat():
+    backend = FakeGoogleSheetsBackend()
+    sheet_id = backend.create_spreadsheet("TLB Test")
+    gc, _ = build_fake_services(backend)
+
+    written = TLBGoogleSheetsOAuthManager.commit_portfolio_batch(gc, sheet_id, _portfolio_with_missing_dates())
+
+    assert written == ['Feuil1', 'Feuil4']
+    feuil1 = backend.get_values(sheet_id, 'Feuil1')
+    assert feuil1[1][:2] == ['2024-01-15', 'AAPL']
+    assert feuil1[2][0] in ("", None) and feuil1[2][1] == 'MC.PA'
+    feuil4 = backend.get_values(sheet_id, 'Feuil4')
+    assert feuil4[1][0] in ("", None) and feuil4[1][1] == 'AAPL'
+    assert feuil4[2][0] == '2024-06-01 10:30:00'
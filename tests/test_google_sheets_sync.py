@@ -0,0 +1,124 @@
+# tests/test_google_sheets_sync.py
+"""
+Synchronisation incrémentale local <-> Google Sheets sur le faux backend
+"""
+
+import pandas as pd
+import pytest
+
+from modules.google_sheets_fake_backend import FakeGoogleSheetsBackend, build_fake_services
+from modules.google_sheets_sync import TLBSheetsSyncEngine, canonical_value
+
+
+def _portfolio():
+    return {
+        'df_data': pd.DataFrame({
+            "Date": ["2025-03-05", "2025-04-10"],
+            "Compte": ["PEA", "CTO"],
+            "Ticker": ["MC.PA", "AAPL"],
+            "Quantity": [2, 5],
+            "Purchase price": [700.0, 180.0],
+            "Units": ["EUR", "USD"]
+        }),
+        'df_events': pd.DataFrame({"Date": ["2025-01-01"], "Event": ["Revue annuelle"]})
+    }
+
+
+@pytest.fixture
+def sheets(tmp_path):
+    backend = FakeGoogleSheetsBackend()
+    portfolio = _portfolio()
+    sheet_id = backend.load_portfolio("TLB Test", portfolio)
+    gc, drive_service = build_fake_services(backend)
+    engine = TLBSheetsSyncEngine(gc, drive_service, sheet_id, directory=str(tmp_path))
+    assert engine.sync(portfolio)['status'] in ('full_push', 'synced')
+    return backend, sheet_id, engine, portfolio
+
+
+@pytest.mark.parametrize("value", ["05/03/2025", "2025-03-05", 45721, pd.Timestamp("2025-03-05")])
+def test_canonical_dates_are_day_first_and_serial_aware(value):
+    assert canonical_value(value, is_date=True) == "2025-03-05"
+
+
+def test_column_change_with_remote_edit_is_reported(sheets):
+    backend, sheet_id, engine, portfolio = sheets
+    gc, _ = build_fake_services(backend)
+    gc.open_by_key(sheet_id).worksheet("Feuil1").update_acell("D2", 3)
+
+    local = {name: df.copy() for name, df in portfolio.items()}
+    local['df_data']["Frais"] = 1.0
+    result = engine.sync(local)
+
+    assert result['status'] == 'conflict'
+    assert [conflict['sheet'] for conflict in result['conflicts']] == ['Feuil1']
+    assert backend.get_values(sheet_id, 'Feuil1')[1][3] in (3, "3")
+    assert "Frais" not in backend.get_values(sheet_id, 'Feuil1')[0]
+
+
+def test_column_change_without_remote_edit_is_pushed(sheets):
+    backend, sheet_id, engine, portfolio = sheets
+    local = {name: df.copy() for name, df in portfolio.items()}
+    local['df_data']["Frais"] = 1.0
+
+    assert engine.sync(local)['status'] == 'full_push'
+    assert backend.get_values(sheet_id, 'Feuil1')[0][-1] == "Frais"
+
+
+# === FLUX COMPLET : CHARGEMENT -> MODIFICATION -> SYNCHRONISATION -> CONFLIT ===
+
+@pytest.fixture
+def loaded(tmp_path):
+    from modules.google_sheets_fake_backend import attach_fake_backend
+    from modules.google_sheets_oauth_manager import TLBGoogleSheetsOAuthManager
+
+    backend = FakeGoogleSheetsBackend()
+    sheet_id = backend.load_portfolio("TLB Test", _portfolio())
+    manager = attach_fake_backend(TLBGoogleSheetsOAuthManager(), backend)
+    success, portfolio = manager.load_portfolio_data(sheet_id, force_refresh=True)
+    assert success
+
+    gc, drive_service = build_fake_services(backend)
+    engine = TLBSheetsSyncEngine(gc, drive_service, sheet_id, directory=str(tmp_path))
+    # Feuil2 à Feuil4 absentes du Sheet : créées par une réécriture complète
+    assert engine.sync(portfolio)['status'] == 'full_push'
+    return backend, sheet_id, engine, portfolio
+
+
+def test_load_maps_dataframes_to_sheets(loaded):
+    backend, sheet_id, _, portfolio = loaded
+    assert backend.get_values(sheet_id, 'Feuil1')[0] == list(_portfolio()['df_data'].columns)
+    assert backend.get_values(sheet_id, 'Feuil5')[1] == ["2025-01-01", "Revue annuelle"]
+    assert list(portfolio['df_data']['Ticker']) == ["MC.PA", "AAPL"]
+
+
+def test_unchanged_portfolio_is_up_to_date(loaded):
+    _, _, engine, portfolio = loaded
+    assert engine.sync(portfolio)['status'] == 'up_to_date'
+
+
+def test_local_edit_is_pushed_as_delta(loaded):
+    backend, sheet_id, engine, portfolio = loaded
+    local = {name: df.copy() for name, df in portfolio.items()}
+    local['df_data'].loc[local['df_data']['Ticker'] == "AAPL", "Quantity"] = 8
+
+    result = engine.sync(local)
+
+    assert (result['status'], result['pushed'], result['conflicts']) == ('synced', 1, [])
+    assert backend.get_values(sheet_id, 'Feuil1')[2][3] in (8, "8")
+
+
+def test_concurrent_edits_report_a_conflict(loaded):
+    backend, sheet_id, engine, portfolio = loaded
+    gc, _ = build_fake_services(backend)
+    gc.open_by_key(sheet_id).worksheet("Feuil1").update_acell("D3", 6)
+
+    local = {name: df.copy() for name, df in portfolio.items()}
+    local['df_data'].loc[local['df_data']['Ticker'] == "AAPL", "Quantity"] = 8
+    result = engine.sync(local)
+
+    assert result['status'] == 'synced'
+    assert len(result['conflicts']) == 1
+    conflict = result['conflicts'][0]
+    assert (conflict['sheet'], conflict['kept']) == ('Feuil1', 'remote')
+    assert backend.get_values(sheet_id, 'Feuil1')[2][3] in (6, "6")
+    assert result['merged']['Feuil1']['rows'][1][3] == "6"
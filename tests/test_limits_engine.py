@@ -0,0 +1,113 @@
+# tests/test_limits_engine.py
+"""
+Règles compilées de Feuil2 : mêmes seuils et montants que les calculs historiques de l'onglet Déséquilibres
+"""
+
+import pandas as pd
+import pytest
+
+from modules.limits_engine import compile_limits, evaluate_limits, scope_view
+
+ETF_LIMIT_CATEGORIES = ['S&P500', 'Euro STOXX50', 'NASDAQ 100']
+
+
+def _portfolio():
+    return pd.DataFrame({
+        'Type': ['Actions', 'Actions', 'Actions', 'Actions', 'ETF', 'ETF', 'ETF'],
+        'Secteur': ['Technologie', 'Technologie', 'Santé', 'Énergie', 'Monde', 'Monde', 'Monde'],
+        'Category': ['Logiciel', 'Logiciel', 'Pharma', 'Pétrole', 'S&P500', 'NASDAQ 100', 'Euro STOXX50'],
+        'Entreprise': ['Apple', 'Apple', 'Sanofi', 'TotalEnergies', 'Amundi', 'Invesco', 'iShares'],
+        'Current value': [9000.0, 6000.0, 4000.0, 1000.0, 12000.0, 6000.0, 2000.0]
+    })
+
+
+def _limits():
+    return pd.DataFrame({
+        'Variable1': ['Type', 'Type', 'Secteur', 'Secteur', 'Category', 'Category', 'Category'],
+        'Variable2': ['Actions', 'ETF', 'Technologie', 'Santé', 'S&P500', 'NASDAQ 100', 'Euro STOXX50'],
+        'Valeur seuils': [70.0, 30.0, 40.0, 30.0, 50.0, 25.0, 25.0]
+    })
+
+
+def _legacy_checks(df, limits):
+    """Seuils de l'ancien onglet : entreprise > 10 % du total, catégorie d'ETF > seuil, Type à ± 15 / 25 points"""
+    limits = limits.rename(columns={'Valeur seuils': 'Seuil'})
+    total = df['Current value'].sum()
+    actions = df[df['Type'] == 'Actions']
+    etf = df[df['Type'] == 'ETF']
+
+    companies = actions.groupby('Entreprise')['Current value'].sum() / total * 100
+    overweight = {name: (pct, (pct - 10) / 100 * total) for name, pct in companies.items() if pct > 10}
+
+    etf_shares = etf.groupby('Category')['Current value'].sum() / etf['Current value'].sum() * 100
+    etf_limits = limits.query("Variable1=='Category' and Variable2 in @ETF_LIMIT_CATEGORIES")
+    etf_over = {row.Variable2: (etf_shares[row.Variable2] - row.Seuil) / 100 * etf['Current value'].sum()
+                for row in etf_limits.itertuples() if etf_shares.get(row.Variable2, 0) > row.Seuil}
+
+    type_shares = df.groupby('Type')['Current value'].sum() / total * 100
+    type_alerts = {}
+    for row in limits.query("Variable1=='Type'").itertuples():
+        gap = type_shares.get(row.Variable2, 0.0) - row.Seuil
+        if abs(gap) > 15:
+            type_alerts[row.Variable2] = ('attention' if abs(gap) < 25 else 'critique', gap / 100 * total)
+
+    sector_shares = actions.groupby('Secteur')['Current value'].sum() / actions['Current value'].sum() * 100
+    return overweight, etf_over, type_alerts, sector_shares
+
+
+def test_compile_limits_types_each_feuil2_row():
+    rules = compile_limits(_limits()).set_index(['Portée', 'Groupe'])
+
+    assert rules.loc[('Type', 'Actions'), ['Base', 'Nature']].tolist() == ['Total', 'objectif']
+    assert rules.loc[('Secteur', 'Santé'), ['Base', 'Nature']].tolist() == ['Actions', 'objectif']
+    assert rules.loc[('Category', 'S&P500'), ['Base', 'Nature']].tolist() == ['ETF', 'plafond']
+    assert rules.loc[('Entreprise', '*'), ['Base', 'Nature', 'Objectif']].tolist() == ['Total', 'plafond', 10.0]
+
+
+@pytest.mark.parametrize("limits", [None, pd.DataFrame()])
+def test_missing_feuil2_keeps_only_the_company_cap(limits):
+    rules = compile_limits(limits)
+    assert rules[['Portée', 'Groupe']].values.tolist() == [['Entreprise', '*']]
+
+
+def test_evaluation_matches_legacy_thresholds():
+    df, limits = _portfolio(), _limits()
+    overweight, etf_over, type_alerts, sector_shares = _legacy_checks(df, limits)
+    result = evaluate_limits(df, compile_limits(limits))
+
+    companies = scope_view(result, 'Entreprise')
+    breached = companies[companies['Dépassement']].set_index('Groupe')
+    assert sorted(breached.index) == sorted(overweight)
+    for name, (pct, excess) in overweight.items():
+        assert breached.loc[name, 'Part (%)'] == pytest.approx(pct)
+        assert -breached.loc[name, 'Montant (€)'] == pytest.approx(excess)
+
+    etf_caps = scope_view(result, 'Category', base='ETF')
+    breached = etf_caps[etf_caps['Dépassement']].set_index('Groupe')
+    assert sorted(breached.index) == sorted(etf_over)
+    for category, excess in etf_over.items():
+        assert -breached.loc[category, 'Montant (€)'] == pytest.approx(excess)
+
+    types = scope_view(result, 'Type').set_index('Groupe')
+    alerted = types[types['Dépassement']]
+    assert sorted(alerted.index) == sorted(type_alerts)
+    for type_, (level, gap_eur) in type_alerts.items():
+        assert alerted.loc[type_, 'Niveau'] == level
+        assert -alerted.loc[type_, 'Montant (€)'] == pytest.approx(gap_eur)
+
+    sectors = scope_view(result, 'Secteur').set_index('Groupe')
+    for sector, share in sector_shares.reindex(sectors.index, fill_value=0.0).items():
+        assert sectors.loc[sector, 'Part (%)'] == pytest.approx(share)
+
+
+@pytest.mark.parametrize("actions_value, level", [(7_000.0, 'équilibré'), (12_000.0, 'écart'),
+                                                  (27_000.0, 'attention'), (97_000.0, 'critique')])
+def test_type_gap_levels_follow_legacy_bands(actions_value, level):
+    df = pd.DataFrame({'Type': ['Actions', 'ETF'], 'Secteur': ['Technologie', 'Monde'],
+                       'Category': ['Logiciel', 'S&P500'], 'Entreprise': ['A', 'B'],
+                       'Current value': [actions_value, 3_000.0]})
+    limits = pd.DataFrame({'Variable1': ['Type'], 'Variable2': ['Actions'], 'Valeur seuils': [70.0]})
+    types = scope_view(evaluate_limits(df, compile_limits(limits)), 'Type').set_index('Groupe')
+
+    assert types.loc['Actions', 'Niveau'] == level
+    assert types.loc['Actions', 'Dépassement'] == (abs(types.loc['Actions', 'Écart (%)']) > 15)
@@ -0,0 +1,59 @@
+# tests/test_montecarlo_engine.py
+"""
+Projection Monte-Carlo : forme fermée des trajectoires, reproductibilité et rendements mensuels
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.montecarlo_engine import (
+    _legacy_paths, fan_grid, monthly_log_returns, portfolio_daily_returns, run_projection, simulate_chunk,
+    synthetic_monthly_logs
+)
+
+
+def test_chunk_matches_month_by_month_loop():
+    monthly_logs = synthetic_monthly_logs(n_days=600)
+    seed = np.random.SeedSequence(7).spawn(1)[0]
+    indices = np.random.default_rng(seed).integers(0, len(monthly_logs), (50, 36))
+    chunk = simulate_chunk(monthly_logs, 10_000.0, 36, 50, 200.0, 0.03, True, 'bootstrap', seed, fan_grid(36))
+
+    legacy = _legacy_paths(monthly_logs, indices, 10_000.0, 200.0, 0.03)
+    np.testing.assert_allclose(chunk['values'][:, -1], legacy, rtol=1e-5)
+
+
+def test_constant_returns_give_deterministic_fan():
+    monthly_logs = np.full(10, np.log(1.01))
+    result = run_projection(monthly_logs, 1_000.0, 12, 200, contribution=100.0, use_processes=False)
+
+    expected = 1_000.0 * 1.01 ** 12 + 100.0 * (1.01 ** 12 - 1) / 0.01
+    assert result['final']['P5'] == pytest.approx(expected, rel=1e-5)
+    assert result['final']['P95'] == pytest.approx(expected, rel=1e-5)
+    assert result['final']['Versements cumulés'] == pytest.approx(2_200.0)
+    assert result['final']['Probabilité de perte (%)'] == 0.0
+
+
+def test_projection_is_reproducible_for_a_seed():
+    monthly_logs = synthetic_monthly_logs(n_days=600)
+    first = run_projection(monthly_logs, 5_000.0, 24, 1_000, seed=3, use_processes=False)
+    second = run_projection(monthly_logs, 5_000.0, 24, 1_000, seed=3, use_processes=False)
+
+    pd.testing.assert_frame_equal(first['fan'], second['fan'])
+    assert first['paths'] == 1_000
+
+
+def test_monthly_log_returns_are_sliding_sums():
+    daily = np.array([0.01, -0.02, 0.03, 0.0])
+    logs = monthly_log_returns(daily, window=2)
+
+    np.testing.assert_allclose(logs, np.log1p(daily[:-1]) + np.log1p(daily[1:]))
+    assert monthly_log_returns(daily, window=5).size == 0
+
+
+def test_portfolio_returns_renormalize_weights_before_listing():
+    days = pd.date_range('2024-01-01', periods=3, freq='B')
+    prices = pd.DataFrame({'A': [100.0, 110.0, 121.0], 'B': [np.nan, 50.0, 45.0]}, index=days)
+    returns = portfolio_daily_returns(prices, pd.Series({'A': 0.5, 'B': 0.5}))
+
+    np.testing.assert_allclose(returns, [0.10, 0.5 * 0.10 + 0.5 * -0.10], atol=1e-12)
@@ -0,0 +1,75 @@
+# tests/test_rebalancing_engine.py
+"""
+Rééquilibrage sous contraintes : plafond par entreprise toutes lignes confondues, limites de Feuil2
+"""
+
+import pandas as pd
+import pytest
+
+from modules.rebalancing_engine import build_positions, rebalance_portfolio, solve_rebalancing
+
+
+def _portfolio():
+    return pd.DataFrame({
+        'Type': ['Actions', 'Actions', 'Actions', 'Actions', 'ETF', 'ETF'],
+        'Secteur': ['Technologie', 'Technologie', 'Santé', 'Santé', 'Monde', 'Monde'],
+        'Category': ['Logiciel', 'Matériel', 'Pharma', 'Pharma', 'S&P500', 'Euro STOXX50'],
+        'Entreprise': ['Apple', 'Apple', 'Sanofi', 'Novartis', 'Amundi', 'iShares'],
+        'Current value': [1_000.0, 800.0, 500.0, 500.0, 4_000.0, 3_200.0]
+    })
+
+
+def _final_values(positions, result):
+    trades = result['trades'].set_index(['Type', 'Secteur', 'Category', 'Entreprise'])
+    final = positions.set_index(['Type', 'Secteur', 'Category', 'Entreprise'])['Valeur']
+    net = (trades['Achat (€)'] - trades['Vente (€)']).reindex(final.index, fill_value=0.0)
+    return (final + net).reset_index(name='Valeur')
+
+
+def test_company_cap_spans_all_lines_of_the_company():
+    positions = build_positions(_portfolio())
+    result = solve_rebalancing(positions, [], cash=0.0, company_cap=0.10)
+    final = _final_values(positions, result)
+    total = final['Valeur'].sum()
+
+    # Apple : 1 800 € sur deux lignes (18 %) → ramenée à 10 % au total, chaque ligne restant sous le plafond
+    apple = final[final['Entreprise'] == 'Apple']['Valeur'].sum()
+    assert result['status'] == 'optimal'
+    assert apple == pytest.approx(0.10 * total, abs=1.0)
+    assert result['total_sell'] == pytest.approx(800.0, abs=1.0)
+    assert not result['violations']
+
+
+def test_company_cap_accounts_for_cash_in_the_final_total():
+    positions = build_positions(_portfolio())
+    result = solve_rebalancing(positions, [], cash=2_000.0, company_cap=0.10)
+    final = _final_values(positions, result)
+
+    by_company = final[final['Type'] == 'Actions'].groupby('Entreprise')['Valeur'].sum()
+    assert final['Valeur'].sum() == pytest.approx(12_000.0)
+    assert (by_company <= 0.10 * 12_000.0 + 1.0).all()
+    assert result['total_buy'] - result['total_sell'] == pytest.approx(2_000.0, abs=1.0)
+
+
+def test_type_targets_are_met_within_tolerance():
+    limits = pd.DataFrame({'Variable1': ['Type', 'Type'], 'Variable2': ['Actions', 'ETF'],
+                           'Valeur seuils': [30.0, 70.0]})
+    result = rebalance_portfolio(_portfolio(), limits, cash=0.0)
+    final = _final_values(build_positions(_portfolio()), result)
+
+    actions_share = final.loc[final['Type'] == 'Actions', 'Valeur'].sum() / final['Valeur'].sum() * 100
+    assert result['status'] == 'optimal'
+    assert 25.0 - 1e-6 <= actions_share <= 35.0 + 1e-6
+    assert not result['violations']
+
+
+def test_unreachable_company_cap_is_reported_as_violation():
+    df = _portfolio()[lambda frame: frame['Type'] == 'Actions']
+    df = df[df['Entreprise'] != 'Novartis']
+    result = solve_rebalancing(build_positions(df), [], cash=0.0, company_cap=0.10)
+
+    # Deux entreprises seulement, sans ETF : 10 % chacune est intenable, les écarts sont signalés
+    assert result['status'] == 'optimal'
+    assert sorted((v['scope'], str(v['label'])) for v in result['violations']) == \
+        [('Entreprise', 'Apple'), ('Entreprise', 'Sanofi')]
+    assert result['trades'].empty
@@ -0,0 +1,61 @@
+# tests/test_returns_engine.py
+"""
+XIRR vectorisé, apports nets et indice TWR du moteur de rendements
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from modules.cost_basis_engine import normalize_ledger  # noqa: E402
+from modules.returns_engine import fx_matrix, net_flows, twr_index, xirr_vectorized  # noqa: E402
+
+
+def test_xirr_recovers_known_ten_percent_rate():
+    amounts = np.array([
+        [-1_000.0, 1_100.0, 0.0],
+        [-1_000.0, 0.0, 1_210.0],
+        [-1_000.0, -1_000.0, 2_310.0],
+    ])
+    years = np.tile([0.0, 1.0, 2.0], (3, 1))
+
+    np.testing.assert_allclose(xirr_vectorized(amounts, years), [0.10, 0.10, 0.10], atol=1e-8)
+
+
+def test_xirr_is_nan_without_sign_change():
+    amounts = np.array([[-1_000.0, -500.0], [-1_000.0, 1_050.0]])
+    years = np.array([[0.0, 0.5], [0.0, 0.5]])
+    rates = xirr_vectorized(amounts, years)
+
+    assert np.isnan(rates[0])
+    assert rates[1] == pytest.approx(1.05 ** 2 - 1)
+
+
+def test_net_flows_convert_at_the_rate_of_the_day():
+    df = pd.DataFrame({
+        'Date': ['2024-01-01', '2024-01-02', '2024-01-03'],
+        'Ticker': ['AAPL', 'AAPL', 'MC.PA'],
+        'Compte': ['CTO', 'CTO', 'PEA'],
+        'Opération': ['Achat', 'Vente', 'Frais'],
+        'Quantity': [10, 4, 0],
+        'Purchase value': [1_000.0, 600.0, 5.0],
+        'Units': ['USD', 'USD', 'EUR']
+    })
+    days = pd.date_range('2024-01-01', periods=3, freq='D')
+    rates = pd.DataFrame({'Devise': ['USD', 'USD'], 'Date': days[:2], 'Taux': [1.25, 1.20]})
+    flows = net_flows(normalize_ledger(df), fx_matrix(rates, ['EUR', 'USD'], days), days)
+
+    assert flows['CTO'].tolist() == pytest.approx([800.0, -500.0, 0.0])
+    assert flows['PEA'].tolist() == pytest.approx([0.0, 0.0, 5.0])
+
+
+def test_twr_ignores_contributions():
+    values = pd.DataFrame({'CTO': [1_000.0, 1_100.0, 2_200.0]})
+    flows = pd.DataFrame({'CTO': [1_000.0, 0.0, 1_000.0]})
+    dividends = pd.DataFrame({'CTO': [0.0, 0.0, 0.0]})
+    index = twr_index(values, flows, dividends)
+
+    # +10 % puis +9,09 % hors versement du troisième jour
+    assert index['CTO'].tolist() == pytest.approx([1.0, 1.1, 1.2])
@@ -0,0 +1,50 @@
+# tests/test_risk_engine.py
+"""
+Modèle de risque incrémental : mise à jour d'un jour et référence pandas titre par titre
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+
+from modules.risk_engine import RiskModel, _legacy_risk, synthetic_risk_dataset  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    return synthetic_risk_dataset(n_tickers=30, n_days=400)
+
+
+def _assert_matches_legacy(metrics, legacy):
+    np.testing.assert_allclose(metrics['correlation'], legacy['correlation'], equal_nan=True, atol=1e-8)
+    np.testing.assert_allclose(metrics['holding_volatility'], legacy['holding_volatility'], equal_nan=True)
+    assert metrics['max_drawdown'] == pytest.approx(legacy['max_drawdown'])
+    np.testing.assert_allclose(metrics['series']['Volatilité glissante (%)'], legacy['rolling_volatility'],
+                               equal_nan=True)
+
+
+def test_model_matches_pandas_reference(dataset):
+    prices, quantities, benchmark = dataset
+    _assert_matches_legacy(RiskModel(prices, quantities, benchmark).metrics(),
+                           _legacy_risk(prices, quantities, benchmark))
+
+
+def test_update_equals_rebuild(dataset):
+    prices, quantities, benchmark = dataset
+    model = RiskModel(prices.iloc[:-1], quantities, benchmark.iloc[:-1])
+
+    assert model.update(prices.index[-1], prices.iloc[-1], benchmark.iloc[-1])
+    assert not model.update(prices.index[-1], prices.iloc[-1], benchmark.iloc[-1])
+    _assert_matches_legacy(model.metrics(), _legacy_risk(prices, quantities, benchmark))
+
+
+def test_beta_of_the_benchmark_itself_is_one():
+    days = pd.bdate_range('2024-01-01', periods=120)
+    rng = np.random.default_rng(0)
+    index = pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(days)))), index=days)
+    metrics = RiskModel(index.to_frame('IDX'), pd.Series({'IDX': 3.0}), index).metrics()
+
+    assert metrics['beta'] == pytest.approx(1.0)
+    assert metrics['value'] == pytest.approx(3.0 * index.iloc[-1])
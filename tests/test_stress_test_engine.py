@@ -0,0 +1,67 @@
+# tests/test_stress_test_engine.py
+"""
+Stress tests matriciels : composition des chocs et dépassements de limites par scénario
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.limits_engine import compile_limits, limits_matrix
+from modules.stress_test_engine import (
+    SHOCK_COLUMNS, _legacy_stress, encode_positions, generate_grid, preset_shocks, run_stress_tests,
+    shock_multipliers, synthetic_portfolio
+)
+
+
+def _encoded():
+    return encode_positions(pd.DataFrame({
+        'Type': ['Actions', 'Actions', 'ETF'],
+        'Secteur': ['Cyclique', 'Défensif', 'ETF'],
+        'Category': ['Technologie', 'Santé', 'S&P500'],
+        'Entreprise': ['Apple', 'Sanofi', 'Amundi'],
+        'Ticker': ['AAPL', 'SAN.PA', 'CW8.PA'],
+        'Units': ['USD', 'EUR', 'EUR'],
+        'Current value': [1_000.0, 1_000.0, 2_000.0]
+    }))
+
+
+def test_shocks_of_a_scenario_compound():
+    shocks = pd.DataFrame([
+        ['Krach', 'Portefeuille', '*', -10.0],
+        ['Krach', 'Type', 'Actions', -10.0],
+        ['Faillite', 'Ticker', 'AAPL', -100.0],
+        ['Dollar', 'Devise', 'USD', 10.0],
+        ['Inconnu', 'Category', 'Absente', -50.0],
+    ], columns=SHOCK_COLUMNS)
+    names, multipliers = shock_multipliers(_encoded(), shocks)
+
+    assert names == ['Krach', 'Faillite', 'Dollar', 'Inconnu']
+    np.testing.assert_allclose(multipliers, [
+        [0.81, 0.81, 0.9],
+        [0.0, 1.0, 1.0],
+        [1.1, 1.0, 1.0],
+        [1.0, 1.0, 1.0],
+    ])
+
+
+def test_grid_covers_every_group_ticker_and_foreign_currency():
+    grid = generate_grid(_encoded(), moves=(-20.0,), crash=-50.0, fx_moves=(10.0,))
+
+    assert set(grid.loc[grid['Portée'] == 'Ticker', 'Groupe']) == {'AAPL', 'SAN.PA', 'CW8.PA'}
+    assert grid.loc[grid['Portée'] == 'Devise', 'Groupe'].tolist() == ['USD']
+    assert grid['Scénario'].is_unique
+
+
+def test_breaches_match_scenario_by_scenario_reference():
+    df, limits = synthetic_portfolio(60)
+    rules = compile_limits(limits)
+    encoded = encode_positions(df)
+    matrix = limits_matrix(encoded['positions'], rules)
+    shocks = pd.concat([preset_shocks(), generate_grid(encoded)], ignore_index=True)
+    result = run_stress_tests(encoded, matrix, shocks)
+
+    sample = shocks[shocks['Scénario'].isin(result['scenarios'][:25])]
+    legacy = _legacy_stress(encoded['positions'], rules, sample)
+    assert result['summary']['Dépassements'].iloc[:25].tolist() == legacy
+    assert result['summary']['Valeur avant'].iloc[0] == pytest.approx(df['Current value'].sum())